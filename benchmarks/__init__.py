@@ -0,0 +1 @@
+"""Benchmarks of the data hub against local stand-ins of its dependencies."""
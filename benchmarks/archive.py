@@ -0,0 +1,201 @@
+"""Analytical scans on the Parquet archive against the database.
+
+Fills a temporary SQLite database (``STORAGE_BACKEND=sqlite``) with
+``--days`` of 5-minute readings for ``--inverters`` inverters, exports it with
+the archive (initial and incremental runs) and times the same daily energy
+aggregation four ways: with SQL on the database, reading the full table
+into pandas, reading only the needed columns of the Parquet archive and with
+the DuckDB ``daily-yield`` report over the archive (plus the database tail).
+
+Usage:
+    python -m benchmarks.archive --days 365 --inverters 4
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+from benchmarks.ingestion import RESULTS_DIR, git_revision
+
+DAILY_ENERGY_SQL = """SELECT inverter_id, fecha, MAX(yieldtoday) AS energy
+    FROM solaxcloud.tb_energy_data GROUP BY inverter_id, fecha"""
+
+
+def energy_rows(days: int, inverters: int, start: date):
+    """tb_energy_data rows, one every 5 minutes per inverter."""
+    for day in range(days):
+        fecha = start + timedelta(days=day)
+        for minute in range(0, 24 * 60, 5):
+            periodo, minuto = divmod(minute, 60)
+            upload = datetime.combine(fecha, datetime.min.time()) + timedelta(
+                minutes=minute
+            )
+            for inverter_id in range(1, inverters + 1):
+                yield {
+                    "fecha": fecha,
+                    "periodo": periodo,
+                    "min": minuto,
+                    "inverter_id": inverter_id,
+                    "acpower": float(minute % 5000),
+                    "yieldtoday": minute / 60.0,
+                    "yieldtotal": 8000.0 + day * 24 + minute / 60.0,
+                    "feedinpower": 0.0,
+                    "feedinenergy": 0.0,
+                    "consumeenergy": 0.0,
+                    "uploadTime": upload,
+                }
+
+
+def best_of(function, repeat: int) -> float:
+    """Best duration of ``repeat`` calls in milliseconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000.0
+
+
+def _duckdb_report(engine_class, start: date, end: date, inverter_id=None):
+    """Daily yield report, including the session setup and the database tail."""
+    with engine_class() as engine:
+        return engine.report("daily-yield", start, end, inverter_id)
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Run the benchmark and store the report."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--inverters", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args(argv)
+
+    workdir = Path(tempfile.mkdtemp(prefix="solarxdatahub-archive-"))
+    os.environ.update(
+        {
+            "STORAGE_BACKEND": "sqlite",
+            "SQLITE_DIR": str(workdir / "sqlite"),
+            "STATE_DIR": str(workdir / "state"),
+            "ARCHIVE_DIR": str(workdir / "archive"),
+        }
+    )
+    # pylint: disable=import-outside-toplevel
+    from loguru import logger
+
+    from solarxdatahub.analytics.archive import read_archive, run_archive
+    from solarxdatahub.analytics.query import ArchiveQuery
+    from solarxdatahub.database.sqlite_database import SQLiteDatabase
+    from solarxdatahub.database.writting import insert_tb_energy_data
+
+    logger.remove()
+    database = SQLiteDatabase(str(workdir / "sqlite"))
+    database.connect()
+    start = date.today() - timedelta(days=args.days)
+    rows = list(energy_rows(args.days, args.inverters, start))
+    database.write(insert_tb_energy_data(), rows[: len(rows) - 288 * args.inverters])
+
+    started = time.perf_counter()
+    exported = run_archive()
+    initial_s = time.perf_counter() - started
+
+    # Último día: filas nuevas más una lectura corregida del día anterior
+    tail = rows[len(rows) - 288 * args.inverters - 1 :]
+    tail[0] = dict(tail[0], acpower=-1.0)
+    time.sleep(1)
+    database.write(insert_tb_energy_data(), tail)
+    started = time.perf_counter()
+    incremental = run_archive()
+    incremental_s = time.perf_counter() - started
+
+    archived = read_archive("solaxcloud.tb_energy_data")
+    assert len(archived) == len(rows), (len(archived), len(rows))
+    assert (archived["acpower"] == -1.0).sum() == 1
+
+    # Filas sin archivar: la consulta las lee de la base de datos
+    database.write(
+        insert_tb_energy_data(), [dict(rows[-1], acpower=-2.0, yieldtoday=99.0)]
+    )
+    end = start + timedelta(days=args.days - 1)
+    with ArchiveQuery() as engine:
+        daily = engine.report("daily-yield", start, end)
+        assert len(daily) == args.days * args.inverters, len(daily)
+        assert daily["yield_kwh"].max() == 99.0
+        # La cola se vuelve a leer con el periodo y el inversor de cada informe
+        inverter_id = int(rows[-1]["inverter_id"])
+        last_day = engine.report("daily-yield", end, end, inverter_id)
+        assert last_day["yield_kwh"].tolist() == [99.0], last_day
+        earlier = engine.report("daily-yield", start, end - timedelta(days=1))
+        assert earlier["yield_kwh"].max() != 99.0
+        assert engine.sql("SELECT MAX(yieldtoday) AS y FROM energy")["y"][0] == 99.0
+
+    def pandas_daily(frame):
+        return frame.groupby(["inverter_id", "fecha"])["yieldtoday"].max()
+
+    timings = {
+        "sql_aggregate_ms": best_of(
+            lambda: database.read(DAILY_ENERGY_SQL), args.repeat
+        ),
+        "db_full_scan_pandas_ms": best_of(
+            lambda: pandas_daily(
+                database.read("SELECT * FROM solaxcloud.tb_energy_data", as_df=True)
+            ),
+            args.repeat,
+        ),
+        "parquet_columns_pandas_ms": best_of(
+            lambda: pandas_daily(
+                read_archive(
+                    "solaxcloud.tb_energy_data",
+                    columns=["inverter_id", "fecha", "yieldtoday"],
+                )
+            ),
+            args.repeat,
+        ),
+    }
+    timings["duckdb_daily_yield_ms"] = best_of(
+        lambda: _duckdb_report(ArchiveQuery, start, end), args.repeat
+    )
+    timings["duckdb_daily_yield_inverter_ms"] = best_of(
+        lambda: _duckdb_report(ArchiveQuery, start, end, inverter_id=1), args.repeat
+    )
+    database.disconnect()
+
+    sqlite_bytes = sum(path.stat().st_size for path in (workdir / "sqlite").glob("*"))
+    archive_bytes = sum(
+        path.stat().st_size for path in (workdir / "archive").rglob("*.parquet")
+    )
+    report = {
+        "benchmark": "archive",
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "git": git_revision(),
+        "parameters": {"days": args.days, "inverters": args.inverters},
+        "rows": len(rows),
+        "export": {
+            "initial_rows": exported["solaxcloud.tb_energy_data"],
+            "initial_s": round(initial_s, 3),
+            "incremental_rows": incremental["solaxcloud.tb_energy_data"],
+            "incremental_s": round(incremental_s, 3),
+        },
+        "size": {"sqlite_mb": sqlite_bytes / 1e6, "parquet_mb": archive_bytes / 1e6},
+        "scans": {key: round(value, 3) for key, value in timings.items()},
+    }
+
+    output = args.output
+    if output is None:
+        stamp = datetime.now().strftime("%Y%m%dT%H%M%S")
+        output = RESULTS_DIR / f"archive-{report['git']['commit'][:10]}-{stamp}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+    print(json.dumps(report["export"]), json.dumps(report["size"]))
+    for key, value in report["scans"].items():
+        print(f"{key:<28} {value:>10} ms")
+    print(f"Report written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""Bulk upserts through a staging table against ``executemany`` upserts.
+
+Loads ``--rows`` Weatherbit hourly rows (the widest upsert, 41 columns) into a
+temporary SQLite database (``STORAGE_BACKEND=sqlite``) twice per path: into
+the empty table (inserts) and again with every row changed (a replay, all
+updates). The ``executemany`` path holds the lock of the target for the whole
+write; the bulk path only for the merge. Reports rows per second and lock
+time, and checks that both paths leave the same rows.
+
+Usage:
+    python -m benchmarks.bulk_load --rows 100000
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from benchmarks.ingestion import RESULTS_DIR, git_revision
+
+PAYLOAD = Path(__file__).parent / "payloads" / "weatherbit_current.json"
+SNAPSHOT_SQL = """SELECT calculation_datetime, temp, ghi, weather_description
+    FROM weatherbit.tb_hourly_data ORDER BY calculation_datetime"""
+
+
+def hourly_rows(count: int, start: datetime, offset: float = 0.0) -> list[dict]:
+    """tb_hourly_data rows, one per hour, built from the payload fixture."""
+    observation = json.loads(PAYLOAD.read_text(encoding="utf-8"))["data"][0]
+    weather = observation.pop("weather")
+    base = observation | {
+        "sources": ", ".join(observation["sources"]),
+        "weather_icon": weather["icon"],
+        "weather_description": weather["description"],
+        "weather_code": weather["code"],
+    }
+    rows = []
+    for hour in range(count):
+        moment = start + timedelta(hours=hour)
+        rows.append(
+            base
+            | {
+                "calculation_datetime": moment,
+                "ob_time": moment,
+                "ts": int(moment.timestamp()),
+                "temp": base["temp"] + offset + hour % 24,
+                "ghi": base["ghi"] + offset,
+            }
+        )
+    return rows
+
+
+def run_path(database, query: str, rows: list[dict], bulk: bool, batch: int) -> dict:
+    """Upsert ``rows`` with one of the paths and time it."""
+    # pylint: disable=import-outside-toplevel
+    from solarxdatahub.database.bulk import chunks
+
+    started = time.perf_counter()
+    if bulk:
+        stats = database.bulk_upsert(query, chunks(rows, batch))
+        lock_s = stats.lock_seconds
+    else:
+        database.write(query, rows)
+        lock_s = time.perf_counter() - started
+    elapsed = time.perf_counter() - started
+    return {
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round(len(rows) / elapsed),
+        "lock_s": round(lock_s, 4),
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Run the benchmark and store the report."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args(argv)
+
+    workdir = Path(tempfile.mkdtemp(prefix="solarxdatahub-bulk-"))
+    os.environ.update(
+        {
+            "STORAGE_BACKEND": "sqlite",
+            "SQLITE_DIR": str(workdir / "sqlite"),
+            "STATE_DIR": str(workdir / "state"),
+        }
+    )
+    # pylint: disable=import-outside-toplevel
+    from solarxdatahub.database.sqlite_database import SQLiteDatabase
+    from solarxdatahub.database.writting import insert_weatherbit_current
+
+    query = insert_weatherbit_current()
+    start = datetime(2015, 1, 1)
+    initial = hourly_rows(args.rows, start)
+    replay = hourly_rows(args.rows, start, offset=1.5)
+
+    results, snapshots = {}, {}
+    for name, bulk in (("executemany", False), ("bulk", True)):
+        database = SQLiteDatabase(str(workdir / "sqlite" / name))
+        database.connect()
+        results[name] = {
+            "load": run_path(database, query, initial, bulk, args.batch_size),
+            "replay": run_path(database, query, replay, bulk, args.batch_size),
+        }
+        snapshots[name] = database.read(SNAPSHOT_SQL)
+        database.disconnect()
+    assert snapshots["executemany"] == snapshots["bulk"]
+    assert len(snapshots["bulk"]) == args.rows
+
+    report = {
+        "benchmark": "bulk_load",
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "git": git_revision(),
+        "parameters": {"rows": args.rows, "batch_size": args.batch_size},
+        **results,
+    }
+
+    output = args.output
+    if output is None:
+        stamp = datetime.now().strftime("%Y%m%dT%H%M%S")
+        name = f"bulk_load-{report['git']['commit'][:10]}-{stamp}.json"
+        output = RESULTS_DIR / name
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+    for name in ("executemany", "bulk"):
+        for phase in ("load", "replay"):
+            print(f"{name:<12} {phase:<7} {json.dumps(results[name][phase])}")
+    print(f"Report written to {output}")
+
+
+if __name__ == "__main__":
+    main()
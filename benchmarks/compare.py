@@ -0,0 +1,138 @@
+"""Compare two benchmark reports and flag regressions.
+
+Usage:
+    python -m benchmarks.compare baseline.json candidate.json --threshold 10
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+# (ruta en el informe, True si un valor mayor es mejor)
+METRICS = {
+    "ingestion": [
+        (("cycles", "p50_ms"), False),
+        (("cycles", "p95_ms"), False),
+        (("cycles", "p99_ms"), False),
+        (("readings", "per_second"), True),
+        (("database", "round_trips_per_reading"), False),
+        (("memory", "peak_rss_mb"), False),
+    ],
+    "logging": [
+        (("us_per_write", "INFO", "rows_40"), False),
+        (("us_per_write", "DEBUG", "rows_40"), False),
+    ],
+    "parsing": [
+        (("models", "solaxcloud", "from_json_us"), False),
+        (("models", "openweather_current", "from_json_us"), False),
+        (("models", "openweather_forecast", "from_json_us"), False),
+        (("models", "weatherbit_current", "from_json_us"), False),
+    ],
+    "memory": [
+        (("representations", "records", "bytes_per_reading"), False),
+    ],
+    "archive": [
+        (("export", "initial_s"), False),
+        (("scans", "parquet_columns_pandas_ms"), False),
+        (("scans", "duckdb_daily_yield_ms"), False),
+    ],
+    "polling": [
+        (("adaptive", "lag_mean_s"), False),
+        (("adaptive", "polls"), False),
+        (("daylight", "polls"), False),
+    ],
+    "rules": [
+        (("observe", "us_per_reading"), False),
+    ],
+    "bulk_load": [
+        (("bulk", "load", "rows_per_second"), True),
+        (("bulk", "replay", "rows_per_second"), True),
+        (("bulk", "replay", "lock_s"), False),
+    ],
+    "workers": [
+        (("runs", "1", "fleet_per_second"), True),
+        (("runs", "4", "speedup"), True),
+    ],
+    "kpi": [
+        (("compute", "readings_per_second"), True),
+        (("compute", "incremental_ms"), False),
+        (("queries", "kpi_daily_ms"), False),
+    ],
+}
+
+
+def lookup(report: dict, path: tuple[str, ...]):
+    """Value at ``path`` in the report, or None."""
+    value = report
+    for key in path:
+        if not isinstance(value, dict) or key not in value:
+            return None
+        value = value[key]
+    return value
+
+
+def compare(baseline: dict, candidate: dict, threshold: float) -> list[dict]:
+    """Relative change of every tracked metric.
+
+    Args:
+        baseline (dict): The reference report.
+        candidate (dict): The report being evaluated.
+        threshold (float): Percentage beyond which a worse value is a regression.
+
+    Returns:
+        list[dict]: One entry per metric present in both reports.
+    """
+    rows = []
+    for path, higher_is_better in METRICS.get(baseline.get("benchmark"), []):
+        before, after = lookup(baseline, path), lookup(candidate, path)
+        if not isinstance(before, (int, float)) or not isinstance(after, (int, float)):
+            continue
+        change = (after - before) / before * 100.0 if before else 0.0
+        worse = -change if higher_is_better else change
+        rows.append(
+            {
+                "metric": ".".join(path),
+                "baseline": before,
+                "candidate": after,
+                "change_pct": round(change, 2),
+                "regression": worse > threshold,
+            }
+        )
+    return rows
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Print the comparison, returning 1 when a metric regressed."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("baseline", type=Path)
+    parser.add_argument("candidate", type=Path)
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=10.0,
+        help="Allowed degradation in percent.",
+    )
+    args = parser.parse_args(argv)
+
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+    candidate = json.loads(args.candidate.read_text(encoding="utf-8"))
+    if baseline.get("benchmark") != candidate.get("benchmark"):
+        parser.error("The reports belong to different benchmarks.")
+
+    print(
+        f"{baseline['git']['commit'][:10]} -> {candidate['git']['commit'][:10]}"
+        f" ({baseline['benchmark']})"
+    )
+    rows = compare(baseline, candidate, args.threshold)
+    for row in rows:
+        flag = "REGRESSION" if row["regression"] else ""
+        print(
+            f"{row['metric']:<36} {row['baseline']:>12} {row['candidate']:>12} "
+            f"{row['change_pct']:>+8.2f}% {flag}"
+        )
+    return 1 if any(row["regression"] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,291 @@
+"""Local stand-in for the MySQL target.
+
+``RecordingDatabase`` replaces the pymysql connection used by ``MySQLDatabase``
+so the real read/write code paths run, while every round trip to the server
+(ping, statement, commit...) is counted instead of sent. Import it only after
+the data hub configuration has been pointed at the stand-ins.
+"""
+
+import re
+from collections import Counter
+from datetime import datetime, timedelta
+
+from pymysql.cursors import RE_INSERT_VALUES
+
+from solarxdatahub.database.mysql_database import MySQLDatabase
+
+
+class DatabaseRecorder:
+    """Round trip accounting and canned answers shared by every connection.
+
+    The answers cover the reads the pipeline branches on: one inverter, the
+    OpenWeather request options, empty request logs (so every cycle goes
+    through the weather providers), every lease claimed (no other process
+    competes), the notification log written so far, the energy readings
+    written since the last KPIs and a calibration history for the forecast
+    engine.
+    """
+
+    def __init__(self, inverter_sn: str, history_days: int = 30):
+        # Seconds_Behind_Source de la réplica (None = sin replicar)
+        self.replica_lag: float | None = 0.0
+        self.round_trips: Counter = Counter()
+        self.rows_written: Counter = Counter()
+        self.statements: Counter = Counter()
+        self.inverter_sn = inverter_sn
+        self._notifications: dict[tuple, dict] = {}
+        self._claims: list[dict] = []
+        # Lecturas de tb_energy_data sin KPI y la última con KPI
+        self._readings: list[dict] = []
+        self._last_kpi: dict | None = None
+        self._history = self._build_history(history_days)
+
+    @property
+    def total_round_trips(self) -> int:
+        """Round trips of every kind."""
+        return sum(self.round_trips.values())
+
+    def reset(self) -> None:
+        """Forget the counters (the canned state is kept)."""
+        self.round_trips.clear()
+        self.rows_written.clear()
+        self.statements.clear()
+
+    @staticmethod
+    def _build_history(days: int) -> list[dict]:
+        """Hourly production correlated with irradiance for the calibration."""
+        today = datetime.now().date()
+        rows = []
+        for day in range(days):
+            fecha = today - timedelta(days=day + 1)
+            for periodo in range(8, 19):
+                ghi = 800.0 * max(0.0, 1.0 - abs(periodo - 13) / 6.0)
+                rows.append(
+                    {
+                        "inverter_id": 1,
+                        "fecha": fecha,
+                        "periodo": periodo,
+                        "acpower": 4.1 * ghi,
+                        "ghi": ghi,
+                        "temp": 18.0,
+                    }
+                )
+        return rows
+
+    def answer(self, query: str) -> list[dict]:
+        """Rows returned for a SELECT (or SHOW) statement."""
+        if "REPLICA STATUS" in query:
+            return [{"Seconds_Behind_Source": self.replica_lag}]
+        if "tb_energy_kpi" in query:
+            last = self._last_kpi["uploadTime"] if self._last_kpi else None
+            rows = ([self._last_kpi] if self._last_kpi else []) + self._readings
+            return [dict(row, batPower=None, last_kpi=last) for row in rows]
+        if "master_tb_inverters" in query:
+            return [
+                {
+                    "id": 1,
+                    "inverterSN": self.inverter_sn,
+                    "sn": "SRABCDEFGH",
+                    "inverterType": "14",
+                    "site_name": "benchmark",
+                    "description": None,
+                }
+            ]
+        if "master_tb_request_options" in query:
+            return [
+                {"id": 1, "request_type": "weather"},
+                {"id": 2, "request_type": "air_pollution"},
+                {"id": 3, "request_type": "forecast"},
+            ]
+        if "total_requests" in query:
+            return [{"total_requests": 0}]
+        if "last_request" in query:
+            return [{"last_request": None}]
+        if "tb_worker_lease" in query:
+            return [{"lease_key": row["lease_key"]} for row in self._claims]
+        if "tb_notification_log" in query:
+            match = re.search(r"notification_type = '(\w+)'", query)
+            rows = [
+                row
+                for row in self._notifications.values()
+                if match is None or row["notification_type"] == match.group(1)
+            ]
+            return sorted(rows, key=lambda row: row["sent_at"], reverse=True)[:1]
+        if "tb_hourly_data" in query and "tb_energy_data" in query:
+            return list(self._history)
+        return []
+
+    def record_write(self, query: str, rows: list) -> None:
+        """Account the rows of an INSERT and keep the notification log."""
+        match = re.search(r"INSERT\s+INTO\s+([\w.]+)", query, re.IGNORECASE)
+        table = match.group(1).split(".")[-1] if match else "unknown"
+        self.rows_written[table] += len(rows)
+        if table == "tb_worker_lease":
+            self._claims = [dict(row) for row in rows]
+        if table == "tb_energy_data":
+            self._readings.extend(dict(row) for row in rows)
+        if table == "tb_energy_kpi" and self._readings:
+            self._last_kpi = self._readings[-1]
+            self._readings = []
+        if table == "tb_notification_log":
+            for row in rows:
+                key = (row["inverter_id"], row["notification_type"])
+                self._notifications[key] = dict(row)
+
+
+class RecordingCursor:
+    """DictCursor replacement that counts statements instead of sending them."""
+
+    def __init__(self, recorder: DatabaseRecorder):
+        self.recorder = recorder
+        self.rowcount = 0
+        self._rows: list[dict] = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query: str, params=None) -> int:
+        """Run a single statement (one round trip)."""
+        self.recorder.round_trips["statement"] += 1
+        if query.lstrip().upper().startswith(("SELECT", "SHOW")):
+            self.recorder.statements["select"] += 1
+            self._rows = self.recorder.answer(query)
+            self.rowcount = len(self._rows)
+        else:
+            self.recorder.statements["write"] += 1
+            rows = [params] if isinstance(params, dict) else []
+            self.recorder.record_write(query, rows)
+            self._rows = []
+            self.rowcount = len(rows)
+        return self.rowcount
+
+    def executemany(self, query: str, rows: list) -> int:
+        """Run a statement for many rows.
+
+        Like pymysql, an ``INSERT ... VALUES`` is sent as a single multi-row
+        statement; anything else costs one round trip per row.
+        """
+        rows = list(rows)
+        if not rows:
+            return 0
+        batched = RE_INSERT_VALUES.match(query) is not None
+        self.recorder.round_trips["statement"] += 1 if batched else len(rows)
+        self.recorder.statements["write"] += 1 if batched else len(rows)
+        self.recorder.record_write(query, rows)
+        self._rows = []
+        self.rowcount = len(rows)
+        return self.rowcount
+
+    def fetchall(self) -> list[dict]:
+        """Rows of the last SELECT."""
+        return self._rows
+
+
+class RecordingConnection:
+    """pymysql ``Connection`` replacement backed by a ``DatabaseRecorder``."""
+
+    def __init__(self, recorder: DatabaseRecorder):
+        self.recorder = recorder
+
+    def ping(self, reconnect: bool = True) -> None:
+        """Count the ping sent before every operation."""
+        self.recorder.round_trips["ping"] += 1
+
+    def cursor(self) -> RecordingCursor:
+        """Open a cursor."""
+        return RecordingCursor(self.recorder)
+
+    def begin(self) -> None:
+        """Count a BEGIN."""
+        self.recorder.round_trips["begin"] += 1
+
+    def commit(self) -> None:
+        """Count a COMMIT."""
+        self.recorder.round_trips["commit"] += 1
+
+    def rollback(self) -> None:
+        """Count a ROLLBACK."""
+        self.recorder.round_trips["rollback"] += 1
+
+    def close(self) -> None:
+        """Nothing to close."""
+
+
+class RecordingDatabase(MySQLDatabase):
+    """``MySQLDatabase`` whose connection is a ``RecordingConnection``.
+
+    Set ``RecordingDatabase.recorder`` before the data hub connects; every
+    configured host shares it.
+    """
+
+    recorder: DatabaseRecorder | None = None
+
+    def connect(self) -> None:
+        """Attach the recording connection instead of opening a socket."""
+        if self.recorder is None:
+            raise ConnectionError("RecordingDatabase.recorder is not configured.")
+        self.recorder.round_trips["connect"] += 1
+        self._connection = RecordingConnection(self.recorder)
+
+
+def install_recording_database(recorder: DatabaseRecorder) -> None:
+    """Route every ``DataBaseConnection`` to the recording database.
+
+    Args:
+        recorder (DatabaseRecorder): The recorder shared by every host.
+    """
+    # pylint: disable=import-outside-toplevel
+    from solarxdatahub.database import connection
+
+    RecordingDatabase.recorder = recorder
+    connection.MySQLDatabase = RecordingDatabase
+
+
+def seed_sqlite_database(recorder: DatabaseRecorder) -> None:
+    """Store the master data of the recorder in the local SQLite database.
+
+    Used to run the benchmarks with ``STORAGE_BACKEND=sqlite`` (SQLITE_DIR must
+    already point at the benchmark directory).
+
+    Args:
+        recorder (DatabaseRecorder): Provides the inverter and request options.
+    """
+    # pylint: disable=import-outside-toplevel
+    from solarxdatahub.config import Storage
+    from solarxdatahub.database.sqlite_database import SQLiteDatabase
+
+    database = SQLiteDatabase(Storage.SQLITE_DIR)
+    database.connect()
+    try:
+        database.write(
+            "INSERT INTO solaxcloud.master_tb_inverters "
+            "(id, inverterSN, sn, inverterType, site_name, description) VALUES "
+            "(%(id)s, %(inverterSN)s, %(sn)s, %(inverterType)s, %(site_name)s, "
+            "%(description)s) ON DUPLICATE KEY UPDATE sn = VALUES(sn)",
+            recorder.answer("master_tb_inverters"),
+        )
+        database.write(
+            "INSERT INTO openweather.master_tb_request_options (id, request_type) "
+            "VALUES (%(id)s, %(request_type)s) "
+            "ON DUPLICATE KEY UPDATE request_type = VALUES(request_type)",
+            recorder.answer("master_tb_request_options"),
+        )
+    finally:
+        database.disconnect()
+
+
+def count_sqlite_rows(table: str) -> int:
+    """Rows of a table of the local SQLite database (``schema.table``)."""
+    # pylint: disable=import-outside-toplevel
+    from solarxdatahub.config import Storage
+    from solarxdatahub.database.sqlite_database import SQLiteDatabase
+
+    database = SQLiteDatabase(Storage.SQLITE_DIR)
+    database.connect()
+    try:
+        return database.read(f"SELECT COUNT(*) AS total FROM {table}")[0]["total"]
+    finally:
+        database.disconnect()
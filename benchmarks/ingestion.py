@@ -0,0 +1,343 @@
+"""End-to-end benchmark of the ingestion cycle.
+
+Runs the real ``controller.run`` pipeline against ``ProviderStub`` (HTTP) and
+``RecordingDatabase`` (MySQL) and writes a JSON report with the cycle latency
+percentiles, readings stored per second, database round trips per reading and
+the peak RSS of the process. With ``--backend sqlite`` the data is stored in
+a temporary embedded database instead (no round trip accounting).
+
+Usage:
+    python -m benchmarks.ingestion --cycles 200 --latency-ms 20 --error-rate 0.02
+    python -m benchmarks.ingestion --backend sqlite --cycles 200
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks.stubs import ProviderStub, load_payload
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    """Parse the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cycles", type=int, default=100, help="Measured cycles.")
+    parser.add_argument(
+        "--warmup", type=int, default=5, help="Cycles run before measuring."
+    )
+    parser.add_argument(
+        "--latency-ms", type=float, default=0.0, help="Latency of every HTTP call."
+    )
+    parser.add_argument(
+        "--jitter-ms", type=float, default=0.0, help="Random extra HTTP latency."
+    )
+    parser.add_argument(
+        "--error-rate",
+        type=float,
+        default=0.0,
+        help="Fraction of HTTP calls answered with a 503.",
+    )
+    parser.add_argument(
+        "--repeat-readings",
+        action="store_true",
+        help="Serve the same SolaxCloud reading on every poll.",
+    )
+    parser.add_argument(
+        "--http-cache",
+        action="store_true",
+        help="Keep the HTTP response cache of the weather providers enabled.",
+    )
+    parser.add_argument(
+        "--query-cache",
+        action="store_true",
+        help="Keep the query result cache of crud enabled (QUERY_CACHE_ENABLED).",
+    )
+    parser.add_argument(
+        "--log-level", default="WARNING", help="LOGGING_LEVEL of the data hub."
+    )
+    parser.add_argument(
+        "--backend",
+        choices=("recording", "sqlite"),
+        default="recording",
+        help="Database stand-in: the recording MySQL or a local SQLite.",
+    )
+    parser.add_argument(
+        "--read-replica",
+        action="store_true",
+        help="Route the lag tolerant reads to SOURCE_HOST (READ_REPLICA_ENABLED).",
+    )
+    parser.add_argument(
+        "--no-circuit-breaker",
+        action="store_true",
+        help="Disable the circuit breakers of the API clients.",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Random seed.")
+    parser.add_argument(
+        "--output", type=Path, default=None, help="Path of the JSON report."
+    )
+    return parser.parse_args(argv)
+
+
+def configure_environment(base_url: str, workdir: Path, args: argparse.Namespace):
+    """Point the data hub configuration at the stand-ins.
+
+    Must run before ``solarxdatahub.config`` is imported.
+    """
+    os.environ.update(
+        {
+            # En development SOURCE_HOST apunta a AZURE_REP_DB_HOST
+            "WORK_ENVIRONMENT": "development" if args.read_replica else "local",
+            "AZURE_REP_DB_HOST": "replica.benchmark",
+            "LOGGING_LEVEL": args.log_level,
+            "LOG_FILE": str(workdir / "app.log"),
+            "STATE_DIR": str(workdir / "state"),
+            "STORAGE_BACKEND": "sqlite" if args.backend == "sqlite" else "mysql",
+            "SQLITE_DIR": str(workdir / "sqlite"),
+            "READ_REPLICA_ENABLED": "true" if args.read_replica else "false",
+            "HTTP_CACHE_ENABLED": "true" if args.http_cache else "false",
+            "QUERY_CACHE_ENABLED": "true" if args.query_cache else "false",
+            "CIRCUIT_BREAKER_ENABLED": "false" if args.no_circuit_breaker else "true",
+            # Cada ciclo consulta SolaxCloud, sea de día o de noche
+            "DAYLIGHT_POLICY": "false",
+            "HTTP_CACHE_DIR": str(workdir / "http_cache"),
+            "API_URL": f"{base_url}/solaxcloud",
+            "TOKEN_ID": "benchmark",
+            "WIFI_SN": "SRABCDEFGH",
+            "OW_CURRENT_URL": f"{base_url}/openweather/weather",
+            "OW_AIR_POLLUTION_URL": f"{base_url}/openweather/air_pollution",
+            "OW_FORECAST_URL": f"{base_url}/openweather/forecast",
+            "OW_API_KEY": "benchmark",
+            "OW_LAT": "40.4168",
+            "OW_LON": "-3.7038",
+            "WB_BASE_URL": f"{base_url}/weatherbit/current",
+            "WB_API_KEY": "benchmark",
+            "LATITUDE": "40.4168",
+            "LONGITUDE": "-3.7038",
+            "NTFY_SERVER": f"{base_url}/ntfy",
+            "NTFY_TOPIC": "benchmark",
+            "NTFY_USER": "benchmark",
+            "NTFY_PASS": "benchmark",
+        }
+    )
+
+
+def git_revision() -> dict:
+    """Commit of the working tree being measured."""
+
+    def git(*command: str) -> str:
+        try:
+            return subprocess.run(
+                ["git", *command],
+                capture_output=True,
+                text=True,
+                check=True,
+                cwd=Path(__file__).parent,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return ""
+
+    return {
+        "commit": git("rev-parse", "HEAD") or "unknown",
+        "dirty": bool(git("status", "--porcelain", "--untracked-files=no")),
+    }
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of the process in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux devuelve KB, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_benchmark(args: argparse.Namespace) -> dict:
+    """Run the warmup and measured cycles.
+
+    Args:
+        args (argparse.Namespace): The benchmark parameters.
+
+    Returns:
+        dict: The report.
+    """
+    stub = ProviderStub(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        repeat_readings=args.repeat_readings,
+        seed=args.seed,
+    )
+    base_url = stub.start()
+    workdir = Path(tempfile.mkdtemp(prefix="solarxdatahub-bench-"))
+    configure_environment(base_url, workdir, args)
+
+    # pylint: disable=import-outside-toplevel
+    from loguru import logger
+
+    from benchmarks.database import (
+        DatabaseRecorder,
+        count_sqlite_rows,
+        install_recording_database,
+        seed_sqlite_database,
+    )
+    from solarxdatahub.core import controller
+    from solarxdatahub.utils.metrics import (
+        API_CIRCUIT_REJECTIONS,
+        DB_READS,
+        REGISTRY,
+        STAGE_DURATION,
+    )
+
+    recorder = DatabaseRecorder(
+        inverter_sn=load_payload("solaxcloud.json")["result"]["inverterSN"]
+    )
+    if args.backend == "sqlite":
+        seed_sqlite_database(recorder)
+    else:
+        install_recording_database(recorder)
+
+    try:
+        for _ in range(args.warmup):
+            _run_cycle(controller)
+        recorder.reset()
+        stored_before = (
+            count_sqlite_rows("solaxcloud.tb_energy_data")
+            if args.backend == "sqlite"
+            else 0
+        )
+        REGISTRY.clear()
+        stub.requests.clear()
+        stub.errors.clear()
+
+        latencies = []
+        failed = 0
+        started = time.perf_counter()
+        for _ in range(args.cycles):
+            cycle_start = time.perf_counter()
+            failed += 0 if _run_cycle(controller) else 1
+            latencies.append(time.perf_counter() - cycle_start)
+        elapsed = time.perf_counter() - started
+        if args.backend == "sqlite":
+            recorder.rows_written["tb_energy_data"] = (
+                count_sqlite_rows("solaxcloud.tb_energy_data") - stored_before
+            )
+    finally:
+        logger.remove()
+        stub.stop()
+
+    latencies_ms = np.array(latencies) * 1000.0
+    readings = recorder.rows_written["tb_energy_data"]
+    # Con SQLite no hay servidor: no se cuentan viajes de ida y vuelta
+    round_trips = recorder.total_round_trips if args.backend == "recording" else 0
+    return {
+        "benchmark": "ingestion",
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "git": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "parameters": {
+            key: str(value) if isinstance(value, Path) else value
+            for key, value in vars(args).items()
+        },
+        "cycles": {
+            "total": args.cycles,
+            "failed": failed,
+            "elapsed_s": round(elapsed, 4),
+            "mean_ms": round(float(latencies_ms.mean()), 3),
+            "p50_ms": round(float(np.percentile(latencies_ms, 50)), 3),
+            "p95_ms": round(float(np.percentile(latencies_ms, 95)), 3),
+            "p99_ms": round(float(np.percentile(latencies_ms, 99)), 3),
+            "max_ms": round(float(latencies_ms.max()), 3),
+        },
+        "readings": {
+            "stored": readings,
+            "per_second": round(readings / elapsed, 3) if elapsed else 0.0,
+        },
+        "database": {
+            "round_trips": round_trips,
+            "round_trips_per_reading": (
+                round(round_trips / readings, 3) if readings and round_trips else None
+            ),
+            "round_trips_by_kind": dict(recorder.round_trips),
+            "statements": dict(recorder.statements),
+            "rows_written": dict(recorder.rows_written),
+            "reads_by_host": {
+                host: DB_READS.value(host=host)
+                for host in ("TARGET_HOST", "SOURCE_HOST")
+            },
+        },
+        "http": {
+            "requests": dict(stub.requests),
+            "injected_errors": dict(stub.errors),
+            "circuit_rejections": {
+                endpoint: API_CIRCUIT_REJECTIONS.value(endpoint=endpoint)
+                for endpoint in (
+                    "solaxcloud.realtime",
+                    "openweather.weather",
+                    "openweather.air_pollution",
+                    "openweather.forecast",
+                    "weatherbit.current",
+                )
+            },
+        },
+        "stages": stage_breakdown(STAGE_DURATION),
+        "memory": {"peak_rss_mb": round(peak_rss_mb(), 2)},
+    }
+
+
+def stage_breakdown(histogram) -> dict:
+    """Total time and calls of each pipeline stage from the metrics registry."""
+    stages = {}
+    for labels, count, total in histogram.totals():
+        stage = labels.get("stage", "unknown")
+        entry = stages.setdefault(stage, {"calls": 0, "total_ms": 0.0})
+        entry["calls"] += count
+        entry["total_ms"] = round(entry["total_ms"] + total * 1000.0, 3)
+    return dict(sorted(stages.items(), key=lambda item: -item[1]["total_ms"]))
+
+
+def _run_cycle(controller) -> bool:
+    """Run one ingestion cycle, returning False if it raised."""
+    try:
+        controller.run()
+        return True
+    except Exception:  # pylint: disable=broad-except
+        return False
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Run the benchmark and store the report."""
+    args = parse_args(argv)
+    report = run_benchmark(args)
+
+    output = args.output
+    if output is None:
+        stamp = datetime.now().strftime("%Y%m%dT%H%M%S")
+        output = RESULTS_DIR / f"ingestion-{report['git']['commit'][:10]}-{stamp}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+    cycles, database = report["cycles"], report["database"]
+    print(
+        f"cycles: {cycles['total']} ({cycles['failed']} failed) | "
+        f"p50 {cycles['p50_ms']} ms, p95 {cycles['p95_ms']} ms, "
+        f"p99 {cycles['p99_ms']} ms | "
+        f"readings/s {report['readings']['per_second']} | "
+        f"round trips/reading {database['round_trips_per_reading']} | "
+        f"peak RSS {report['memory']['peak_rss_mb']} MB"
+    )
+    print(f"Report written to {output}")
+
+
+if __name__ == "__main__":
+    main()
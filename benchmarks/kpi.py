@@ -0,0 +1,185 @@
+"""Energy KPIs computed in batches against window functions over the history.
+
+Fills a temporary SQLite database (``STORAGE_BACKEND=sqlite``) with
+``--days`` of 5-minute readings for ``--inverters`` inverters (one counter
+reset and a one-hour gap per inverter) and times:
+
+- the initial run of the KPI stage over the whole history (readings/s);
+- an incremental run after one more reading per inverter, the cost the
+  stage adds to a cycle;
+- the daily energy balance with a ``LAG`` window function over the raw
+  readings, as the analytics did, and with a ``SUM`` over tb_energy_kpi.
+
+Both balances must agree except on the reset days, where the window function
+gets a negative energy.
+
+Usage:
+    python -m benchmarks.kpi --days 90 --inverters 4
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+from benchmarks.archive import best_of
+from benchmarks.ingestion import RESULTS_DIR, git_revision
+
+WINDOW_SQL = """WITH deltas AS (
+        SELECT inverter_id, fecha,
+            yieldtotal - LAG(yieldtotal) OVER w AS yield_energy,
+            feedinenergy - LAG(feedinenergy) OVER w AS feedin_energy
+        FROM solaxcloud.tb_energy_data
+        WINDOW w AS (PARTITION BY inverter_id ORDER BY uploadTime)
+    )
+    SELECT inverter_id, fecha, SUM(yield_energy) AS yield_kwh,
+        SUM(feedin_energy) AS exported_kwh
+    FROM deltas GROUP BY inverter_id, fecha ORDER BY inverter_id, fecha"""
+KPI_SQL = """SELECT inverter_id, fecha, SUM(yield_energy) AS yield_kwh,
+        SUM(feedin_energy) AS exported_kwh
+    FROM solaxcloud.tb_energy_kpi
+    GROUP BY inverter_id, fecha ORDER BY inverter_id, fecha"""
+
+
+def reading_rows(days: int, inverters: int, start: date):
+    """tb_energy_data / tb_battery_data rows, one every 5 minutes per inverter.
+
+    The counters of every inverter are reset halfway through the period and
+    the readings of 12:00 to 12:55 of the second day are missing. The last
+    readings (one per inverter) are the first ones of the following day.
+    """
+    for step in range(days * 288 + 1):
+        upload = datetime.combine(start, datetime.min.time()) + timedelta(
+            minutes=5 * step
+        )
+        if step // 288 == 1 and upload.hour == 12:
+            continue
+        counter = step - days * 144 if step >= days * 144 else 1000 + step
+        for inverter_id in range(1, inverters + 1):
+            yield {
+                "fecha": upload.date(),
+                "periodo": upload.hour,
+                "min": upload.minute,
+                "inverter_id": inverter_id,
+                "acpower": 3000.0,
+                "yieldtoday": 0.0,
+                "yieldtotal": counter * 0.25,
+                "feedinpower": 1000.0,
+                "feedinenergy": counter * 0.1,
+                "consumeenergy": counter * 0.05,
+                "uploadTime": upload,
+                "batPower": 1200.0 if upload.hour < 12 else -800.0,
+                "soc": 50.0,
+                "batStatus": "0",
+            }
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Run the benchmark and store the report."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--inverters", type=int, default=4)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args(argv)
+
+    workdir = Path(tempfile.mkdtemp(prefix="solarxdatahub-kpi-"))
+    os.environ.update(
+        {
+            "STORAGE_BACKEND": "sqlite",
+            "SQLITE_DIR": str(workdir / "sqlite"),
+            "STATE_DIR": str(workdir / "state"),
+        }
+    )
+    # pylint: disable=import-outside-toplevel
+    from loguru import logger
+
+    from solarxdatahub.core.kpi import run_kpi
+    from solarxdatahub.database.connection import DataBaseConnection
+    from solarxdatahub.database.crud import insert_battery, insert_energy
+    from solarxdatahub.database.sqlite_database import SQLiteDatabase
+
+    logger.remove()
+    DataBaseConnection.connect()
+    database = SQLiteDatabase(str(workdir / "sqlite"))
+    database.connect()
+    start = date.today() - timedelta(days=args.days)
+    rows = list(reading_rows(args.days, args.inverters, start))
+    # Un ciclo más: una lectura nueva por inversor
+    rows, cycle = rows[: -args.inverters], rows[-args.inverters :]
+    database.write(
+        "INSERT INTO solaxcloud.master_tb_inverters "
+        "(id, inverterSN, sn, inverterType, site_name) VALUES "
+        "(%(id)s, %(sn)s, %(sn)s, '14', 'benchmark')",
+        [
+            {"id": number, "sn": f"SR{number:08d}"}
+            for number in range(1, args.inverters + 1)
+        ],
+    )
+    insert_energy(rows)
+    insert_battery(rows)
+
+    started = time.perf_counter()
+    initial = run_kpi(args.batch_size)
+    initial_s = time.perf_counter() - started
+    assert initial == len(rows), (initial, len(rows))
+
+    insert_energy(cycle)
+    insert_battery(cycle)
+    started = time.perf_counter()
+    incremental = run_kpi(args.batch_size)
+    incremental_ms = (time.perf_counter() - started) * 1000.0
+    assert incremental == args.inverters, incremental
+
+    def daily(query: str):
+        return database.read(query, as_df=True)
+
+    window, precomputed = daily(WINDOW_SQL), daily(KPI_SQL)
+    differs = (window["yield_kwh"] - precomputed["yield_kwh"]).abs() > 1e-3
+    assert (window.loc[differs, "yield_kwh"] < 0).all()
+    assert differs.sum() == args.inverters, differs.sum()
+
+    timings = {
+        "window_daily_ms": best_of(lambda: daily(WINDOW_SQL), args.repeat),
+        "kpi_daily_ms": best_of(lambda: daily(KPI_SQL), args.repeat),
+    }
+    database.disconnect()
+    DataBaseConnection.disconnect()
+
+    report = {
+        "benchmark": "kpi",
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "git": git_revision(),
+        "parameters": {
+            "days": args.days,
+            "inverters": args.inverters,
+            "batch_size": args.batch_size,
+        },
+        "rows": len(rows),
+        "compute": {
+            "initial_s": round(initial_s, 3),
+            "readings_per_second": round(initial / initial_s, 1),
+            "incremental_ms": round(incremental_ms, 3),
+        },
+        "queries": {key: round(value, 3) for key, value in timings.items()},
+    }
+
+    output = args.output
+    if output is None:
+        stamp = datetime.now().strftime("%Y%m%dT%H%M%S")
+        output = RESULTS_DIR / f"kpi-{report['git']['commit'][:10]}-{stamp}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+    print(json.dumps(report["compute"]))
+    for key, value in report["queries"].items():
+        print(f"{key:<20} {value:>10} ms")
+    print(f"Report written to {output}")
+
+
+if __name__ == "__main__":
+    main()
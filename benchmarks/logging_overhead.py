@@ -0,0 +1,165 @@
+"""Per-write cost of the database logging.
+
+Times ``MySQLDatabase.write`` over the recording connection (no network) with
+logging disabled, at INFO and at DEBUG, and at DEBUG with synchronous sinks
+and the whole payload rendered for reference. The difference
+with the disabled run is the logging overhead of a write.
+
+Usage:
+    python -m benchmarks.logging_overhead --writes 2000
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from loguru import logger
+
+from benchmarks.database import DatabaseRecorder, RecordingDatabase
+from benchmarks.ingestion import RESULTS_DIR, git_revision
+from solarxdatahub.config import Logging
+from solarxdatahub.database.writting import insert_openweather_forecast
+
+# (nivel, sinks en cola, caracteres de la vista previa)
+MODES = {
+    "disabled": (None, True, 500),
+    "INFO": ("INFO", True, 500),
+    "DEBUG": ("DEBUG", True, 500),
+    "DEBUG_sync_full": ("DEBUG", False, 0),
+}
+
+
+def build_rows(count: int) -> list[dict]:
+    """Forecast-like rows (the widest upsert of the pipeline)."""
+    return [
+        {
+            "issue_datetime": datetime(2025, 2, 15, 12),
+            "target_datetime": datetime(2025, 2, 15, 12 + i % 12),
+            "city_id": 3117735,
+            "lat": 40.4168,
+            "lon": -3.7038,
+            "dt": 1739620800 + 10800 * i,
+            "temp": 14.2,
+            "feels_like": 12.9,
+            "temp_min": 12.8,
+            "temp_max": 15.6,
+            "pressure": 1021,
+            "humidity": 48,
+            "sea_level": 1021,
+            "grnd_level": 940,
+            "visibility": 10000,
+            "wind_speed": 3.6,
+            "wind_deg": 240,
+            "wind_gust": 6.2,
+            "clouds": 20,
+            "pop": 0.12,
+            "rain_3h": None,
+            "pod": "d",
+            "weather_main": "Clouds",
+            "weather_description": "nubes dispersas",
+            "weather_icon": "03d",
+        }
+        for i in range(count)
+    ]
+
+
+def configure(mode: str, log_file: Path) -> None:
+    """Configure the data hub logging for a mode."""
+    level, enqueue, preview_chars = MODES[mode]
+    if level is None:
+        logger.remove()
+        logging.basicConfig(level=logging.CRITICAL, force=True)
+        return
+    Logging.LOG_LEVEL = level
+    Logging.LOG_FILE = str(log_file)
+    Logging.LOG_ENQUEUE = enqueue
+    Logging.LOG_PAYLOAD_PREVIEW_CHARS = preview_chars
+    Logging.configure_logger(force=True)
+
+
+def time_writes(database: RecordingDatabase, rows: list[dict], writes: int) -> float:
+    """Mean duration of a write in microseconds."""
+    query = insert_openweather_forecast()
+    for _ in range(min(50, writes)):
+        database.write(query, rows)
+    start = time.perf_counter()
+    for _ in range(writes):
+        database.write(query, rows)
+    return (time.perf_counter() - start) / writes * 1e6
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Run the benchmark and store the report."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--writes", type=int, default=2000)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1, 40])
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args(argv)
+
+    RecordingDatabase.recorder = DatabaseRecorder(inverter_sn="benchmark")
+    database = RecordingDatabase("localhost", 3306, "root", "", None, "benchmark")
+    database.connect()
+    workdir = Path(tempfile.mkdtemp(prefix="solarxdatahub-logbench-"))
+
+    timings: dict[str, dict[str, float]] = {}
+    stdout = sys.stdout
+    try:
+        # La consola también es un sink: se descarta para no medir el terminal
+        sys.stdout = open(os.devnull, "w", encoding="utf-8")
+        for mode in MODES:
+            configure(mode, workdir / f"{mode}.log")
+            timings[mode] = {
+                f"rows_{count}": round(
+                    time_writes(database, build_rows(count), args.writes), 3
+                )
+                for count in args.rows
+            }
+            # Se vacían las colas antes de medir el siguiente modo
+            logger.remove()
+    finally:
+        logger.remove()
+        sys.stdout.close()
+        sys.stdout = stdout
+
+    overhead = {
+        mode: {
+            key: round(value - timings["disabled"][key], 3)
+            for key, value in values.items()
+        }
+        for mode, values in timings.items()
+        if mode != "disabled"
+    }
+    report = {
+        "benchmark": "logging",
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "git": git_revision(),
+        "parameters": {"writes": args.writes, "rows": args.rows},
+        "us_per_write": timings,
+        "overhead_us": overhead,
+    }
+
+    output = args.output
+    if output is None:
+        stamp = datetime.now().strftime("%Y%m%dT%H%M%S")
+        output = RESULTS_DIR / f"logging-{report['git']['commit'][:10]}-{stamp}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+    for mode, values in timings.items():
+        extra = overhead.get(mode, {})
+        cells = ", ".join(
+            f"{key}: {value} us" + (f" (+{extra[key]} us)" if key in extra else "")
+            for key, value in values.items()
+        )
+        print(f"{mode:<14} {cells}")
+    print(f"Report written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""Memory used by buffered SolaxCloud readings.
+
+Builds ``--readings`` distinct readings (varying upload time and values) and
+measures with tracemalloc the memory held by each representation:
+
+- ``pydantic_rows``: a ``SolaxCloudResult`` plus the three per-table dicts,
+  as the pipeline held a reading before ``ReadingRecord``. At ~5 KB per
+  reading 1M of them do not fit in a small machine, so it is measured on
+  ``--baseline-readings`` and scaled linearly (flagged as extrapolated).
+- ``records``: a list of slotted ``ReadingRecord``.
+
+Usage:
+    python -m benchmarks.memory --readings 1000000
+"""
+
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from benchmarks.ingestion import RESULTS_DIR, git_revision
+from benchmarks.stubs import load_payload
+from solarxdatahub.models.model_solaxcloud import SolaxCloudResult
+from solarxdatahub.models.records import ReadingRecord
+
+START = datetime(2025, 2, 15, 6, 0, 0)
+
+
+def reading_payloads(count: int):
+    """Distinct readings, one every 5 minutes, as decoded API results."""
+    base = load_payload("solaxcloud.json")["result"]
+    for i in range(count):
+        payload = dict(base)
+        payload["uploadTime"] = (START + timedelta(minutes=5 * i)).strftime(
+            "%Y-%m-%d %H:%M:%S"
+        )
+        payload["acpower"] = float(i % 5000)
+        payload["yieldtoday"] = (i % 288) * 0.1
+        payload["yieldtotal"] = 8000.0 + i * 0.01
+        payload["feedinpower"] = float(i % 3000) - 1500.0
+        payload["soc"] = float(i % 100)
+        yield payload
+
+
+def common_columns(upload_time: str) -> dict:
+    """fecha, periodo and minute as computed by the SolaxCloud client."""
+    fecha, hora = upload_time.split(" ")
+    return {"fecha": fecha, "periodo": hora[:2], "minute": hora[3:5]}
+
+
+def build(kind: str, count: int):
+    """Build ``count`` readings in the representation ``kind``."""
+    if kind == "pydantic_rows":
+        held = []
+        for payload in reading_payloads(count):
+            result = SolaxCloudResult(**payload)
+            record = ReadingRecord.from_result(
+                result, 1, common_columns(result.uploadTime)
+            )
+            held.append(
+                (
+                    result,
+                    record.energy_row(),
+                    record.phase_power_row(),
+                    record.battery_row(),
+                )
+            )
+        return held
+    held = []
+    for payload in reading_payloads(count):
+        result = SolaxCloudResult(**payload)
+        held.append(
+            ReadingRecord.from_result(result, 1, common_columns(result.uploadTime))
+        )
+    return held
+
+
+def measure(kind: str, count: int, sample: int | None = None) -> dict:
+    """Memory held and build time of a representation.
+
+    Args:
+        kind (str): The representation.
+        count (int): Readings reported.
+        sample (int | None, optional): Readings actually built, scaled to
+            ``count``. Defaults to ``count``.
+    """
+    sample = min(sample or count, count)
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    held = build(kind, sample)
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del held
+    gc.collect()
+    scale = count / sample
+    return {
+        "mb": round(current * scale / 1e6, 2),
+        "bytes_per_reading": round(current / sample, 1),
+        "peak_mb": round(peak * scale / 1e6, 2),
+        "build_seconds": round(elapsed * scale, 2),
+        "extrapolated": sample != count,
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Run the benchmark and store the report."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--readings", type=int, default=1_000_000)
+    parser.add_argument("--baseline-readings", type=int, default=100_000)
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args(argv)
+
+    results = {
+        "pydantic_rows": measure(
+            "pydantic_rows", args.readings, args.baseline_readings
+        ),
+        "records": measure("records", args.readings),
+    }
+    baseline = results["pydantic_rows"]["mb"]
+    for values in results.values():
+        values["reduction"] = (
+            round(baseline / values["mb"], 2) if values["mb"] else None
+        )
+
+    report = {
+        "benchmark": "memory",
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "git": git_revision(),
+        "parameters": {
+            "readings": args.readings,
+            "baseline_readings": args.baseline_readings,
+        },
+        "representations": results,
+    }
+
+    output = args.output
+    if output is None:
+        stamp = datetime.now().strftime("%Y%m%dT%H%M%S")
+        output = RESULTS_DIR / f"memory-{report['git']['commit'][:10]}-{stamp}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+    for kind, values in results.items():
+        print(
+            f"{kind:<14} {values['mb']:>10} MB  {values['bytes_per_reading']:>8} B/reading"
+            f"  x{values['reduction']}  (built in {values['build_seconds']} s)"
+            + ("  [extrapolated]" if values["extrapolated"] else "")
+        )
+    print(f"Report written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""Cost of turning an API response body into its pydantic model.
+
+For every recorded payload it times the previous path (``json.loads`` into a
+dict, then validating the dict with ``from_api`` / the constructor) against
+``from_json``, which validates straight from the bytes. ``--scale`` repeats the
+items of the list payloads (forecast slots, air pollution samples) to emulate
+larger responses.
+
+Usage:
+    python -m benchmarks.parsing --iterations 2000 --scale 1 10
+"""
+
+import argparse
+import json
+import time
+from datetime import datetime
+from pathlib import Path
+
+from benchmarks.ingestion import RESULTS_DIR, git_revision
+from benchmarks.stubs import PAYLOADS_DIR
+from solarxdatahub.models.model_openweather import (
+    OpenWeatherAirPollutionResponse,
+    OpenWeatherCurrentResponse,
+    OpenWeatherForecastResponse,
+)
+from solarxdatahub.models.model_solaxcloud import SolaxCloudResponse
+from solarxdatahub.models.model_weatherbit import WeatherbitResponse
+
+# nombre -> (fichero, modelo, ruta anterior a partir del dict, clave de la lista)
+CASES = {
+    "solaxcloud": (
+        "solaxcloud.json",
+        SolaxCloudResponse,
+        lambda data: SolaxCloudResponse(**data),
+        None,
+    ),
+    "openweather_current": (
+        "openweather_current.json",
+        OpenWeatherCurrentResponse,
+        OpenWeatherCurrentResponse.from_api,
+        None,
+    ),
+    "openweather_air_pollution": (
+        "openweather_air_pollution.json",
+        OpenWeatherAirPollutionResponse,
+        OpenWeatherAirPollutionResponse.from_api,
+        "list",
+    ),
+    "openweather_forecast": (
+        "openweather_forecast.json",
+        OpenWeatherForecastResponse,
+        OpenWeatherForecastResponse.from_api,
+        "list",
+    ),
+    "weatherbit_current": (
+        "weatherbit_current.json",
+        WeatherbitResponse,
+        WeatherbitResponse.from_api,
+        None,
+    ),
+}
+
+
+def load_body(file_name: str, list_key: str | None, scale: int) -> bytes:
+    """Recorded body with its list repeated ``scale`` times."""
+    data = json.loads((PAYLOADS_DIR / file_name).read_bytes())
+    if list_key is not None and scale > 1:
+        data[list_key] = data[list_key] * scale
+    return json.dumps(data).encode("utf-8")
+
+
+def time_call(function, iterations: int) -> float:
+    """Mean duration of a call in microseconds."""
+    for _ in range(min(50, iterations)):
+        function()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        function()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Run the benchmark and store the report."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--scale", type=int, nargs="+", default=[1, 10])
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args(argv)
+
+    results: dict[str, dict] = {}
+    for name, (file_name, model, from_dict, list_key) in CASES.items():
+        scales = args.scale if list_key is not None else [1]
+        for scale in scales:
+            body = load_body(file_name, list_key, scale)
+            # Ambas rutas deben producir el mismo modelo
+            assert model.from_json(body) == from_dict(json.loads(body)), name
+            iterations = max(10, args.iterations // scale)
+            dict_us = time_call(lambda: from_dict(json.loads(body)), iterations)
+            bytes_us = time_call(lambda: model.from_json(body), iterations)
+            key = name if scale == 1 else f"{name}_x{scale}"
+            results[key] = {
+                "bytes": len(body),
+                "dict_us": round(dict_us, 3),
+                "from_json_us": round(bytes_us, 3),
+                "speedup": round(dict_us / bytes_us, 3),
+            }
+
+    report = {
+        "benchmark": "parsing",
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "git": git_revision(),
+        "parameters": {"iterations": args.iterations, "scale": args.scale},
+        "models": results,
+    }
+
+    output = args.output
+    if output is None:
+        stamp = datetime.now().strftime("%Y%m%dT%H%M%S")
+        output = RESULTS_DIR / f"parsing-{report['git']['commit'][:10]}-{stamp}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+    for key, values in results.items():
+        print(
+            f"{key:<32} {values['bytes']:>8} B  dict {values['dict_us']:>10} us"
+            f"  from_json {values['from_json_us']:>10} us  x{values['speedup']}"
+        )
+    print(f"Report written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""Freshness of the SolaxCloud readings with fixed and adaptive polling.
+
+Simulates ``--hours`` of a dongle uploading every ``--period`` seconds at a
+random phase (with some jitter, a time zone offset and a delay until the
+reading can be fetched) and polls it in simulated time:
+
+- fixed: every DAEMON_INTERVAL_SECONDS, like the daemon without
+  ADAPTIVE_POLLING;
+- adaptive: when ``PollScheduler.next_poll`` says;
+- daylight: adaptive plus the ``DaylightPolicy`` night heartbeat, at
+  ``--latitude`` / ``--longitude``.
+
+Reports the polls and the freshness lag (seconds between a reading becoming
+available and being fetched) of the readings uploaded during the day. A
+dongle outage in the middle of the run shows the back-off.
+
+Usage:
+    python -m benchmarks.polling --hours 24
+"""
+
+import argparse
+import json
+import random
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks.ingestion import RESULTS_DIR, git_revision
+from solarxdatahub.core.scheduler import DaylightPolicy, PollScheduler
+from solarxdatahub.models.records import UPLOAD_TIME_FORMAT
+
+
+class SimulatedDongle:
+    """Uploads of a dongle, as seen through the SolaxCloud API."""
+
+    def __init__(self, args: argparse.Namespace, start: float):
+        rng = random.Random(args.seed)
+        phase = rng.uniform(0, args.period)
+        self.timezone = 3600.0
+        self.uploads = []
+        moment = start + phase
+        outage = (start + args.hours * 1800, start + args.hours * 1800 + 3600)
+        while moment < start + args.hours * 3600:
+            if not outage[0] <= moment < outage[1]:
+                # (hora local del dongle, momento en que se puede consultar)
+                self.uploads.append(
+                    (moment - self.timezone, moment + args.delay + rng.uniform(0, 5))
+                )
+            moment += args.period + rng.uniform(-args.jitter, args.jitter)
+
+    def poll(self, now: float) -> tuple[float, float] | None:
+        """Latest reading available at ``now``: (upload, available at)."""
+        latest = None
+        for upload, available in self.uploads:
+            if available > now:
+                break
+            latest = (upload, available)
+        return latest
+
+
+def simulate(
+    dongle: SimulatedDongle,
+    start: float,
+    hours: float,
+    next_wait,
+    sun: DaylightPolicy,
+    daylight: DaylightPolicy | None = None,
+) -> dict:
+    """Poll the dongle with ``next_wait(scheduler, now)`` seconds between polls.
+
+    The lag is measured on the readings uploaded during the day (``sun``).
+    """
+    scheduler = PollScheduler()
+    now = start
+    polls = 0
+    lags = []
+    last_upload = None
+    while now < start + hours * 3600:
+        if daylight is None or daylight.should_poll(now):
+            if daylight is not None:
+                daylight.record_poll(now)
+            polls += 1
+            reading = dongle.poll(now)
+            if reading is None:
+                scheduler.observe_failure()
+            else:
+                upload, available = reading
+                upload_time = datetime.fromtimestamp(upload, timezone.utc).strftime(
+                    UPLOAD_TIME_FORMAT
+                )
+                scheduler.observe("SIMULATED", upload_time, seen_at=now)
+                if upload != last_upload:
+                    if sun.is_daylight(available):
+                        lags.append(now - available)
+                    last_upload = upload
+        wait = next_wait(scheduler, now)
+        now += daylight.next_wait(wait, now) if daylight is not None else wait
+    lags = np.array(lags)
+    return {
+        "polls": polls,
+        "daylight_readings": len(lags),
+        "lag_mean_s": round(float(lags.mean()), 1),
+        "lag_p95_s": round(float(np.percentile(lags, 95)), 1),
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Run the simulation and store the report."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--hours", type=float, default=24.0)
+    parser.add_argument("--period", type=float, default=300.0)
+    parser.add_argument("--jitter", type=float, default=3.0)
+    parser.add_argument("--delay", type=float, default=20.0)
+    parser.add_argument("--interval", type=float, default=300.0)
+    parser.add_argument("--latitude", type=float, default=40.4168)
+    parser.add_argument("--longitude", type=float, default=-3.7038)
+    parser.add_argument("--start", type=datetime.fromisoformat, default="2025-03-20")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args(argv)
+
+    start = args.start.replace(tzinfo=timezone.utc).timestamp()
+    dongle = SimulatedDongle(args, start)
+    sun = DaylightPolicy(args.latitude, args.longitude)
+    report = {
+        "benchmark": "polling",
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "git": git_revision(),
+        "parameters": vars(args) | {"output": None, "start": args.start.isoformat()},
+        "fixed": simulate(
+            dongle, start, args.hours, lambda scheduler, now: args.interval, sun
+        ),
+        "adaptive": simulate(
+            dongle,
+            start,
+            args.hours,
+            lambda scheduler, now: scheduler.next_poll(now, default=args.interval),
+            sun,
+        ),
+        "daylight": simulate(
+            dongle,
+            start,
+            args.hours,
+            lambda scheduler, now: scheduler.next_poll(now, default=args.interval),
+            sun,
+            DaylightPolicy(args.latitude, args.longitude),
+        ),
+    }
+
+    output = args.output
+    if output is None:
+        stamp = datetime.now().strftime("%Y%m%dT%H%M%S")
+        output = RESULTS_DIR / f"polling-{report['git']['commit'][:10]}-{stamp}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+    for mode in ("fixed", "adaptive", "daylight"):
+        print(f"{mode:<9} {json.dumps(report[mode])}")
+    print(f"Report written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Cost of evaluating the windowed notification rules per reading.
+
+Feeds ``--days`` of synthetic 5-minute readings (a sunny day with passing
+clouds, a battery cycling and a shaded string) for ``--inverters`` inverters
+to the ``RulesEngine`` and reports the microseconds per ``observe`` and the
+number of notifications produced, against the instantaneous thresholds of
+``NtfyNotification.check_energy`` on the same readings.
+
+Usage:
+    python -m benchmarks.rules --days 7 --inverters 4
+"""
+
+import argparse
+import json
+import math
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from benchmarks.ingestion import RESULTS_DIR, git_revision
+from solarxdatahub.config import Ntfy
+from solarxdatahub.core.rules import RulesEngine
+from solarxdatahub.models.records import UPLOAD_TIME_FORMAT, ReadingRecord
+
+
+def readings(days: int, inverters: int, start: datetime):
+    """Synthetic readings, one every 5 minutes per inverter."""
+    for step in range(days * 288):
+        moment = start + timedelta(minutes=5 * step)
+        hour = moment.hour + moment.minute / 60.0
+        sun = max(math.sin((hour - 7.0) / 12.0 * math.pi), 0.0)
+        # Nube de 5 minutos cada 40 minutos
+        cloud = 0.2 if step % 8 == 3 else 1.0
+        for inverter_id in range(1, inverters + 1):
+            production = 5000.0 * sun * cloud
+            # El string 2 del inversor 1 tiene sombra por la tarde
+            shade = 0.4 if inverter_id == 1 and hour > 15 else 1.0
+            load = 600.0 + 1500.0 * (18 <= moment.hour < 21)
+            yield ReadingRecord(
+                inverter_id=inverter_id,
+                fecha=moment.strftime("%Y-%m-%d"),
+                periodo=moment.strftime("%H"),
+                minute=moment.strftime("%M"),
+                uploadTime=moment.strftime(UPLOAD_TIME_FORMAT),
+                acpower=production,
+                yieldtoday=0.0,
+                yieldtotal=0.0,
+                feedinpower=production - load,
+                feedinenergy=0.0,
+                consumeenergy=0.0,
+                powerdc1=production / 2,
+                powerdc2=production / 2 * shade,
+                soc=max(100.0 - (step % 288) / 2.5, 5.0),
+            )
+
+
+def instantaneous_flips(records: list[ReadingRecord]) -> int:
+    """State changes of the single-reading thresholds of ``check_energy``."""
+    margin = float(Ntfy.NTFY_EXCESS_MARGIN)
+    last: dict[int, str | None] = {}
+    flips = 0
+    for record in records:
+        if record.feedinpower > margin:
+            state = "energy_available"
+        elif record.feedinpower < -margin:
+            state = "high_consumption"
+        else:
+            continue
+        if last.get(record.inverter_id) != state:
+            flips += 1
+        last[record.inverter_id] = state
+    return flips
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Run the benchmark and store the report."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--inverters", type=int, default=4)
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args(argv)
+
+    start = datetime(2025, 6, 1)
+    records = list(readings(args.days, args.inverters, start))
+    engine = RulesEngine()
+    events = []
+    started = time.perf_counter()
+    for record in records:
+        events.extend(engine.observe(record))
+    elapsed = time.perf_counter() - started
+
+    by_type: dict[str, int] = {}
+    for event in events:
+        by_type[event.notification_type] = by_type.get(event.notification_type, 0) + 1
+    report = {
+        "benchmark": "rules",
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "git": git_revision(),
+        "parameters": {"days": args.days, "inverters": args.inverters},
+        "readings": len(records),
+        "observe": {"us_per_reading": round(elapsed / len(records) * 1e6, 2)},
+        "notifications": {
+            "rules": len(events),
+            "instantaneous": instantaneous_flips(records),
+            "by_type": by_type,
+        },
+    }
+
+    output = args.output
+    if output is None:
+        stamp = datetime.now().strftime("%Y%m%dT%H%M%S")
+        output = RESULTS_DIR / f"rules-{report['git']['commit'][:10]}-{stamp}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+    print(json.dumps(report["observe"]), json.dumps(report["notifications"]))
+    print(f"Report written to {output}")
+
+
+if __name__ == "__main__":
+    main()
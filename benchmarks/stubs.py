@@ -0,0 +1,189 @@
+"""Local stand-in for the HTTP providers.
+
+``ProviderStub`` serves the recorded payloads of ``benchmarks/payloads`` for
+SolaxCloud, OpenWeather, Weatherbit and ntfy with a configurable latency and
+error rate. It does not import the data hub, so it can be started before the
+configuration is read from the environment.
+"""
+
+import json
+import random
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+PAYLOADS_DIR = Path(__file__).parent / "payloads"
+
+# Ruta -> fichero con la respuesta grabada
+ROUTES = {
+    ("POST", "/solaxcloud"): "solaxcloud.json",
+    ("GET", "/openweather/weather"): "openweather_current.json",
+    ("GET", "/openweather/air_pollution"): "openweather_air_pollution.json",
+    ("GET", "/openweather/forecast"): "openweather_forecast.json",
+    ("GET", "/weatherbit/current"): "weatherbit_current.json",
+}
+
+# El dongle sube una lectura nueva cada 5 minutos
+UPLOAD_INTERVAL = timedelta(minutes=5)
+
+
+def load_payload(name: str) -> dict:
+    """Load a recorded payload.
+
+    Args:
+        name (str): File name inside ``benchmarks/payloads``.
+
+    Returns:
+        dict: The decoded JSON document.
+    """
+    return json.loads((PAYLOADS_DIR / name).read_text(encoding="utf-8"))
+
+
+class ProviderStub:
+    """HTTP server impersonating every external API used by the data hub.
+
+    Each SolaxCloud response advances ``uploadTime`` by five minutes so every
+    poll carries a new reading, unless ``repeat_readings`` is set to reproduce
+    a dongle that has not uploaded anything new. A poll for another dongle
+    (``wifiSn``) than the recorded one answers with the reading of a made-up
+    inverter of that dongle; every poll is kept in ``polls``.
+    """
+
+    def __init__(
+        self,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        error_rate: float = 0.0,
+        repeat_readings: bool = False,
+        seed: int = 0,
+    ):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.repeat_readings = repeat_readings
+        self.requests: Counter = Counter()
+        # (momento de llegada, wifiSn) de cada consulta a SolaxCloud
+        self.polls: list[tuple[float, str]] = []
+        self.errors: Counter = Counter()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._bodies = {
+            route: json.dumps(load_payload(name)).encode("utf-8")
+            for route, name in ROUTES.items()
+        }
+        self._solax = load_payload("solaxcloud.json")
+        self._upload_time = datetime.strptime(
+            self._solax["result"]["uploadTime"], "%Y-%m-%d %H:%M:%S"
+        )
+        self._server: ThreadingHTTPServer | None = None
+        self._thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        """Root URL of the running server."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> str:
+        """Start serving on a free local port.
+
+        Returns:
+            str: The root URL of the server.
+        """
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            """Request handler bound to this stub."""
+
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):  # noqa: N802
+                stub.handle(self, "GET")
+
+            def do_POST(self):  # noqa: N802
+                stub.handle(self, "POST")
+
+            def log_message(self, format, *args):  # noqa: A002
+                """Silence the per request log of the standard library."""
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="provider-stub", daemon=True
+        )
+        self._thread.start()
+        return self.base_url
+
+    def stop(self) -> None:
+        """Stop the server."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def handle(self, request: BaseHTTPRequestHandler, method: str) -> None:
+        """Answer a request with its recorded payload.
+
+        Args:
+            request (BaseHTTPRequestHandler): The request being served.
+            method (str): The HTTP method.
+        """
+        length = int(request.headers.get("Content-Length") or 0)
+        body = request.rfile.read(length) if length else b""
+        path = request.path.split("?", 1)[0]
+        route = "/ntfy" if path.startswith("/ntfy/") else path
+
+        with self._lock:
+            if (method, route) == ("POST", "/solaxcloud"):
+                self.polls.append((time.time(), self._wifi_sn(body)))
+            self.requests[route] += 1
+            delay = self.latency_ms + self._random.uniform(0.0, self.jitter_ms)
+            failed = self._random.random() < self.error_rate
+            if failed:
+                self.errors[route] += 1
+        if delay > 0:
+            time.sleep(delay / 1000.0)
+
+        if failed:
+            self._send(request, 503, b'{"message": "Service Unavailable"}')
+        elif route == "/ntfy" and method == "POST":
+            self._send(request, 200, b'{"event": "message"}')
+        elif (method, route) == ("POST", "/solaxcloud"):
+            self._send(request, 200, self._next_reading(body))
+        elif (method, route) in self._bodies:
+            self._send(request, 200, self._bodies[(method, route)])
+        else:
+            self._send(request, 404, b'{"message": "Not Found"}')
+
+    def _wifi_sn(self, body: bytes) -> str:
+        """Dongle asked in the body of a SolaxCloud request."""
+        default = self._solax["result"]["sn"]
+        return json.loads(body).get("wifiSn", default) if body else default
+
+    def _next_reading(self, body: bytes = b"") -> bytes:
+        """Build the next SolaxCloud reading for the dongle asked in ``body``."""
+        result = dict(self._solax["result"])
+        wifi_sn = self._wifi_sn(body)
+        with self._lock:
+            if not self.repeat_readings:
+                self._upload_time += UPLOAD_INTERVAL
+            upload_time = self._upload_time
+        if wifi_sn != result["sn"]:
+            result["sn"] = wifi_sn
+            result["inverterSN"] = f"INV{wifi_sn}"
+        result["uploadTime"] = upload_time.strftime("%Y-%m-%d %H:%M:%S")
+        result["utcDateTime"] = (upload_time - timedelta(hours=1)).strftime(
+            "%Y-%m-%dT%H:%M:%SZ"
+        )
+        return json.dumps({**self._solax, "result": result}).encode("utf-8")
+
+    @staticmethod
+    def _send(request: BaseHTTPRequestHandler, status: int, body: bytes) -> None:
+        request.send_response(status)
+        request.send_header("Content-Type", "application/json")
+        request.send_header("Content-Length", str(len(body)))
+        request.end_headers()
+        request.wfile.write(body)
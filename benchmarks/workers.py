@@ -0,0 +1,240 @@
+"""Fleet throughput of the worker mode with 1..N workers.
+
+Seeds a temporary SQLite database (``STORAGE_BACKEND=sqlite``, shared by the
+workers as a MySQL server would be) with ``--inverters`` inverters, serves
+every dongle from ``ProviderStub`` with ``--latency-ms`` per request and runs
+``python -m solarxdatahub --worker`` processes with ``--slot-seconds`` slots.
+For every worker count of ``--workers``, over ``--slots`` slots after a warm-up
+slot, reports the fleet coverage of each slot, the seconds from the start of
+the slot to the last poll, the fleet polled per second and the dongles polled
+more than once in the same slot (which must be none, warm-up included).
+
+The failover run starts the largest worker count and kills one worker
+(SIGKILL, no clean leave) just before the first measured slot: its share has
+to be taken over by the others within the slot.
+
+The replicas run starts ``--replicas`` one-shot runs of the data hub at once
+(an overlapping cron, a blue/green deploy) with empty request logs: each
+weather endpoint must be called once, not once per replica.
+
+Usage:
+    python -m benchmarks.workers --inverters 200 --workers 1 2 4
+"""
+
+import argparse
+import json
+import math
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+
+from benchmarks.ingestion import RESULTS_DIR, configure_environment, git_revision
+from benchmarks.stubs import ProviderStub
+
+ROOT = Path(__file__).parent.parent
+
+
+def seed_fleet(sqlite_dir: Path, inverters: int) -> list[str]:
+    """Store ``inverters`` inverters and the request options, returning the SNs."""
+    # pylint: disable=import-outside-toplevel
+    from solarxdatahub.database.sqlite_database import SQLiteDatabase
+
+    fleet = [f"SR{number:08d}" for number in range(1, inverters + 1)]
+    database = SQLiteDatabase(str(sqlite_dir))
+    database.connect()
+    try:
+        database.write(
+            "INSERT INTO solaxcloud.master_tb_inverters "
+            "(id, inverterSN, sn, inverterType, site_name) VALUES "
+            "(%(id)s, %(inverterSN)s, %(sn)s, '14', 'benchmark') "
+            "ON DUPLICATE KEY UPDATE sn = VALUES(sn)",
+            [
+                {"id": number, "inverterSN": f"INV{sn}", "sn": sn}
+                for number, sn in enumerate(fleet, start=1)
+            ],
+        )
+        database.write(
+            "INSERT INTO openweather.master_tb_request_options (id, request_type) "
+            "VALUES (%(id)s, %(request_type)s) "
+            "ON DUPLICATE KEY UPDATE request_type = VALUES(request_type)",
+            [
+                {"id": 1, "request_type": "weather"},
+                {"id": 2, "request_type": "air_pollution"},
+                {"id": 3, "request_type": "forecast"},
+            ],
+        )
+    finally:
+        database.disconnect()
+    return fleet
+
+
+def slot_stats(
+    polls: list[tuple[float, str]], fleet: list[str], slot: float, length: float
+) -> dict:
+    """Coverage and timing of the polls of one slot."""
+    moments = [moment for moment, sn in polls if slot <= moment < slot + length]
+    polled = Counter(sn for moment, sn in polls if slot <= moment < slot + length)
+    covered = len(set(polled).intersection(fleet))
+    last = max(moments) - slot if moments else None
+    return {
+        "coverage": round(covered / len(fleet), 4),
+        "last_poll_s": round(last, 2) if last is not None else None,
+        "fleet_per_second": round(covered / last, 2) if last else 0.0,
+    }
+
+
+def prepare(stub: ProviderStub, args: argparse.Namespace) -> tuple[Path, list[str]]:
+    """Point the environment at the stub and a fresh seeded database."""
+    base_url = stub.start()
+    workdir = Path(tempfile.mkdtemp(prefix="solarxdatahub-workers-"))
+    configure_environment(
+        base_url,
+        workdir,
+        argparse.Namespace(
+            read_replica=False,
+            log_level="WARNING",
+            backend="sqlite",
+            http_cache=False,
+            query_cache=True,
+            no_circuit_breaker=True,
+        ),
+    )
+    return workdir, seed_fleet(workdir / "sqlite", args.inverters)
+
+
+def run_workers(args: argparse.Namespace, count: int, kill: bool = False) -> dict:
+    """Run ``count`` workers over a fresh database and measure the slots."""
+    stub = ProviderStub(latency_ms=args.latency_ms, seed=args.seed)
+    workdir, fleet = prepare(stub, args)
+    processes = []
+    try:
+        for number in range(count):
+            env = os.environ | {
+                "WORKER_ID": f"worker-{number}",
+                "STATE_DIR": str(workdir / f"state-{number}"),
+                "LOG_FILE": str(workdir / f"worker-{number}.log"),
+                "WORKER_SLOT_SECONDS": str(args.slot_seconds),
+                "WORKER_HEARTBEAT_SECONDS": "1",
+                "WORKER_LEASE_SECONDS": "3",
+                "METRICS_PORT": "",
+            }
+            processes.append(
+                subprocess.Popen(
+                    [sys.executable, "-m", "solarxdatahub", "--worker"],
+                    cwd=ROOT,
+                    env=env,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL,
+                )
+            )
+        # La primera ranura completa es de calentamiento
+        first = math.ceil(time.time() / args.slot_seconds) * args.slot_seconds
+        measured = [first + args.slot_seconds * (n + 1) for n in range(args.slots)]
+        if kill:
+            time.sleep(max(0.0, measured[0] - 0.2 - time.time()))
+            processes[0].kill()
+        time.sleep(max(0.0, measured[-1] + args.slot_seconds - time.time()))
+    finally:
+        for process in processes:
+            if process.poll() is None:
+                process.send_signal(signal.SIGTERM)
+        for process in processes:
+            process.wait(timeout=60)
+        stub.stop()
+
+    per_slot = Counter(
+        (int(moment // args.slot_seconds), sn) for moment, sn in stub.polls
+    )
+    return {
+        "workers": count,
+        "slots": [
+            slot_stats(stub.polls, fleet, slot, args.slot_seconds) for slot in measured
+        ],
+        "duplicate_polls": sum(polls - 1 for polls in per_slot.values() if polls > 1),
+    }
+
+
+def run_replicas(args: argparse.Namespace, count: int) -> dict:
+    """Start ``count`` one-shot runs at once and count the weather calls."""
+    stub = ProviderStub(latency_ms=args.latency_ms, seed=args.seed)
+    workdir, _ = prepare(stub, args)
+    try:
+        processes = [
+            subprocess.Popen(
+                [sys.executable, "-m", "solarxdatahub"],
+                cwd=ROOT,
+                env=os.environ | {"STATE_DIR": str(workdir / f"state-{number}")},
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+            for number in range(count)
+        ]
+        for process in processes:
+            process.wait(timeout=300)
+    finally:
+        stub.stop()
+    return {
+        "replicas": count,
+        "weather_calls": {
+            route: stub.requests[route]
+            for route in ("/weatherbit/current", "/openweather/weather")
+        },
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Run the benchmark and store the report."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--inverters", type=int, default=100)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--slot-seconds", type=int, default=15)
+    parser.add_argument("--slots", type=int, default=2)
+    parser.add_argument("--replicas", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args(argv)
+
+    runs = {str(count): run_workers(args, count) for count in args.workers}
+    failover = run_workers(args, max(args.workers), kill=True)
+    replicas = run_replicas(args, args.replicas)
+    baseline = runs[str(min(args.workers))]["slots"][-1]["fleet_per_second"]
+    for run in runs.values():
+        run["fleet_per_second"] = run["slots"][-1]["fleet_per_second"]
+        run["speedup"] = (
+            round(run["fleet_per_second"] / baseline, 2) if baseline else None
+        )
+
+    report = {
+        "benchmark": "workers",
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "git": git_revision(),
+        "parameters": vars(args) | {"output": None},
+        "runs": runs,
+        "failover": failover,
+        "replicas": replicas,
+    }
+
+    output = args.output
+    if output is None:
+        stamp = datetime.now().strftime("%Y%m%dT%H%M%S")
+        output = RESULTS_DIR / f"workers-{report['git']['commit'][:10]}-{stamp}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+    for name, run in list(runs.items()) + [
+        ("failover", failover),
+        ("replicas", replicas),
+    ]:
+        print(f"{name:<9} {json.dumps(run)}")
+    print(f"Report written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,87 @@
 """Main module for the SolarX Data Hub application."""
 
+import argparse
 import logging
 
-from solarxdatahub.core.controller import run
+from solarxdatahub.analytics.archive import run_archive
+from solarxdatahub.config import Logging
+from solarxdatahub.core.controller import prepare_environment, run, run_daemon
+from solarxdatahub.core.kpi import run_kpi
+from solarxdatahub.core.workers import run_worker
+from solarxdatahub.database.connection import DataBaseConnection
+from solarxdatahub.database.sync import sync_upstream
+from solarxdatahub.utils.profiling import get_cycle_profiler
 
 logger = logging.getLogger(__name__)
 
 
+def parse_args() -> argparse.Namespace:
+    """Parse the command line arguments."""
+    parser = argparse.ArgumentParser(prog="solarxdatahub")
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="Poll continuously instead of running a single cycle.",
+    )
+    parser.add_argument(
+        "--worker",
+        action="store_true",
+        help="Poll the share of the inverter fleet of this worker (see WORKER_*).",
+    )
+    parser.add_argument(
+        "--interval",
+        type=int,
+        default=None,
+        help="Seconds between cycles in daemon mode (DAEMON_INTERVAL_SECONDS).",
+    )
+    parser.add_argument(
+        "--profile",
+        type=int,
+        default=None,
+        metavar="N",
+        help="Profile the first N cycles (PROFILE_CYCLES), see PROFILE_DIR.",
+    )
+    parser.add_argument(
+        "--sync",
+        action="store_true",
+        help="Send the local SQLite data (SQLITE_DIR) to the remote MySQL and exit.",
+    )
+    parser.add_argument(
+        "--archive",
+        action="store_true",
+        help="Export the new rows to the Parquet archive (ARCHIVE_DIR) and exit.",
+    )
+    parser.add_argument(
+        "--kpi",
+        action="store_true",
+        help="Compute the KPIs of the readings without them (tb_energy_kpi) and exit.",
+    )
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
-    run()
-    logger.info("Data hub completed")
+    args = parse_args()
+    if args.profile is not None:
+        get_cycle_profiler().arm(args.profile)
+    if args.archive:
+        Logging.configure_logger()
+        run_archive()
+        logger.info("Archive export completed")
+    elif args.kpi:
+        prepare_environment()
+        try:
+            run_kpi()
+        finally:
+            DataBaseConnection.disconnect()
+        logger.info("KPI computation completed")
+    elif args.sync:
+        Logging.configure_logger()
+        sync_upstream()
+        logger.info("Upstream sync completed")
+    elif args.worker:
+        run_worker()
+    elif args.daemon:
+        run_daemon(args.interval)
+    else:
+        run()
+        logger.info("Data hub completed")
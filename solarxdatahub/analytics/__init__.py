@@ -0,0 +1 @@
+"""Package for the analytics on the archived data."""
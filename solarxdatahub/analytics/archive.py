@@ -0,0 +1,280 @@
+"""Incremental Parquet archive of the measurement and weather tables.
+
+Long analytical scans are moved off the OLTP database: the rows inserted or
+updated since the last export are streamed in ``ARCHIVE_CHUNK_SIZE`` batches
+and written to compressed Parquet files partitioned by month::
+
+    ARCHIVE_DIR/solaxcloud/tb_energy_data/month=2025-02/data.parquet
+
+Every export writes the new rows of a month to a ``part-*.parquet`` file;
+once the table is exported the touched months are compacted into
+``data.parquet`` keeping the last version of every ``id`` (the upserts keep
+the id of the row), so a month holds each row once. The watermark of every
+table (``COALESCE(timestamp_update, timestamp_insert)``) is kept in the
+``archive`` state document and only advanced after the compaction. An
+interrupted export is repeated from the previous watermark.
+
+``pyarrow`` is an optional dependency, only needed by this module.
+"""
+
+import os
+import re
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pandas as pd
+from loguru import logger
+
+from solarxdatahub.config import Archive, Database
+from solarxdatahub.database.connection import DataBaseConnection
+from solarxdatahub.database.crud import get_archive_rows
+from solarxdatahub.database.sqlite_database import MYSQL_SCHEMA_FILE
+from solarxdatahub.utils.metrics import timed
+from solarxdatahub.utils.state import StateStore
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - depende del entorno
+    pa = None
+
+# Tabla archivada -> columna que define el mes de la partición
+ARCHIVE_TABLES = {
+    "solaxcloud.tb_energy_data": "fecha",
+    "solaxcloud.tb_phase_power_data": "fecha",
+    "solaxcloud.tb_battery_data": "fecha",
+    "solaxcloud.tb_energy_kpi": "fecha",
+    "weatherbit.tb_hourly_data": "calculation_datetime",
+    "openweather.tb_current_weather": "calculation_datetime",
+    "openweather.tb_air_pollution": "calculation_datetime",
+}
+DATA_FILE = "data.parquet"
+# Filas por row group: con los datos ordenados por inversor, las estadísticas
+# de cada row group permiten saltar los de otros inversores al filtrar
+ROW_GROUP_SIZE = 16384
+
+_TABLE_STATEMENT = re.compile(
+    r"^USE `(?P<use>\w+)`;"
+    r"|^CREATE TABLE IF NOT EXISTS `(?P<table>\w+)` \((?P<body>.*?)\n\)[^;]*;",
+    re.M | re.S,
+)
+_COLUMN = re.compile(r"^`(\w+)` (\w+)")
+
+
+def _require_pyarrow() -> None:
+    if pa is None:
+        raise ImportError("The Parquet archive requires pyarrow: pip install pyarrow")
+
+
+def _arrow_type(mysql_type: str):
+    if mysql_type in ("int", "smallint", "tinyint", "bigint"):
+        return pa.int64()
+    if mysql_type in ("float", "double", "decimal"):
+        return pa.float64()
+    if mysql_type == "date":
+        return pa.date32()
+    if mysql_type == "datetime":
+        return pa.timestamp("s")
+    # varchar, text y time (pymysql devuelve timedelta, SQLite texto)
+    return pa.string()
+
+
+def arrow_schema(table: str) -> "pa.Schema":
+    """Arrow schema of a table, from the column types of create_tables.sql.
+
+    Args:
+        table (str): The table, qualified with its schema.
+
+    Returns:
+        pa.Schema: One field per column of the table.
+    """
+    _require_pyarrow()
+    schema_name, table_name = table.split(".")
+    schema = None
+    for match in _TABLE_STATEMENT.finditer(MYSQL_SCHEMA_FILE.read_text("utf-8")):
+        if match.group("use"):
+            schema = match.group("use")
+        elif schema == schema_name and match.group("table") == table_name:
+            fields = []
+            for line in match.group("body").splitlines():
+                column = _COLUMN.match(line.strip())
+                if column:
+                    name, mysql_type = column.groups()
+                    fields.append(pa.field(name, _arrow_type(mysql_type)))
+            return pa.schema(fields)
+    raise ValueError(f"Table {table} is not in {MYSQL_SCHEMA_FILE.name}")
+
+
+def table_dir(table: str, root: str | None = None) -> Path:
+    """Directory of the archived table (one month=YYYY-MM folder per month)."""
+    return Path(root or Archive.ARCHIVE_DIR, *table.split("."))
+
+
+def _normalize(rows: list[dict], schema: "pa.Schema") -> list[dict]:
+    text_columns = [field.name for field in schema if pa.types.is_string(field.type)]
+    for row in rows:
+        for name in text_columns:
+            value = row.get(name)
+            if isinstance(value, timedelta):
+                # TIME de MySQL: HH:MM:SS
+                hours, seconds = divmod(int(value.total_seconds()), 3600)
+                row[name] = f"{hours:02d}:{seconds // 60:02d}:{seconds % 60:02d}"
+    return rows
+
+
+def compact_month(month_dir: Path, schema: "pa.Schema") -> int:
+    """Merge the part files of a month into data.parquet.
+
+    Rows are deduplicated by ``id`` keeping the most recent export and sorted
+    by inverter (when the table has one) and id.
+
+    Args:
+        month_dir (Path): The month=YYYY-MM directory.
+        schema (pa.Schema): Schema of the table.
+
+    Returns:
+        int: Rows of the compacted month.
+    """
+    parts = sorted(month_dir.glob("part-*.parquet"))
+    files = [month_dir / DATA_FILE] if (month_dir / DATA_FILE).exists() else []
+    table = pa.concat_tables(
+        pq.read_table(path, schema=schema) for path in files + parts
+    )
+    positions = table.append_column("_position", pa.array(range(len(table))))
+    last = positions.group_by("id").aggregate([("_position", "max")])
+    sort_keys = [
+        (name, "ascending") for name in ("inverter_id", "id") if name in schema.names
+    ]
+    table = table.take(last["_position_max"]).sort_by(sort_keys)
+
+    temporary = month_dir / f"{DATA_FILE}.tmp"
+    pq.write_table(
+        table,
+        temporary,
+        compression=Archive.ARCHIVE_COMPRESSION,
+        row_group_size=ROW_GROUP_SIZE,
+    )
+    os.replace(temporary, month_dir / DATA_FILE)
+    for path in parts:
+        path.unlink()
+    return len(table)
+
+
+def export_table(
+    table: str,
+    since: str | None = None,
+    root: str | None = None,
+    chunk_size: int | None = None,
+) -> tuple[int, str | None]:
+    """Archive the rows of a table changed since a watermark.
+
+    Args:
+        table (str): One of ``ARCHIVE_TABLES``.
+        since (str | None, optional): Watermark of the previous export.
+            Defaults to None (every row).
+        root (str | None, optional): Archive directory. Defaults to ARCHIVE_DIR.
+        chunk_size (int | None, optional): Rows per batch. Defaults to
+            ARCHIVE_CHUNK_SIZE.
+
+    Returns:
+        tuple[int, str | None]: Rows exported and the new watermark.
+    """
+    _require_pyarrow()
+    partition_column = ARCHIVE_TABLES[table]
+    schema = arrow_schema(table)
+    directory = table_dir(table, root)
+    stamp = datetime.now().strftime("%Y%m%dT%H%M%S%f")
+    writers: dict[str, pq.ParquetWriter] = {}
+    chunk_size = int(chunk_size or Archive.ARCHIVE_CHUNK_SIZE)
+    exported, watermark = 0, since
+
+    try:
+        for batch in get_archive_rows(table, since, chunk_size):
+            months: dict[str, list[dict]] = {}
+            for row in batch:
+                changed_at = str(row.pop("changed_at"))
+                if watermark is None or changed_at > watermark:
+                    watermark = changed_at
+                months.setdefault(str(row[partition_column])[:7], []).append(row)
+            for month, rows in months.items():
+                if month not in writers:
+                    month_dir = directory / f"month={month}"
+                    month_dir.mkdir(parents=True, exist_ok=True)
+                    writers[month] = pq.ParquetWriter(
+                        month_dir / f"part-{stamp}.parquet",
+                        schema,
+                        compression=Archive.ARCHIVE_COMPRESSION,
+                    )
+                writers[month].write_table(
+                    pa.Table.from_pylist(_normalize(rows, schema), schema=schema)
+                )
+            exported += len(batch)
+    finally:
+        for writer in writers.values():
+            writer.close()
+
+    for month in writers:
+        compact_month(directory / f"month={month}", schema)
+    return exported, watermark
+
+
+def run_archive(root: str | None = None) -> dict[str, int]:
+    """Export every archived table from its watermark.
+
+    Args:
+        root (str | None, optional): Archive directory. Defaults to ARCHIVE_DIR.
+
+    Returns:
+        dict[str, int]: Rows exported per table.
+    """
+    _require_pyarrow()
+    state = StateStore("archive")
+    watermarks = state.load()
+    exported = {}
+    DataBaseConnection.connect(Database.TARGET_HOST.name)
+    try:
+        for table in ARCHIVE_TABLES:
+            with timed("archive", table=table):
+                rows, watermark = export_table(table, watermarks.get(table), root)
+            exported[table] = rows
+            if watermark:
+                watermarks[table] = watermark
+                state.save(watermarks)
+            logger.info("{} rows of {} archived", rows, table)
+    finally:
+        DataBaseConnection.disconnect(Database.TARGET_HOST.name)
+    return exported
+
+
+def read_archive(
+    table: str,
+    columns: list[str] | None = None,
+    months: list[str] | None = None,
+    root: str | None = None,
+) -> pd.DataFrame:
+    """Read an archived table.
+
+    Args:
+        table (str): One of ``ARCHIVE_TABLES``.
+        columns (list[str] | None, optional): Columns to read. Defaults to all.
+        months (list[str] | None, optional): Months (YYYY-MM) to read, the
+            other partitions are not opened. Defaults to all.
+        root (str | None, optional): Archive directory. Defaults to ARCHIVE_DIR.
+
+    Returns:
+        pd.DataFrame: The archived rows.
+    """
+    _require_pyarrow()
+    directory = table_dir(table, root)
+    if not directory.exists():
+        return pd.DataFrame(columns=columns or arrow_schema(table).names)
+    filters = [("month", "in", months)] if months else None
+    return pq.read_table(
+        directory,
+        columns=columns,
+        filters=filters,
+        partitioning=ds.partitioning(
+            pa.schema([("month", pa.string())]), flavor="hive"
+        ),
+    ).to_pandas()
@@ -0,0 +1,313 @@
+"""Analytical queries over the Parquet archive with DuckDB.
+
+The reports (daily yield, self-consumption, weather correlation) run on the
+files written by ``archive`` with an embedded vectorized engine:
+
+- The month partitions outside the requested period are not opened and the
+  date / inverter filters are pushed down to the Parquet row groups (the
+  archive is sorted by inverter).
+- The unarchived tail, the rows changed in the database after the archive
+  watermark, is read from the database and replaces the archived version of
+  the same ids, so the reports are current without scanning the tables. It
+  is loaded when a report runs, only for the views it uses and narrowed to
+  its period and inverter.
+
+``duckdb`` and ``pyarrow`` are optional dependencies, only needed here.
+
+Usage:
+    python -m solarxdatahub.analytics.query daily-yield --start 2025-01-01 --end 2025-12-31
+"""
+
+import argparse
+import sys
+from datetime import date, timedelta
+
+import pandas as pd
+from loguru import logger
+
+from solarxdatahub.analytics.archive import ARCHIVE_TABLES, arrow_schema, table_dir
+from solarxdatahub.config import Database
+from solarxdatahub.database.connection import DataBaseConnection
+from solarxdatahub.database.crud import get_archive_rows
+from solarxdatahub.utils.metrics import timed
+from solarxdatahub.utils.state import StateStore
+
+try:
+    import duckdb
+except ImportError:  # pragma: no cover - depende del entorno
+    duckdb = None
+
+# Vista de DuckDB -> tabla archivada
+VIEWS = {
+    "energy": "solaxcloud.tb_energy_data",
+    "kpi": "solaxcloud.tb_energy_kpi",
+    "weather": "weatherbit.tb_hourly_data",
+}
+
+DAILY_YIELD = """
+    SELECT inverter_id, fecha, MAX(yieldtoday) AS yield_kwh,
+        MAX(acpower) AS peak_power_w, COUNT(*) AS readings
+    FROM energy
+    WHERE {where}
+    GROUP BY inverter_id, fecha
+    ORDER BY inverter_id, fecha
+"""
+
+# La energía de cada intervalo entre lecturas está precalculada en
+# tb_energy_kpi (core.kpi) a partir de los contadores acumulados, con sus
+# reinicios ya resueltos: la energía del día es la suma de sus intervalos
+SELF_CONSUMPTION = """
+    WITH daily AS (
+        SELECT inverter_id, fecha, SUM(yield_energy) AS yield_kwh,
+            SUM(feedin_energy) AS exported_kwh,
+            SUM(consume_energy) AS imported_kwh,
+            SUM(battery_charge) AS battery_charge_kwh,
+            SUM(battery_discharge) AS battery_discharge_kwh
+        FROM kpi
+        WHERE {where}
+        GROUP BY inverter_id, fecha
+    )
+    SELECT inverter_id, fecha, yield_kwh, exported_kwh, imported_kwh,
+        battery_charge_kwh, battery_discharge_kwh,
+        GREATEST(yield_kwh - exported_kwh, 0) AS self_consumed_kwh,
+        GREATEST(yield_kwh - exported_kwh, 0) / NULLIF(yield_kwh, 0)
+            AS self_consumption_ratio,
+        GREATEST(yield_kwh - exported_kwh, 0)
+            / NULLIF(GREATEST(yield_kwh - exported_kwh, 0) + imported_kwh, 0)
+            AS self_sufficiency_ratio
+    FROM daily
+    ORDER BY inverter_id, fecha
+"""
+
+WEATHER_CORRELATION = """
+    WITH hourly AS (
+        SELECT inverter_id, fecha, periodo, AVG(acpower) AS acpower
+        FROM energy
+        WHERE {where}
+        GROUP BY inverter_id, fecha, periodo
+    )
+    SELECT h.inverter_id, COUNT(*) AS hours,
+        CORR(h.acpower, w.ghi) AS corr_ghi,
+        CORR(h.acpower, w.clouds) AS corr_clouds,
+        CORR(h.acpower, w.temp) AS corr_temp,
+        REGR_SLOPE(h.acpower, w.ghi) AS watts_per_ghi
+    FROM hourly h
+    JOIN weather w
+        ON CAST(w.calculation_datetime AS DATE) = h.fecha
+        AND HOUR(w.calculation_datetime) = h.periodo
+    WHERE {weather_where}
+    GROUP BY h.inverter_id
+    ORDER BY h.inverter_id
+"""
+
+REPORTS = {
+    "daily-yield": DAILY_YIELD,
+    "self-consumption": SELF_CONSUMPTION,
+    "weather-correlation": WEATHER_CORRELATION,
+}
+
+# Vistas que consulta cada informe
+REPORT_VIEWS = {
+    "daily-yield": ("energy",),
+    "self-consumption": ("kpi",),
+    "weather-correlation": ("energy", "weather"),
+}
+
+
+class ArchiveQuery:
+    """DuckDB session over the archive plus the unarchived tail.
+
+    Args:
+        root (str | None, optional): Archive directory. Defaults to ARCHIVE_DIR.
+        include_tail (bool, optional): Read from the database the rows changed
+            after the archive watermark. Defaults to True.
+
+    The views are created on first use; a report creates its own with the
+    tail of its period and inverter.
+    """
+
+    def __init__(self, root: str | None = None, include_tail: bool = True):
+        if duckdb is None:
+            raise ImportError("The archive queries require duckdb: pip install duckdb")
+        self.root = root
+        self.include_tail = include_tail
+        self._connection = duckdb.connect()
+        # Vista -> filtros con los que se leyó su cola
+        self._views: dict[str, tuple] = {}
+
+    def close(self) -> None:
+        """Close the DuckDB session."""
+        self._connection.close()
+
+    def __enter__(self) -> "ArchiveQuery":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _prepare(
+        self,
+        views,
+        start: date | None = None,
+        end: date | None = None,
+        inverter_id: int | None = None,
+    ) -> None:
+        """Create ``views`` with the tail narrowed to a period and inverter."""
+        scope = (start, end, inverter_id)
+        pending = [view for view in views if self._views.get(view) != scope]
+        if not pending:
+            return
+        tails = self._load_tails(pending, *scope) if self.include_tail else {}
+        for view in pending:
+            self._create_view(view, VIEWS[view], tails.get(VIEWS[view]))
+            self._views[view] = scope
+
+    def _load_tails(
+        self,
+        views: list[str],
+        start: date | None,
+        end: date | None,
+        inverter_id: int | None,
+    ) -> dict[str, pd.DataFrame]:
+        watermarks = StateStore("archive").load()
+        host_name = Database.TARGET_HOST.name
+        opened = not DataBaseConnection.is_connected(host_name)
+        if opened:
+            DataBaseConnection.connect(host_name)
+        filters = {
+            "start": start.isoformat() if start else None,
+            # El final es exclusivo: se incluye el último día completo
+            "end": (end + timedelta(days=1)).isoformat() if end else None,
+        }
+        tails = {}
+        try:
+            for view in views:
+                table = VIEWS[view]
+                filters["date_column"] = ARCHIVE_TABLES[table]
+                # La meteorología no es de un inversor
+                filters["inverter_id"] = inverter_id if view != "weather" else None
+                with timed("archive_tail", table=table):
+                    rows = [
+                        row
+                        for batch in get_archive_rows(
+                            table,
+                            watermarks.get(table),
+                            lag_tolerant=True,
+                            **filters,
+                        )
+                        for row in batch
+                    ]
+                for row in rows:
+                    del row["changed_at"]
+                tails[table] = pd.DataFrame(rows)
+                logger.debug("{} unarchived rows of {}", len(rows), table)
+        finally:
+            if opened:
+                DataBaseConnection.disconnect(host_name)
+        return tails
+
+    def _create_view(
+        self, view: str, table: str, tail: pd.DataFrame | None = None
+    ) -> None:
+        directory = table_dir(table, self.root)
+        archived = None
+        if any(directory.glob("month=*/*.parquet")):
+            files = (directory / "month=*" / "*.parquet").as_posix()
+            archived = (
+                f"SELECT * FROM read_parquet('{files}', "
+                "hive_partitioning = true, union_by_name = true)"
+            )
+        if tail is not None and not tail.empty:
+            name = f"{view}_tail"
+            partition = ARCHIVE_TABLES[table]
+            self._connection.register(f"{name}_frame", tail)
+            self._connection.execute(
+                f"CREATE OR REPLACE TEMP VIEW {name} AS SELECT *, "
+                f"strftime(CAST({partition} AS DATE), '%Y-%m') AS month "
+                f"FROM {name}_frame"
+            )
+            if archived:
+                # La versión de la base de datos sustituye a la archivada
+                archived = (
+                    f"SELECT * FROM ({archived}) "
+                    f"WHERE id NOT IN (SELECT id FROM {name}) "
+                    f"UNION ALL BY NAME SELECT * FROM {name}"
+                )
+            else:
+                archived = f"SELECT * FROM {name}"
+        if archived is None:
+            # Tabla sin datos: vista vacía con sus columnas
+            empty = arrow_schema(table).empty_table()
+            empty = empty.append_column("month", empty.column(0).cast("string"))
+            self._connection.register(f"{view}_empty", empty)
+            archived = f"SELECT * FROM {view}_empty"
+        self._connection.execute(f"CREATE OR REPLACE TEMP VIEW {view} AS {archived}")
+
+    def sql(self, query: str, params: list | None = None) -> pd.DataFrame:
+        """Run a query on the views (``energy``, ``kpi``, ``weather``).
+
+        The views hold the whole tail, not the one of the last report.
+        """
+        self._prepare(VIEWS)
+        return self._connection.execute(query, params or []).df()
+
+    def report(
+        self,
+        name: str,
+        start: date,
+        end: date,
+        inverter_id: int | None = None,
+    ) -> pd.DataFrame:
+        """Run one of ``REPORTS`` for a period.
+
+        Args:
+            name (str): The report.
+            start (date): First day of the period.
+            end (date): Last day of the period.
+            inverter_id (int | None, optional): Restrict to an inverter.
+                Defaults to every inverter.
+
+        Returns:
+            pd.DataFrame: The report rows.
+        """
+        # month permite descartar particiones enteras, fecha e inverter_id
+        # filtran los row groups de cada fichero
+        where = "month BETWEEN ? AND ? AND fecha BETWEEN ? AND ?"
+        params: list = [start.strftime("%Y-%m"), end.strftime("%Y-%m"), start, end]
+        if inverter_id is not None:
+            where += " AND inverter_id = ?"
+            params.append(int(inverter_id))
+        weather_where = "w.month BETWEEN ? AND ?"
+        query = REPORTS[name].format(where=where, weather_where=weather_where)
+        if "{weather_where}" in REPORTS[name]:
+            params += [start.strftime("%Y-%m"), end.strftime("%Y-%m")]
+        self._prepare(REPORT_VIEWS[name], start, end, inverter_id)
+        with timed("archive_query", report=name):
+            return self._connection.execute(query, params).df()
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Run a report from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("report", choices=sorted(REPORTS))
+    parser.add_argument("--start", type=date.fromisoformat, required=True)
+    parser.add_argument("--end", type=date.fromisoformat, required=True)
+    parser.add_argument("--inverter", type=int, default=None)
+    parser.add_argument(
+        "--no-tail",
+        action="store_true",
+        help="Only query the archive, without reading the database.",
+    )
+    parser.add_argument("--csv", action="store_true", help="Print CSV.")
+    args = parser.parse_args(argv)
+
+    with ArchiveQuery(include_tail=not args.no_tail) as engine:
+        result = engine.report(args.report, args.start, args.end, args.inverter)
+    if args.csv:
+        result.to_csv(sys.stdout, index=False)
+    else:
+        print(result.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
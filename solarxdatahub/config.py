@@ -1,5 +1,6 @@
 """Aplicaction configuration"""
 
+import logging
 import os
 import sys
 from enum import Enum
@@ -8,6 +9,7 @@ from loguru import logger
 
 from solarxdatahub.types.database import DatabaseConnectionConfiguration
 from solarxdatahub.types.enums import WorkEnvironment
+from solarxdatahub.utils.log_utils import InterceptHandler, QueuedSink
 
 WORK_ENVIRONMENT = getattr(
     WorkEnvironment,
@@ -33,6 +35,16 @@ class Logging:
     LOG_FILE = os.getenv("LOG_FILE", "app.log")
     LOG_FORMAT_STYLE = os.getenv("LOG_FORMAT_STYLE", "DEFAULT").upper()
     LOG_RETENTION_DAYS = os.getenv("LOG_RETENTION_DAYS", "7")
+    # Los sinks escriben desde un hilo en segundo plano (no bloquean el ciclo)
+    LOG_ENQUEUE = os.getenv("LOG_ENQUEUE", "true").lower() == "true"
+    # Mensajes en cola como máximo; si se llena se descartan en vez de bloquear
+    LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+    # Variables locales en las trazas: útil en desarrollo, caro y verboso en producción
+    LOG_DIAGNOSE = os.getenv("LOG_DIAGNOSE", "false").lower() == "true"
+    # Máximo de caracteres de las consultas/datos mostrados en los logs DEBUG (0: sin límite)
+    LOG_PAYLOAD_PREVIEW_CHARS = int(os.getenv("LOG_PAYLOAD_PREVIEW_CHARS", "500"))
+
+    _configured = False
 
     # Formato por defecto: solo el nivel aparece coloreado (usando la etiqueta <level>)
     DEFAULT_LOG_FORMAT = (
@@ -65,14 +77,22 @@ class Logging:
         )
 
     @staticmethod
-    def configure_logger():
+    def configure_logger(force: bool = False):
         """
         Configura Loguru como sistema de logging:
             - Elimina handlers previos.
             - Configura la salida en consola (con colores) y en archivo.
             - Se aplica la política de retención (borrado automático de logs antiguos) según la variable LOG_RETENTION_DAYS.
             - Se selecciona el formato en función de la variable LOG_FORMAT_STYLE.
+            - Los sinks escriben desde un hilo (LOG_ENQUEUE) para no bloquear el ciclo.
+            - El logging estándar (p. ej. mysql_database) se redirige a Loguru.
+
+        Solo se configura una vez por proceso (en modo daemon se llama en cada
+        ciclo); ``force`` vuelve a crear los sinks.
         """
+        if Logging._configured and not force:
+            return
+
         # Remover cualquier handler previo para evitar duplicados.
         logger.remove()
 
@@ -82,25 +102,49 @@ class Logging:
         else:
             format_to_use = Logging.DEFAULT_LOG_FORMAT
 
+        # Con LOG_ENQUEUE las escrituras se hacen en un hilo en segundo plano.
+        if Logging.LOG_ENQUEUE:
+            console_sink = QueuedSink.stream(sys.stdout, Logging.LOG_QUEUE_SIZE)
+            file_sink = QueuedSink.daily_file(
+                Logging.LOG_FILE,
+                int(Logging.LOG_RETENTION_DAYS),
+                Logging.LOG_QUEUE_SIZE,
+            )
+            file_options = {}
+        else:
+            console_sink = sys.stdout
+            file_sink = Logging.LOG_FILE
+            file_options = {
+                "rotation": "00:00",  # Rota el archivo a medianoche.
+                "retention": f"{Logging.LOG_RETENTION_DAYS} days",
+            }
+
         # Configurar salida en consola con colores.
         logger.add(
-            sys.stdout,
+            console_sink,
             format=format_to_use,
             level=Logging.LOG_LEVEL,
             colorize=True,  # Asegura que se interpreten las etiquetas de color.
             backtrace=False,  # Muestra backtrace detallado en errores.
-            diagnose=True,  # Información adicional en excepciones.
+            diagnose=Logging.LOG_DIAGNOSE,  # Información adicional en excepciones.
         )
 
         # Configurar salida en archivo con retención automática.
-        retention_str = f"{Logging.LOG_RETENTION_DAYS} days"
         logger.add(
-            Logging.LOG_FILE,
-            rotation="00:00",  # Rota el archivo a medianoche.
+            file_sink,
             format=format_to_use,
             level=Logging.LOG_LEVEL,
-            retention=retention_str,
+            colorize=False,
+            diagnose=Logging.LOG_DIAGNOSE,
+            **file_options,
+        )
+
+        # El logging estándar filtra por nivel antes de crear el registro, así
+        # los logger.debug de mysql_database no cuestan nada por encima de DEBUG.
+        logging.basicConfig(
+            handlers=[InterceptHandler()], level=Logging.LOG_LEVEL, force=True
         )
+        Logging._configured = True
 
 
 class Database(Enum):
@@ -176,6 +220,11 @@ class Weatherbit:
     )  # Unidades de medida (M = Métrico, I = Imperial, S = Científico)
     LANGUAGE = os.getenv("LANGUAGE", default="es")
     WB_DAILY_LIMIT = os.getenv("WB_DAILY_LIMIT", default="50")
+    # Segundos durante los que una respuesta se sirve desde la caché. Las peticiones
+    # ya van separadas 60 min (weatherbit_requests_log) y una respuesta de la caché
+    # no se registra ni se vuelve a procesar: con un TTL mayor el refresco pasa a ser
+    # el TTL, con uno menor la caché solo revalida la respuesta (ETag)
+    WB_CACHE_TTL = os.getenv("WB_CACHE_TTL", default="3600")
 
 
 class OpenWeather:
@@ -190,6 +239,47 @@ class OpenWeather:
     OW_FORECAST_URL = os.getenv("OW_FORECAST_URL")
     OW_AIR_POLLUTION_URL = os.getenv("OW_AIR_POLLUTION_URL")
     OW_DAILY_LIMIT = os.getenv("OW_DAILY_LIMIT", default="1000")
+    # Segundos durante los que una respuesta se sirve desde la caché, como
+    # WB_CACHE_TTL: por defecto es menor que los 60 min entre peticiones
+    # (openweather_requests_log) y la caché solo revalida la respuesta (ETag)
+    OW_CACHE_TTL = os.getenv("OW_CACHE_TTL", default="600")
+
+
+class State:
+    """Configuration of the local state persisted between executions"""
+
+    STATE_DIR = os.getenv("STATE_DIR", default=".state")
+
+
+class HttpCache:
+    """Configuration of the disk cache for the weather provider responses"""
+
+    HTTP_CACHE_ENABLED = os.getenv("HTTP_CACHE_ENABLED", default="true")
+    HTTP_CACHE_DIR = os.getenv("HTTP_CACHE_DIR", default=".cache/http")
+    # Tamaño máximo de la caché en disco (MB)
+    HTTP_CACHE_MAX_MB = os.getenv("HTTP_CACHE_MAX_MB", default="50")
+
+
+class QueryCache:
+    """Configuration of the cache of the database reads"""
+
+    QUERY_CACHE_ENABLED = os.getenv("QUERY_CACHE_ENABLED", default="true")
+    QUERY_CACHE_MAX_ENTRIES = os.getenv("QUERY_CACHE_MAX_ENTRIES", default="256")
+    # Segundos que se sirve un resultado sin volver a leerlo
+    QUERY_CACHE_TTL_SECONDS = os.getenv("QUERY_CACHE_TTL_SECONDS", default="300")
+
+
+class CircuitBreakers:
+    """Configuration of the circuit breakers of the external APIs"""
+
+    CIRCUIT_BREAKER_ENABLED = os.getenv("CIRCUIT_BREAKER_ENABLED", default="true")
+    # Últimas llamadas consideradas y mínimo de ellas para poder abrir el circuito
+    CIRCUIT_WINDOW = os.getenv("CIRCUIT_WINDOW", default="10")
+    CIRCUIT_MIN_CALLS = os.getenv("CIRCUIT_MIN_CALLS", default="3")
+    # Proporción de fallos de la ventana que abre el circuito
+    CIRCUIT_FAILURE_RATE = os.getenv("CIRCUIT_FAILURE_RATE", default="0.5")
+    # Segundos con el circuito abierto antes de dejar pasar una llamada de prueba
+    CIRCUIT_COOLDOWN_SECONDS = os.getenv("CIRCUIT_COOLDOWN_SECONDS", default="300")
 
 
 class Ntfy:
@@ -203,3 +293,182 @@ class Ntfy:
     NTFY_NOTIFY_REPEAT_MINUTES = os.getenv("NTFY_NOTIFY_REPEAT_MINUTES", default="30")
     # Margen de exceso para notificaciones
     NTFY_EXCESS_MARGIN = os.getenv("NTFY_EXCESS_MARGIN", default="50")
+    # Enviar las notificaciones desde hilos en segundo plano
+    NTFY_ASYNC = os.getenv("NTFY_ASYNC", default="true")
+    # Notificaciones pendientes como máximo (una por inversor)
+    NTFY_QUEUE_SIZE = os.getenv("NTFY_QUEUE_SIZE", default="100")
+    NTFY_WORKERS = os.getenv("NTFY_WORKERS", default="1")
+    # Reintentos de cada envío, con espera exponencial desde NTFY_RETRY_BACKOFF_SECONDS
+    NTFY_MAX_RETRIES = os.getenv("NTFY_MAX_RETRIES", default="3")
+    NTFY_RETRY_BACKOFF_SECONDS = os.getenv("NTFY_RETRY_BACKOFF_SECONDS", default="2")
+    # Espera máxima al salir para enviar las notificaciones pendientes
+    NTFY_DRAIN_SECONDS = os.getenv("NTFY_DRAIN_SECONDS", default="15")
+
+
+class Rules:
+    """Configuration of the windowed notification rules"""
+
+    # Lecturas guardadas por inversor (288 = 24 h con una lectura cada 5 min)
+    RULES_WINDOW_CAPACITY = os.getenv("RULES_WINDOW_CAPACITY", default="288")
+    # Minutos que debe mantenerse el excedente o el consumo para notificar
+    RULES_SUSTAINED_MINUTES = os.getenv("RULES_SUSTAINED_MINUTES", default="15")
+    # Fracción del umbral por debajo de la cual se desactiva una regla (histéresis)
+    RULES_HYSTERESIS = os.getenv("RULES_HYSTERESIS", default="0.5")
+    # Estado de carga (%) de batería baja y a partir del cual se recupera
+    RULES_SOC_LOW = os.getenv("RULES_SOC_LOW", default="20")
+    RULES_SOC_LOW_CLEAR = os.getenv("RULES_SOC_LOW_CLEAR", default="30")
+    # Diferencia relativa entre strings DC que se considera descompensada
+    RULES_STRING_MISMATCH_RATIO = os.getenv(
+        "RULES_STRING_MISMATCH_RATIO", default="0.3"
+    )
+    # Potencia DC mínima (W) para comparar los strings
+    RULES_STRING_MIN_POWER = os.getenv("RULES_STRING_MIN_POWER", default="200")
+    # Minutos de lecturas usados para comparar los strings
+    RULES_STRING_MINUTES = os.getenv("RULES_STRING_MINUTES", default="30")
+
+
+class LatestState:
+    """Configuration of the latest state of every inverter"""
+
+    # Segundos tras los que se vuelve a leer tb_inverter_latest_state (lectores)
+    LATEST_STATE_TTL_SECONDS = os.getenv("LATEST_STATE_TTL_SECONDS", default="60")
+
+
+class Kpi:
+    """Configuration of the derived energy KPIs (tb_energy_kpi)"""
+
+    # Calcular los KPI de las lecturas nuevas al final de cada ciclo
+    KPI_ENABLED = os.getenv("KPI_ENABLED", default="true")
+    # Lecturas de tb_energy_data procesadas por lote
+    KPI_BATCH_SIZE = os.getenv("KPI_BATCH_SIZE", default="5000")
+    # Intervalo máximo entre dos lecturas para integrar la potencia de la batería
+    # (vacío = intervalo esperado entre lecturas + 2 * DAEMON_INTERVAL_SECONDS)
+    KPI_MAX_GAP_SECONDS = os.getenv("KPI_MAX_GAP_SECONDS", default="")
+
+
+class Forecast:
+    """Configuration of the PV production forecast engine"""
+
+    # Horizonte de predicción en horas
+    FORECAST_HORIZON_HOURS = os.getenv("FORECAST_HORIZON_HOURS", default="48")
+    # Días de histórico usados para calibrar cada inversor
+    FORECAST_CALIBRATION_DAYS = os.getenv("FORECAST_CALIBRATION_DAYS", default="30")
+    # Mínimo de horas diurnas con datos para considerar válida la calibración
+    FORECAST_MIN_SAMPLES = os.getenv("FORECAST_MIN_SAMPLES", default="24")
+    # Coeficiente de temperatura de los módulos (1/°C)
+    FORECAST_TEMP_COEFFICIENT = os.getenv("FORECAST_TEMP_COEFFICIENT", default="-0.004")
+
+
+class Metrics:
+    """Configuration of the pipeline metrics (Prometheus text format)"""
+
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", default="true")
+    # Fichero para el colector textfile de node_exporter (vacío = no se escribe)
+    METRICS_TEXTFILE = os.getenv("METRICS_TEXTFILE", default="")
+    # Puerto del endpoint /metrics en modo daemon (vacío = desactivado)
+    METRICS_PORT = os.getenv("METRICS_PORT", default="")
+    METRICS_HOST = os.getenv("METRICS_HOST", default="127.0.0.1")
+
+
+class Daemon:
+    """Configuration of the daemon mode (continuous polling)"""
+
+    # Segundos entre el inicio de dos ciclos consecutivos (máximo con
+    # ADAPTIVE_POLLING)
+    DAEMON_INTERVAL_SECONDS = os.getenv("DAEMON_INTERVAL_SECONDS", default="300")
+    # Programar cada ciclo justo después de la subida esperada del dongle
+    ADAPTIVE_POLLING = os.getenv("ADAPTIVE_POLLING", default="true")
+    # Segundos tras la disponibilidad esperada de una lectura para pedirla
+    POLL_MARGIN_SECONDS = os.getenv("POLL_MARGIN_SECONDS", default="5")
+    # Segundos mínimos entre dos ciclos
+    POLL_MIN_INTERVAL_SECONDS = os.getenv("POLL_MIN_INTERVAL_SECONDS", default="15")
+    # Primera espera al no llegar la lectura esperada (se duplica en cada fallo)
+    POLL_BACKOFF_SECONDS = os.getenv("POLL_BACKOFF_SECONDS", default="20")
+    # Subidas recordadas por inversor para estimar el periodo y la fase
+    POLL_HISTORY = os.getenv("POLL_HISTORY", default="24")
+    # Reducir las consultas a SolaxCloud fuera de las horas de sol
+    DAYLIGHT_POLICY = os.getenv("DAYLIGHT_POLICY", default="true")
+    # Minutos antes del amanecer y después del anochecer considerados de día
+    DAYLIGHT_MARGIN_MINUTES = os.getenv("DAYLIGHT_MARGIN_MINUTES", default="30")
+    # Minutos entre consultas de noche (estado de la batería)
+    NIGHT_HEARTBEAT_MINUTES = os.getenv("NIGHT_HEARTBEAT_MINUTES", default="30")
+
+
+class Workers:
+    """Configuration of the worker mode (fleet sharded between processes)"""
+
+    # Identificador del worker (vacío = <hostname>-<pid>)
+    WORKER_ID = os.getenv("WORKER_ID", default="")
+    # Segundos de cada ranura de sondeo (vacío = DAEMON_INTERVAL_SECONDS)
+    WORKER_SLOT_SECONDS = os.getenv("WORKER_SLOT_SECONDS", default="")
+    # Segundos entre dos latidos del worker
+    WORKER_HEARTBEAT_SECONDS = os.getenv("WORKER_HEARTBEAT_SECONDS", default="30")
+    # Segundos sin latido tras los que un worker se da por caído
+    WORKER_LEASE_SECONDS = os.getenv("WORKER_LEASE_SECONDS", default="90")
+    # Puntos de cada worker en el anillo de hash consistente
+    WORKER_RING_REPLICAS = os.getenv("WORKER_RING_REPLICAS", default="64")
+
+
+class Profiling:
+    """Configuration of the profiling mode"""
+
+    # Número de ciclos a perfilar al arrancar (0 = desactivado)
+    PROFILE_CYCLES = os.getenv("PROFILE_CYCLES", default="0")
+    PROFILE_DIR = os.getenv("PROFILE_DIR", default="profiles")
+    # cprofile, sampling o both
+    PROFILE_MODE = os.getenv("PROFILE_MODE", default="both")
+    # Intervalo del muestreo de pilas en milisegundos
+    PROFILE_SAMPLE_INTERVAL_MS = os.getenv("PROFILE_SAMPLE_INTERVAL_MS", default="5")
+
+
+class Storage:
+    """Configuration of the storage engine"""
+
+    # mysql (servidor remoto) o sqlite (base de datos local embebida)
+    STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", default="mysql").lower()
+    # Directorio con un fichero .db por esquema (":memory:" = en memoria)
+    SQLITE_DIR = os.getenv("SQLITE_DIR", default="data")
+    # Con el motor local, volcar los datos nuevos al MySQL remoto tras cada ciclo
+    SYNC_UPSTREAM = os.getenv("SYNC_UPSTREAM", default="false")
+    # Filas por lote al sincronizar con el MySQL remoto
+    SYNC_BATCH_SIZE = os.getenv("SYNC_BATCH_SIZE", default="1000")
+    # Sincronizar cada tabla con una tabla de staging y un solo upsert (backfills)
+    SYNC_BULK_LOAD = os.getenv("SYNC_BULK_LOAD", default="false")
+    # Filas por INSERT multi-fila al llenar la tabla de staging
+    BULK_LOAD_BATCH_SIZE = os.getenv("BULK_LOAD_BATCH_SIZE", default="5000")
+
+
+class Archive:
+    """Configuration of the Parquet archive for analytics"""
+
+    # Directorio raíz: una carpeta por tabla con particiones month=YYYY-MM
+    ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", default="archive")
+    # Filas leídas de la base de datos por lote
+    ARCHIVE_CHUNK_SIZE = os.getenv("ARCHIVE_CHUNK_SIZE", default="50000")
+    # Códec de compresión de los ficheros Parquet (zstd, snappy, gzip...)
+    ARCHIVE_COMPRESSION = os.getenv("ARCHIVE_COMPRESSION", default="zstd")
+
+
+class Replication:
+    """Configuration of the read/write splitting between the database hosts
+
+    When TARGET_HOST and SOURCE_HOST have the same configuration (local
+    environment) they are the same Database member and nothing is routed.
+    """
+
+    # Enviar las lecturas que toleran retraso a la réplica (SOURCE_HOST)
+    READ_REPLICA_ENABLED = os.getenv("READ_REPLICA_ENABLED", default="false")
+    # Retraso máximo de la réplica (Seconds_Behind_Source) para leer de ella
+    REPLICA_MAX_LAG_SECONDS = os.getenv("REPLICA_MAX_LAG_SECONDS", default="60")
+    # Cada cuánto se comprueba el estado de la réplica
+    REPLICA_CHECK_INTERVAL_SECONDS = os.getenv(
+        "REPLICA_CHECK_INTERVAL_SECONDS", default="30"
+    )
+
+    @staticmethod
+    def enabled() -> bool:
+        """Whether lag tolerant reads are routed to the replica."""
+        return (
+            Replication.READ_REPLICA_ENABLED.lower() == "true"
+            and Storage.STORAGE_BACKEND == "mysql"
+        )
@@ -10,16 +10,21 @@ from solarxdatahub.config import OpenWeather
 from solarxdatahub.database.crud import (
     insert_openweather_air_pollution_,
     insert_openweather_current_,
+    insert_openweather_forecast_,
     insert_openweather_requests_log_,
 )
 from solarxdatahub.models.model_openweather import (
     OpenWeatherAirPollutionResponse,
     OpenWeatherCurrentResponse,
+    OpenWeatherForecastResponse,
 )
+from solarxdatahub.utils.circuit_breaker import CircuitOpenError, get_circuit_breaker
+from solarxdatahub.utils.http_cache import get_response_cache
+from solarxdatahub.utils.metrics import API_CACHE_HITS, API_REQUESTS, timed
 
 
 class OpenWeatherAPI:
-    """Clase para interactuar con las APIs de OpenWeather (clima actual y contaminación)."""
+    """Clase para interactuar con las APIs de OpenWeather (clima actual, pronóstico y contaminación)."""
 
     def __init__(self):
         self.lat = OpenWeather.OW_LAT
@@ -31,6 +36,10 @@ class OpenWeatherAPI:
         self.forecast_url = OpenWeather.OW_FORECAST_URL
         self.air_pollution_url = OpenWeather.OW_AIR_POLLUTION_URL
         self.daily_limit = OpenWeather.OW_DAILY_LIMIT
+        self.cache_ttl = int(OpenWeather.OW_CACHE_TTL)
+        self.cache = get_response_cache()
+        # True si la última respuesta se sirvió desde la caché (ya procesada)
+        self.from_cache = False
 
     def get_current_weather(
         self, df_request_options: pd.DataFrame
@@ -42,6 +51,7 @@ class OpenWeatherAPI:
             OpenWeatherCurrentResponse: The current weather data.
         """
         http_status_code = 0
+        from_cache = self.from_cache = False
         current_request_time = datetime.now()
         request_option_id = int(
             df_request_options.loc[
@@ -57,15 +67,28 @@ class OpenWeatherAPI:
                 "units": self.metrics,
                 "lang": self.lang,
             }
-            response = requests.get(self.current_url, params=params, timeout=10)
-            response.raise_for_status()
+            with timed("http_fetch", provider="openweather", endpoint="weather"):
+                response = self.cache.get(
+                    self.current_url,
+                    params,
+                    ttl=self.cache_ttl,
+                    timeout=10,
+                    breaker=get_circuit_breaker("openweather", "weather"),
+                )
+            from_cache = response.from_cache
             http_status_code = response.status_code
-            data = response.json()
-            current_weather = OpenWeatherCurrentResponse.from_api(data)
+            with timed("parse", provider="openweather", endpoint="weather"):
+                current_weather = OpenWeatherCurrentResponse.from_json(response.content)
             if not current_weather.success or current_weather.result is None:
                 logger.error(
                     "API OpenWeather returned an error: {}", current_weather.exception
                 )
+        except CircuitOpenError as e:
+            # La petición no llega a OpenWeather: no consume cuota ni se registra
+            logger.warning("Skipping the OpenWeather current weather request: {}", e)
+            return OpenWeatherCurrentResponse(
+                success=False, result=None, exception=str(e), code=0
+            )
         except requests.exceptions.RequestException as e:
             http_status_code = e.response.status_code if e.response is not None else 0
             current_weather = OpenWeatherCurrentResponse(
@@ -78,6 +101,17 @@ class OpenWeatherAPI:
                 "An error occurred getting the data from the OpenWeather API: {}", e
             )
 
+        if from_cache:
+            # Servida desde la caché: no consume cuota, no se registra la petición
+            # y no se vuelve a procesar (ver OW_CACHE_TTL)
+            self.from_cache = True
+            logger.info("OpenWeather current weather served from the HTTP cache.")
+            API_CACHE_HITS.inc(provider="openweather", endpoint="weather")
+            return current_weather
+
+        API_REQUESTS.inc(
+            provider="openweather", endpoint="weather", status=http_status_code
+        )
         df_log_data = pd.DataFrame(
             [
                 {
@@ -101,6 +135,7 @@ class OpenWeatherAPI:
         """
         current_request_time = datetime.now()
         http_status_code = 0
+        from_cache = self.from_cache = False
         request_option_id = int(
             df_request_options.loc[
                 df_request_options["request_type"] == "air_pollution", "id"
@@ -112,15 +147,30 @@ class OpenWeatherAPI:
                 "lon": self.lon,
                 "appid": self.api_key,
             }
-            response = requests.get(self.air_pollution_url, params=params, timeout=10)
-            response.raise_for_status()
+            with timed("http_fetch", provider="openweather", endpoint="air_pollution"):
+                response = self.cache.get(
+                    self.air_pollution_url,
+                    params,
+                    ttl=self.cache_ttl,
+                    timeout=10,
+                    breaker=get_circuit_breaker("openweather", "air_pollution"),
+                )
+            from_cache = response.from_cache
             http_status_code = response.status_code
-            data = response.json()
-            air_pollution = OpenWeatherAirPollutionResponse.from_api(data)
+            with timed("parse", provider="openweather", endpoint="air_pollution"):
+                air_pollution = OpenWeatherAirPollutionResponse.from_json(
+                    response.content
+                )
             if not air_pollution.success or air_pollution.result is None:
                 logger.error(
                     "API OpenWeather returned an error: {}", air_pollution.exception
                 )
+        except CircuitOpenError as e:
+            # La petición no llega a OpenWeather: no consume cuota ni se registra
+            logger.warning("Skipping the OpenWeather air pollution request: {}", e)
+            return OpenWeatherAirPollutionResponse(
+                success=False, result=[], exception=str(e), code=0
+            )
         except requests.exceptions.RequestException as e:
             http_status_code = e.response.status_code if e.response is not None else 0
             air_pollution = OpenWeatherAirPollutionResponse(
@@ -134,6 +184,17 @@ class OpenWeatherAPI:
                 e,
             )
 
+        if from_cache:
+            # Servida desde la caché: no consume cuota, no se registra la petición
+            # y no se vuelve a procesar (ver OW_CACHE_TTL)
+            self.from_cache = True
+            logger.info("OpenWeather air pollution served from the HTTP cache.")
+            API_CACHE_HITS.inc(provider="openweather", endpoint="air_pollution")
+            return air_pollution
+
+        API_REQUESTS.inc(
+            provider="openweather", endpoint="air_pollution", status=http_status_code
+        )
         df_log_data = pd.DataFrame(
             [
                 {
@@ -146,6 +207,97 @@ class OpenWeatherAPI:
         insert_openweather_requests_log_(df_log_data)
         return air_pollution
 
+    def get_forecast(
+        self, df_request_options: pd.DataFrame
+    ) -> OpenWeatherForecastResponse | None:
+        """
+        Fetches the 5 day / 3 hour forecast from the OpenWeather API.
+
+        Args:
+            df_request_options (pd.DataFrame): The master_tb_request_options table.
+
+        Returns:
+            OpenWeatherForecastResponse | None: The forecast, or None if the
+            'forecast' request type is not configured.
+        """
+        current_request_time = datetime.now()
+        http_status_code = 0
+        from_cache = self.from_cache = False
+        option_ids = df_request_options.loc[
+            df_request_options["request_type"] == "forecast", "id"
+        ]
+        if option_ids.empty:
+            logger.error(
+                "No se encontró la opción de solicitud 'forecast' para OpenWeather."
+            )
+            return None
+        request_option_id = int(option_ids.iloc[0])
+        try:
+            params = {
+                "lat": self.lat,
+                "lon": self.lon,
+                "appid": self.api_key,
+                "units": self.metrics,
+                "lang": self.lang,
+            }
+            with timed("http_fetch", provider="openweather", endpoint="forecast"):
+                response = self.cache.get(
+                    self.forecast_url,
+                    params,
+                    ttl=self.cache_ttl,
+                    timeout=10,
+                    breaker=get_circuit_breaker("openweather", "forecast"),
+                )
+            from_cache = response.from_cache
+            http_status_code = response.status_code
+            with timed("parse", provider="openweather", endpoint="forecast"):
+                forecast = OpenWeatherForecastResponse.from_json(response.content)
+            if not forecast.success:
+                logger.error(
+                    "API OpenWeather returned an error: {}", forecast.exception
+                )
+        except CircuitOpenError as e:
+            # La petición no llega a OpenWeather: no consume cuota ni se registra
+            logger.warning("Skipping the OpenWeather forecast request: {}", e)
+            return OpenWeatherForecastResponse(
+                success=False, result=[], exception=str(e), code=0
+            )
+        except requests.exceptions.RequestException as e:
+            http_status_code = e.response.status_code if e.response is not None else 0
+            forecast = OpenWeatherForecastResponse(
+                success=False,
+                result=[],
+                exception=str(e),
+                code=http_status_code,
+            )
+            logger.error(
+                "An error occurred getting the forecast from the OpenWeather API: {}",
+                e,
+            )
+
+        if from_cache:
+            # Servida desde la caché: no consume cuota, no se registra la petición
+            # y no se vuelve a procesar (ver OW_CACHE_TTL)
+            self.from_cache = True
+            logger.info("OpenWeather forecast served from the HTTP cache.")
+            API_CACHE_HITS.inc(provider="openweather", endpoint="forecast")
+            return forecast
+
+        API_REQUESTS.inc(
+            provider="openweather", endpoint="forecast", status=http_status_code
+        )
+        df_log_data = pd.DataFrame(
+            [
+                {
+                    "request_datetime": current_request_time,
+                    "request_option_id": request_option_id,
+                    "status": http_status_code,
+                }
+            ]
+        )
+        insert_openweather_requests_log_(df_log_data)
+        return forecast
+
     def process_openweather_response_current(
         self, response: OpenWeatherCurrentResponse
     ):
@@ -168,47 +320,108 @@ class OpenWeatherAPI:
             )
             return
 
-        df_current = pd.DataFrame(
-            [
+        with timed("build_rows", table="tb_current_weather"):
+            df_current = pd.DataFrame(
+                [
+                    {
+                        "calculation_datetime": request_time,
+                        "city_name": result.name,
+                        "country": result.sys.country,
+                        "lat": result.coord.lat,
+                        "lon": result.coord.lon,
+                        "temp": result.main.temp,
+                        "feels_like": result.main.feels_like,
+                        "temp_min": result.main.temp_min,
+                        "temp_max": result.main.temp_max,
+                        "pressure": result.main.pressure,
+                        "humidity": result.main.humidity,
+                        "sea_level": result.main.sea_level,
+                        "grnd_level": result.main.grnd_level,
+                        "visibility": result.visibility,
+                        "wind_speed": result.wind.speed,
+                        "wind_deg": result.wind.deg,
+                        "wind_gust": result.wind.gust,
+                        "clouds": result.clouds.all,
+                        "dt": result.dt,
+                        "sunrise": result.sys.sunrise,
+                        "sunset": result.sys.sunset,
+                        # Si la lista de weather puede tener más de un elemento, se puede almacenar como lista o iterar:
+                        "weather_main": [w.main for w in result.weather],
+                        "weather_description": [w.description for w in result.weather],
+                        "weather_icon": [w.icon for w in result.weather],
+                        "timezone": result.timezone,
+                        "base": result.base,
+                        "city_id": result.id,
+                        "sys_type": result.sys.type,
+                        "sys_id": result.sys.id,
+                        # Para el campo rain, que puede ser None:
+                        "rain_1h": (
+                            result.rain.one_h if result.rain is not None else None
+                        ),
+                        "rain_3h": (
+                            result.rain.three_h if result.rain is not None else None
+                        ),
+                    }
+                ]
+            )
+        insert_openweather_current_(df_current)
+        logger.info("Current weather data processed successfully.")
+
+    def process_openweather_forecast_response(
+        self, response: OpenWeatherForecastResponse
+    ) -> None:
+        """
+        Processes the OpenWeather 5 day / 3 hour forecast to insert it in the DB.
+
+        Every slot of the response (usually 40) becomes one row keyed by the
+        moment of the request (issue_datetime) and the predicted hour
+        (target_datetime). All the rows are written with a single upsert.
+
+        Args:
+            response (OpenWeatherForecastResponse): The forecast response.
+        """
+        if not response.result:
+            logger.error("La respuesta del pronóstico no contiene datos.")
+            return
+
+        with timed("build_rows", table="tb_forecast"):
+            issue_datetime = datetime.now().replace(microsecond=0)
+            city = response.city
+            rows = [
                 {
-                    "calculation_datetime": request_time,
-                    "city_name": result.name,
-                    "country": result.sys.country,
-                    "lat": result.coord.lat,
-                    "lon": result.coord.lon,
-                    "temp": result.main.temp,
-                    "feels_like": result.main.feels_like,
-                    "temp_min": result.main.temp_min,
-                    "temp_max": result.main.temp_max,
-                    "pressure": result.main.pressure,
-                    "humidity": result.main.humidity,
-                    "sea_level": result.main.sea_level,
-                    "grnd_level": result.main.grnd_level,
-                    "visibility": result.visibility,
-                    "wind_speed": result.wind.speed,
-                    "wind_deg": result.wind.deg,
-                    "wind_gust": result.wind.gust,
-                    "clouds": result.clouds.all,
-                    "dt": result.dt,
-                    "sunrise": result.sys.sunrise,
-                    "sunset": result.sys.sunset,
-                    # Si la lista de weather puede tener más de un elemento, se puede almacenar como lista o iterar:
-                    "weather_main": [w.main for w in result.weather],
-                    "weather_description": [w.description for w in result.weather],
-                    "weather_icon": [w.icon for w in result.weather],
-                    "timezone": result.timezone,
-                    "base": result.base,
-                    "city_id": result.id,
-                    "sys_type": result.sys.type,
-                    "sys_id": result.sys.id,
-                    # Para el campo rain, que puede ser None:
-                    "rain_1h": result.rain.one_h if result.rain is not None else None,
-                    "rain_3h": result.rain.three_h if result.rain is not None else None,
+                    "issue_datetime": issue_datetime,
+                    "target_datetime": datetime.fromtimestamp(item.dt),
+                    "city_id": city.id if city is not None else None,
+                    "lat": city.coord.lat if city is not None else self.lat,
+                    "lon": city.coord.lon if city is not None else self.lon,
+                    "dt": item.dt,
+                    "temp": item.main.temp,
+                    "feels_like": item.main.feels_like,
+                    "temp_min": item.main.temp_min,
+                    "temp_max": item.main.temp_max,
+                    "pressure": item.main.pressure,
+                    "humidity": item.main.humidity,
+                    "sea_level": item.main.sea_level,
+                    "grnd_level": item.main.grnd_level,
+                    "visibility": item.visibility,
+                    "wind_speed": item.wind.speed,
+                    "wind_deg": item.wind.deg,
+                    "wind_gust": item.wind.gust,
+                    "clouds": item.clouds.all,
+                    "pop": item.pop,
+                    "rain_3h": item.rain.three_h if item.rain is not None else None,
+                    "pod": item.sys.get("pod"),
+                    "weather_main": ",".join(w.main for w in item.weather),
+                    "weather_description": ",".join(
+                        w.description for w in item.weather
+                    ),
+                    "weather_icon": ",".join(w.icon for w in item.weather),
                 }
+                for item in response.result
             ]
-        )
-        insert_openweather_current_(df_current)
-        logger.info("Current weather data processed successfully.")
+        # Lista de diccionarios: un DataFrame convertiría los None en NaN
+        insert_openweather_forecast_(rows)
+        logger.info("Forecast data processed successfully ({} slots).", len(rows))
 
     def process_openweather_air_pollution_response(
         self, response: OpenWeatherAirPollutionResponse
@@ -234,25 +447,26 @@ class OpenWeatherAPI:
             logger.error("La respuesta de contaminación del aire no contiene datos.")
             return
 
-        rows = []
-        for item in response.result:
-            row = {
-                "calculation_datetime": request_time,
-                "lat": lat,
-                "lon": lon,
-                "dt": item.dt,
-                "aqi": item.main.aqi,
-                "co": item.components.co,
-                "no": item.components.no,
-                "no2": item.components.no2,
-                "o3": item.components.o3,
-                "so2": item.components.so2,
-                "pm2_5": item.components.pm2_5,
-                "pm10": item.components.pm10,
-                "nh3": item.components.nh3,
-            }
-            rows.append(row)
+        with timed("build_rows", table="tb_air_pollution"):
+            rows = []
+            for item in response.result:
+                row = {
+                    "calculation_datetime": request_time,
+                    "lat": lat,
+                    "lon": lon,
+                    "dt": item.dt,
+                    "aqi": item.main.aqi,
+                    "co": item.components.co,
+                    "no": item.components.no,
+                    "no2": item.components.no2,
+                    "o3": item.components.o3,
+                    "so2": item.components.so2,
+                    "pm2_5": item.components.pm2_5,
+                    "pm10": item.components.pm10,
+                    "nh3": item.components.nh3,
+                }
+                rows.append(row)
 
-        df_air = pd.DataFrame(rows)
+            df_air = pd.DataFrame(rows)
         insert_openweather_air_pollution_(df_air)
         logger.info("Air pollution data processed successfully.")
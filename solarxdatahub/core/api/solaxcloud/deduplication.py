@@ -0,0 +1,65 @@
+"""Detection of SolaxCloud readings that were already stored."""
+
+import hashlib
+
+from solarxdatahub.models.model_solaxcloud import SolaxCloudResult
+from solarxdatahub.utils.state import StateStore
+
+
+class ReadingDeduplicator:
+    """Per-inverter cache of the last stored ``(uploadTime, content hash)``.
+
+    The dongle only uploads new data every ~5 minutes, so polling faster
+    returns the same reading several times. A reading is a duplicate when both
+    its uploadTime and the hash of its content match the last stored one.
+    """
+
+    def __init__(self, store: StateStore | None = None):
+        self.store = store
+        self._last_seen: dict[str, list[str]] = store.load() if store else {}
+        self.skipped = 0
+        self.accepted = 0
+
+    @staticmethod
+    def content_hash(result: SolaxCloudResult) -> str:
+        """Hash the content of a reading.
+
+        Args:
+            result (SolaxCloudResult): The reading.
+
+        Returns:
+            str: A hex digest of every field of the reading.
+        """
+        return hashlib.sha1(result.model_dump_json().encode("utf-8")).hexdigest()
+
+    def is_duplicate(self, result: SolaxCloudResult) -> bool:
+        """Check whether the reading was already stored.
+
+        Args:
+            result (SolaxCloudResult): The reading.
+
+        Returns:
+            bool: True if the reading is unchanged since the last stored one.
+        """
+        last = self._last_seen.get(result.inverterSN)
+        if last is not None and last == [
+            result.uploadTime,
+            self.content_hash(result),
+        ]:
+            self.skipped += 1
+            return True
+        return False
+
+    def mark_stored(self, result: SolaxCloudResult) -> None:
+        """Remember the reading as the last one stored for its inverter.
+
+        Args:
+            result (SolaxCloudResult): The reading.
+        """
+        self.accepted += 1
+        self._last_seen[result.inverterSN] = [
+            result.uploadTime,
+            self.content_hash(result),
+        ]
+        if self.store is not None:
+            self.store.save(self._last_seen)
@@ -2,11 +2,13 @@
 
 from datetime import datetime
 
-import pandas as pd
 import requests
 from loguru import logger
 
 from solarxdatahub.config import SolaxCloud
+from solarxdatahub.core.api.solaxcloud.deduplication import ReadingDeduplicator
+from solarxdatahub.core.latest_state import get_latest_state
+from solarxdatahub.core.rules import RulesEngine
 from solarxdatahub.database.crud import (
     get_master_tb_inverters,
     insert_battery,
@@ -14,7 +16,15 @@ from solarxdatahub.database.crud import (
     insert_phase_power,
 )
 from solarxdatahub.models.model_solaxcloud import SolaxCloudResponse, SolaxCloudResult
+from solarxdatahub.models.records import ReadingRecord
+from solarxdatahub.utils.circuit_breaker import (
+    CircuitOpenError,
+    get_circuit_breaker,
+    guard,
+)
+from solarxdatahub.utils.metrics import API_REQUESTS, READINGS, timed
 from solarxdatahub.utils.ntfy import NtfyNotification
+from solarxdatahub.utils.state import StateStore
 
 
 class SolaxCloudAPI:
@@ -26,23 +36,41 @@ class SolaxCloudAPI:
         self.wifi_sn = SolaxCloud.WIFI_SN
         self.headers = {"Content-Type": "application/json", "tokenId": self.token_id}
         self.payload = {"wifiSn": self.wifi_sn}
-        self.ntfy = NtfyNotification()
+        self.ntfy = NtfyNotification(
+            rules=RulesEngine(store=StateStore("notification_rules"))
+        )
+        self.deduplicator = ReadingDeduplicator(StateStore("solaxcloud_last_seen"))
+        self.breaker = get_circuit_breaker("solaxcloud", "realtime")
+
+    def get_real_time_data(self, wifi_sn: str | None = None) -> None:
+        """Get the real-time data from the Solax Cloud API.
 
-    def get_real_time_data(self) -> None:
-        """Get the real-time data from the Solax Cloud API."""
+        Args:
+            wifi_sn (str | None, optional): Serial number of the dongle to
+                query. Defaults to WIFI_SN.
+        """
+        payload = {"wifiSn": wifi_sn} if wifi_sn else self.payload
+        status = 0
         try:
-            response = requests.post(
-                self.api_url, headers=self.headers, json=self.payload, timeout=10
-            )
-            response.raise_for_status()
-            data = response.json()
-            solax_response = SolaxCloudResponse(**data)
+            with timed("http_fetch", provider="solaxcloud"), guard(self.breaker):
+                response = requests.post(
+                    self.api_url, headers=self.headers, json=payload, timeout=10
+                )
+                status = response.status_code
+                response.raise_for_status()
+            with timed("parse", provider="solaxcloud"):
+                solax_response = SolaxCloudResponse.from_json(response.content)
             if not solax_response.success or solax_response.result is None:
                 logger.error(
                     "API SolaXCloud returned an error: {}", solax_response.exception
                 )
                 return None
             return solax_response
+        except CircuitOpenError as e:
+            # La petición no sale: no se cuenta en API_REQUESTS
+            status = None
+            logger.warning("Skipping the Solax Cloud request: {}", e)
+            return None
         except requests.exceptions.Timeout:
             logger.error("The request to the Solax Cloud API timed out.")
             return None
@@ -60,149 +88,146 @@ class SolaxCloudAPI:
                 e,
             )
             return None
+        finally:
+            if status is not None:
+                API_REQUESTS.inc(
+                    provider="solaxcloud", endpoint="realtime", status=status
+                )
 
-    def process_solaxcloud_response(self, response: SolaxCloudResponse) -> None:
+    def process_solaxcloud_response(
+        self, response: SolaxCloudResponse, inverter_id: int | None = None
+    ) -> None:
         """
         Process the response from the Solax Cloud API.
 
-        This method divides the information contained in the response into several
-        pandas DataFrames, each corresponding to a database table. Later these DataFrames
-        can be used to insert data into the database.
+        This method builds a compact ReadingRecord from the response and divides its
+        values into the rows of several database tables, which are then inserted
+        into the database. Readings already stored (same
+        inverterSN, uploadTime and content) are dropped before any database work.
 
         Args:
             response (SolaxCloudResponse): The validated response from the API.
+            inverter_id (int | None, optional): ID of the inverter in
+                master_tb_inverters, when the caller already knows it. Defaults
+                to the ID read from master_tb_inverters.
         """
         result: SolaxCloudResult = response.result
-
-        common_columns = self.common_columns(result)
-        inverter_df = get_master_tb_inverters()
-        if inverter_df.empty:
-            logger.error(
-                "Inverter ID not found for SN: {}. Response uploadTime: {}",
+        if self.deduplicator.is_duplicate(result):
+            READINGS.inc(result="duplicate")
+            logger.info(
+                "Skipping unchanged reading for SN: {} (uploadTime: {}). "
+                "Skipped readings: {}",
                 result.inverterSN,
                 result.uploadTime,
+                self.deduplicator.skipped,
             )
             return
-        inverter_id = int(inverter_df.iloc[0]["id"])
+
+        common_columns = self.common_columns(result)
+        if inverter_id is None:
+            inverter_df = get_master_tb_inverters()
+            if inverter_df.empty:
+                logger.error(
+                    "Inverter ID not found for SN: {}. Response uploadTime: {}",
+                    result.inverterSN,
+                    result.uploadTime,
+                )
+                return
+            inverter_id = int(inverter_df.iloc[0]["id"])
         logger.info(
             "Processing data for inverter ID: {} (SN: {}, uploadTime: {})",
             inverter_id,
             result.inverterSN,
             result.uploadTime,
         )
-        self.process_tb_energy_data(result, common_columns, inverter_id)
-        self.process_tb_phase_power_data(result, common_columns, inverter_id)
-        self.process_tb_battery_data(result, common_columns, inverter_id)
+        record = ReadingRecord.from_result(result, inverter_id, common_columns)
+        self.process_tb_energy_data(record)
+        self.process_tb_phase_power_data(record)
+        self.process_tb_battery_data(record)
+        self.process_tb_inverter_latest_state(record)
+        self.deduplicator.mark_stored(result)
+        READINGS.inc(result="stored")
         logger.info(
             "Data from SolaxCloud processed successfully for inverter ID: {}",
             inverter_id,
         )
-        self.ntfy.check_energy(
-            inverter_id,
-            feedinpower=result.feedinpower or 0,
-        )
+        self.ntfy.check_reading(record)
 
-    def process_tb_energy_data(
-        self, result: SolaxCloudResponse, common_columns: dict, inverter_id: int
-    ) -> None:
+    def finish_cycle(self, wait_notifications: float = 0) -> None:
+        """Persist the rule windows and log the delivered notifications.
+
+        Runs once per cycle (or worker slot) instead of after every reading.
+
+        Args:
+            wait_notifications (float, optional): Seconds to wait for the
+                queued notifications. Defaults to 0.
+        """
+        self.ntfy.rules.save()
+        self.ntfy.flush(wait_notifications)
+
+    def process_tb_energy_data(self, record: ReadingRecord) -> None:
         """
-        Prepare the response from the Solax Cloud API for the tb_energy_data table.
+        Insert a reading into the tb_energy_data table.
 
         Args:
-            result (SolaxCloudResponse): The validated response from the API.
-            common_columns (dict): Common columns for the DataFrames.
-            inverter_id (int): The inverter ID.
+            record (ReadingRecord): The reading.
         """
-        df_energy = pd.DataFrame(
-            [
-                {
-                    "fecha": common_columns["fecha"],
-                    "periodo": common_columns["periodo"],
-                    "min": common_columns["minute"],
-                    "inverter_id": inverter_id,
-                    "acpower": result.acpower,
-                    "yieldtoday": result.yieldtoday,
-                    "yieldtotal": result.yieldtotal,
-                    "feedinpower": result.feedinpower,
-                    "feedinenergy": result.feedinenergy,
-                    "consumeenergy": result.consumeenergy,
-                    "uploadTime": result.uploadTime,
-                }
-            ]
-        )
-        insert_energy(df_energy)
+        with timed("build_rows", table="tb_energy_data"):
+            rows = [record.energy_row()]
+        insert_energy(rows)
         logger.info(
             "Energy data inserted into tb_energy_data for inverter ID: {} with uploadTime: {}",
-            inverter_id,
-            result.uploadTime,
+            record.inverter_id,
+            record.uploadTime,
         )
 
-    def process_tb_phase_power_data(
-        self, result: SolaxCloudResponse, common_columns: dict, inverter_id: int
-    ) -> None:
-        """Prepare the response from the Solax Cloud API for the tb_phase_power_data table.
+    def process_tb_phase_power_data(self, record: ReadingRecord) -> None:
+        """Insert a reading into the tb_phase_power_data table.
 
         Args:
-            result (SolaxCloudResponse): The validated response from the API.
-            common_columns (dict): Common columns for the DataFrames.
-            inverter_id (int): The inverter ID.
+            record (ReadingRecord): The reading.
         """
-        df_phase_power = pd.DataFrame(
-            [
-                {
-                    "fecha": common_columns["fecha"],
-                    "periodo": common_columns["periodo"],
-                    "min": common_columns["minute"],
-                    "inverter_id": inverter_id,
-                    "peps1": result.peps1,
-                    "peps2": result.peps2,
-                    "peps3": result.peps3,
-                    "powerdc1": result.powerdc1,
-                    "powerdc2": result.powerdc2,
-                    "powerdc3": result.powerdc3,
-                    "powerdc4": result.powerdc4,
-                    "uploadTime": result.uploadTime,
-                }
-            ]
-        )
-        insert_phase_power(df_phase_power)
+        with timed("build_rows", table="tb_phase_power_data"):
+            rows = [record.phase_power_row()]
+        insert_phase_power(rows)
         logger.info(
             "Phase data inserted into tb_phase_power_data for inverter ID: {} with uploadTime: {}",
-            inverter_id,
-            result.uploadTime,
+            record.inverter_id,
+            record.uploadTime,
         )
 
-    def process_tb_battery_data(
-        self, result: SolaxCloudResponse, common_columns: dict, inverter_id: int
-    ) -> None:
-        """Prepare the response from the Solax Cloud API for the tb_battery_data table.
+    def process_tb_battery_data(self, record: ReadingRecord) -> None:
+        """Insert a reading into the tb_battery_data table.
 
         Args:
-            result (SolaxCloudResponse): The validated response from the API.
-            common_columns (dict): Common columns for the DataFrames.
-            inverter_id (int): The inverter ID.
+            record (ReadingRecord): The reading.
         """
-        df_battery = pd.DataFrame(
-            [
-                {
-                    "fecha": common_columns["fecha"],
-                    "periodo": common_columns["periodo"],
-                    "min": common_columns["minute"],
-                    "inverter_id": inverter_id,
-                    "batPower": result.batPower,
-                    "soc": result.soc,
-                    "batStatus": result.batStatus,
-                    "uploadTime": result.uploadTime,
-                }
-            ]
-        )
-        insert_battery(df_battery)
+        with timed("build_rows", table="tb_battery_data"):
+            rows = [record.battery_row()]
+        insert_battery(rows)
         logger.info(
             "Battery data inserted into tb_battery_data for inverter ID: {} with uploadTime: {}",
-            inverter_id,
-            result.uploadTime,
+            record.inverter_id,
+            record.uploadTime,
         )
 
+    def process_tb_inverter_latest_state(self, record: ReadingRecord) -> None:
+        """Store a reading as the latest state of its inverter.
+
+        Args:
+            record (ReadingRecord): The reading.
+        """
+        with timed("build_rows", table="tb_inverter_latest_state"):
+            row = record.latest_state_row()
+        newest = get_latest_state().update(row)
+        if not newest:
+            logger.info(
+                "Reading of inverter ID: {} with uploadTime: {} is older than its "
+                "latest state, not updated",
+                record.inverter_id,
+                record.uploadTime,
+            )
+
     def common_columns(self, result: SolaxCloudResponse) -> dict:
         """Return the common columns for the DataFrames.
 
@@ -9,6 +9,9 @@ from loguru import logger
 from solarxdatahub.config import Weatherbit
 from solarxdatahub.database.crud import insert_weatherbit_current_
 from solarxdatahub.models.model_weatherbit import WeatherbitResponse, WeatherDataResult
+from solarxdatahub.utils.circuit_breaker import CircuitOpenError, get_circuit_breaker
+from solarxdatahub.utils.http_cache import get_response_cache
+from solarxdatahub.utils.metrics import timed
 
 
 class WeatherbitAPI:
@@ -28,14 +31,29 @@ class WeatherbitAPI:
             "units": self.units,
             "lang": self.language,
         }
+        self.cache_ttl = int(Weatherbit.WB_CACHE_TTL)
+        self.cache = get_response_cache()
+        # True si la última respuesta se sirvió desde la caché (sin consumir cuota)
+        self.from_cache = False
+        # True si el circuito estaba abierto y la petición no llegó a salir
+        self.skipped = False
 
     def get_current_weather(self) -> None:
         """Get the current weather from the Weatherbit API."""
+        self.from_cache = False
+        self.skipped = False
         try:
-            response = requests.get(self.api_url, params=self.params, timeout=10)
-            response.raise_for_status()
-            data = response.json()
-            weatherbit_response = WeatherbitResponse.from_api(data)
+            with timed("http_fetch", provider="weatherbit", endpoint="current"):
+                response = self.cache.get(
+                    self.api_url,
+                    self.params,
+                    ttl=self.cache_ttl,
+                    timeout=10,
+                    breaker=get_circuit_breaker("weatherbit", "current"),
+                )
+            self.from_cache = response.from_cache
+            with timed("parse", provider="weatherbit", endpoint="current"):
+                weatherbit_response = WeatherbitResponse.from_json(response.content)
             if not weatherbit_response.success or weatherbit_response.result is None:
                 logger.error(
                     "API Weatherbit returned an error: {}",
@@ -43,6 +61,10 @@ class WeatherbitAPI:
                 )
                 return None
             return weatherbit_response
+        except CircuitOpenError as e:
+            self.skipped = True
+            logger.warning("Skipping the Weatherbit request: {}", e)
+            return None
         except requests.exceptions.RequestException as e:
             logger.error(
                 "An error occurred getting the data from the Weatherbit API: {}", e
@@ -66,55 +88,56 @@ class WeatherbitAPI:
         """
         result: WeatherDataResult = response.result
 
-        df_weather = pd.DataFrame(
-            [
-                {
-                    "calculation_datetime": request_time,
-                    "wind_cdir": result.wind_cdir,
-                    "rh": result.rh,
-                    "pod": result.pod,
-                    "lon": result.lon,
-                    "pres": result.pres,
-                    "timezone": result.timezone,
-                    "ob_time": result.ob_time,
-                    "country_code": result.country_code,
-                    "clouds": result.clouds,
-                    "vis": result.vis,
-                    "wind_spd": result.wind_spd,
-                    "gust": result.gust,
-                    "wind_cdir_full": result.wind_cdir_full,
-                    "app_temp": result.app_temp,
-                    "state_code": result.state_code,
-                    "ts": result.ts,
-                    "h_angle": result.h_angle,
-                    "dewpt": result.dewpt,
-                    "weather_icon": result.weather.icon,
-                    "weather_description": result.weather.description,
-                    "weather_code": result.weather.code,
-                    "uv": result.uv,
-                    "aqi": result.aqi,
-                    "station": result.station,
-                    "sources": ",".join(result.sources)
-                    if isinstance(result.sources, list)
-                    else result.sources,
-                    "wind_dir": result.wind_dir,
-                    "elev_angle": result.elev_angle,
-                    "datetime": result.datetime,
-                    "precip": result.precip,
-                    "ghi": result.ghi,
-                    "dni": result.dni,
-                    "dhi": result.dhi,
-                    "solar_rad": result.solar_rad,
-                    "city_name": result.city_name,
-                    "sunrise": result.sunrise,
-                    "sunset": result.sunset,
-                    "temp": result.temp,
-                    "lat": result.lat,
-                    "slp": result.slp,
-                    "snow": result.snow,
-                }
-            ]
-        )
+        with timed("build_rows", table="tb_hourly_data"):
+            df_weather = pd.DataFrame(
+                [
+                    {
+                        "calculation_datetime": request_time,
+                        "wind_cdir": result.wind_cdir,
+                        "rh": result.rh,
+                        "pod": result.pod,
+                        "lon": result.lon,
+                        "pres": result.pres,
+                        "timezone": result.timezone,
+                        "ob_time": result.ob_time,
+                        "country_code": result.country_code,
+                        "clouds": result.clouds,
+                        "vis": result.vis,
+                        "wind_spd": result.wind_spd,
+                        "gust": result.gust,
+                        "wind_cdir_full": result.wind_cdir_full,
+                        "app_temp": result.app_temp,
+                        "state_code": result.state_code,
+                        "ts": result.ts,
+                        "h_angle": result.h_angle,
+                        "dewpt": result.dewpt,
+                        "weather_icon": result.weather.icon,
+                        "weather_description": result.weather.description,
+                        "weather_code": result.weather.code,
+                        "uv": result.uv,
+                        "aqi": result.aqi,
+                        "station": result.station,
+                        "sources": ",".join(result.sources)
+                        if isinstance(result.sources, list)
+                        else result.sources,
+                        "wind_dir": result.wind_dir,
+                        "elev_angle": result.elev_angle,
+                        "datetime": result.datetime,
+                        "precip": result.precip,
+                        "ghi": result.ghi,
+                        "dni": result.dni,
+                        "dhi": result.dhi,
+                        "solar_rad": result.solar_rad,
+                        "city_name": result.city_name,
+                        "sunrise": result.sunrise,
+                        "sunset": result.sunset,
+                        "temp": result.temp,
+                        "lat": result.lat,
+                        "slp": result.slp,
+                        "snow": result.snow,
+                    }
+                ]
+            )
         insert_weatherbit_current_(df_weather)
         logger.info(
             "Datos meteorológicos insertados/actualizados correctamente en weatherbit_current."
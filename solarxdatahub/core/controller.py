@@ -1,14 +1,28 @@
 """Methods for controlling the data hub."""
 
+import signal
+import time
 from datetime import datetime, timedelta
 
 import pandas as pd
 from loguru import logger
 
-from solarxdatahub.config import Logging, OpenWeather, Weatherbit
+from solarxdatahub.config import (
+    Daemon,
+    Kpi,
+    Logging,
+    Ntfy,
+    OpenWeather,
+    Storage,
+    Weatherbit,
+)
+from solarxdatahub.core import leases
 from solarxdatahub.core.api.openweather.openweather import OpenWeatherAPI
 from solarxdatahub.core.api.solaxcloud.solaxcloud import SolaxCloudAPI
 from solarxdatahub.core.api.weatherbit.weatherbit import WeatherbitAPI
+from solarxdatahub.core.forecast import ProductionForecastEngine
+from solarxdatahub.core.kpi import run_kpi
+from solarxdatahub.core.scheduler import get_daylight_policy, get_poll_scheduler
 from solarxdatahub.database.connection import DataBaseConnection
 from solarxdatahub.database.crud import (
     get_master_tb_request_options,
@@ -18,6 +32,21 @@ from solarxdatahub.database.crud import (
     get_weatherbit_requests_log,
     insert_weatherbit_requests_log_,
 )
+from solarxdatahub.database.sync import sync_upstream
+from solarxdatahub.models.model_openweather import OpenWeatherForecastResponse
+from solarxdatahub.utils.metrics import (
+    API_CACHE_HITS,
+    API_LEASE_SKIPPED,
+    API_QUOTA_LIMIT,
+    API_QUOTA_USED,
+    API_REQUESTS,
+    CYCLE_DURATION,
+    CYCLES,
+    POLL_SKIPPED,
+    start_metrics_server,
+    write_textfile,
+)
+from solarxdatahub.utils.profiling import get_cycle_profiler
 
 
 def prepare_environment():
@@ -26,21 +55,110 @@ def prepare_environment():
     DataBaseConnection.connect()
 
 
-def run():
-    """Run the data hub."""
+def run(wait_notifications: bool = True):
+    """Run the data hub.
+
+    Args:
+        wait_notifications (bool, optional): Wait up to NTFY_DRAIN_SECONDS for
+            the notifications queued in the cycle, so they are logged before
+            disconnecting. The daemon logs them in a later cycle instead.
+            Defaults to True.
+    """
+    cycle_start = time.perf_counter()
+    outcome = "success"
     try:
-        prepare_environment()
-        process_solaxcloud_data(SolaxCloudAPI())
-        process_openweather_data(OpenWeatherAPI())
-        process_weather_data(WeatherbitAPI())
+        with get_cycle_profiler().cycle():
+            prepare_environment()
+            client = SolaxCloudAPI()
+            process_solaxcloud_data(client)
+            process_openweather_data(OpenWeatherAPI())
+            process_weather_data(WeatherbitAPI())
+            process_energy_kpi()
+            process_upstream_sync()
+            client.finish_cycle(
+                float(Ntfy.NTFY_DRAIN_SECONDS) if wait_notifications else 0
+            )
     except (ValueError, KeyError, ConnectionError) as e:
+        outcome = "error"
         logger.exception("A specific error occurred: {}", e)
         raise
     except Exception as e:
+        outcome = "error"
         logger.exception("An error occurred: {}", e)
         raise
     finally:
         DataBaseConnection.disconnect()
+        CYCLE_DURATION.observe(time.perf_counter() - cycle_start)
+        CYCLES.inc(outcome=outcome)
+        write_textfile()
+
+
+def run_daemon(interval_seconds: int | None = None) -> None:
+    """Run the data hub continuously, starting a cycle every interval.
+
+    The ``/metrics`` endpoint is served while the daemon runs when METRICS_PORT
+    is set. A failed cycle is logged and the next one runs on schedule. Sending
+    SIGUSR1 to the process profiles the next cycle.
+
+    With ADAPTIVE_POLLING the next cycle runs just after the next expected
+    upload of the SolaxCloud dongle (see ``PollScheduler``), waiting at most
+    the interval. With DAYLIGHT_POLICY the cycles are spaced out at night
+    (see ``DaylightPolicy``).
+
+    Args:
+        interval_seconds (int | None, optional): Seconds between the start of
+            two cycles (the maximum with ADAPTIVE_POLLING). Defaults to
+            DAEMON_INTERVAL_SECONDS.
+    """
+    interval = int(interval_seconds or Daemon.DAEMON_INTERVAL_SECONDS)
+    adaptive = Daemon.ADAPTIVE_POLLING.lower() == "true"
+    start_metrics_server()
+    if hasattr(signal, "SIGUSR1"):
+        profiler = get_cycle_profiler()
+        signal.signal(signal.SIGUSR1, lambda *_: profiler.request(1))
+    while True:
+        started = time.monotonic()
+        try:
+            run(wait_notifications=False)
+        except Exception as e:
+            logger.error("Cycle failed, waiting for the next one: {}", e)
+        if adaptive:
+            wait = get_poll_scheduler().next_poll(default=interval)
+        else:
+            wait = max(0.0, interval - (time.monotonic() - started))
+        daylight = get_daylight_policy()
+        if daylight is not None:
+            wait = daylight.next_wait(wait)
+        logger.debug("Next cycle in {:.0f} s", wait)
+        time.sleep(wait)
+
+
+def process_upstream_sync() -> None:
+    """Send the new local rows to the remote MySQL when SYNC_UPSTREAM is set.
+
+    Only applies to the sqlite backend. A failed sync is logged and retried
+    in the next cycle, the local data is kept.
+    """
+    if Storage.STORAGE_BACKEND != "sqlite" or Storage.SYNC_UPSTREAM != "true":
+        return
+    try:
+        sync_upstream()
+    except Exception as e:
+        logger.error("Upstream sync failed, retrying in the next cycle: {}", e)
+
+
+def process_energy_kpi() -> None:
+    """Compute the KPIs of the new readings when KPI_ENABLED is set.
+
+    A failed computation is logged and resumed in the next cycle from the
+    last readings with KPIs.
+    """
+    if Kpi.KPI_ENABLED.lower() != "true":
+        return
+    try:
+        run_kpi()
+    except Exception as e:
+        logger.error("KPI computation failed, retrying in the next cycle: {}", e)
 
 
 def process_solaxcloud_data(client: SolaxCloudAPI):
@@ -49,11 +167,39 @@ def process_solaxcloud_data(client: SolaxCloudAPI):
     Args:
         client (SolaxCloudAPI): The Solax Cloud API client.
     """
-    api_response = client.get_real_time_data()
+    daylight = get_daylight_policy()
+    if daylight is not None:
+        if not daylight.should_poll():
+            POLL_SKIPPED.inc()
+            logger.info("Outside the daylight window, skipping the Solax Cloud poll")
+            return
+        daylight.record_poll()
+    poll_solaxcloud_inverter(client)
+
+
+def poll_solaxcloud_inverter(client: SolaxCloudAPI, inverter: dict | None = None):
+    """Poll the dongle of an inverter and store its reading.
+
+    Args:
+        client (SolaxCloudAPI): The Solax Cloud API client.
+        inverter (dict | None, optional): Row of master_tb_inverters (``id``
+            and ``sn``, the serial number of the dongle). Defaults to the
+            dongle of WIFI_SN.
+    """
+    scheduler = get_poll_scheduler()
+    if inverter is None:
+        api_response = client.get_real_time_data()
+    else:
+        api_response = client.get_real_time_data(inverter["sn"])
     if api_response is None or not api_response.success or api_response.result is None:
+        scheduler.observe_failure()
         logger.error("No data was received from the Solax Cloud API")
         return
-    client.process_solaxcloud_response(api_response)
+    result = api_response.result
+    scheduler.observe(result.inverterSN, result.uploadTime)
+    client.process_solaxcloud_response(
+        api_response, inverter_id=int(inverter["id"]) if inverter else None
+    )
 
 
 def ensure_hour_interval_or_skip(
@@ -77,6 +223,30 @@ def ensure_hour_interval_or_skip(
     return elapsed.total_seconds() >= interval_minutes * 60
 
 
+def acquire_provider_lease(provider: str, interval_minutes: int) -> bool:
+    """
+    Toma el arriendo del proveedor para el intervalo actual (ver ``leases``).
+
+    Dos procesos (réplicas de un despliegue, ejecuciones de cron solapadas)
+    pueden pasar a la vez la comprobación del intervalo; solo el primero que
+    reclama el intervalo hace la petición y gasta cuota.
+
+    Args:
+        provider (str): Nombre del proveedor.
+        interval_minutes (int): Minutos entre dos peticiones al proveedor.
+
+    Returns:
+        bool: True si este proceso debe hacer la petición.
+    """
+    if leases.acquire(f"provider:{provider}", interval_minutes * 60):
+        return True
+    API_LEASE_SKIPPED.inc(provider=provider)
+    logger.info(
+        "Saltando petición a {}: otro proceso ya la hace en este intervalo.", provider
+    )
+    return False
+
+
 def process_weather_data(client: WeatherbitAPI) -> None:
     """
     Controla la lógica para llamar a la API de Weatherbit:
@@ -90,6 +260,8 @@ def process_weather_data(client: WeatherbitAPI) -> None:
     total_requests = (
         int(req_log_df.iloc[0]["total_requests"]) if not req_log_df.empty else 0
     )
+    API_QUOTA_USED.set(total_requests, provider="weatherbit")
+    API_QUOTA_LIMIT.set(int(Weatherbit.WB_DAILY_LIMIT), provider="weatherbit")
 
     if total_requests >= int(Weatherbit.WB_DAILY_LIMIT):
         logger.error(
@@ -112,10 +284,23 @@ def process_weather_data(client: WeatherbitAPI) -> None:
         )
         return
 
+    if not acquire_provider_lease("weatherbit", interval_minutes):
+        return
+
     current_request_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     api_response = client.get_current_weather()
     http_status_code = api_response.code if api_response else 0
+    if client.skipped:
+        # Circuito abierto: la petición no llegó a Weatherbit, no consume cuota
+        return
+
+    if client.from_cache:
+        # Ya se procesó al recibirla: no se registra ni se vuelve a insertar
+        logger.info("Respuesta de Weatherbit servida desde la caché HTTP.")
+        API_CACHE_HITS.inc(provider="weatherbit", endpoint="current")
+        return
 
+    API_REQUESTS.inc(provider="weatherbit", endpoint="current", status=http_status_code)
     log_data = [{"request_datetime": current_request_time, "status": http_status_code}]
     df_log = pd.DataFrame(log_data)
     insert_weatherbit_requests_log_(df_log.to_dict(orient="records"))
@@ -146,6 +331,8 @@ def process_openweather_data(client: OpenWeatherAPI) -> None:
     total_requests = (
         int(req_log_df.iloc[0]["total_requests"]) if not req_log_df.empty else 0
     )
+    API_QUOTA_USED.set(total_requests, provider="openweather")
+    API_QUOTA_LIMIT.set(int(OpenWeather.OW_DAILY_LIMIT), provider="openweather")
 
     if total_requests >= int(OpenWeather.OW_DAILY_LIMIT):
         logger.error(
@@ -168,17 +355,44 @@ def process_openweather_data(client: OpenWeatherAPI) -> None:
         )
         return
 
+    if not acquire_provider_lease("openweather", interval_minutes):
+        return
+
+    # Una respuesta servida desde la caché ya se procesó al recibirla
     current_weather = client.get_current_weather(request_options)
+    current_cached = client.from_cache
     air_pollution = client.get_air_pollution(request_options)
+    air_pollution_cached = client.from_cache
 
     if not current_weather or not current_weather.success:
         logger.error("No se recibieron datos de la API OpenWeather.")
-    else:
+    elif not current_cached:
         client.process_openweather_response_current(current_weather)
+        daylight = get_daylight_policy()
+        if daylight is not None and current_weather.result is not None:
+            daylight.observe_sun(
+                current_weather.result.sys.sunrise, current_weather.result.sys.sunset
+            )
 
     if not air_pollution or not air_pollution.success:
         logger.error("No se recibieron datos de la API OpenWeather.")
-    else:
+    elif not air_pollution_cached:
         client.process_openweather_air_pollution_response(air_pollution)
 
+    forecast = client.get_forecast(request_options)
+    if not forecast or not forecast.success:
+        logger.error("No se recibieron datos de pronóstico de la API OpenWeather.")
+    elif not client.from_cache:
+        client.process_openweather_forecast_response(forecast)
+        process_production_forecast(forecast)
+
     logger.info("Successfully processed all data from the OpenWeather API.")
+
+
+def process_production_forecast(forecast: OpenWeatherForecastResponse) -> None:
+    """Compute and store the PV production forecast of every inverter.
+
+    Args:
+        forecast (OpenWeatherForecastResponse): The OpenWeather 5 day forecast.
+    """
+    ProductionForecastEngine().run(forecast)
@@ -0,0 +1,202 @@
+"""PV production forecast engine based on irradiance and weather forecasts."""
+
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+from solarxdatahub.config import Forecast, OpenWeather
+from solarxdatahub.database.crud import (
+    get_energy_irradiance_history,
+    insert_production_forecast,
+)
+from solarxdatahub.models.model_openweather import OpenWeatherForecastResponse
+from solarxdatahub.utils.metrics import timed
+from solarxdatahub.utils.solar import clear_sky_ghi, cloudy_sky_ghi, solar_elevation
+
+# Irradiancia mínima para usar una hora en la calibración (W/m2)
+MIN_CALIBRATION_GHI = 50.0
+# Aproximación NOCT: la célula se calienta ~0.03 °C por cada W/m2
+CELL_HEATING_PER_GHI = 0.03
+
+
+class ProductionForecastEngine:
+    """Predicts the hourly production of every inverter over the forecast horizon.
+
+    Each inverter is modelled as ``power = k * ghi * temperature_factor``, where
+    ``k`` (W of AC power per W/m2 of irradiance) is fitted against the measured
+    history of tb_energy_data and weatherbit.tb_hourly_data. The forecast GHI is
+    derived from the clear sky irradiance attenuated by the forecast cloud cover.
+    All inverters and forecast hours are computed at once as a NumPy matrix.
+    """
+
+    def __init__(self):
+        self.horizon_hours = int(Forecast.FORECAST_HORIZON_HOURS)
+        self.calibration_days = int(Forecast.FORECAST_CALIBRATION_DAYS)
+        self.min_samples = int(Forecast.FORECAST_MIN_SAMPLES)
+        self.temp_coefficient = float(Forecast.FORECAST_TEMP_COEFFICIENT)
+
+    def temperature_factor(self, temp: np.ndarray, ghi: np.ndarray) -> np.ndarray:
+        """Power derating factor due to the cell temperature.
+
+        Args:
+            temp (np.ndarray): Air temperature in °C.
+            ghi (np.ndarray): Global horizontal irradiance in W/m2.
+
+        Returns:
+            np.ndarray: Multiplicative factor (1.0 at 25 °C cell temperature).
+        """
+        cell_temp = temp + CELL_HEATING_PER_GHI * ghi
+        return 1.0 + self.temp_coefficient * (cell_temp - 25.0)
+
+    def calibrate(self, df_history: pd.DataFrame) -> pd.Series:
+        """Fit the calibration factor of each inverter by least squares.
+
+        Args:
+            df_history (pd.DataFrame): Hourly history with the columns
+                inverter_id, acpower, ghi and temp.
+
+        Returns:
+            pd.Series: Calibration factor indexed by inverter_id. Inverters
+            without enough daylight samples are left out.
+        """
+        if df_history.empty:
+            return pd.Series(dtype=float)
+
+        df = df_history.dropna(subset=["acpower", "ghi"])
+        ghi = df["ghi"].to_numpy(dtype=float)
+        acpower = df["acpower"].to_numpy(dtype=float)
+        temp = df["temp"].fillna(25.0).to_numpy(dtype=float)
+
+        daylight = ghi >= MIN_CALIBRATION_GHI
+        x = ghi[daylight] * self.temperature_factor(temp[daylight], ghi[daylight])
+        y = acpower[daylight]
+        sums = (
+            pd.DataFrame(
+                {
+                    "inverter_id": df["inverter_id"].to_numpy()[daylight],
+                    "xy": x * y,
+                    "xx": x * x,
+                }
+            )
+            .groupby("inverter_id")
+            .agg(xy=("xy", "sum"), xx=("xx", "sum"), samples=("xx", "size"))
+        )
+
+        valid = sums[(sums["samples"] >= self.min_samples) & (sums["xx"] > 0)]
+        for inverter_id in sums.index.difference(valid.index):
+            logger.warning(
+                "Not enough history to calibrate the forecast of inverter ID: {}",
+                inverter_id,
+            )
+        return valid["xy"] / valid["xx"]
+
+    def weather_horizon(
+        self, response: OpenWeatherForecastResponse, issue_time: float
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Interpolate the 3 hour forecast slots onto an hourly grid.
+
+        Args:
+            response (OpenWeatherForecastResponse): The forecast response.
+            issue_time (float): Unix timestamp of the forecast issue.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray, np.ndarray]: Start of each forecast hour
+            (Unix timestamp), cloud cover (%) and air temperature (°C).
+        """
+        slot_times = np.array([item.dt for item in response.result], dtype=float)
+        slot_clouds = np.array(
+            [item.clouds.all for item in response.result], dtype=float
+        )
+        slot_temps = np.array([item.main.temp for item in response.result], dtype=float)
+
+        first_hour = (issue_time // 3600 + 1) * 3600
+        hours = first_hour + 3600.0 * np.arange(self.horizon_hours)
+        midpoints = hours + 1800.0
+        clouds = np.interp(midpoints, slot_times, slot_clouds)
+        temps = np.interp(midpoints, slot_times, slot_temps)
+        return hours, clouds, temps
+
+    def forecast(
+        self,
+        response: OpenWeatherForecastResponse,
+        calibration: pd.Series,
+        issue_datetime: datetime,
+    ) -> pd.DataFrame:
+        """Compute the hourly forecast of every calibrated inverter.
+
+        Args:
+            response (OpenWeatherForecastResponse): The forecast response.
+            calibration (pd.Series): Calibration factor indexed by inverter_id.
+            issue_datetime (datetime): The moment the forecast is issued.
+
+        Returns:
+            pd.DataFrame: Rows for the tb_production_forecast table.
+        """
+        if response.city is not None:
+            latitude, longitude = response.city.coord.lat, response.city.coord.lon
+        else:
+            latitude, longitude = float(OpenWeather.OW_LAT), float(OpenWeather.OW_LON)
+
+        hours, clouds, temps = self.weather_horizon(
+            response, issue_datetime.timestamp()
+        )
+        elevation = solar_elevation(hours + 1800.0, latitude, longitude)
+        ghi = cloudy_sky_ghi(clear_sky_ghi(elevation), clouds)
+        if OpenWeather.OW_METRICS == "metric":
+            unit_power = ghi * self.temperature_factor(temps, ghi)
+        else:
+            # Sin grados Celsius no se aplica la corrección por temperatura
+            unit_power = ghi
+
+        factors = calibration.to_numpy(dtype=float)
+        # (inversores x horas): potencia media esperada en cada hora
+        power = np.clip(np.outer(factors, unit_power), 0.0, None)
+
+        n_inverters, n_hours = power.shape
+        target_datetimes = [datetime.fromtimestamp(ts) for ts in hours]
+        return pd.DataFrame(
+            {
+                "inverter_id": np.repeat(calibration.index.to_numpy(), n_hours),
+                "issue_datetime": issue_datetime,
+                "target_datetime": target_datetimes * n_inverters,
+                "clouds": np.tile(clouds, n_inverters).round(1),
+                "ghi": np.tile(ghi, n_inverters).round(1),
+                "calibration_factor": np.repeat(factors, n_hours).round(4),
+                "expected_power": power.ravel().round(1),
+                # Potencia media durante una hora -> energía en Wh
+                "expected_energy": power.ravel().round(1),
+            }
+        )
+
+    def run(self, response: OpenWeatherForecastResponse) -> int:
+        """Calibrate, forecast and store the production of every inverter.
+
+        Args:
+            response (OpenWeatherForecastResponse): The forecast response.
+
+        Returns:
+            int: The number of forecast rows written.
+        """
+        if not response.result:
+            logger.error("The forecast response has no slots to process.")
+            return 0
+
+        calibration = self.calibrate(
+            get_energy_irradiance_history(self.calibration_days)
+        )
+        if calibration.empty:
+            logger.warning("No inverter could be calibrated, skipping the forecast.")
+            return 0
+
+        issue_datetime = datetime.now().replace(microsecond=0)
+        with timed("build_rows", table="tb_production_forecast"):
+            df_forecast = self.forecast(response, calibration, issue_datetime)
+        insert_production_forecast(df_forecast)
+        logger.info(
+            "Production forecast stored for {} inverter(s) over {} hours.",
+            len(calibration),
+            self.horizon_hours,
+        )
+        return len(df_forecast)
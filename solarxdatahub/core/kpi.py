@@ -0,0 +1,219 @@
+"""Derived energy KPIs of every reading, stored in tb_energy_kpi.
+
+The analytics kept deriving the same quantities from the raw readings of
+tb_energy_data and tb_battery_data with window functions over the whole
+history. They are computed instead once per reading, right after the
+ingestion, and stored with the key of the reading (fecha, periodo, min,
+inverter_id):
+
+- yield_energy, feedin_energy, consume_energy: kWh of the interval since the
+  previous reading of the inverter, from the yieldtotal, feedinenergy and
+  consumeenergy counters;
+- home_load: W used by the house (``acpower - feedinpower``);
+- self_consumption: fraction of the energy produced in the interval that was
+  not exported;
+- battery_charge, battery_discharge: kWh in and out of the battery, from the
+  batPower of both ends of the interval (trapezoidal rule).
+
+Only the readings newer than the newest one with KPIs of each inverter are
+read, in batches of KPI_BATCH_SIZE, and every batch is computed with NumPy
+over whole columns. The counters are cumulative, so the energy of an interval
+is right however long it is; a counter that drops has been reset (a replaced
+inverter, a firmware update) and its energy is the new value, unless it only
+dropped a little, which is noise and counts as zero. The battery power is
+only integrated over intervals up to KPI_MAX_GAP_SECONDS, the longer ones are
+flagged as gaps.
+
+By default the limit follows the expected interval between two readings:
+DAEMON_INTERVAL_SECONDS by day and, with DAYLIGHT_POLICY, one reading every
+NIGHT_HEARTBEAT_MINUTES at night, plus two polling periods of tolerance. The
+night discharge of the battery is then integrated between the heartbeats,
+from the batPower of both ends of each interval; only a missing heartbeat is
+a gap.
+
+Readings backfilled older than the newest one with KPIs of their inverter are
+not picked up: delete the KPIs of the inverter from that date to compute them
+again.
+"""
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+from solarxdatahub.config import Daemon, Kpi
+from solarxdatahub.database.crud import get_energy_kpi_source, insert_energy_kpi
+from solarxdatahub.models.records import UPLOAD_TIME_FORMAT
+from solarxdatahub.utils.metrics import KPI_INTERVALS, timed
+
+# Columna de tb_energy_kpi -> contador acumulado de tb_energy_data
+COUNTERS = {
+    "yield_energy": "yieldtotal",
+    "feedin_energy": "feedinenergy",
+    "consume_energy": "consumeenergy",
+}
+# Periodos de sondeo de margen sobre el intervalo esperado antes de un hueco
+GAP_TOLERANCE_PERIODS = 2
+# Un contador que cae por debajo de esta fracción del valor anterior se ha
+# reiniciado; una caída menor es ruido del redondeo del dongle
+RESET_RATIO = 0.5
+KPI_COLUMNS = (
+    "interval_seconds",
+    *COUNTERS,
+    "home_load",
+    "self_consumption",
+    "battery_charge",
+    "battery_discharge",
+    "counter_reset",
+    "gap",
+)
+
+
+def _column(frame: pd.DataFrame, name: str) -> np.ndarray:
+    return pd.to_numeric(frame[name], errors="coerce").to_numpy(np.float64)
+
+
+def _counter_delta(
+    current: np.ndarray, previous: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """Increase of a cumulative counter, and whether it was reset."""
+    delta = current - previous
+    reset = (delta < 0) & (current < previous * RESET_RATIO)
+    delta = np.where(reset, current, delta)
+    return np.where(delta < 0, 0.0, delta), reset
+
+
+def max_gap_seconds() -> float:
+    """Longest interval over which the battery power is integrated.
+
+    Returns:
+        float: KPI_MAX_GAP_SECONDS, or the longest expected interval between
+            two readings (the night heartbeat with DAYLIGHT_POLICY) plus
+            GAP_TOLERANCE_PERIODS polling periods.
+    """
+    if Kpi.KPI_MAX_GAP_SECONDS:
+        return float(Kpi.KPI_MAX_GAP_SECONDS)
+    period = float(Daemon.DAEMON_INTERVAL_SECONDS)
+    expected = period
+    if Daemon.DAYLIGHT_POLICY.lower() == "true":
+        expected = max(expected, float(Daemon.NIGHT_HEARTBEAT_MINUTES) * 60.0)
+    return expected + GAP_TOLERANCE_PERIODS * period
+
+
+def compute_kpis(frame: pd.DataFrame, max_gap_seconds: float) -> pd.DataFrame:
+    """Compute the KPIs of a batch of readings.
+
+    Args:
+        frame (pd.DataFrame): Readings ordered by inverter_id and uploadTime,
+            with the columns of ``read_energy_kpi_source``. The first reading
+            of every inverter is only the previous one of the next.
+        max_gap_seconds (float): Longest interval over which the battery
+            power is integrated.
+
+    Returns:
+        pd.DataFrame: The KPI_COLUMNS of every reading, NaN (or 0 for the
+            flags) where there is no previous reading.
+    """
+    inverter = frame["inverter_id"].to_numpy(np.int64)
+    upload = pd.to_datetime(frame["uploadTime"]).to_numpy("datetime64[s]")
+    seconds = upload.astype(np.int64).astype(np.float64)
+    # Posición de la lectura anterior (la propia en la primera del lote)
+    previous = np.maximum(np.arange(len(frame)) - 1, 0)
+    has_previous = np.zeros(len(frame), dtype=bool)
+    has_previous[1:] = inverter[1:] == inverter[:-1]
+
+    interval = np.where(has_previous, seconds - seconds[previous], np.nan)
+    gap = has_previous & (interval > max_gap_seconds)
+    kpis = {"interval_seconds": interval}
+    counter_reset = np.zeros(len(frame), dtype=bool)
+    for name, counter in COUNTERS.items():
+        values = _column(frame, counter)
+        delta, reset = _counter_delta(values, values[previous])
+        kpis[name] = np.where(has_previous, delta, np.nan)
+        counter_reset |= has_previous & reset
+
+    kpis["home_load"] = _column(frame, "acpower") - _column(frame, "feedinpower")
+    produced = kpis["yield_energy"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = (produced - kpis["feedin_energy"]) / produced
+    kpis["self_consumption"] = np.where(produced > 0, np.clip(ratio, 0.0, 1.0), np.nan)
+
+    # batPower > 0: carga, < 0: descarga (W); kWh = W * s / 3.6e6
+    power = _column(frame, "batPower")
+    kwh_per_watt = np.where(has_previous & ~gap, interval, np.nan) / 3.6e6
+    kpis["battery_charge"] = (
+        (np.maximum(power, 0) + np.maximum(power[previous], 0)) / 2 * kwh_per_watt
+    )
+    kpis["battery_discharge"] = (
+        (np.maximum(-power, 0) + np.maximum(-power[previous], 0)) / 2 * kwh_per_watt
+    )
+    kpis["counter_reset"] = counter_reset.astype(np.int8)
+    kpis["gap"] = gap.astype(np.int8)
+    return pd.DataFrame(kpis, index=frame.index)
+
+
+def _rows(frame: pd.DataFrame, kpis: pd.DataFrame) -> list[dict]:
+    """Rows of tb_energy_kpi (NaN -> NULL)."""
+    columns = {
+        "fecha": frame["fecha"].astype(str).tolist(),
+        "periodo": frame["periodo"].tolist(),
+        "min": frame["min"].tolist(),
+        "inverter_id": frame["inverter_id"].tolist(),
+        "uploadTime": pd.to_datetime(frame["uploadTime"])
+        .dt.strftime(UPLOAD_TIME_FORMAT)
+        .tolist(),
+    }
+    for name in KPI_COLUMNS:
+        values = kpis[name].to_numpy()
+        if values.dtype.kind == "f":
+            nulls = np.isnan(values)
+            values = values.astype(object)
+            values[nulls] = None
+        columns[name] = values.tolist()
+    return [dict(zip(columns, row)) for row in zip(*columns.values())]
+
+
+def run_kpi(batch_size: int | None = None) -> int:
+    """Compute and store the KPIs of the readings newer than tb_energy_kpi.
+
+    Args:
+        batch_size (int | None, optional): Readings per batch. Defaults to
+            KPI_BATCH_SIZE.
+
+    Returns:
+        int: The readings with new KPIs.
+    """
+    batch_size = int(batch_size or Kpi.KPI_BATCH_SIZE)
+    gap_limit = max_gap_seconds()
+    carry: pd.DataFrame | None = None
+    after_inverter, after_upload = None, None
+    stored = 0
+    while True:
+        batch = get_energy_kpi_source(batch_size, after_inverter, after_upload)
+        if batch.empty:
+            break
+        with timed("build_rows", table="tb_energy_kpi"):
+            # La última lectura del lote anterior es la previa de la primera
+            frame = batch if carry is None else pd.concat([carry, batch])
+            frame = frame.reset_index(drop=True)
+            kpis = compute_kpis(frame, gap_limit)
+            upload = pd.to_datetime(frame["uploadTime"])
+            # Las lecturas que ya tienen KPI solo sirven de lectura anterior
+            new = upload.ne(pd.to_datetime(frame["last_kpi"])).to_numpy()
+            if carry is not None:
+                new[0] = False
+            rows = _rows(frame[new], kpis[new])
+        if rows:
+            insert_energy_kpi(rows)
+            stored += len(rows)
+            resets = kpis["counter_reset"][new].astype(bool)
+            gaps = kpis["gap"][new].astype(bool)
+            KPI_INTERVALS.inc(int((~resets & ~gaps).sum()), kind="normal")
+            KPI_INTERVALS.inc(int(resets.sum()), kind="counter_reset")
+            KPI_INTERVALS.inc(int(gaps.sum()), kind="gap")
+        carry = batch.iloc[[-1]]
+        after_inverter = int(carry["inverter_id"].iloc[0])
+        after_upload = upload.iloc[-1].strftime(UPLOAD_TIME_FORMAT)
+        if len(batch) < batch_size:
+            break
+    logger.info("KPIs computed for {} readings", stored)
+    return stored
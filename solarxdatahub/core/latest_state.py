@@ -0,0 +1,124 @@
+"""Latest state of every inverter, without touching the reading tables.
+
+Knowing what an inverter is doing right now from tb_energy_data,
+tb_battery_data and tb_phase_power_data takes an ``ORDER BY uploadTime DESC
+LIMIT 1`` per table and inverter. The ingestion keeps instead one row per
+inverter with the newest energy, phase, battery and status values in
+tb_inverter_latest_state, written next to the reading tables, and the same
+rows in memory.
+
+The process that ingests (the daemon) answers from memory. Any other process
+reads the small table once and again every LATEST_STATE_TTL_SECONDS; a state
+is only ever replaced by a newer reading, so replays and backfills of old
+readings never move it back.
+"""
+
+import threading
+import time
+from datetime import datetime
+
+from loguru import logger
+
+from solarxdatahub.config import LatestState
+from solarxdatahub.database.crud import (
+    get_inverter_latest_state,
+    insert_inverter_latest_state,
+)
+from solarxdatahub.models.records import UPLOAD_TIME_FORMAT
+
+
+def _upload_time(value) -> str:
+    """uploadTime as ``YYYY-MM-DD HH:MM:SS`` whatever the engine returned."""
+    if isinstance(value, datetime):
+        return value.strftime(UPLOAD_TIME_FORMAT)
+    return str(value)
+
+
+class LatestStateStore:
+    """One row per inverter with the values of its newest reading.
+
+    Args:
+        ttl (float | None, optional): Seconds before the table is read again.
+            Defaults to LATEST_STATE_TTL_SECONDS.
+    """
+
+    def __init__(self, ttl: float | None = None):
+        self.ttl = float(LatestState.LATEST_STATE_TTL_SECONDS if ttl is None else ttl)
+        self._states: dict[int, dict] = {}
+        self._loaded_at = float("-inf")
+        self._lock = threading.Lock()
+
+    def _merge(self, row: dict) -> bool:
+        """Keep ``row`` unless the known state of the inverter is newer."""
+        current = self._states.get(row["inverter_id"])
+        if current is not None and current["uploadTime"] > row["uploadTime"]:
+            return False
+        self._states[row["inverter_id"]] = row
+        return True
+
+    def update(self, row: dict) -> bool:
+        """Store a reading as the latest state of its inverter.
+
+        The table upsert ignores readings older than the stored one as well.
+
+        Args:
+            row (dict): ``ReadingRecord.latest_state_row`` of the reading,
+                already written to the reading tables.
+
+        Returns:
+            bool: True if the reading is now the latest state.
+        """
+        insert_inverter_latest_state([row])
+        with self._lock:
+            return self._merge(dict(row))
+
+    def refresh(self) -> None:
+        """Read tb_inverter_latest_state into memory."""
+        frame = get_inverter_latest_state()
+        # NaN de pandas -> None, como en las filas escritas por este proceso
+        frame = frame.astype(object).where(frame.notna(), None)
+        with self._lock:
+            for row in frame.to_dict(orient="records"):
+                row["inverter_id"] = int(row["inverter_id"])
+                row["uploadTime"] = _upload_time(row["uploadTime"])
+                self._merge(row)
+            self._loaded_at = time.monotonic()
+        logger.debug("Latest state of {} inverters loaded", len(frame))
+
+    def _ensure_fresh(self) -> None:
+        if time.monotonic() - self._loaded_at > self.ttl:
+            self.refresh()
+
+    def get(self, inverter_id: int) -> dict | None:
+        """Latest state of an inverter.
+
+        Args:
+            inverter_id (int): The inverter ID.
+
+        Returns:
+            dict | None: uploadTime and the values of the newest reading, or
+                None if the inverter has none.
+        """
+        self._ensure_fresh()
+        with self._lock:
+            state = self._states.get(inverter_id)
+            return dict(state) if state is not None else None
+
+    def all(self) -> dict[int, dict]:
+        """Latest state of every inverter, keyed by inverter ID."""
+        self._ensure_fresh()
+        with self._lock:
+            return {key: dict(state) for key, state in self._states.items()}
+
+
+_latest_state: LatestStateStore | None = None
+_latest_state_lock = threading.Lock()
+
+
+def get_latest_state() -> LatestStateStore:
+    """Return the process wide latest state store."""
+    global _latest_state
+    with _latest_state_lock:
+        if _latest_state is None:
+            _latest_state = LatestStateStore()
+        return _latest_state
@@ -0,0 +1,80 @@
+"""Leases of tb_worker_lease, shared by every process of a database.
+
+A lease is a key (an inverter, a provider) taken for a slot, a period of time
+aligned to the epoch. The conditional upsert of ``upsert_tb_worker_lease``
+keeps the first claim of a slot, so of the processes that claim a key for the
+same slot (workers, the replicas of a blue/green deploy, overlapping cron
+runs) exactly one gets it, at the cost of one upsert and one read whatever
+the number of processes. The slot is also the fencing token of the lease: a
+claim only takes a key over for a later slot, so a process that stalls can't
+take back a slot already claimed by another one.
+
+The slots (and the heartbeats of the workers) are stored as UTC: in local
+time the clock goes back an hour at the autumn DST change, and every slot of
+that hour would look older than the ones already claimed.
+
+Unlike a ``GET_LOCK`` lock, a lease doesn't depend on the database session,
+which the MySQL backend reopens silently on reconnection, and works the same
+with the SQLite backend.
+"""
+
+import os
+import socket
+import time
+import uuid
+from datetime import datetime, timezone
+
+from solarxdatahub.database.crud import claim_worker_leases, get_worker_leases
+
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Dueño de los arriendos de este proceso (único aunque se reinicie)
+OWNER = f"{socket.gethostname()}-{os.getpid()}@{uuid.uuid4().hex[:8]}"
+
+
+def utc_text(epoch: float | None = None) -> str:
+    """``epoch`` (now by default) as a UTC DATETIME of the lease tables."""
+    epoch = time.time() if epoch is None else epoch
+    return datetime.fromtimestamp(epoch, timezone.utc).strftime(DATETIME_FORMAT)
+
+
+def slot_start(slot_seconds: float, now: float | None = None) -> float:
+    """Epoch seconds at which the slot of ``now`` started."""
+    now = time.time() if now is None else now
+    return now - now % slot_seconds
+
+
+def claim(keys: list[str], slot: float, owner: str = OWNER) -> set[str]:
+    """Claim the leases of ``keys`` for a slot.
+
+    Args:
+        keys (list[str]): The lease keys.
+        slot (float): Start of the slot (epoch seconds).
+        owner (str, optional): The claiming process. Defaults to OWNER.
+
+    Returns:
+        set[str]: The keys leased to ``owner`` for the slot.
+    """
+    if not keys:
+        return set()
+    slot_text = utc_text(slot)
+    claim_worker_leases(
+        [{"lease_key": key, "worker_id": owner, "slot": slot_text} for key in keys]
+    )
+    leases = get_worker_leases(owner, slot_text)
+    held = set(leases["lease_key"]) if not leases.empty else set()
+    return held.intersection(keys)
+
+
+def acquire(key: str, slot_seconds: float, owner: str = OWNER) -> bool:
+    """Take ``key`` for the current slot of ``slot_seconds``.
+
+    Args:
+        key (str): The lease key.
+        slot_seconds (float): Length of the slots of the key.
+        owner (str, optional): The claiming process. Defaults to OWNER.
+
+    Returns:
+        bool: True if ``owner`` holds the key until the end of the slot.
+    """
+    return key in claim([key], slot_start(slot_seconds), owner)
@@ -0,0 +1,372 @@
+"""Windowed notification rules evaluated on in-memory ring buffers.
+
+Every inverter keeps its last ``RULES_WINDOW_CAPACITY`` readings in a fixed
+size NumPy ring buffer (``ReadingWindow``). The rules look at the readings of
+the last N minutes with vectorized operations, without touching the database,
+and use hysteresis: a rule becomes active when its condition holds and only
+clears once the values move back past a lower threshold, so a passing cloud
+doesn't produce a new notification. ``RulesEngine.observe`` returns an event
+only when a rule becomes active.
+
+The windows and the rule states are persisted with ``StateStore`` so the
+rules also work when the data hub runs as a one-shot job. They are saved once
+per cycle (``RulesEngine.save``), not on every reading.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+import numpy as np
+
+from solarxdatahub.config import Ntfy, Rules
+from solarxdatahub.models.records import ReadingRecord
+from solarxdatahub.utils.state import StateStore
+
+COLUMNS = (
+    "timestamp",
+    "feedinpower",
+    "soc",
+    "powerdc1",
+    "powerdc2",
+    "powerdc3",
+    "powerdc4",
+)
+STRING_COLUMNS = ("powerdc1", "powerdc2", "powerdc3", "powerdc4")
+_INDEX = {name: index for index, name in enumerate(COLUMNS)}
+_STRINGS = [_INDEX[name] for name in STRING_COLUMNS]
+
+# El dongle sube una lectura cada ~5 minutos
+READING_INTERVAL_SECONDS = 300
+
+
+class ReadingWindow:
+    """Fixed size ring buffer with the recent readings of an inverter.
+
+    Every reading is written twice (at ``position`` and ``position +
+    capacity``), so the latest readings are always a contiguous slice in
+    chronological order and the windows are views found with a binary search
+    on the timestamps, without copies. Missing values are NaN.
+
+    Args:
+        capacity (int): Readings kept.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.data = np.full((2 * capacity, len(COLUMNS)), np.nan)
+        self.position = 0
+        self.size = 0
+        self._windows: dict[float, np.ndarray | None] = {}
+
+    def append(self, values: list[float]) -> None:
+        """Add a reading, overwriting the oldest one when full.
+
+        Args:
+            values (list[float]): One value per column of ``COLUMNS``.
+        """
+        self.data[self.position] = values
+        self.data[self.position + self.capacity] = values
+        self.position = (self.position + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+        self._windows.clear()
+
+    def rows(self) -> np.ndarray:
+        """Every reading kept, oldest first (a view of the buffer)."""
+        end = self.position + self.capacity
+        return self.data[end - self.size : end]
+
+    @property
+    def now(self) -> float:
+        """Timestamp of the latest reading."""
+        return self.data[self.position + self.capacity - 1, 0]
+
+    def latest(self, column: str) -> float:
+        """Value of a column in the latest reading."""
+        return self.data[self.position + self.capacity - 1, _INDEX[column]]
+
+    def last_minutes(self, minutes: float) -> np.ndarray | None:
+        """Readings of the last ``minutes`` (relative to the latest reading).
+
+        Returns:
+            np.ndarray | None: The rows, oldest first, or None if the buffer
+                doesn't cover the whole period yet.
+        """
+        if minutes in self._windows:
+            return self._windows[minutes]
+        rows = self.rows()
+        window = None
+        if self.size:
+            start = self.now - minutes * 60.0
+            first = int(rows[:, 0].searchsorted(start))
+            # Sin lecturas anteriores al periodo solo vale si empieza al inicio
+            if first or rows[0, 0] <= start + READING_INTERVAL_SECONDS:
+                window = rows[first:]
+        self._windows[minutes] = window
+        return window
+
+    def to_state(self) -> dict:
+        """JSON serializable copy of the buffer."""
+        return {"rows": self.rows().tolist()}
+
+    @classmethod
+    def from_state(cls, state: dict, capacity: int) -> "ReadingWindow":
+        """Rebuild a buffer saved with ``to_state`` (resized to ``capacity``)."""
+        window = cls(capacity)
+        for row in state.get("rows", [])[-capacity:]:
+            window.append(row)
+        return window
+
+
+@dataclass(frozen=True)
+class RuleEvent:
+    """A rule that became active for an inverter."""
+
+    inverter_id: int
+    notification_type: str
+    title: str
+    message: str
+
+
+@dataclass(frozen=True)
+class SustainedThresholdRule:
+    """A column stays above (or below) a threshold for a number of minutes.
+
+    Becomes active when every reading of the window is past ``enter`` and
+    clears when the mean of the window is back past ``clear``. With
+    ``minutes=0`` only the latest reading is checked.
+    """
+
+    notification_type: str
+    column: str
+    enter: float
+    clear: float
+    minutes: float
+    above: bool
+    title: str
+    template: str
+
+    def evaluate(self, window: ReadingWindow, active: bool) -> bool:
+        """New state of the rule for the window."""
+        if self.minutes:
+            rows = window.last_minutes(self.minutes)
+            if rows is None:
+                return active
+            values = rows[:, _INDEX[self.column]]
+        else:
+            values = np.array([window.latest(self.column)])
+        values = values[~np.isnan(values)]
+        if not values.size:
+            return active
+        if not self.above:
+            values = -values
+            enter, clear = -self.enter, -self.clear
+        else:
+            enter, clear = self.enter, self.clear
+        if active:
+            return bool(values.sum() / values.size > clear)
+        return bool(values.min() > enter)
+
+    def event(self, inverter_id: int, window: ReadingWindow) -> RuleEvent:
+        """Notification of the rule becoming active."""
+        value = window.latest(self.column)
+        message = self.template.format(
+            value=abs(value), enter=abs(self.enter), minutes=self.minutes
+        )
+        return RuleEvent(inverter_id, self.notification_type, self.title, message)
+
+
+@dataclass(frozen=True)
+class StringMismatchRule:
+    """The DC strings of an inverter produce very different power.
+
+    Compares the mean power of every string over the window; active when the
+    weakest string produces ``ratio`` less than the strongest one (only with
+    ``min_power`` W or more on the strongest), clears below
+    ``ratio * hysteresis``.
+    """
+
+    ratio: float
+    min_power: float
+    minutes: float
+    hysteresis: float
+    notification_type: str = "string_mismatch"
+    title: str = "Strings descompensados"
+
+    def _mismatch(self, window: ReadingWindow) -> float | None:
+        rows = window.last_minutes(self.minutes)
+        if rows is None:
+            return None
+        strings = rows[:, _STRINGS]
+        valid = ~np.isnan(strings)
+        counts = valid.sum(axis=0)
+        # Solo los strings conectados (con algún valor en la ventana)
+        connected = counts > 0
+        if np.count_nonzero(connected) < 2:
+            return None
+        sums = np.where(valid, strings, 0.0).sum(axis=0)
+        means = sums[connected] / counts[connected]
+        strongest = means.max()
+        if strongest < self.min_power:
+            return None
+        return 1.0 - means.min() / strongest
+
+    def evaluate(self, window: ReadingWindow, active: bool) -> bool:
+        """New state of the rule for the window."""
+        mismatch = self._mismatch(window)
+        if mismatch is None:
+            return active
+        if active:
+            return mismatch > self.ratio * self.hysteresis
+        return mismatch > self.ratio
+
+    def event(self, inverter_id: int, window: ReadingWindow) -> RuleEvent:
+        """Notification of the rule becoming active."""
+        mismatch = self._mismatch(window) or 0.0
+        message = (
+            f"Un string DC produce un {mismatch:.0%} menos que el resto en los "
+            f"últimos {self.minutes:.0f} minutos. Revisa sombras, suciedad o el "
+            "cableado de los paneles."
+        )
+        return RuleEvent(inverter_id, self.notification_type, self.title, message)
+
+
+def default_rules() -> list:
+    """The rules configured by NTFY_EXCESS_MARGIN and the RULES_* settings."""
+    margin = float(Ntfy.NTFY_EXCESS_MARGIN)
+    hysteresis = float(Rules.RULES_HYSTERESIS)
+    minutes = float(Rules.RULES_SUSTAINED_MINUTES)
+    return [
+        SustainedThresholdRule(
+            notification_type="energy_available",
+            column="feedinpower",
+            enter=margin,
+            clear=margin * hysteresis,
+            minutes=minutes,
+            above=True,
+            title="Energia disponible",
+            template=(
+                "Tienes {value:.0f} W de excedente (umbral {enter:.0f} W) desde "
+                "hace {minutes:.0f} minutos. Puedes encender aparatos para "
+                "aprovechar tu propia energía."
+            ),
+        ),
+        SustainedThresholdRule(
+            notification_type="high_consumption",
+            column="feedinpower",
+            enter=-margin,
+            clear=-margin * hysteresis,
+            minutes=minutes,
+            above=False,
+            title="Consumo elevado",
+            template=(
+                "Estás consumiendo {value:.0f} W por encima de tu producción "
+                "(umbral {enter:.0f} W) desde hace {minutes:.0f} minutos. "
+                "Apaga aparatos para ahorrar."
+            ),
+        ),
+        SustainedThresholdRule(
+            notification_type="battery_low",
+            column="soc",
+            enter=float(Rules.RULES_SOC_LOW),
+            clear=float(Rules.RULES_SOC_LOW_CLEAR),
+            minutes=0,
+            above=False,
+            title="Bateria baja",
+            template="La batería está al {value:.0f} % (umbral {enter:.0f} %).",
+        ),
+        StringMismatchRule(
+            ratio=float(Rules.RULES_STRING_MISMATCH_RATIO),
+            min_power=float(Rules.RULES_STRING_MIN_POWER),
+            minutes=float(Rules.RULES_STRING_MINUTES),
+            hysteresis=hysteresis,
+        ),
+    ]
+
+
+class RulesEngine:
+    """Evaluates the rules on the reading windows of every inverter.
+
+    Args:
+        rules (list | None, optional): The rules. Defaults to ``default_rules()``.
+        capacity (int | None, optional): Readings kept per inverter. Defaults
+            to RULES_WINDOW_CAPACITY.
+        store (StateStore | None, optional): Where the windows and the rule
+            states are persisted. Defaults to None (memory only).
+    """
+
+    def __init__(
+        self,
+        rules: list | None = None,
+        capacity: int | None = None,
+        store: StateStore | None = None,
+    ):
+        self.rules = default_rules() if rules is None else rules
+        self.capacity = int(capacity or Rules.RULES_WINDOW_CAPACITY)
+        self.store = store
+        self._windows: dict[int, ReadingWindow] = {}
+        self._active: set[tuple[int, str]] = set()
+        self._dirty = False
+        if store is not None:
+            self._load(store.load())
+
+    def _load(self, state: dict) -> None:
+        for inverter_id, window in state.get("windows", {}).items():
+            self._windows[int(inverter_id)] = ReadingWindow.from_state(
+                window, self.capacity
+            )
+        for key in state.get("active", []):
+            inverter_id, notification_type = key.split(":", 1)
+            self._active.add((int(inverter_id), notification_type))
+
+    def save(self) -> None:
+        """Persist the windows and the rule states if they changed."""
+        if self.store is None or not self._dirty:
+            return
+        self.store.save(
+            {
+                "windows": {
+                    str(inverter_id): window.to_state()
+                    for inverter_id, window in self._windows.items()
+                },
+                "active": [f"{key[0]}:{key[1]}" for key in sorted(self._active)],
+            }
+        )
+        self._dirty = False
+
+    def is_active(self, inverter_id: int, notification_type: str) -> bool:
+        """Whether a rule is currently active for an inverter."""
+        return (inverter_id, notification_type) in self._active
+
+    def observe(self, record: ReadingRecord) -> list[RuleEvent]:
+        """Add a reading and evaluate the rules of its inverter.
+
+        Args:
+            record (ReadingRecord): The reading.
+
+        Returns:
+            list[RuleEvent]: The rules that became active with this reading.
+        """
+        window = self._windows.get(record.inverter_id)
+        if window is None:
+            window = self._windows[record.inverter_id] = ReadingWindow(self.capacity)
+        self._dirty = True
+        upload = datetime.fromisoformat(record.uploadTime)
+        window.append(
+            [upload.replace(tzinfo=timezone.utc).timestamp()]
+            + [
+                np.nan if getattr(record, name) is None else getattr(record, name)
+                for name in COLUMNS[1:]
+            ]
+        )
+
+        events = []
+        for rule in self.rules:
+            key = (record.inverter_id, rule.notification_type)
+            was_active = key in self._active
+            if rule.evaluate(window, was_active):
+                self._active.add(key)
+                if not was_active:
+                    events.append(rule.event(record.inverter_id, window))
+            else:
+                self._active.discard(key)
+        return events
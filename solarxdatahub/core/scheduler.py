@@ -0,0 +1,420 @@
+"""Polling schedule aligned to the upload cadence of the SolaxCloud dongles.
+
+A dongle uploads a reading every ~5 minutes at a fixed offset of its own.
+Polling on a fixed interval either asks for readings that are not there yet
+or finds them minutes late. ``PollScheduler`` learns for every inverter, from
+the ``uploadTime`` of the readings it sees:
+
+- the period, as the median time between consecutive uploads;
+- the phase, as the median offset of the uploads from the period grid, and
+  the jitter around it;
+- the delay until a reading can be fetched, as the smallest difference
+  between the moment a new reading was first seen and its ``uploadTime``
+  (``uploadTime`` is the local time of the dongle: the whole quarter hours of
+  that difference are taken as the time zone, the rest as real delay).
+
+The daemon then runs the next cycle just after the next expected upload. When
+the expected reading doesn't show up the poll is retried with an exponential
+back-off capped at the period, so an offline dongle is polled once per period.
+The state is persisted with ``StateStore``.
+
+Outside the daylight window (sunrise to sunset, widened by
+DAYLIGHT_MARGIN_MINUTES) there is nothing new to read but the battery:
+``DaylightPolicy`` limits the polls to a heartbeat every
+NIGHT_HEARTBEAT_MINUTES, both in daemon mode (longer sleeps) and when the
+data hub runs as a one-shot job (the poll is skipped). The window is computed
+from the solar position at the configured coordinates and replaced by the
+sunrise / sunset reported by OpenWeather when available.
+"""
+
+import statistics
+import threading
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+from loguru import logger
+
+from solarxdatahub.config import Daemon, OpenWeather, Weatherbit
+from solarxdatahub.models.records import UPLOAD_TIME_FORMAT
+from solarxdatahub.utils.metrics import POLL_FRESHNESS_LAG, POLL_UPLOAD_PERIOD
+from solarxdatahub.utils.solar import solar_elevation
+from solarxdatahub.utils.state import StateStore
+
+# Periodo de subida por defecto del dongle hasta tener historial
+DEFAULT_PERIOD_SECONDS = 300.0
+# Diferencias entre subidas consideradas al estimar el periodo
+MIN_PERIOD_SECONDS = 60.0
+MAX_PERIOD_SECONDS = 1800.0
+TIMEZONE_STEP_SECONDS = 900
+# Elevación del centro del sol al amanecer/anochecer (refracción y radio)
+SUNRISE_ELEVATION = -0.833
+# Holgura del latido nocturno (cron y despertares no son exactos)
+HEARTBEAT_TOLERANCE_SECONDS = 60.0
+
+
+def upload_epoch(upload_time: str) -> float:
+    """Seconds since the epoch of an ``uploadTime``, read as UTC."""
+    upload = datetime.strptime(upload_time, UPLOAD_TIME_FORMAT)
+    return upload.replace(tzinfo=timezone.utc).timestamp()
+
+
+class UploadCadence:
+    """Learned upload cadence of an inverter.
+
+    Args:
+        history (int): Uploads remembered.
+    """
+
+    def __init__(self, history: int):
+        self.history = history
+        self.uploads: list[float] = []
+        # Segundos entre uploadTime y el primer momento en que se vio la lectura
+        self.delay: float | None = None
+        self.misses = 0
+
+    @property
+    def period(self) -> float:
+        """Median time between consecutive uploads (ignoring the skipped ones)."""
+        gaps = [
+            later - earlier
+            for earlier, later in zip(self.uploads, self.uploads[1:])
+            if MIN_PERIOD_SECONDS <= later - earlier <= MAX_PERIOD_SECONDS
+        ]
+        if not gaps:
+            return DEFAULT_PERIOD_SECONDS
+        # Sin los huecos de subidas perdidas o de los latidos nocturnos
+        shortest = min(gaps)
+        return statistics.median(gap for gap in gaps if gap <= 1.5 * shortest)
+
+    @property
+    def jitter(self) -> float:
+        """Typical deviation of the uploads from the period grid."""
+        if len(self.uploads) < 3:
+            return 0.0
+        period = self.period
+        deviations = [
+            abs(later - earlier - period)
+            for earlier, later in zip(self.uploads, self.uploads[1:])
+            if later - earlier < 1.5 * period
+        ]
+        return statistics.median(deviations) if deviations else 0.0
+
+    @property
+    def timezone_offset(self) -> float:
+        """Difference between the local clock and the clock of the dongle."""
+        if self.delay is None:
+            return 0.0
+        return round(self.delay / TIMEZONE_STEP_SECONDS) * TIMEZONE_STEP_SECONDS
+
+    def expected_available(self) -> float | None:
+        """Local time at which the next upload should be available."""
+        if not self.uploads:
+            return None
+        period = self.period
+        last = self.uploads[-1]
+        # Desfase mediano de las subidas respecto a la rejilla del periodo
+        phase = statistics.median(
+            (upload - last + period / 2) % period - period / 2
+            for upload in self.uploads
+        )
+        return last + phase + period + (self.delay or 0.0) + self.jitter
+
+    def observe(self, upload: float, seen_at: float) -> bool:
+        """Record a poll that returned the reading uploaded at ``upload``.
+
+        Returns:
+            bool: True if the reading is newer than the last one seen.
+        """
+        if self.uploads and upload <= self.uploads[-1]:
+            expected = self.expected_available()
+            if expected is not None and seen_at >= expected:
+                self.misses += 1
+            return False
+        self.uploads = (self.uploads + [upload])[-self.history :]
+        delay = seen_at - upload
+        self.delay = delay if self.delay is None else min(self.delay, delay)
+        self.misses = 0
+        return True
+
+    def to_state(self) -> dict:
+        """JSON serializable copy of the cadence."""
+        return {"uploads": self.uploads, "delay": self.delay, "misses": self.misses}
+
+    @classmethod
+    def from_state(cls, state: dict, history: int) -> "UploadCadence":
+        """Rebuild a cadence saved with ``to_state``."""
+        cadence = cls(history)
+        cadence.uploads = list(state.get("uploads", []))[-history:]
+        cadence.delay = state.get("delay")
+        cadence.misses = int(state.get("misses", 0))
+        return cadence
+
+
+class PollScheduler:
+    """Decides when the daemon polls SolaxCloud again.
+
+    Args:
+        store (StateStore | None, optional): Where the cadences are persisted.
+            Defaults to None (memory only).
+    """
+
+    def __init__(self, store: StateStore | None = None):
+        self.store = store
+        self.history = int(Daemon.POLL_HISTORY)
+        self.margin = float(Daemon.POLL_MARGIN_SECONDS)
+        self.min_interval = float(Daemon.POLL_MIN_INTERVAL_SECONDS)
+        self.backoff = float(Daemon.POLL_BACKOFF_SECONDS)
+        self._lock = threading.Lock()
+        self._cadences: dict[str, UploadCadence] = {}
+        self.failures = 0
+        if store is not None:
+            state = store.load()
+            self.failures = int(state.get("failures", 0))
+            for serial, cadence in state.get("inverters", {}).items():
+                self._cadences[serial] = UploadCadence.from_state(cadence, self.history)
+
+    def _save(self) -> None:
+        if self.store is None:
+            return
+        self.store.save(
+            {
+                "failures": self.failures,
+                "inverters": {
+                    serial: cadence.to_state()
+                    for serial, cadence in self._cadences.items()
+                },
+            }
+        )
+
+    def cadence(self, serial: str) -> UploadCadence | None:
+        """Learned cadence of an inverter."""
+        return self._cadences.get(serial)
+
+    def observe(
+        self, serial: str, upload_time: str, seen_at: float | None = None
+    ) -> bool:
+        """Record a successful poll.
+
+        Args:
+            serial (str): The inverterSN.
+            upload_time (str): The ``uploadTime`` of the returned reading.
+            seen_at (float | None, optional): When the poll answered (epoch
+                seconds). Defaults to now.
+
+        Returns:
+            bool: True if the reading is new.
+        """
+        seen_at = time.time() if seen_at is None else seen_at
+        upload = upload_epoch(upload_time)
+        with self._lock:
+            self.failures = 0
+            cadence = self._cadences.get(serial)
+            if cadence is None:
+                cadence = self._cadences[serial] = UploadCadence(self.history)
+            new = cadence.observe(upload, seen_at)
+            # Antigüedad de la lectura más reciente al recibirla
+            lag = seen_at - cadence.uploads[-1] - cadence.timezone_offset
+            POLL_FRESHNESS_LAG.set(lag, inverter_sn=serial)
+            POLL_UPLOAD_PERIOD.set(cadence.period, inverter_sn=serial)
+            self._save()
+        if not new and cadence.misses:
+            logger.info(
+                "Reading of {} not uploaded yet ({} s old, {} polls late)",
+                serial,
+                round(lag),
+                cadence.misses,
+            )
+        return new
+
+    def observe_failure(self) -> None:
+        """Record a poll that got no reading (API error or circuit open)."""
+        with self._lock:
+            self.failures += 1
+            self._save()
+
+    def _retry_delay(self, attempts: int, period: float) -> float:
+        return min(self.backoff * 2 ** (attempts - 1), period)
+
+    def next_poll(
+        self, now: float | None = None, default: float | None = None
+    ) -> float:
+        """Seconds until the next poll.
+
+        Args:
+            now (float | None, optional): Current epoch seconds. Defaults to now.
+            default (float | None, optional): Wait without a learned cadence
+                and upper bound of the result. Defaults to
+                DAEMON_INTERVAL_SECONDS.
+
+        Returns:
+            float: The seconds to wait.
+        """
+        now = time.time() if now is None else now
+        default = float(Daemon.DAEMON_INTERVAL_SECONDS if default is None else default)
+        with self._lock:
+            if self.failures:
+                wait = self._retry_delay(self.failures, default)
+            else:
+                waits = []
+                for cadence in self._cadences.values():
+                    expected = cadence.expected_available()
+                    if expected is None:
+                        continue
+                    if cadence.misses:
+                        waits.append(self._retry_delay(cadence.misses, cadence.period))
+                    else:
+                        # Si ya venció sin haberla pedido se pide cuanto antes
+                        waits.append(expected + self.margin - now)
+                wait = min(waits) if waits else default
+        return min(max(wait, self.min_interval), default)
+
+
+class DaylightPolicy:
+    """Lowers the polling frequency outside the daylight window.
+
+    Args:
+        latitude (float): Latitude of the installation in degrees.
+        longitude (float): Longitude in degrees (east positive).
+        store (StateStore | None, optional): Where the last poll and the
+            observed sunrise / sunset are persisted. Defaults to None.
+    """
+
+    def __init__(
+        self, latitude: float, longitude: float, store: StateStore | None = None
+    ):
+        self.latitude = latitude
+        self.longitude = longitude
+        self.store = store
+        self.margin = float(Daemon.DAYLIGHT_MARGIN_MINUTES) * 60.0
+        self.heartbeat = float(Daemon.NIGHT_HEARTBEAT_MINUTES) * 60.0
+        self._lock = threading.Lock()
+        self._computed: dict[int, tuple[float, float] | None] = {}
+        state = store.load() if store is not None else {}
+        self.last_poll: float = state.get("last_poll", 0.0)
+        self._observed: list[list[float]] = state.get("observed", [])
+
+    def _save(self) -> None:
+        if self.store is not None:
+            self.store.save({"last_poll": self.last_poll, "observed": self._observed})
+
+    def _solar_day(self, moment: float) -> int:
+        # Día en tiempo solar medio del lugar (4 minutos por grado de longitud)
+        return int((moment + self.longitude * 240.0) // 86400)
+
+    def _compute(self, day: int) -> tuple[float, float] | None:
+        """Sunrise and sunset of a solar day from the solar position."""
+        if day not in self._computed:
+            start = day * 86400.0 - self.longitude * 240.0
+            minutes = start + np.arange(0.0, 86400.0, 60.0)
+            up = np.flatnonzero(
+                solar_elevation(minutes, self.latitude, self.longitude)
+                > SUNRISE_ELEVATION
+            )
+            # None en la noche polar
+            self._computed[day] = (
+                (minutes[up[0]], minutes[up[-1]] + 60.0) if up.size else None
+            )
+        return self._computed[day]
+
+    def windows(self, now: float) -> list[tuple[float, float]]:
+        """Daylight windows (with the margin) of the days around ``now``."""
+        today = self._solar_day(now)
+        result = []
+        for day in (today - 1, today, today + 1):
+            window = self._compute(day)
+            if window is None:
+                continue
+            # Lo observado por OpenWeather ese día sustituye al cálculo
+            for sunrise, sunset in self._observed:
+                if abs(sunrise - window[0]) < 6 * 3600:
+                    window = (sunrise, sunset)
+            result.append((window[0] - self.margin, window[1] + self.margin))
+        return result
+
+    def observe_sun(self, sunrise: float, sunset: float) -> None:
+        """Record the sunrise and sunset reported by a weather provider."""
+        with self._lock:
+            observed = [
+                window
+                for window in self._observed
+                if abs(window[0] - sunrise) >= 6 * 3600
+            ]
+            self._observed = (observed + [[float(sunrise), float(sunset)]])[-3:]
+            self._save()
+
+    def is_daylight(self, now: float | None = None) -> bool:
+        """Whether ``now`` is inside a daylight window."""
+        now = time.time() if now is None else now
+        return any(start <= now <= end for start, end in self.windows(now))
+
+    def should_poll(self, now: float | None = None) -> bool:
+        """Whether SolaxCloud has to be polled now.
+
+        Always during the day; at night only when the heartbeat is due.
+        """
+        now = time.time() if now is None else now
+        if self.is_daylight(now):
+            return True
+        return now - self.last_poll >= self.heartbeat - HEARTBEAT_TOLERANCE_SECONDS
+
+    def record_poll(self, now: float | None = None) -> None:
+        """Record that SolaxCloud was polled."""
+        with self._lock:
+            self.last_poll = time.time() if now is None else now
+            self._save()
+
+    def next_wait(self, wait: float, now: float | None = None) -> float:
+        """Stretch the wait until the next poll when it falls at night.
+
+        Args:
+            wait (float): Seconds until the next poll during the day.
+            now (float | None, optional): Current epoch seconds. Defaults to now.
+
+        Returns:
+            float: ``wait``, or the seconds until the next heartbeat or the
+                start of the next daylight window, whichever comes first.
+        """
+        now = time.time() if now is None else now
+        if self.is_daylight(now + wait):
+            return wait
+        heartbeat = self.last_poll + self.heartbeat
+        starts = [start for start, _ in self.windows(now) if start > now]
+        return max(wait, min([heartbeat] + starts) - now)
+
+
+_scheduler: PollScheduler | None = None
+_scheduler_lock = threading.Lock()
+_daylight: DaylightPolicy | None = None
+
+
+def get_poll_scheduler() -> PollScheduler:
+    """Return the process wide scheduler, persisted in the state directory."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = PollScheduler(StateStore("solaxcloud_cadence"))
+        return _scheduler
+
+
+def get_daylight_policy() -> DaylightPolicy | None:
+    """Return the process wide daylight policy.
+
+    Returns:
+        DaylightPolicy | None: The policy, or None when DAYLIGHT_POLICY is not
+            "true" or no coordinates are configured (OW_LAT / OW_LON, or
+            LATITUDE / LONGITUDE).
+    """
+    global _daylight
+    if Daemon.DAYLIGHT_POLICY.lower() != "true":
+        return None
+    with _scheduler_lock:
+        if _daylight is None:
+            latitude = OpenWeather.OW_LAT or Weatherbit.LATITUDE
+            longitude = OpenWeather.OW_LON or Weatherbit.LONGITUDE
+            if not latitude or not longitude:
+                return None
+            _daylight = DaylightPolicy(
+                float(latitude), float(longitude), StateStore("daylight")
+            )
+        return _daylight
@@ -0,0 +1,319 @@
+"""Worker mode: several processes share the SolaxCloud fleet.
+
+A single process polls the dongles of ``master_tb_inverters`` one after the
+other, so the fleet it covers within a polling slot is bounded by the API
+latency. In worker mode N processes, on one host or many, split the fleet:
+
+- every worker upserts a heartbeat in tb_worker_heartbeat every
+  WORKER_HEARTBEAT_SECONDS; the workers with a heartbeat younger than
+  WORKER_LEASE_SECONDS are the live ones, and a worker that stops cleanly
+  marks itself as stopped;
+- every worker builds the same consistent hash ring of the live workers and
+  takes the inverters whose serial number falls on its arcs, so a worker that
+  joins or dies only moves its own share of the fleet;
+- before polling, a worker claims a lease of tb_worker_lease for each of its
+  inverters and the current slot (WORKER_SLOT_SECONDS). The first claim of a
+  key for a slot wins, so while the workers disagree on the ring (a worker
+  just died or joined) an inverter may be polled by the old or the new owner,
+  but never by both in the same slot;
+- the weather providers, the KPIs and the upstream sync are one more key of
+  the ring (``providers``), run by a single worker per slot.
+
+The ring is rebuilt at every heartbeat, so the inverters of a dead worker are
+taken over in the same slot once its heartbeat expires. A worker that runs
+out of slot stops polling; the rest of its shard is claimed in the next one.
+Workers on the same host need a STATE_DIR each.
+"""
+
+import bisect
+import hashlib
+import os
+import signal
+import socket
+import threading
+import time
+import uuid
+from typing import Callable, Iterable
+
+from loguru import logger
+
+from solarxdatahub.config import Daemon, Ntfy, Workers
+from solarxdatahub.core import leases
+from solarxdatahub.core.api.openweather.openweather import OpenWeatherAPI
+from solarxdatahub.core.api.solaxcloud.solaxcloud import SolaxCloudAPI
+from solarxdatahub.core.api.weatherbit.weatherbit import WeatherbitAPI
+from solarxdatahub.core.controller import (
+    poll_solaxcloud_inverter,
+    prepare_environment,
+    process_energy_kpi,
+    process_openweather_data,
+    process_upstream_sync,
+    process_weather_data,
+)
+from solarxdatahub.core.scheduler import get_daylight_policy
+from solarxdatahub.database.connection import DataBaseConnection
+from solarxdatahub.database.crud import (
+    get_live_workers,
+    get_master_tb_inverters,
+    insert_worker_heartbeat,
+)
+from solarxdatahub.utils.metrics import (
+    POLL_SKIPPED,
+    WORKER_LEASE_CONFLICTS,
+    WORKER_MEMBERS,
+    WORKER_SHARD_SIZE,
+    start_metrics_server,
+    write_textfile,
+)
+from solarxdatahub.utils.profiling import get_cycle_profiler
+
+PROVIDERS_KEY = "providers"
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest())
+
+
+class HashRing:
+    """Consistent hash ring of the live workers.
+
+    Args:
+        members (Iterable[str]): The worker IDs.
+        replicas (int, optional): Points of every worker on the ring; more
+            points split the keys more evenly. Defaults to 64.
+    """
+
+    def __init__(self, members: Iterable[str], replicas: int = 64):
+        self.members = sorted(set(members))
+        points = sorted(
+            (_hash(f"{member}#{replica}"), member)
+            for member in self.members
+            for replica in range(replicas)
+        )
+        self._hashes = [point for point, _ in points]
+        self._owners = [member for _, member in points]
+
+    def owner(self, key: str) -> str | None:
+        """Worker that owns ``key``, or None if the ring is empty."""
+        if not self._hashes:
+            return None
+        index = bisect.bisect(self._hashes, _hash(key)) % len(self._hashes)
+        return self._owners[index]
+
+
+class Worker:
+    """One of the processes that share the fleet.
+
+    Args:
+        worker_id (str | None, optional): Unique ID of the worker. Defaults to
+            WORKER_ID, or ``<hostname>-<pid>``.
+        slot_seconds (float | None, optional): Length of a polling slot.
+            Defaults to WORKER_SLOT_SECONDS, or DAEMON_INTERVAL_SECONDS.
+        heartbeat_seconds (float | None, optional): Seconds between two
+            heartbeats. Defaults to WORKER_HEARTBEAT_SECONDS.
+        lease_seconds (float | None, optional): Seconds without heartbeat
+            after which a worker leaves the ring. Defaults to
+            WORKER_LEASE_SECONDS.
+        replicas (int | None, optional): Points of every worker on the ring.
+            Defaults to WORKER_RING_REPLICAS.
+    """
+
+    def __init__(
+        self,
+        worker_id: str | None = None,
+        slot_seconds: float | None = None,
+        heartbeat_seconds: float | None = None,
+        lease_seconds: float | None = None,
+        replicas: int | None = None,
+    ):
+        self.hostname = socket.gethostname()
+        self.worker_id = (
+            worker_id or Workers.WORKER_ID or f"{self.hostname}-{os.getpid()}"
+        )
+        self.slot_seconds = float(
+            slot_seconds
+            or Workers.WORKER_SLOT_SECONDS
+            or Daemon.DAEMON_INTERVAL_SECONDS
+        )
+        self.heartbeat_seconds = float(
+            heartbeat_seconds or Workers.WORKER_HEARTBEAT_SECONDS
+        )
+        self.lease_seconds = float(lease_seconds or Workers.WORKER_LEASE_SECONDS)
+        self.replicas = int(replicas or Workers.WORKER_RING_REPLICAS)
+        self.started_at = leases.utc_text()
+        # Los arriendos son de esta ejecución: al reiniciar con el mismo
+        # WORKER_ID no se vuelven a sondear los inversores de la ranura
+        self.lease_owner = f"{self.worker_id}@{uuid.uuid4().hex[:8]}"
+        self.client: SolaxCloudAPI | None = None
+        self._stop = threading.Event()
+        self._last_heartbeat = float("-inf")
+        self._slot: float | None = None
+        # Claves ya intentadas en la ranura actual (propias o de otro worker)
+        self._attempted: set[str] = set()
+        self._daylight = True
+
+    def slot_start(self, now: float | None = None) -> float:
+        """Epoch seconds at which the slot of ``now`` started."""
+        return leases.slot_start(self.slot_seconds, now)
+
+    def heartbeat(self, status: str = "active") -> None:
+        """Upsert the heartbeat of the worker."""
+        insert_worker_heartbeat(
+            [
+                {
+                    "worker_id": self.worker_id,
+                    "hostname": self.hostname,
+                    "started_at": self.started_at,
+                    "heartbeat_at": leases.utc_text(),
+                    "status": status,
+                }
+            ]
+        )
+        self._last_heartbeat = time.monotonic()
+
+    def ring(self) -> HashRing:
+        """Hash ring of the live workers (this one included)."""
+        live = get_live_workers(leases.utc_text(time.time() - self.lease_seconds))
+        members = set(live["worker_id"]) if not live.empty else set()
+        members.add(self.worker_id)
+        WORKER_MEMBERS.set(len(members), worker=self.worker_id)
+        return HashRing(members, self.replicas)
+
+    def claim(self, keys: list[str], slot: float) -> set[str]:
+        """Claim the leases of ``keys`` for a slot.
+
+        Args:
+            keys (list[str]): The lease keys.
+            slot (float): Start of the slot (epoch seconds).
+
+        Returns:
+            set[str]: The keys leased to this worker for the slot.
+        """
+        won = leases.claim(keys, slot, self.lease_owner)
+        if len(won) < len(keys):
+            WORKER_LEASE_CONFLICTS.inc(len(keys) - len(won), worker=self.worker_id)
+            logger.info(
+                "{} of {} keys already leased by other workers for this slot",
+                len(keys) - len(won),
+                len(keys),
+            )
+        return won
+
+    def jobs(self, ring: HashRing) -> dict[str, Callable[[], None]]:
+        """The work assigned to this worker by the ring, keyed by lease key."""
+        jobs = {}
+        if ring.owner(PROVIDERS_KEY) == self.worker_id:
+            jobs[PROVIDERS_KEY] = self.run_providers
+        if self._daylight:
+            fleet = get_master_tb_inverters()
+            for inverter in fleet.to_dict(orient="records"):
+                if ring.owner(inverter["inverterSN"]) == self.worker_id:
+                    key = f"inverter:{int(inverter['id'])}"
+                    jobs[key] = lambda inverter=inverter: poll_solaxcloud_inverter(
+                        self.client, inverter
+                    )
+            shard = len(jobs) - (PROVIDERS_KEY in jobs)
+            WORKER_SHARD_SIZE.set(shard, worker=self.worker_id)
+        return jobs
+
+    def run_providers(self) -> None:
+        """Run the weather providers, the KPIs and the upstream sync."""
+        process_openweather_data(OpenWeatherAPI())
+        process_weather_data(WeatherbitAPI())
+        process_energy_kpi()
+        process_upstream_sync()
+
+    def _new_slot(self, slot: float) -> None:
+        self._slot = slot
+        self._attempted.clear()
+        daylight = get_daylight_policy()
+        self._daylight = daylight is None or daylight.should_poll(slot)
+        if daylight is None:
+            return
+        if self._daylight:
+            daylight.record_poll(slot)
+        else:
+            POLL_SKIPPED.inc()
+            logger.info("Outside the daylight window, skipping the Solax Cloud polls")
+
+    def step(self) -> int:
+        """Heartbeat, rebuild the ring and run the pending work of the slot.
+
+        Returns:
+            int: The jobs run.
+        """
+        slot = self.slot_start()
+        if slot != self._slot:
+            self._new_slot(slot)
+        self.heartbeat()
+        jobs = self.jobs(self.ring())
+        pending = [key for key in jobs if key not in self._attempted]
+        if not pending:
+            return 0
+        done = 0
+        with get_cycle_profiler().cycle():
+            won = self.claim(pending, slot)
+            # Solo tras reclamarlas: si la reclamación falla se reintentan
+            self._attempted.update(pending)
+            for key in [key for key in pending if key in won]:
+                if self.slot_start() != slot:
+                    logger.warning(
+                        "Slot over with work pending, resuming in the next one"
+                    )
+                    break
+                if time.monotonic() - self._last_heartbeat >= self.heartbeat_seconds:
+                    self.heartbeat()
+                try:
+                    jobs[key]()
+                except Exception as e:
+                    logger.error("Job {} failed: {}", key, e)
+                done += 1
+            self.client.finish_cycle()
+        logger.info("Worker {} ran {} jobs in this slot", self.worker_id, done)
+        return done
+
+    def stop(self) -> None:
+        """Ask the worker to stop after the current job."""
+        self._stop.set()
+
+    def run(self) -> None:
+        """Run until stopped, leaving the ring on exit."""
+        prepare_environment()
+        self.client = SolaxCloudAPI()
+        logger.info(
+            "Worker {} started (slot {:.0f} s)", self.worker_id, self.slot_seconds
+        )
+        try:
+            while not self._stop.is_set():
+                try:
+                    self.step()
+                except Exception as e:
+                    logger.error("Worker step failed, retrying: {}", e)
+                write_textfile()
+                next_slot = self.slot_start() + self.slot_seconds
+                self._stop.wait(
+                    max(0.0, min(self.heartbeat_seconds, next_slot - time.time()))
+                )
+        finally:
+            try:
+                self.heartbeat(status="stopped")
+                self.client.finish_cycle(float(Ntfy.NTFY_DRAIN_SECONDS))
+            finally:
+                DataBaseConnection.disconnect()
+            logger.info("Worker {} stopped", self.worker_id)
+
+
+def run_worker() -> None:
+    """Run this process as a worker until SIGTERM or SIGINT.
+
+    Sending SIGUSR1 to the process profiles the next step with work, as in
+    ``run_daemon``.
+    """
+    worker = Worker()
+    start_metrics_server()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *_: worker.stop())
+    if hasattr(signal, "SIGUSR1"):
+        profiler = get_cycle_profiler()
+        signal.signal(signal.SIGUSR1, lambda *_: profiler.request(1))
+    worker.run()
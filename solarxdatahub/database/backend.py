@@ -0,0 +1,77 @@
+"""Contract shared by the storage engines behind ``DataBaseConnection``."""
+
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import pandas as pd
+
+from solarxdatahub.database.bulk import BulkLoadStats
+
+
+class DatabaseBackend(ABC):
+    """A storage engine able to run the queries of ``reading`` and ``writting``.
+
+    The queries are written in the MySQL dialect (``%(name)s`` placeholders,
+    ``ON DUPLICATE KEY UPDATE``, schema qualified tables); engines speaking
+    another dialect translate them.
+    """
+
+    @abstractmethod
+    def connect(self) -> None:
+        """Open the connection."""
+
+    @abstractmethod
+    def disconnect(self) -> None:
+        """Close the connection."""
+
+    @abstractmethod
+    def ping(self) -> None:
+        """Check the connection, reconnecting if needed."""
+
+    @abstractmethod
+    def read(
+        self,
+        query: str,
+        params: Optional[Union[Dict[str, Any], list[Any]]] = None,
+        as_df: bool = False,
+    ) -> Union[List[Dict[str, Any]], pd.DataFrame]:
+        """Run a query and return its rows."""
+
+    @abstractmethod
+    def read_batches(
+        self,
+        query: str,
+        params: Optional[Union[Dict[str, Any], list[Any]]] = None,
+        batch_size: int = 1000,
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """Run a query and yield its rows in batches, without loading them all."""
+
+    @abstractmethod
+    def write(
+        self,
+        query: str,
+        data: Union[List[Dict], Tuple, pd.DataFrame],
+        commit: bool = True,
+    ) -> int:
+        """Run a statement for every row of ``data`` and return the affected rows."""
+
+    @abstractmethod
+    def bulk_upsert(
+        self,
+        query: str,
+        batches: Iterable[List[Dict]],
+        commit: bool = True,
+    ) -> BulkLoadStats:
+        """Load the rows into a staging table and merge them with one upsert."""
+
+    @abstractmethod
+    def commit(self) -> None:
+        """Commit the transaction."""
+
+    @abstractmethod
+    def begin(self) -> None:
+        """Begin a transaction."""
+
+    @abstractmethod
+    def rollback(self) -> None:
+        """Rollback the transaction."""
@@ -0,0 +1,160 @@
+"""Bulk upserts through a staging table, for backfills and replays.
+
+Running the upserts of ``writting`` with ``executemany`` over many rows keeps
+the target table locked while every row is checked against its unique keys.
+The bulk path streams the rows into a session-temporary staging table instead
+(no lock on the target) and merges them with a single
+``INSERT ... SELECT ... ON DUPLICATE KEY UPDATE``. The table, the columns and
+the update clause are taken from the ``insert_*`` query itself, so the upsert
+semantics are the same; the staging rows are merged in load order, so when a
+key appears more than once the last row wins, as with ``executemany``.
+"""
+
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Iterable, Iterator
+
+_UPSERT = re.compile(
+    r"INSERT\s+INTO\s+(?P<table>\w+\.\w+)\s*\((?P<columns>[^)]*)\)\s*"
+    r"VALUES\s*\((?P<values>.*?)\)\s*"
+    r"ON\s+DUPLICATE\s+KEY\s+UPDATE\s+(?P<updates>.*?);?\s*$",
+    re.I | re.S,
+)
+_NAMED_PARAM = re.compile(r"%\((\w+)\)s")
+
+
+@dataclass(frozen=True)
+class UpsertStatement:
+    """The parts of an ``insert_*`` upsert used by the bulk path.
+
+    Attributes:
+        table (str): The target table (``schema.table``).
+        columns (tuple[str, ...]): The inserted columns.
+        params (tuple[str, ...]): The row key bound to each column.
+        updates (str): The ``ON DUPLICATE KEY UPDATE`` assignments.
+    """
+
+    table: str
+    columns: tuple[str, ...]
+    params: tuple[str, ...]
+    updates: str
+
+    @property
+    def schema(self) -> str:
+        """Schema of the target table."""
+        return self.table.split(".")[0]
+
+    @property
+    def staging(self) -> str:
+        """Name of the staging table of the target."""
+        return "bulk_" + self.table.split(".")[1]
+
+    def staging_insert(self, staging: str) -> str:
+        """Plain multi-row ``INSERT`` of the rows into the staging table."""
+        values = ", ".join(f"%({param})s" for param in self.params)
+        return f"INSERT INTO {staging} ({', '.join(self.columns)}) VALUES ({values})"
+
+    def merge(self, staging: str, order_by: str) -> str:
+        """``INSERT ... SELECT`` of the staging rows with the same upsert.
+
+        The staging columns are renamed in a derived table, so the column
+        names in the update clause (``CASE WHEN VALUES(uploadTime) >=
+        uploadTime ...``) only refer to the target table, as in the upsert.
+
+        Args:
+            staging (str): The staging table.
+            order_by (str): Column holding the load order of the rows.
+
+        Returns:
+            str: The merge statement, in the MySQL dialect.
+        """
+        renamed = ", ".join(f"bulk_{column}" for column in self.columns)
+        source = ", ".join(f"{column} AS bulk_{column}" for column in self.columns)
+        # SQLite necesita el WHERE para no confundir el upsert con un JOIN
+        return (
+            f"INSERT INTO {self.table} ({', '.join(self.columns)}) "
+            f"SELECT {renamed} FROM "
+            f"(SELECT {source}, {order_by} AS bulk_order FROM {staging}) AS bulk "
+            f"WHERE TRUE ORDER BY bulk_order "
+            f"ON DUPLICATE KEY UPDATE {self.updates}"
+        )
+
+
+@lru_cache(maxsize=64)
+def parse_upsert(query: str) -> UpsertStatement:
+    """Split an ``insert_*`` upsert into the parts of the bulk path.
+
+    Args:
+        query (str): An ``INSERT INTO schema.table (...) VALUES (%(...)s, ...)
+            ON DUPLICATE KEY UPDATE ...`` query.
+
+    Raises:
+        ValueError: The query is not an upsert of that form.
+
+    Returns:
+        UpsertStatement: The parsed query.
+    """
+    match = _UPSERT.search(query)
+    if match is None:
+        raise ValueError(
+            "Only INSERT ... ON DUPLICATE KEY UPDATE queries can be bulk loaded"
+        )
+    columns = tuple(column.strip() for column in match.group("columns").split(","))
+    params = tuple(_NAMED_PARAM.findall(match.group("values")))
+    if len(columns) != len(params):
+        raise ValueError("Every column of a bulk loaded upsert needs a %(name)s value")
+    return UpsertStatement(
+        table=match.group("table"),
+        columns=columns,
+        params=params,
+        updates=match.group("updates").strip(),
+    )
+
+
+@dataclass
+class BulkLoadStats:
+    """Outcome of a bulk upsert.
+
+    Attributes:
+        rows (int): Rows loaded into the staging table.
+        affected_rows (int): Rows affected by the merge, counted like the
+            engine counts an upsert.
+        load_seconds (float): Time spent filling the staging table.
+        lock_seconds (float): Time the target table was written (merge and
+            commit).
+    """
+
+    rows: int = 0
+    affected_rows: int = 0
+    load_seconds: float = 0.0
+    lock_seconds: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        """Rows upserted per second, load and merge included."""
+        elapsed = self.load_seconds + self.lock_seconds
+        return self.rows / elapsed if elapsed > 0 else 0.0
+
+
+def chunks(rows: list[dict], size: int) -> Iterator[list[dict]]:
+    """Split ``rows`` in lists of at most ``size`` rows."""
+    for start in range(0, len(rows), size):
+        yield rows[start : start + size]
+
+
+def as_batches(
+    data: list[dict] | Iterable[list[dict]], batch_size: int
+) -> Iterable[list[dict]]:
+    """The batches of a bulk load: a list of rows is split, an iterable kept.
+
+    Args:
+        data (list[dict] | Iterable[list[dict]]): Rows, or batches of rows.
+        batch_size (int): Rows per batch when ``data`` is a list of rows.
+
+    Returns:
+        Iterable[list[dict]]: The batches.
+    """
+    if isinstance(data, list) and (not data or isinstance(data[0], dict)):
+        return chunks(data, batch_size)
+    return data
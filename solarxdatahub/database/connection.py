@@ -2,13 +2,26 @@
 
 import functools
 import re
-from typing import Callable
+import time
+from typing import Callable, Iterable, Iterator
 
 import pandas as pd
 from loguru import logger
 
-from solarxdatahub.config import Database
+from solarxdatahub.config import Database, Replication, Storage
+from solarxdatahub.database.backend import DatabaseBackend
+from solarxdatahub.database.bulk import BulkLoadStats, as_batches
 from solarxdatahub.database.mysql_database import MySQLDatabase
+from solarxdatahub.database.reading import read_replica_status
+from solarxdatahub.database.sqlite_database import SQLiteDatabase
+from solarxdatahub.utils.metrics import (
+    DB_BULK_LOCK,
+    DB_BULK_ROWS_PER_SECOND,
+    DB_READS,
+    DB_REPLICA_LAG,
+    DB_ROWS,
+    timed,
+)
 
 
 def db_error_handler(func: Callable) -> Callable:
@@ -32,10 +45,46 @@ def db_error_handler(func: Callable) -> Callable:
     return wrapper
 
 
+def create_database(host_name: str) -> DatabaseBackend:
+    """Create the storage engine of a host according to STORAGE_BACKEND.
+
+    With the ``sqlite`` backend every host name shares the local database.
+
+    Args:
+        host_name (str): The name of the host in the configuration.
+
+    Returns:
+        DatabaseBackend: The (not yet connected) database.
+    """
+    if Storage.STORAGE_BACKEND == "sqlite":
+        return SQLiteDatabase(Storage.SQLITE_DIR)
+    if Storage.STORAGE_BACKEND != "mysql":
+        raise ValueError(
+            f"Invalid storage backend {Storage.STORAGE_BACKEND}, must be mysql or sqlite"
+        )
+    return MySQLDatabase(**Database[host_name].value)
+
+
 class DataBaseConnection:
-    """Class to define the work with the database."""
+    """Class to define the work with the database.
+
+    Writes and reads go to the host they name. With READ_REPLICA_ENABLED the
+    reads flagged as ``lag_tolerant`` (master data, history, report tails)
+    addressed to TARGET_HOST are served by the SOURCE_HOST replica, as long as
+    it is reachable and its lag is under REPLICA_MAX_LAG_SECONDS; otherwise
+    they fall back to the primary. Reads that must see the writes of the
+    pipeline (request logs, notifications, forecasts, the archive export)
+    stay on the primary.
+    """
 
-    __connections: dict[str, MySQLDatabase] = {}
+    __connections: dict[str, DatabaseBackend] = {}
+    __replica_checked_at: float = float("-inf")
+    __replica_available: bool = False
+
+    @classmethod
+    def is_connected(cls, host_name: str) -> bool:
+        """Whether there is an open connection to the host."""
+        return host_name in cls.__connections
 
     @classmethod
     @db_error_handler
@@ -55,11 +104,83 @@ class DataBaseConnection:
             if name not in host_names:
                 raise ValueError(f"host_name {name} is not in the configuration.")
             if name not in cls.__connections:
-                database = MySQLDatabase(**Database[name].value)
-                database.connect()
+                database = create_database(name)
+                try:
+                    database.connect()
+                except Exception as e:
+                    if not cls._is_replica(name):
+                        raise
+                    # Sin réplica las lecturas van al primario
+                    logger.warning("Read replica {} unavailable: {}", name, e)
+                    cls.__replica_available = False
+                    cls.__replica_checked_at = time.monotonic()
+                    continue
                 cls.__connections[name] = database
                 logger.debug("Connected to database {}.", name)
 
+    @staticmethod
+    def _is_replica(host_name: str) -> bool:
+        return Replication.enabled() and host_name == Database.SOURCE_HOST.name
+
+    @classmethod
+    def _check_replica(cls) -> bool:
+        """Connect to the replica if needed and check its replication lag."""
+        replica = Database.SOURCE_HOST.name
+        try:
+            if replica not in cls.__connections:
+                database = create_database(replica)
+                database.connect()
+                cls.__connections[replica] = database
+            status = cls.__connections[replica].read(query=read_replica_status())
+        except Exception as e:
+            logger.warning("Read replica unavailable, reading from the primary: {}", e)
+            database = cls.__connections.pop(replica, None)
+            if database is not None:
+                try:
+                    database.disconnect()
+                except Exception:  # pylint: disable=broad-except
+                    pass
+            return False
+        lag = None
+        if status:
+            lag = status[0].get(
+                "Seconds_Behind_Source", status[0].get("Seconds_Behind_Master")
+            )
+        if lag is None:
+            logger.warning("Read replica is not replicating, reading from the primary")
+            return False
+        DB_REPLICA_LAG.set(float(lag))
+        if float(lag) > float(Replication.REPLICA_MAX_LAG_SECONDS):
+            logger.warning("Read replica is {} s behind, reading from the primary", lag)
+            return False
+        return True
+
+    @classmethod
+    def route_read(cls, host_name: str, lag_tolerant: bool = False) -> str:
+        """Host that serves a read addressed to ``host_name``.
+
+        Args:
+            host_name (str): The host named by the caller.
+            lag_tolerant (bool, optional): The read accepts data up to
+                REPLICA_MAX_LAG_SECONDS old. Defaults to False.
+
+        Returns:
+            str: SOURCE_HOST for lag tolerant reads of TARGET_HOST while the
+                replica is healthy, ``host_name`` otherwise.
+        """
+        if (
+            not lag_tolerant
+            or host_name != Database.TARGET_HOST.name
+            or not Replication.enabled()
+        ):
+            return host_name
+        now = time.monotonic()
+        interval = float(Replication.REPLICA_CHECK_INTERVAL_SECONDS)
+        if now - cls.__replica_checked_at >= interval:
+            cls.__replica_available = cls._check_replica()
+            cls.__replica_checked_at = now
+        return Database.SOURCE_HOST.name if cls.__replica_available else host_name
+
     @classmethod
     @db_error_handler
     def disconnect(cls, host_name: str | None = None) -> None:
@@ -84,7 +205,12 @@ class DataBaseConnection:
     @classmethod
     @db_error_handler
     def read(
-        cls, host_name: str, query: Callable, params: dict = {}, as_df: bool = False
+        cls,
+        host_name: str,
+        query: Callable,
+        params: dict = {},
+        as_df: bool = False,
+        lag_tolerant: bool = False,
     ) -> list[dict] | pd.DataFrame:
         """Read data from the database.
 
@@ -93,6 +219,8 @@ class DataBaseConnection:
             query (Callable): The query to execute.
             params (dict): The parameters to pass to the query.
             as_df (bool, optional): Return the data as a DataFrame. Defaults to False.
+            lag_tolerant (bool, optional): The read can be served by the read
+                replica. Defaults to False.
 
         Returns:
             list[dict] | pd.DataFrame: The data read from the database.
@@ -101,10 +229,64 @@ class DataBaseConnection:
             raise ConnectionError(
                 "You are not connected to the database, please connect first."
             )
+        query_name = re.search(r"read_(.*)", query.__name__).group(1)
+        serving_host = cls.route_read(host_name, lag_tolerant)
+        logger.debug("Reading data from {} on {}", query_name, serving_host)
+        with timed("db_read", query=query_name):
+            try:
+                result = cls.__connections[serving_host].read(
+                    query=query(**params), as_df=as_df
+                )
+            except Exception as e:
+                if serving_host == host_name:
+                    raise
+                logger.warning("Read replica failed, reading from the primary: {}", e)
+                cls.__replica_available = False
+                serving_host = host_name
+                result = cls.__connections[host_name].read(
+                    query=query(**params), as_df=as_df
+                )
+        DB_READS.inc(host=serving_host)
+        return result
+
+    @classmethod
+    def read_batches(
+        cls,
+        host_name: str,
+        query: Callable,
+        params: dict = {},
+        batch_size: int = 1000,
+        lag_tolerant: bool = False,
+    ) -> Iterator[list[dict]]:
+        """Read data from the database in batches, streaming the rows.
+
+        Args:
+            host_name (str): The name of the host to read from.
+            query (Callable): The query to execute.
+            params (dict): The parameters to pass to the query.
+            batch_size (int, optional): Rows per batch. Defaults to 1000.
+            lag_tolerant (bool, optional): The read can be served by the read
+                replica. Defaults to False.
+
+        Yields:
+            list[dict]: The next batch of rows.
+        """
+        if host_name not in cls.__connections:
+            raise ConnectionError(
+                "You are not connected to the database, please connect first."
+            )
+        query_name = re.search(r"read_(.*)", query.__name__).group(1)
+        serving_host = cls.route_read(host_name, lag_tolerant)
         logger.debug(
-            "Reading data from {}", re.search(r"read_(.*)", query.__name__).group(1)
+            "Reading data from {} on {} in batches of {}",
+            query_name,
+            serving_host,
+            batch_size,
+        )
+        DB_READS.inc(host=serving_host)
+        yield from cls.__connections[serving_host].read_batches(
+            query=query(**params), batch_size=batch_size
         )
-        return cls.__connections[host_name].read(query=query(**params), as_df=as_df)
 
     @classmethod
     @db_error_handler
@@ -131,13 +313,15 @@ class DataBaseConnection:
                 "You are not connected to the database, please connect first."
             )
 
-        inserted_rows = cls.__connections[host_name].write(
-            query=query(), data=data, commit=commit
-        )
+        table_name_match = re.search(r"(?:insert|upsert)_(.*)", query.__name__)
+        table_name = table_name_match.group(1) if table_name_match else "unknown table"
+        with timed("db_write", table=table_name):
+            inserted_rows = cls.__connections[host_name].write(
+                query=query(), data=data, commit=commit
+            )
+        DB_ROWS.inc(len(data), table=table_name)
 
         updated_rows = len(data) - inserted_rows
-        table_name_match = re.search(r"insert_(.*)", query.__name__)
-        table_name = table_name_match.group(1) if table_name_match else "unknown table"
 
         logger.info(
             "Host: {}, {} data inserted and {} data updated in {}.",
@@ -148,6 +332,63 @@ class DataBaseConnection:
         )
         return inserted_rows
 
+    @classmethod
+    @db_error_handler
+    def bulk_write(
+        cls,
+        host_name: str,
+        query: Callable,
+        data: list[dict] | pd.DataFrame | Iterable[list[dict]],
+        batch_size: int | None = None,
+        commit: bool = True,
+    ) -> BulkLoadStats:
+        """Write many rows through a staging table and a single upsert.
+
+        Meant for backfills and replays: the rows are loaded into a temporary
+        table and merged into the target with one statement, with the same
+        upsert semantics as ``write``.
+
+        Args:
+            host_name (str): The name of the host to write to.
+            query (Callable): The ``insert_*`` query of the target table.
+            data (list[dict] | pd.DataFrame | Iterable[list[dict]]): The rows,
+                or an iterable of batches of rows (streamed to the staging
+                table).
+            batch_size (int | None, optional): Rows per multi-row insert into
+                the staging table. Defaults to BULK_LOAD_BATCH_SIZE.
+            commit (bool, optional): Commit the transaction. Defaults to True.
+
+        Returns:
+            BulkLoadStats: Rows loaded, rows affected, load and lock time.
+        """
+        if host_name not in cls.__connections:
+            raise ConnectionError(
+                "You are not connected to the database, please connect first."
+            )
+
+        table_name_match = re.search(r"insert_(.*)", query.__name__)
+        table_name = table_name_match.group(1) if table_name_match else "unknown table"
+        if isinstance(data, pd.DataFrame):
+            data = data.to_dict(orient="records")
+        batches = as_batches(data, int(batch_size or Storage.BULK_LOAD_BATCH_SIZE))
+        with timed("db_bulk_write", table=table_name):
+            stats = cls.__connections[host_name].bulk_upsert(
+                query=query(), batches=batches, commit=commit
+            )
+        DB_ROWS.inc(stats.rows, table=table_name)
+        DB_BULK_LOCK.observe(stats.lock_seconds, table=table_name)
+        DB_BULK_ROWS_PER_SECOND.set(stats.rows_per_second, table=table_name)
+
+        logger.info(
+            "Host: {}, {} rows bulk loaded into {} ({:.0f} rows/s, {:.3f} s of lock).",
+            host_name,
+            stats.rows,
+            table_name,
+            stats.rows_per_second,
+            stats.lock_seconds,
+        )
+        return stats
+
     @classmethod
     @db_error_handler
     def truncate(cls, host_name: str, query: Callable, commit: bool = True) -> None:
@@ -1,59 +1,96 @@
-"""Module for CRUD operations on the database."""
+"""Module for CRUD operations on the database.
 
-from typing import Optional
+The reads whose result only changes when this process writes it go through
+the result cache of ``query_cache``; the matching ``insert_*`` functions
+update the cached results. The request logs of the weather providers are
+always read from the database: they gate the API calls (daily quota, minimum
+interval) and other processes sharing the database write them too.
+"""
+
+from typing import Callable, Iterator, Optional
 
 import pandas as pd
 
 from solarxdatahub.config import Database
 from solarxdatahub.database.connection import DataBaseConnection
+from solarxdatahub.database.query_cache import get_result_cache
 from solarxdatahub.database.reading import (
+    read_archive_rows,
+    read_energy_irradiance_history,
+    read_energy_kpi_source,
+    read_inverter_latest_state,
     read_last_notification_timestamp,
+    read_live_workers,
     read_master_tb_device_status_mapping,
     read_master_tb_error_codes,
     read_master_tb_inverters,
     read_master_tb_request_options,
     read_openweather_last_request,
+    read_openweather_requests_log,
+    read_production_forecast,
     read_weatherbit_last_request,
     read_weatherbit_requests_log,
+    read_worker_leases,
 )
 from solarxdatahub.database.writting import (
     insert_openweather_air_pollution,
     insert_openweather_current,
+    insert_openweather_forecast,
     insert_openweather_requests_log,
     insert_tb_battery_data,
     insert_tb_energy_data,
+    insert_tb_energy_kpi,
+    insert_tb_inverter_latest_state,
     insert_tb_notification_log,
     insert_tb_phase_power_data,
+    insert_tb_production_forecast,
     insert_weatherbit_current,
     insert_weatherbit_requests_log,
+    upsert_tb_worker_heartbeat,
+    upsert_tb_worker_lease,
 )
 
 
+def _cached_read(
+    query: Callable,
+    params: Optional[dict] = None,
+    lag_tolerant: bool = False,
+) -> pd.DataFrame:
+    """Read a query as a DataFrame through the result cache."""
+    params = params or {}
+    return get_result_cache().read(
+        query,
+        params,
+        lambda: DataBaseConnection.read(
+            host_name=Database.TARGET_HOST.name,
+            query=query,
+            params=params,
+            as_df=True,
+            lag_tolerant=lag_tolerant,
+        ),
+    )
+
+
+def _records(data: pd.DataFrame | list[dict]) -> list[dict]:
+    if isinstance(data, pd.DataFrame):
+        return data.to_dict(orient="records")
+    return list(data)
+
+
 def get_master_tb_device_status_mapping():
     """Get the master_tb_device_status_mapping table."""
-    return DataBaseConnection.read(
-        host_name=Database.TARGET_HOST.name,
-        query=read_master_tb_device_status_mapping,
-        as_df=True,
-    )
+    return _cached_read(read_master_tb_device_status_mapping, lag_tolerant=True)
 
 
 def get_master_tb_error_codes():
     """Get the master_tb_error_codes table."""
-    return DataBaseConnection.read(
-        host_name=Database.TARGET_HOST.name,
-        query=read_master_tb_error_codes,
-        as_df=True,
-    )
+    return _cached_read(read_master_tb_error_codes, lag_tolerant=True)
 
 
 def get_master_tb_inverters(inverter_sn: Optional[str] = None):
     """Get the master_tb_inverters table."""
-    return DataBaseConnection.read(
-        host_name=Database.TARGET_HOST.name,
-        query=read_master_tb_inverters,
-        params={"inverter_sn": inverter_sn},
-        as_df=True,
+    return _cached_read(
+        read_master_tb_inverters, {"inverter_sn": inverter_sn}, lag_tolerant=True
     )
 
 
@@ -67,24 +104,20 @@ def get_weatherbit_requests_log():
 
 
 def get_openweather_requests_log():
-    """Get the weatherbit_requests_log table."""
+    """Get the openweather_requests_log table."""
     return DataBaseConnection.read(
         host_name=Database.TARGET_HOST.name,
-        query=read_weatherbit_requests_log,
+        query=read_openweather_requests_log,
         as_df=True,
     )
 
 
 def get_master_tb_request_options():
     """Get the master_tb_request_options table."""
-    return DataBaseConnection.read(
-        host_name=Database.TARGET_HOST.name,
-        query=read_master_tb_request_options,
-        as_df=True,
-    )
+    return _cached_read(read_master_tb_request_options, lag_tolerant=True)
 
 
-def insert_energy(df_energy: pd.DataFrame):
+def insert_energy(df_energy: pd.DataFrame | list[dict]):
     """Insert data into the tb_energy_data table."""
     return DataBaseConnection.write(
         host_name=Database.TARGET_HOST.name,
@@ -94,7 +127,7 @@ def insert_energy(df_energy: pd.DataFrame):
     )
 
 
-def insert_phase_power(df_phase_power: pd.DataFrame):
+def insert_phase_power(df_phase_power: pd.DataFrame | list[dict]):
     """Insert data into the tb_phase_power_data table."""
     return DataBaseConnection.write(
         host_name=Database.TARGET_HOST.name,
@@ -104,7 +137,7 @@ def insert_phase_power(df_phase_power: pd.DataFrame):
     )
 
 
-def insert_battery(df_battery: pd.DataFrame):
+def insert_battery(df_battery: pd.DataFrame | list[dict]):
     """Insert data into the tb_battery_data table."""
     return DataBaseConnection.write(
         host_name=Database.TARGET_HOST.name,
@@ -114,6 +147,26 @@ def insert_battery(df_battery: pd.DataFrame):
     )
 
 
+def insert_inverter_latest_state(latest_state: list[dict]):
+    """Upsert the latest state of the inverters into tb_inverter_latest_state."""
+    return DataBaseConnection.write(
+        host_name=Database.TARGET_HOST.name,
+        query=insert_tb_inverter_latest_state,
+        data=latest_state,
+        commit=True,
+    )
+
+
+def get_inverter_latest_state(inverter_id: Optional[int] = None) -> pd.DataFrame:
+    """Fetch the latest state of every inverter, or of a single one."""
+    return DataBaseConnection.read(
+        host_name=Database.TARGET_HOST.name,
+        query=read_inverter_latest_state,
+        params={"inverter_id": inverter_id},
+        as_df=True,
+    )
+
+
 def insert_weatherbit_requests_log_(df_weatherbit_requests_log: pd.DataFrame):
     """Insert data into the weatherbit_requests_log table."""
     return DataBaseConnection.write(
@@ -154,6 +207,18 @@ def insert_openweather_current_(df_openweather_current: pd.DataFrame):
     )
 
 
+def insert_openweather_forecast_(
+    df_openweather_forecast: list[dict] | pd.DataFrame,
+):
+    """Insert all the slots of a forecast into the openweather tb_forecast table."""
+    return DataBaseConnection.write(
+        host_name=Database.TARGET_HOST.name,
+        query=insert_openweather_forecast,
+        data=df_openweather_forecast,
+        commit=True,
+    )
+
+
 def insert_openweather_air_pollution_(df_openweather_air_pollution: pd.DataFrame):
     """Insert data into the openweather_air_pollution table."""
     return DataBaseConnection.write(
@@ -170,24 +235,54 @@ def get_last_notification_timestamp(
     """
     Devuelve el timestamp de la última notificación enviada para un inversor y tipo.
     """
-    return DataBaseConnection.read(
-        host_name=Database.TARGET_HOST.name,
-        query=read_last_notification_timestamp,
-        params={"inverter_id": inverter_id, "notification_type": notification_type},
-        as_df=True,
+    return _cached_read(
+        read_last_notification_timestamp,
+        {"inverter_id": inverter_id, "notification_type": notification_type},
     )
 
 
+def _newest_notification(df: pd.DataFrame, sent: pd.DataFrame) -> pd.DataFrame | None:
+    """Last notification of any type once ``sent`` has been logged."""
+    if df.empty:
+        return sent
+    notification_type, sent_at = df.iloc[0][["notification_type", "sent_at"]]
+    if pd.Timestamp(sent.iloc[0]["sent_at"]) >= pd.Timestamp(sent_at):
+        return sent
+    if notification_type == sent.iloc[0]["notification_type"]:
+        # La fila de ese tipo se ha sobrescrito con una fecha anterior: ya no se
+        # sabe cuál es la última sin leerla
+        return None
+    return df
+
+
 def insert_notification_log(df: pd.DataFrame):
     """
     Escribe un registro de notificación en la base de datos.
     """
-    return DataBaseConnection.write(
+    result = DataBaseConnection.write(
         host_name=Database.TARGET_HOST.name,
         query=insert_tb_notification_log,
         data=df,
         commit=True,
     )
+    cache = get_result_cache()
+    for row in _records(df):
+        sent = pd.DataFrame(
+            [{"notification_type": row["notification_type"], "sent_at": row["sent_at"]}]
+        )
+        # Una fila por (inversor, tipo): la escrita es la última de su tipo
+        params = {"inverter_id": row["inverter_id"]}
+        cache.put(
+            read_last_notification_timestamp,
+            params | {"notification_type": row["notification_type"]},
+            sent,
+        )
+        cache.update(
+            read_last_notification_timestamp,
+            params | {"notification_type": None},
+            lambda df, sent=sent: _newest_notification(df, sent),
+        )
+    return result
 
 
 def get_weatherbit_last_request() -> pd.DataFrame:
@@ -206,3 +301,126 @@ def get_openweather_last_request() -> pd.DataFrame:
         query=read_openweather_last_request,
         as_df=True,
     )
+
+
+def get_energy_irradiance_history(days: int) -> pd.DataFrame:
+    """Fetch the hourly production and irradiance history used for calibration."""
+    return DataBaseConnection.read(
+        host_name=Database.TARGET_HOST.name,
+        query=read_energy_irradiance_history,
+        params={"days": days},
+        as_df=True,
+        lag_tolerant=True,
+    )
+
+
+def insert_production_forecast(df_forecast: pd.DataFrame):
+    """Insert data into the tb_production_forecast table."""
+    return DataBaseConnection.write(
+        host_name=Database.TARGET_HOST.name,
+        query=insert_tb_production_forecast,
+        data=df_forecast,
+        commit=True,
+    )
+
+
+def get_production_forecast(inverter_id: Optional[int] = None) -> pd.DataFrame:
+    """Fetch the precomputed production forecast for the upcoming hours."""
+    return DataBaseConnection.read(
+        host_name=Database.TARGET_HOST.name,
+        query=read_production_forecast,
+        params={"inverter_id": inverter_id},
+        as_df=True,
+    )
+
+
+def get_archive_rows(
+    table: str,
+    since: Optional[str] = None,
+    batch_size: int = 1000,
+    lag_tolerant: bool = False,
+    **filters,
+) -> Iterator[list[dict]]:
+    """Stream the rows of a table changed since a watermark, in batches.
+
+    The export reads from the primary: a row that reaches the replica after a
+    newer one would fall behind the watermark and never be archived. Only
+    reads that can be stale (the unarchived tail of a report) set
+    ``lag_tolerant``. ``filters`` (``date_column``, ``start``, ``end``,
+    ``inverter_id``) narrow the rows as in ``read_archive_rows``.
+    """
+    return DataBaseConnection.read_batches(
+        host_name=Database.TARGET_HOST.name,
+        query=read_archive_rows,
+        params={"table": table, "since": since, **filters},
+        batch_size=batch_size,
+        lag_tolerant=lag_tolerant,
+    )
+
+
+def get_energy_kpi_source(
+    batch_size: int,
+    after_inverter: Optional[int] = None,
+    after_upload: Optional[str] = None,
+) -> pd.DataFrame:
+    """Fetch the next batch of energy readings without KPIs."""
+    return DataBaseConnection.read(
+        host_name=Database.TARGET_HOST.name,
+        query=read_energy_kpi_source,
+        params={
+            "batch_size": batch_size,
+            "after_inverter": after_inverter,
+            "after_upload": after_upload,
+        },
+        as_df=True,
+    )
+
+
+def insert_energy_kpi(rows: list[dict]):
+    """Insert data into the tb_energy_kpi table."""
+    return DataBaseConnection.write(
+        host_name=Database.TARGET_HOST.name,
+        query=insert_tb_energy_kpi,
+        data=rows,
+        commit=True,
+    )
+
+
+def insert_worker_heartbeat(rows: list[dict]):
+    """Insert or refresh the heartbeat of a worker."""
+    return DataBaseConnection.write(
+        host_name=Database.TARGET_HOST.name,
+        query=upsert_tb_worker_heartbeat,
+        data=rows,
+        commit=True,
+    )
+
+
+def get_live_workers(since: str) -> pd.DataFrame:
+    """Fetch the active workers with a heartbeat since ``since``."""
+    return DataBaseConnection.read(
+        host_name=Database.TARGET_HOST.name,
+        query=read_live_workers,
+        params={"since": since},
+        as_df=True,
+    )
+
+
+def claim_worker_leases(rows: list[dict]):
+    """Claim lease keys for a polling slot (see ``upsert_tb_worker_lease``)."""
+    return DataBaseConnection.write(
+        host_name=Database.TARGET_HOST.name,
+        query=upsert_tb_worker_lease,
+        data=rows,
+        commit=True,
+    )
+
+
+def get_worker_leases(worker_id: str, slot: str) -> pd.DataFrame:
+    """Fetch the lease keys held by a worker for a polling slot."""
+    return DataBaseConnection.read(
+        host_name=Database.TARGET_HOST.name,
+        query=read_worker_leases,
+        params={"worker_id": worker_id, "slot": slot},
+        as_df=True,
+    )
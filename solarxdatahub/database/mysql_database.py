@@ -2,16 +2,23 @@
 
 import logging
 import os
-from typing import Any, Dict, List, Optional, Tuple, Union
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
 import pandas as pd
 from pymysql.connections import Connection
-from pymysql.cursors import DictCursor
+from pymysql.cursors import DictCursor, SSDictCursor
+
+from solarxdatahub.config import Logging
+from solarxdatahub.database.backend import DatabaseBackend
+from solarxdatahub.database.bulk import BulkLoadStats, parse_upsert
+from solarxdatahub.utils.log_utils import PayloadPreview
+from solarxdatahub.utils.metrics import timed
 
 logger = logging.getLogger(__name__)
 
 
-class MySQLDatabase:
+class MySQLDatabase(DatabaseBackend):
     """MySQL database connection and operations."""
 
     _host: str
@@ -46,8 +53,8 @@ class MySQLDatabase:
                 "You are not connected to the database, please connect first."
             )
         try:
+            # Se llama antes de cada consulta: solo se registra el fallo
             self._connection.ping(reconnect=True)
-            logger.debug("Ping to the database successful")
         except Exception as e:
             logger.exception("Failed to ping the database %s", e)
             raise
@@ -127,7 +134,12 @@ class MySQLDatabase:
                 else:
                     cursor.execute(query, params)
                 result = cursor.fetchall()
-                logger.debug("Query executed: %s, with params: %s", query, params)
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(
+                        "Query executed: %s, with params: %s",
+                        PayloadPreview(query, Logging.LOG_PAYLOAD_PREVIEW_CHARS),
+                        PayloadPreview(params, Logging.LOG_PAYLOAD_PREVIEW_CHARS),
+                    )
                 if as_df:
                     return pd.DataFrame(result)
                 return list(result)
@@ -135,6 +147,28 @@ class MySQLDatabase:
             logger.exception("Failed to read from the database: %s", e)
             raise
 
+    def read_batches(
+        self,
+        query: str,
+        params: Optional[Union[Dict[str, Any], list[Any]]] = None,
+        batch_size: int = 1000,
+    ) -> Iterator[List[Dict]]:
+        """Read data from the MySQL database in batches.
+
+        Uses an unbuffered cursor, so the server streams the rows and only one
+        batch is held in memory. The connection can't run other queries until
+        every batch has been consumed.
+        """
+        self._ensure_connection()
+        try:
+            with self._connection.cursor(SSDictCursor) as cursor:
+                cursor.execute(query, params)
+                while batch := cursor.fetchmany(batch_size):
+                    yield list(batch)
+        except Exception as e:
+            logger.exception("Failed to read from the database: %s", e)
+            raise
+
     def write(
         self,
         query: str,
@@ -158,9 +192,15 @@ class MySQLDatabase:
                 else:
                     raise TypeError("Data type not supported")
                 affected_rows = cursor.rowcount
-                logger.debug("Query executed: %s, with data: %s", query, data)
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(
+                        "Query executed: %s, with data: %s",
+                        PayloadPreview(query, Logging.LOG_PAYLOAD_PREVIEW_CHARS),
+                        PayloadPreview(data, Logging.LOG_PAYLOAD_PREVIEW_CHARS),
+                    )
             if commit:
-                self._connection.commit()
+                with timed("db_commit"):
+                    self._connection.commit()
                 logger.debug("Transaction committed")
             return affected_rows
         except Exception as e:
@@ -169,11 +209,70 @@ class MySQLDatabase:
             logger.info("Transaction rolled back due to error")
             raise
 
+    def bulk_upsert(
+        self,
+        query: str,
+        batches: Iterable[List[Dict]],
+        commit: bool = True,
+    ) -> BulkLoadStats:
+        """Upsert many rows through a session-temporary staging table.
+
+        The batches are sent to the staging table as multi-row ``INSERT``
+        statements, without locking the target, and merged with a single
+        ``INSERT ... SELECT ... ON DUPLICATE KEY UPDATE`` built from ``query``.
+        The staging table only copies the column types of the target (no
+        unique keys) and numbers the rows, so they are merged in load order.
+        """
+        self._ensure_connection()
+        statement = parse_upsert(query)
+        staging = f"{statement.schema}.{statement.staging}"
+        stats = BulkLoadStats()
+        try:
+            with self._connection.cursor() as cursor:
+                cursor.execute(f"DROP TEMPORARY TABLE IF EXISTS {staging}")
+                cursor.execute(
+                    f"CREATE TEMPORARY TABLE {staging} "
+                    "(_seq BIGINT AUTO_INCREMENT PRIMARY KEY) "
+                    f"SELECT {', '.join(statement.columns)} "
+                    f"FROM {statement.table} LIMIT 0"
+                )
+                insert = statement.staging_insert(staging)
+                started = time.perf_counter()
+                for batch in batches:
+                    # pymysql envía el lote como un único INSERT multi-fila
+                    cursor.executemany(insert, batch)
+                    stats.rows += len(batch)
+                stats.load_seconds = time.perf_counter() - started
+
+                started = time.perf_counter()
+                cursor.execute(statement.merge(staging, order_by="_seq"))
+                stats.affected_rows = cursor.rowcount
+                if commit:
+                    with timed("db_commit"):
+                        self._connection.commit()
+                    logger.debug("Transaction committed")
+                stats.lock_seconds = time.perf_counter() - started
+                cursor.execute(f"DROP TEMPORARY TABLE {staging}")
+            logger.debug(
+                "Bulk upsert of %s rows into %s: %.0f rows/s, %.3f s of lock",
+                stats.rows,
+                statement.table,
+                stats.rows_per_second,
+                stats.lock_seconds,
+            )
+            return stats
+        except Exception as e:
+            logger.exception("Failed to bulk write to the database: %s", e)
+            self._connection.rollback()
+            logger.info("Transaction rolled back due to error")
+            raise
+
     def commit(self) -> None:
         """Commit the transaction."""
         self._ensure_connection()
         try:
-            self._connection.commit()
+            with timed("db_commit"):
+                self._connection.commit()
             logger.debug("Transaction committed")
         except Exception as e:
             logger.exception("Failed to commit the transaction: %s", e)
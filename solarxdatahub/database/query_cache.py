@@ -0,0 +1,153 @@
+"""Read-through cache of the results of the ``reading`` queries.
+
+Several reads of every cycle (the master tables, the last notification of
+each inverter) return values that only change when this same process writes
+them. The results are kept in a small LRU cache with a TTL, keyed by query
+function and params, and the ``insert_*`` functions of ``crud`` update the
+entries they affect, so a steady-state cycle doesn't read back what it just
+wrote. The TTL bounds how long a change made by another process goes
+unnoticed.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable
+
+import pandas as pd
+from loguru import logger
+
+from solarxdatahub.config import QueryCache
+from solarxdatahub.utils.metrics import DB_QUERY_CACHE
+
+
+def _key(query: Callable, params: dict) -> tuple:
+    return (query.__name__, tuple(sorted(params.items())))
+
+
+def _copy(value: Any) -> Any:
+    """Copy of a cached result, so the callers can't modify the entry."""
+    if isinstance(value, pd.DataFrame):
+        return value.copy()
+    if isinstance(value, list):
+        return [dict(row) for row in value]
+    return value
+
+
+class ResultCache:
+    """LRU cache of query results with a time to live.
+
+    Args:
+        max_entries (int): Entries kept; the least recently used is evicted.
+        ttl (float): Seconds an entry is served.
+        enabled (bool, optional): When False every read goes to the
+            database. Defaults to True.
+    """
+
+    def __init__(self, max_entries: int, ttl: float, enabled: bool = True):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.enabled = enabled
+        self._entries: OrderedDict[tuple, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _lookup(self, key: tuple) -> tuple[bool, Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        expires_at, value = entry
+        if time.monotonic() >= expires_at:
+            del self._entries[key]
+            return False, None
+        self._entries.move_to_end(key)
+        return True, value
+
+    def _store(self, key: tuple, value: Any) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def read(self, query: Callable, params: dict, loader: Callable[[], Any]) -> Any:
+        """Return the cached result of a query, loading it on a miss.
+
+        Args:
+            query (Callable): The ``read_*`` query function.
+            params (dict): The parameters of the query.
+            loader (Callable[[], Any]): Runs the query.
+
+        Returns:
+            Any: The result (a copy of the cached one).
+        """
+        if not self.enabled:
+            return loader()
+        key = _key(query, params)
+        with self._lock:
+            hit, value = self._lookup(key)
+        if hit:
+            DB_QUERY_CACHE.inc(query=query.__name__, result="hit")
+            return _copy(value)
+        DB_QUERY_CACHE.inc(query=query.__name__, result="miss")
+        value = loader()
+        with self._lock:
+            self._store(key, _copy(value))
+        return value
+
+    def update(
+        self, query: Callable, params: dict, function: Callable[[Any], Any]
+    ) -> None:
+        """Apply a write to the cached result of a query, if any.
+
+        Args:
+            query (Callable): The ``read_*`` query function.
+            params (dict): The parameters of the query.
+            function (Callable[[Any], Any]): Returns the new result from the
+                cached one, or None when it can't tell (the entry is dropped).
+        """
+        if not self.enabled:
+            return
+        key = _key(query, params)
+        with self._lock:
+            hit, value = self._lookup(key)
+            if not hit:
+                return
+            try:
+                value = function(value)
+            except Exception as e:  # pylint: disable=broad-except
+                logger.warning("Dropping the cached {}: {}", query.__name__, e)
+                value = None
+            if value is None:
+                del self._entries[key]
+            else:
+                self._store(key, value)
+
+    def put(self, query: Callable, params: dict, value: Any) -> None:
+        """Store the result of a query known from a write."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._store(_key(query, params), value)
+
+    def invalidate(self, query: Callable | None = None) -> None:
+        """Drop the entries of a query, or every entry."""
+        with self._lock:
+            if query is None:
+                self._entries.clear()
+                return
+            for key in [key for key in self._entries if key[0] == query.__name__]:
+                del self._entries[key]
+
+
+_result_cache: ResultCache | None = None
+
+
+def get_result_cache() -> ResultCache:
+    """Return the process wide result cache configured from the environment."""
+    global _result_cache
+    if _result_cache is None:
+        _result_cache = ResultCache(
+            max_entries=int(QueryCache.QUERY_CACHE_MAX_ENTRIES),
+            ttl=float(QueryCache.QUERY_CACHE_TTL_SECONDS),
+            enabled=QueryCache.QUERY_CACHE_ENABLED.lower() == "true",
+        )
+    return _result_cache
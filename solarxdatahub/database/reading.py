@@ -80,3 +80,123 @@ def read_openweather_last_request() -> str:
     """Fetch the last request made to the OpenWeather API."""
     return """SELECT MAX(request_datetime) AS last_request
             FROM openweather.tb_requests_log;"""
+
+
+def read_energy_irradiance_history(days: int = 30) -> str:
+    """Hourly mean AC power per inverter joined with the measured irradiance."""
+    return f"""SELECT e.inverter_id, e.fecha, e.periodo,
+                AVG(e.acpower) AS acpower, AVG(w.ghi) AS ghi, AVG(w.temp) AS temp
+            FROM solaxcloud.tb_energy_data e
+            JOIN weatherbit.tb_hourly_data w
+                ON DATE(w.calculation_datetime) = e.fecha
+                AND HOUR(w.calculation_datetime) = e.periodo
+            WHERE e.fecha >= CURDATE() - INTERVAL {int(days)} DAY
+            GROUP BY e.inverter_id, e.fecha, e.periodo;"""
+
+
+def read_production_forecast(inverter_id: int = None) -> str:
+    """Fetch the upcoming production forecast, optionally for a single inverter."""
+    where_clause = f"AND inverter_id = {int(inverter_id)}" if inverter_id else ""
+    return f"""SELECT inverter_id, issue_datetime, target_datetime, clouds, ghi,
+                expected_power, expected_energy
+            FROM solaxcloud.tb_production_forecast
+            WHERE target_datetime >= NOW() - INTERVAL 1 HOUR
+                {where_clause}
+            ORDER BY inverter_id, target_datetime;"""
+
+
+def read_inverter_latest_state(inverter_id: int = None) -> str:
+    """Fetch the latest state of every inverter, or of a single one."""
+    where_clause = f"WHERE inverter_id = {int(inverter_id)}" if inverter_id else ""
+    return f"""SELECT inverter_id, uploadTime, acpower, yieldtoday, yieldtotal,
+                feedinpower, feedinenergy, consumeenergy, peps1, peps2, peps3,
+                powerdc1, powerdc2, powerdc3, powerdc4, batPower, soc, batStatus,
+                inverterStatus
+            FROM solaxcloud.tb_inverter_latest_state
+            {where_clause};"""
+
+
+def read_energy_kpi_source(
+    batch_size: int, after_inverter: int = None, after_upload: str = None
+) -> str:
+    """Fetch the energy readings without KPIs, ordered by inverter and uploadTime.
+
+    The newest reading with KPIs of every inverter (``last_kpi``) is returned as
+    well, as the previous reading of the first new one. The batches are paged
+    on (inverter_id, uploadTime) after the last row of the previous batch.
+    """
+    keyset = (
+        f"""AND (e.inverter_id > {int(after_inverter)}
+                OR (e.inverter_id = {int(after_inverter)}
+                    AND e.uploadTime > '{after_upload}'))"""
+        if after_inverter is not None
+        else ""
+    )
+    return f"""SELECT e.inverter_id, e.fecha, e.periodo, e.min, e.uploadTime,
+                e.acpower, e.yieldtotal, e.feedinpower, e.feedinenergy,
+                e.consumeenergy, b.batPower, w.last_kpi
+            FROM (
+                SELECT i.id AS inverter_id, (
+                    SELECT MAX(k.uploadTime) FROM solaxcloud.tb_energy_kpi k
+                    WHERE k.inverter_id = i.id
+                ) AS last_kpi
+                FROM solaxcloud.master_tb_inverters i
+            ) w
+            CROSS JOIN solaxcloud.tb_energy_data e
+                ON e.inverter_id = w.inverter_id
+                AND e.uploadTime >= COALESCE(w.last_kpi, '1000-01-01')
+            LEFT JOIN solaxcloud.tb_battery_data b
+                ON b.fecha = e.fecha AND b.periodo = e.periodo
+                AND b.min = e.min AND b.inverter_id = e.inverter_id
+            WHERE 1 = 1 {keyset}
+            ORDER BY e.inverter_id, e.uploadTime
+            LIMIT {int(batch_size)};"""
+
+
+def read_live_workers(since: str) -> str:
+    """Fetch the active workers with a heartbeat since ``since``."""
+    return f"""SELECT worker_id, hostname, started_at, heartbeat_at
+            FROM solaxcloud.tb_worker_heartbeat
+            WHERE status = 'active' AND heartbeat_at >= '{since}'
+            ORDER BY worker_id;"""
+
+
+def read_worker_leases(worker_id: str, slot: str) -> str:
+    """Fetch the lease keys held by a worker for a polling slot."""
+    worker_id = worker_id.replace("'", "''")
+    return f"""SELECT lease_key
+            FROM solaxcloud.tb_worker_lease
+            WHERE worker_id = '{worker_id}' AND slot = '{slot}';"""
+
+
+def read_archive_rows(
+    table: str,
+    since: str = None,
+    date_column: str = None,
+    start: str = None,
+    end: str = None,
+    inverter_id: int = None,
+) -> str:
+    """Rows of a table inserted or updated since a watermark, for the archive.
+
+    The reports narrow the rows to a period of ``date_column`` (``end``
+    excluded) and to an inverter.
+    """
+    conditions = []
+    if since:
+        conditions.append(f"COALESCE(timestamp_update, timestamp_insert) >= '{since}'")
+    if date_column and start:
+        conditions.append(f"{date_column} >= '{start}'")
+    if date_column and end:
+        conditions.append(f"{date_column} < '{end}'")
+    if inverter_id is not None:
+        conditions.append(f"inverter_id = {int(inverter_id)}")
+    where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    return f"""SELECT *, COALESCE(timestamp_update, timestamp_insert) AS changed_at
+            FROM {table}
+            {where_clause};"""
+
+
+def read_replica_status() -> str:
+    """Replication status of the read replica (MySQL 8.0.22+)."""
+    return "SHOW REPLICA STATUS;"
@@ -98,6 +98,45 @@ CREATE TABLE IF NOT EXISTS `tb_current_weather` (
 
 -- La exportación de datos fue deseleccionada.
 
+-- Volcando estructura para tabla openweather.tb_forecast
+CREATE TABLE IF NOT EXISTS `tb_forecast` (
+  `id` int NOT NULL AUTO_INCREMENT COMMENT 'ID interno del registro',
+  `issue_datetime` datetime NOT NULL COMMENT 'Fecha y hora de la petición del pronóstico',
+  `target_datetime` datetime NOT NULL COMMENT 'Fecha y hora predicha',
+  `city_id` int DEFAULT NULL COMMENT 'ID de la ciudad en OpenWeather',
+  `lat` float DEFAULT NULL COMMENT 'Latitud',
+  `lon` float DEFAULT NULL COMMENT 'Longitud',
+  `dt` int NOT NULL COMMENT 'Timestamp de la predicción',
+  `temp` float DEFAULT NULL COMMENT 'Temperatura prevista en °C',
+  `feels_like` float DEFAULT NULL COMMENT 'Sensación térmica prevista en °C',
+  `temp_min` float DEFAULT NULL COMMENT 'Temperatura mínima en °C',
+  `temp_max` float DEFAULT NULL COMMENT 'Temperatura máxima en °C',
+  `pressure` int DEFAULT NULL COMMENT 'Presión atmosférica (hPa)',
+  `humidity` int DEFAULT NULL COMMENT 'Humedad (%)',
+  `sea_level` float DEFAULT NULL COMMENT 'Presión a nivel del mar (hPa)',
+  `grnd_level` float DEFAULT NULL COMMENT 'Presión en el suelo (hPa)',
+  `visibility` int DEFAULT NULL COMMENT 'Visibilidad en metros',
+  `wind_speed` float DEFAULT NULL COMMENT 'Velocidad del viento (m/s)',
+  `wind_deg` int DEFAULT NULL COMMENT 'Dirección del viento (grados)',
+  `wind_gust` float DEFAULT NULL COMMENT 'Ráfagas del viento (m/s)',
+  `clouds` int DEFAULT NULL COMMENT 'Nubosidad (%)',
+  `pop` float DEFAULT NULL COMMENT 'Probabilidad de precipitación (0-1)',
+  `rain_3h` float DEFAULT NULL COMMENT 'Volumen de lluvia en las 3 horas (mm)',
+  `pod` varchar(5) DEFAULT NULL COMMENT 'Período del día (d = día, n = noche)',
+  `weather_main` varchar(255) DEFAULT NULL COMMENT 'Grupo(s) del clima (ej. Clear, Rain)',
+  `weather_description` varchar(255) DEFAULT NULL COMMENT 'Descripción(es) detallada(s) del clima',
+  `weather_icon` varchar(50) DEFAULT NULL COMMENT 'Código(s) del icono del clima',
+  `timestamp_insert` datetime NOT NULL DEFAULT CURRENT_TIMESTAMP COMMENT 'Fecha de inserción',
+  `user_insert` varchar(50) DEFAULT NULL COMMENT 'Usuario que inserta',
+  `timestamp_update` datetime DEFAULT NULL ON UPDATE CURRENT_TIMESTAMP COMMENT 'Fecha de actualización',
+  `user_update` varchar(50) DEFAULT NULL COMMENT 'Usuario que actualiza',
+  PRIMARY KEY (`id`),
+  UNIQUE KEY `uk_issue_target` (`issue_datetime`,`target_datetime`),
+  KEY `idx_target_datetime` (`target_datetime`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
+-- La exportación de datos fue deseleccionada.
+
 -- Volcando estructura para tabla openweather.tb_requests_log
 CREATE TABLE IF NOT EXISTS `tb_requests_log` (
   `id` int NOT NULL AUTO_INCREMENT,
@@ -158,6 +197,20 @@ CREATE TRIGGER `tb_current_weather_before_update` BEFORE UPDATE ON `tb_current_w
 DELIMITER ;
 SET SQL_MODE=@OLDTMP_SQL_MODE;
 
+-- Volcando estructura para disparador openweather.tb_forecast_before_insert
+SET @OLDTMP_SQL_MODE=@@SQL_MODE, SQL_MODE='ONLY_FULL_GROUP_BY,STRICT_TRANS_TABLES,NO_ZERO_IN_DATE,NO_ZERO_DATE,ERROR_FOR_DIVISION_BY_ZERO,NO_ENGINE_SUBSTITUTION';
+DELIMITER //
+CREATE TRIGGER `tb_forecast_before_insert` BEFORE INSERT ON `tb_forecast` FOR EACH ROW SET NEW.user_insert = USER()//
+DELIMITER ;
+SET SQL_MODE=@OLDTMP_SQL_MODE;
+
+-- Volcando estructura para disparador openweather.tb_forecast_before_update
+SET @OLDTMP_SQL_MODE=@@SQL_MODE, SQL_MODE='ONLY_FULL_GROUP_BY,STRICT_TRANS_TABLES,NO_ZERO_IN_DATE,NO_ZERO_DATE,ERROR_FOR_DIVISION_BY_ZERO,NO_ENGINE_SUBSTITUTION';
+DELIMITER //
+CREATE TRIGGER `tb_forecast_before_update` BEFORE UPDATE ON `tb_forecast` FOR EACH ROW SET NEW.user_update = USER()//
+DELIMITER ;
+SET SQL_MODE=@OLDTMP_SQL_MODE;
+
 -- Volcando estructura para disparador openweather.tb_requests_log_before_insert
 SET @OLDTMP_SQL_MODE=@@SQL_MODE, SQL_MODE='ONLY_FULL_GROUP_BY,STRICT_TRANS_TABLES,NO_ZERO_IN_DATE,NO_ZERO_DATE,ERROR_FOR_DIVISION_BY_ZERO,NO_ENGINE_SUBSTITUTION';
 DELIMITER //
@@ -172,6 +225,17 @@ CREATE TRIGGER `tb_requests_log_before_update` BEFORE UPDATE ON `tb_requests_log
 DELIMITER ;
 SET SQL_MODE=@OLDTMP_SQL_MODE;
 
+-- Opciones de petición que usa OpenWeatherAPI (se insertan solo las que falten)
+INSERT INTO `master_tb_request_options` (request_type, description)
+SELECT v.request_type, v.description FROM (
+  SELECT 'weather' AS request_type, 'Tiempo actual' AS description
+  UNION ALL SELECT 'air_pollution', 'Contaminación del aire'
+  UNION ALL SELECT 'forecast', 'Pronóstico de 5 días cada 3 horas'
+) v
+WHERE NOT EXISTS (
+  SELECT 1 FROM `master_tb_request_options` o WHERE o.request_type = v.request_type
+);
+
 
 -- Volcando estructura de base de datos para solaxcloud
 CREATE DATABASE IF NOT EXISTS `solaxcloud` /*!40100 DEFAULT CHARACTER SET utf8mb4 COLLATE utf8mb4_0900_ai_ci */ /*!80016 DEFAULT ENCRYPTION='N' */;
@@ -266,11 +330,75 @@ CREATE TABLE IF NOT EXISTS `tb_energy_data` (
   PRIMARY KEY (`id`),
   UNIQUE KEY `unique_measurement` (`fecha`,`periodo`,`min`,`inverter_id`),
   KEY `inverter_id` (`inverter_id`),
+  KEY `idx_inverter_upload` (`inverter_id`,`uploadTime`),
   CONSTRAINT `tb_energy_data_ibfk_1` FOREIGN KEY (`inverter_id`) REFERENCES `master_tb_inverters` (`id`)
 ) ENGINE=InnoDB AUTO_INCREMENT=51 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
 
 -- La exportación de datos fue deseleccionada.
 
+-- Volcando estructura para tabla solaxcloud.tb_energy_kpi
+CREATE TABLE IF NOT EXISTS `tb_energy_kpi` (
+  `id` int NOT NULL AUTO_INCREMENT,
+  `fecha` date NOT NULL,
+  `periodo` smallint NOT NULL,
+  `min` smallint NOT NULL,
+  `inverter_id` int NOT NULL,
+  `uploadTime` datetime NOT NULL,
+  `interval_seconds` int DEFAULT NULL COMMENT 'Segundos desde la lectura anterior (NULL en la primera)',
+  `yield_energy` float DEFAULT NULL COMMENT 'kWh producidos en el intervalo (yieldtotal)',
+  `feedin_energy` float DEFAULT NULL COMMENT 'kWh exportados a la red en el intervalo (feedinenergy)',
+  `consume_energy` float DEFAULT NULL COMMENT 'kWh importados de la red en el intervalo (consumeenergy)',
+  `home_load` float DEFAULT NULL COMMENT 'W consumidos por la vivienda (acpower - feedinpower)',
+  `self_consumption` float DEFAULT NULL COMMENT 'Fracción de la producción del intervalo no exportada',
+  `battery_charge` float DEFAULT NULL COMMENT 'kWh cargados en la batería en el intervalo',
+  `battery_discharge` float DEFAULT NULL COMMENT 'kWh descargados de la batería en el intervalo',
+  `counter_reset` tinyint NOT NULL DEFAULT '0' COMMENT 'Algún contador se reinició en el intervalo',
+  `gap` tinyint NOT NULL DEFAULT '0' COMMENT 'Intervalo mayor que KPI_MAX_GAP_SECONDS',
+  `timestamp_insert` datetime NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  `user_insert` varchar(50) DEFAULT NULL,
+  `timestamp_update` datetime DEFAULT NULL ON UPDATE CURRENT_TIMESTAMP,
+  `user_update` varchar(50) DEFAULT NULL,
+  PRIMARY KEY (`id`),
+  UNIQUE KEY `unique_measurement` (`fecha`,`periodo`,`min`,`inverter_id`),
+  KEY `idx_inverter_upload` (`inverter_id`,`uploadTime`),
+  CONSTRAINT `tb_energy_kpi_ibfk_1` FOREIGN KEY (`inverter_id`) REFERENCES `master_tb_inverters` (`id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
+-- La exportación de datos fue deseleccionada.
+
+-- Volcando estructura para tabla solaxcloud.tb_inverter_latest_state
+CREATE TABLE IF NOT EXISTS `tb_inverter_latest_state` (
+  `id` int NOT NULL AUTO_INCREMENT,
+  `inverter_id` int NOT NULL,
+  `uploadTime` datetime NOT NULL COMMENT 'Hora de subida de la última lectura',
+  `acpower` float DEFAULT NULL,
+  `yieldtoday` float DEFAULT NULL,
+  `yieldtotal` float DEFAULT NULL,
+  `feedinpower` float DEFAULT NULL,
+  `feedinenergy` float DEFAULT NULL,
+  `consumeenergy` float DEFAULT NULL,
+  `peps1` float DEFAULT NULL,
+  `peps2` float DEFAULT NULL,
+  `peps3` float DEFAULT NULL,
+  `powerdc1` float DEFAULT NULL,
+  `powerdc2` float DEFAULT NULL,
+  `powerdc3` float DEFAULT NULL,
+  `powerdc4` float DEFAULT NULL,
+  `batPower` float DEFAULT NULL,
+  `soc` float DEFAULT NULL,
+  `batStatus` varchar(50) DEFAULT NULL,
+  `inverterStatus` varchar(10) DEFAULT NULL COMMENT 'Código de master_tb_device_status_mapping',
+  `timestamp_insert` datetime NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  `user_insert` varchar(50) DEFAULT NULL,
+  `timestamp_update` datetime DEFAULT NULL ON UPDATE CURRENT_TIMESTAMP,
+  `user_update` varchar(50) DEFAULT NULL,
+  PRIMARY KEY (`id`),
+  UNIQUE KEY `unique_inverter` (`inverter_id`),
+  CONSTRAINT `tb_inverter_latest_state_ibfk_1` FOREIGN KEY (`inverter_id`) REFERENCES `master_tb_inverters` (`id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
+-- La exportación de datos fue deseleccionada.
+
 -- Volcando estructura para tabla solaxcloud.tb_notification_log
 CREATE TABLE IF NOT EXISTS `tb_notification_log` (
   `id` int NOT NULL AUTO_INCREMENT,
@@ -315,6 +443,65 @@ CREATE TABLE IF NOT EXISTS `tb_phase_power_data` (
 
 -- La exportación de datos fue deseleccionada.
 
+-- Volcando estructura para tabla solaxcloud.tb_production_forecast
+CREATE TABLE IF NOT EXISTS `tb_production_forecast` (
+  `id` int NOT NULL AUTO_INCREMENT,
+  `inverter_id` int NOT NULL,
+  `issue_datetime` datetime NOT NULL COMMENT 'Fecha y hora en que se calculó la predicción',
+  `target_datetime` datetime NOT NULL COMMENT 'Inicio de la hora predicha',
+  `clouds` float DEFAULT NULL COMMENT 'Nubosidad prevista (%)',
+  `ghi` float DEFAULT NULL COMMENT 'Irradiancia horizontal global prevista (W/m2)',
+  `calibration_factor` float DEFAULT NULL COMMENT 'Factor de calibración del inversor (W por W/m2)',
+  `expected_power` float DEFAULT NULL COMMENT 'Potencia AC media prevista (W)',
+  `expected_energy` float DEFAULT NULL COMMENT 'Energía prevista en la hora (Wh)',
+  `timestamp_insert` datetime NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  `user_insert` varchar(50) DEFAULT NULL,
+  `timestamp_update` datetime DEFAULT NULL ON UPDATE CURRENT_TIMESTAMP,
+  `user_update` varchar(50) DEFAULT NULL,
+  PRIMARY KEY (`id`),
+  UNIQUE KEY `unique_forecast` (`inverter_id`,`target_datetime`),
+  KEY `idx_target_datetime` (`target_datetime`),
+  CONSTRAINT `tb_production_forecast_ibfk_1` FOREIGN KEY (`inverter_id`) REFERENCES `master_tb_inverters` (`id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
+-- La exportación de datos fue deseleccionada.
+
+-- Volcando estructura para tabla solaxcloud.tb_worker_heartbeat
+CREATE TABLE IF NOT EXISTS `tb_worker_heartbeat` (
+  `id` int NOT NULL AUTO_INCREMENT,
+  `worker_id` varchar(100) NOT NULL,
+  `hostname` varchar(100) DEFAULT NULL,
+  `started_at` datetime NOT NULL,
+  `heartbeat_at` datetime NOT NULL COMMENT 'Último latido del worker',
+  `status` varchar(10) NOT NULL COMMENT 'active o stopped',
+  `timestamp_insert` datetime NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  `user_insert` varchar(50) DEFAULT NULL,
+  `timestamp_update` datetime DEFAULT NULL ON UPDATE CURRENT_TIMESTAMP,
+  `user_update` varchar(50) DEFAULT NULL,
+  PRIMARY KEY (`id`),
+  UNIQUE KEY `unique_worker` (`worker_id`),
+  KEY `idx_heartbeat_at` (`heartbeat_at`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
+-- La exportación de datos fue deseleccionada.
+
+-- Volcando estructura para tabla solaxcloud.tb_worker_lease
+CREATE TABLE IF NOT EXISTS `tb_worker_lease` (
+  `id` int NOT NULL AUTO_INCREMENT,
+  `lease_key` varchar(100) NOT NULL COMMENT 'Trabajo arrendado, p. ej. inverter:3',
+  `worker_id` varchar(100) NOT NULL,
+  `slot` datetime NOT NULL COMMENT 'Inicio de la ranura de sondeo arrendada',
+  `timestamp_insert` datetime NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  `user_insert` varchar(50) DEFAULT NULL,
+  `timestamp_update` datetime DEFAULT NULL ON UPDATE CURRENT_TIMESTAMP,
+  `user_update` varchar(50) DEFAULT NULL,
+  PRIMARY KEY (`id`),
+  UNIQUE KEY `unique_lease` (`lease_key`),
+  KEY `idx_worker_slot` (`worker_id`,`slot`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
+-- La exportación de datos fue deseleccionada.
+
 -- Volcando estructura para disparador solaxcloud.master_tb_device_status_mapping_before_insert
 SET @OLDTMP_SQL_MODE=@@SQL_MODE, SQL_MODE='ONLY_FULL_GROUP_BY,STRICT_TRANS_TABLES,NO_ZERO_IN_DATE,NO_ZERO_DATE,ERROR_FOR_DIVISION_BY_ZERO,NO_ENGINE_SUBSTITUTION';
 DELIMITER //
@@ -385,6 +572,34 @@ CREATE TRIGGER `tb_energy_tb_data_before_update` BEFORE UPDATE ON `tb_energy_dat
 DELIMITER ;
 SET SQL_MODE=@OLDTMP_SQL_MODE;
 
+-- Volcando estructura para disparador solaxcloud.tb_energy_kpi_before_insert
+SET @OLDTMP_SQL_MODE=@@SQL_MODE, SQL_MODE='ONLY_FULL_GROUP_BY,STRICT_TRANS_TABLES,NO_ZERO_IN_DATE,NO_ZERO_DATE,ERROR_FOR_DIVISION_BY_ZERO,NO_ENGINE_SUBSTITUTION';
+DELIMITER //
+CREATE TRIGGER `tb_energy_kpi_before_insert` BEFORE INSERT ON `tb_energy_kpi` FOR EACH ROW SET NEW.user_insert = USER()//
+DELIMITER ;
+SET SQL_MODE=@OLDTMP_SQL_MODE;
+
+-- Volcando estructura para disparador solaxcloud.tb_energy_kpi_before_update
+SET @OLDTMP_SQL_MODE=@@SQL_MODE, SQL_MODE='ONLY_FULL_GROUP_BY,STRICT_TRANS_TABLES,NO_ZERO_IN_DATE,NO_ZERO_DATE,ERROR_FOR_DIVISION_BY_ZERO,NO_ENGINE_SUBSTITUTION';
+DELIMITER //
+CREATE TRIGGER `tb_energy_kpi_before_update` BEFORE UPDATE ON `tb_energy_kpi` FOR EACH ROW SET NEW.user_update = USER()//
+DELIMITER ;
+SET SQL_MODE=@OLDTMP_SQL_MODE;
+
+-- Volcando estructura para disparador solaxcloud.tb_inverter_latest_state_before_insert
+SET @OLDTMP_SQL_MODE=@@SQL_MODE, SQL_MODE='ONLY_FULL_GROUP_BY,STRICT_TRANS_TABLES,NO_ZERO_IN_DATE,NO_ZERO_DATE,ERROR_FOR_DIVISION_BY_ZERO,NO_ENGINE_SUBSTITUTION';
+DELIMITER //
+CREATE TRIGGER `tb_inverter_latest_state_before_insert` BEFORE INSERT ON `tb_inverter_latest_state` FOR EACH ROW SET NEW.user_insert = USER()//
+DELIMITER ;
+SET SQL_MODE=@OLDTMP_SQL_MODE;
+
+-- Volcando estructura para disparador solaxcloud.tb_inverter_latest_state_before_update
+SET @OLDTMP_SQL_MODE=@@SQL_MODE, SQL_MODE='ONLY_FULL_GROUP_BY,STRICT_TRANS_TABLES,NO_ZERO_IN_DATE,NO_ZERO_DATE,ERROR_FOR_DIVISION_BY_ZERO,NO_ENGINE_SUBSTITUTION';
+DELIMITER //
+CREATE TRIGGER `tb_inverter_latest_state_before_update` BEFORE UPDATE ON `tb_inverter_latest_state` FOR EACH ROW SET NEW.user_update = USER()//
+DELIMITER ;
+SET SQL_MODE=@OLDTMP_SQL_MODE;
+
 -- Volcando estructura para disparador solaxcloud.tb_notification_log_before_insert
 SET @OLDTMP_SQL_MODE=@@SQL_MODE, SQL_MODE='ONLY_FULL_GROUP_BY,STRICT_TRANS_TABLES,NO_ZERO_IN_DATE,NO_ZERO_DATE,ERROR_FOR_DIVISION_BY_ZERO,NO_ENGINE_SUBSTITUTION';
 DELIMITER //
@@ -413,6 +628,48 @@ CREATE TRIGGER `tb_phase_power_data_before_update` BEFORE UPDATE ON `tb_phase_po
 DELIMITER ;
 SET SQL_MODE=@OLDTMP_SQL_MODE;
 
+-- Volcando estructura para disparador solaxcloud.tb_production_forecast_before_insert
+SET @OLDTMP_SQL_MODE=@@SQL_MODE, SQL_MODE='ONLY_FULL_GROUP_BY,STRICT_TRANS_TABLES,NO_ZERO_IN_DATE,NO_ZERO_DATE,ERROR_FOR_DIVISION_BY_ZERO,NO_ENGINE_SUBSTITUTION';
+DELIMITER //
+CREATE TRIGGER `tb_production_forecast_before_insert` BEFORE INSERT ON `tb_production_forecast` FOR EACH ROW SET NEW.user_insert = USER()//
+DELIMITER ;
+SET SQL_MODE=@OLDTMP_SQL_MODE;
+
+-- Volcando estructura para disparador solaxcloud.tb_production_forecast_before_update
+SET @OLDTMP_SQL_MODE=@@SQL_MODE, SQL_MODE='ONLY_FULL_GROUP_BY,STRICT_TRANS_TABLES,NO_ZERO_IN_DATE,NO_ZERO_DATE,ERROR_FOR_DIVISION_BY_ZERO,NO_ENGINE_SUBSTITUTION';
+DELIMITER //
+CREATE TRIGGER `tb_production_forecast_before_update` BEFORE UPDATE ON `tb_production_forecast` FOR EACH ROW SET NEW.user_update = USER()//
+DELIMITER ;
+SET SQL_MODE=@OLDTMP_SQL_MODE;
+
+-- Volcando estructura para disparador solaxcloud.tb_worker_heartbeat_before_insert
+SET @OLDTMP_SQL_MODE=@@SQL_MODE, SQL_MODE='ONLY_FULL_GROUP_BY,STRICT_TRANS_TABLES,NO_ZERO_IN_DATE,NO_ZERO_DATE,ERROR_FOR_DIVISION_BY_ZERO,NO_ENGINE_SUBSTITUTION';
+DELIMITER //
+CREATE TRIGGER `tb_worker_heartbeat_before_insert` BEFORE INSERT ON `tb_worker_heartbeat` FOR EACH ROW SET NEW.user_insert = USER()//
+DELIMITER ;
+SET SQL_MODE=@OLDTMP_SQL_MODE;
+
+-- Volcando estructura para disparador solaxcloud.tb_worker_heartbeat_before_update
+SET @OLDTMP_SQL_MODE=@@SQL_MODE, SQL_MODE='ONLY_FULL_GROUP_BY,STRICT_TRANS_TABLES,NO_ZERO_IN_DATE,NO_ZERO_DATE,ERROR_FOR_DIVISION_BY_ZERO,NO_ENGINE_SUBSTITUTION';
+DELIMITER //
+CREATE TRIGGER `tb_worker_heartbeat_before_update` BEFORE UPDATE ON `tb_worker_heartbeat` FOR EACH ROW SET NEW.user_update = USER()//
+DELIMITER ;
+SET SQL_MODE=@OLDTMP_SQL_MODE;
+
+-- Volcando estructura para disparador solaxcloud.tb_worker_lease_before_insert
+SET @OLDTMP_SQL_MODE=@@SQL_MODE, SQL_MODE='ONLY_FULL_GROUP_BY,STRICT_TRANS_TABLES,NO_ZERO_IN_DATE,NO_ZERO_DATE,ERROR_FOR_DIVISION_BY_ZERO,NO_ENGINE_SUBSTITUTION';
+DELIMITER //
+CREATE TRIGGER `tb_worker_lease_before_insert` BEFORE INSERT ON `tb_worker_lease` FOR EACH ROW SET NEW.user_insert = USER()//
+DELIMITER ;
+SET SQL_MODE=@OLDTMP_SQL_MODE;
+
+-- Volcando estructura para disparador solaxcloud.tb_worker_lease_before_update
+SET @OLDTMP_SQL_MODE=@@SQL_MODE, SQL_MODE='ONLY_FULL_GROUP_BY,STRICT_TRANS_TABLES,NO_ZERO_IN_DATE,NO_ZERO_DATE,ERROR_FOR_DIVISION_BY_ZERO,NO_ENGINE_SUBSTITUTION';
+DELIMITER //
+CREATE TRIGGER `tb_worker_lease_before_update` BEFORE UPDATE ON `tb_worker_lease` FOR EACH ROW SET NEW.user_update = USER()//
+DELIMITER ;
+SET SQL_MODE=@OLDTMP_SQL_MODE;
+
 
 -- Volcando estructura de base de datos para weatherbit
 CREATE DATABASE IF NOT EXISTS `weatherbit` /*!40100 DEFAULT CHARACTER SET utf8mb4 COLLATE utf8mb4_0900_ai_ci */ /*!80016 DEFAULT ENCRYPTION='N' */;
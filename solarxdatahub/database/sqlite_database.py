@@ -0,0 +1,460 @@
+"""Module for the embedded SQLite storage engine.
+
+Runs the same queries as ``MySQLDatabase`` on local SQLite files, so a single
+site installation can store everything next to the inverter. Each MySQL
+schema (``solaxcloud``, ``openweather``, ``weatherbit``) is a database file
+attached under its own name, which keeps the schema qualified table names of
+the queries valid. The tables are created from ``schemas/create_tables.sql``
+and the queries are translated from the MySQL dialect when first used.
+"""
+
+import logging
+import re
+import sqlite3
+import time
+from datetime import date, datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from solarxdatahub.config import Logging
+from solarxdatahub.database.backend import DatabaseBackend
+from solarxdatahub.database.bulk import BulkLoadStats, parse_upsert
+from solarxdatahub.utils.log_utils import PayloadPreview
+from solarxdatahub.utils.metrics import timed
+
+logger = logging.getLogger(__name__)
+
+MYSQL_SCHEMA_FILE = Path(__file__).parent / "schemas" / "create_tables.sql"
+MEMORY = ":memory:"
+
+
+# Conversión de los tipos de Python que usa el pipeline (los de pandas/numpy incluidos)
+def _adapt_datetime(value: datetime) -> str:
+    return value.isoformat(" ", "seconds")
+
+
+def _convert_datetime(value: bytes):
+    text = value.decode()
+    try:
+        return datetime.fromisoformat(text)
+    except ValueError:
+        return text
+
+
+def _convert_date(value: bytes):
+    text = value.decode()
+    try:
+        return date.fromisoformat(text)
+    except ValueError:
+        return text
+
+
+sqlite3.register_adapter(datetime, _adapt_datetime)
+sqlite3.register_adapter(pd.Timestamp, _adapt_datetime)
+sqlite3.register_adapter(date, date.isoformat)
+for _type in (np.int8, np.int16, np.int32, np.int64, np.uint8, np.uint16, np.uint32):
+    sqlite3.register_adapter(_type, int)
+sqlite3.register_adapter(np.float32, float)
+sqlite3.register_adapter(np.bool_, bool)
+# pymysql envía las listas como ('a', 'b'): con un solo elemento MySQL guarda el valor
+sqlite3.register_adapter(list, lambda value: ", ".join(map(str, value)))
+sqlite3.register_converter("datetime", _convert_datetime)
+sqlite3.register_converter("date", _convert_date)
+
+
+# --- Traducción del esquema -------------------------------------------------
+
+_SCHEMA_STATEMENT = re.compile(
+    r"^USE `(?P<use>\w+)`;"
+    r"|^CREATE TABLE IF NOT EXISTS `(?P<table>\w+)` \((?P<body>.*?)\n\)[^;]*;"
+    r"|^(?P<seed>INSERT INTO .*?;)",
+    re.M | re.S,
+)
+_COMMENT = re.compile(r"\s+COMMENT\s+'(?:[^']|'')*'")
+_CHARSET = re.compile(r"\s+(?:CHARACTER SET|COLLATE)\s+\w+")
+_INDEX = re.compile(r"^(UNIQUE )?KEY `(\w+)` \((.*)\)$")
+_FOREIGN_KEY = re.compile(r"^CONSTRAINT `\w+` (FOREIGN KEY .*)$")
+
+
+def _columns(text: str) -> str:
+    return text.replace("`", '"')
+
+
+@lru_cache(maxsize=1)
+def sqlite_schema() -> dict[str, list[str]]:
+    """Translate the MySQL schema of the data hub to SQLite statements.
+
+    Returns:
+        dict[str, list[str]]: The CREATE TABLE / CREATE INDEX statements and
+            the master data of every MySQL schema (database), keyed by schema
+            name.
+    """
+    ddl = MYSQL_SCHEMA_FILE.read_text(encoding="utf-8")
+    schemas: dict[str, list[str]] = {}
+    schema = None
+    for match in _SCHEMA_STATEMENT.finditer(ddl):
+        if match.group("use"):
+            schema = match.group("use")
+            schemas.setdefault(schema, [])
+            continue
+        if match.group("seed"):
+            # Los datos maestros solo citan con `` los nombres de tabla
+            schemas[schema].append(
+                re.sub(r"`(\w+)`", rf'{schema}."\1"', match.group("seed"))
+            )
+            continue
+        table = match.group("table")
+        definitions, indexes, auto_increment = [], [], None
+        on_update = None
+        for line in match.group("body").strip().splitlines():
+            line = _CHARSET.sub("", _COMMENT.sub("", line.strip().rstrip(",")))
+            if line.startswith("PRIMARY KEY"):
+                if auto_increment is None:
+                    definitions.append(_columns(line))
+                continue
+            index = _INDEX.match(line)
+            if index:
+                unique, name, columns = index.groups()
+                if unique:
+                    definitions.append(f"UNIQUE ({_columns(columns)})")
+                else:
+                    indexes.append(
+                        f'CREATE INDEX IF NOT EXISTS {schema}."{table}_{name}" '
+                        f'ON "{table}" ({_columns(columns)});'
+                    )
+                continue
+            foreign_key = _FOREIGN_KEY.match(line)
+            if foreign_key:
+                definitions.append(_columns(foreign_key.group(1)))
+                continue
+            column = line.split("`")[1]
+            if "AUTO_INCREMENT" in line:
+                # Las claves AUTO_INCREMENT pasan a ser el rowid de SQLite
+                auto_increment = column
+                definitions.append(f'"{column}" INTEGER PRIMARY KEY AUTOINCREMENT')
+                continue
+            if " ON UPDATE CURRENT_TIMESTAMP" in line:
+                on_update = column
+            line = line.replace(" ON UPDATE CURRENT_TIMESTAMP", "").replace(
+                "DEFAULT CURRENT_TIMESTAMP", "DEFAULT (datetime('now', 'localtime'))"
+            )
+            definitions.append(_columns(line))
+        body = ",\n  ".join(definitions)
+        schemas[schema].append(
+            f'CREATE TABLE IF NOT EXISTS {schema}."{table}" (\n  {body}\n);'
+        )
+        schemas[schema].extend(indexes)
+        if on_update:
+            # SQLite no tiene ON UPDATE CURRENT_TIMESTAMP: se emula con un trigger
+            schemas[schema].append(
+                f'CREATE TRIGGER IF NOT EXISTS {schema}."{table}_{on_update}" '
+                f'AFTER UPDATE ON "{table}" FOR EACH ROW '
+                f'WHEN NEW."{on_update}" IS OLD."{on_update}" BEGIN '
+                f"UPDATE \"{table}\" SET \"{on_update}\" = datetime('now', 'localtime') "
+                f"WHERE rowid = NEW.rowid; END;"
+            )
+    return schemas
+
+
+# --- Traducción de las consultas --------------------------------------------
+
+_NAMED_PARAM = re.compile(r"%\((\w+)\)s")
+_DUPLICATE_KEY = re.compile(r"ON DUPLICATE KEY UPDATE", re.I)
+_VALUES_FUNCTION = re.compile(r"VALUES\((\w+)\)", re.I)
+_INTERVAL = re.compile(
+    r"(CURDATE|NOW)\(\)\s*-\s*INTERVAL\s+(\d+)\s+(DAY|HOUR|MINUTE)", re.I
+)
+_HOUR = re.compile(r"HOUR\(([^()]*)\)", re.I)
+_TRUNCATE = re.compile(r"TRUNCATE\s+TABLE", re.I)
+
+
+def _interval(match: re.Match) -> str:
+    function, amount, unit = match.groups()
+    modifier = f"'-{amount} {unit.lower()}s'"
+    if function.upper() == "CURDATE":
+        return f"date('now', 'localtime', {modifier})"
+    return f"datetime('now', 'localtime', {modifier})"
+
+
+@lru_cache(maxsize=256)
+def translate_query(query: str) -> str:
+    """Translate a query of ``reading``/``writting`` to the SQLite dialect.
+
+    Covers what the data hub uses: ``%(name)s``/``%s`` placeholders,
+    ``ON DUPLICATE KEY UPDATE ... VALUES(col)`` upserts, ``CURDATE()``,
+    ``NOW()``, ``- INTERVAL n DAY|HOUR|MINUTE``, ``HOUR()`` and
+    ``TRUNCATE TABLE``.
+
+    Args:
+        query (str): The MySQL query.
+
+    Returns:
+        str: The SQLite query.
+    """
+    sql = _NAMED_PARAM.sub(r":\1", query).replace("%s", "?")
+    upsert = _DUPLICATE_KEY.search(sql)
+    if upsert:
+        updates = _VALUES_FUNCTION.sub(r"excluded.\1", sql[upsert.end() :])
+        # Sin columnas de conflicto: aplica a cualquier clave única, como en MySQL
+        sql = f"{sql[: upsert.start()]}ON CONFLICT DO UPDATE SET{updates}"
+    sql = _INTERVAL.sub(_interval, sql)
+    sql = re.sub(r"CURDATE\(\)", "date('now', 'localtime')", sql, flags=re.I)
+    sql = re.sub(r"NOW\(\)", "datetime('now', 'localtime')", sql, flags=re.I)
+    sql = _HOUR.sub(r"CAST(strftime('%H', \1) AS INTEGER)", sql)
+    sql = _TRUNCATE.sub("DELETE FROM", sql)
+    return sql.replace("`", '"')
+
+
+class SQLiteDatabase(DatabaseBackend):
+    """Embedded SQLite database with the schemas of the data hub."""
+
+    _path: str
+    _connection: Optional[sqlite3.Connection]
+
+    def __init__(self, path: str) -> None:
+        """Initialize the SQLite database.
+
+        Args:
+            path (str): Directory holding one database file per schema, or
+                ``:memory:`` for in-memory databases shared by the connections
+                of the process.
+        """
+        self._path = path
+        self._connection = None
+
+    def _location(self, name: str) -> str:
+        if self._path == MEMORY:
+            return f"file:solarxdatahub_{name}?mode=memory&cache=shared"
+        return Path(self._path, f"{name}.db").resolve().as_uri()
+
+    def _ensure_connection(self) -> None:
+        if self._connection is None:
+            raise ConnectionError(
+                "You are not connected to the database, please connect first."
+            )
+
+    def connect(self) -> None:
+        """Open the database files and create the missing tables."""
+        try:
+            if self._path != MEMORY:
+                Path(self._path).mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(
+                self._location("main"),
+                uri=True,
+                detect_types=sqlite3.PARSE_DECLTYPES,
+                check_same_thread=False,
+            )
+            connection.row_factory = sqlite3.Row
+            schemas = sqlite_schema()
+            for schema in schemas:
+                connection.execute(
+                    "ATTACH DATABASE ? AS " + schema, (self._location(schema),)
+                )
+                if self._path != MEMORY:
+                    connection.execute(f"PRAGMA {schema}.journal_mode=WAL")
+                    connection.execute(f"PRAGMA {schema}.synchronous=NORMAL")
+            connection.execute("PRAGMA busy_timeout=5000")
+            connection.executescript(
+                "\n".join(
+                    statement
+                    for statements in schemas.values()
+                    for statement in statements
+                )
+            )
+            self._connection = connection
+            logger.info("Connected to the SQLite database at %s", self._path)
+        except Exception as e:
+            logger.error("Failed to connect to the SQLite database: %s", e)
+            raise
+
+    def disconnect(self) -> None:
+        """Close the SQLite database."""
+        self._ensure_connection()
+        try:
+            self._connection.close()
+            self._connection = None
+            logger.info("Disconnected from the SQLite database")
+        except Exception as e:
+            logger.error("Failed to disconnect from the SQLite database: %s", e)
+            raise
+
+    def ping(self) -> None:
+        """Check the SQLite database."""
+        self._ensure_connection()
+        self._connection.execute("SELECT 1")
+
+    def read(
+        self,
+        query: str,
+        params: Optional[Union[Dict[str, Any], list[Any]]] = None,
+        as_df: bool = False,
+    ) -> Union[List[Dict], pd.DataFrame]:
+        """Read data from the SQLite database."""
+        self._ensure_connection()
+        try:
+            cursor = self._connection.execute(translate_query(query), params or ())
+            result = [dict(row) for row in cursor.fetchall()]
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    "Query executed: %s, with params: %s",
+                    PayloadPreview(query, Logging.LOG_PAYLOAD_PREVIEW_CHARS),
+                    PayloadPreview(params, Logging.LOG_PAYLOAD_PREVIEW_CHARS),
+                )
+            if as_df:
+                return pd.DataFrame(result)
+            return result
+        except Exception as e:
+            logger.exception("Failed to read from the database: %s", e)
+            raise
+
+    def read_batches(
+        self,
+        query: str,
+        params: Optional[Union[Dict[str, Any], list[Any]]] = None,
+        batch_size: int = 1000,
+    ) -> Iterator[List[Dict]]:
+        """Read the rows of a query in batches, without loading them all.
+
+        Args:
+            query (str): The query, in the MySQL dialect.
+            params (dict | list, optional): The parameters of the query.
+            batch_size (int, optional): Rows per batch. Defaults to 1000.
+
+        Yields:
+            list[dict]: The next batch of rows.
+        """
+        self._ensure_connection()
+        cursor = self._connection.execute(translate_query(query), params or ())
+        while batch := cursor.fetchmany(batch_size):
+            yield [dict(row) for row in batch]
+
+    def write(
+        self,
+        query: str,
+        data: Union[List[Dict], Tuple, pd.DataFrame],
+        commit: bool = True,
+    ) -> int:
+        """Write data to the SQLite database."""
+        self._ensure_connection()
+        sql = translate_query(query)
+        try:
+            if isinstance(data, list):
+                cursor = self._connection.executemany(sql, data)
+            elif isinstance(data, tuple):
+                cursor = self._connection.execute(sql, data)
+            elif isinstance(data, pd.DataFrame):
+                data = data.to_dict(orient="records")
+                cursor = self._connection.executemany(sql, data)
+            elif data is None:
+                cursor = self._connection.execute(sql)
+            else:
+                raise TypeError("Data type not supported")
+            affected_rows = cursor.rowcount
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    "Query executed: %s, with data: %s",
+                    PayloadPreview(query, Logging.LOG_PAYLOAD_PREVIEW_CHARS),
+                    PayloadPreview(data, Logging.LOG_PAYLOAD_PREVIEW_CHARS),
+                )
+            if commit:
+                with timed("db_commit"):
+                    self._connection.commit()
+                logger.debug("Transaction committed")
+            return affected_rows
+        except Exception as e:
+            logger.exception("Failed to write to the database: %s", e)
+            self._connection.rollback()
+            logger.info("Transaction rolled back due to error")
+            raise
+
+    def bulk_upsert(
+        self,
+        query: str,
+        batches: Iterable[List[Dict]],
+        commit: bool = True,
+    ) -> BulkLoadStats:
+        """Upsert many rows through a temporary staging table.
+
+        The staging table lives in the ``temp`` database, so filling it does
+        not lock the database file of the target; the rows are then merged in
+        load order with a single ``INSERT ... SELECT ... ON CONFLICT``.
+        """
+        self._ensure_connection()
+        statement = parse_upsert(query)
+        staging = f"temp.{statement.staging}"
+        stats = BulkLoadStats()
+        try:
+            self._connection.execute(f"DROP TABLE IF EXISTS {staging}")
+            # Misma afinidad que el destino, sin sus claves únicas
+            self._connection.execute(
+                f"CREATE TEMP TABLE {statement.staging} AS "
+                f"SELECT {', '.join(statement.columns)} "
+                f"FROM {statement.table} LIMIT 0"
+            )
+            insert = translate_query(statement.staging_insert(staging))
+            started = time.perf_counter()
+            for batch in batches:
+                self._connection.executemany(insert, batch)
+                stats.rows += len(batch)
+            stats.load_seconds = time.perf_counter() - started
+
+            started = time.perf_counter()
+            cursor = self._connection.execute(
+                translate_query(statement.merge(staging, order_by="rowid"))
+            )
+            stats.affected_rows = cursor.rowcount
+            if commit:
+                with timed("db_commit"):
+                    self._connection.commit()
+                logger.debug("Transaction committed")
+            stats.lock_seconds = time.perf_counter() - started
+            self._connection.execute(f"DROP TABLE {staging}")
+            logger.debug(
+                "Bulk upsert of %s rows into %s: %.0f rows/s, %.3f s of lock",
+                stats.rows,
+                statement.table,
+                stats.rows_per_second,
+                stats.lock_seconds,
+            )
+            return stats
+        except Exception as e:
+            logger.exception("Failed to bulk write to the database: %s", e)
+            self._connection.rollback()
+            logger.info("Transaction rolled back due to error")
+            raise
+
+    def commit(self) -> None:
+        """Commit the transaction."""
+        self._ensure_connection()
+        try:
+            with timed("db_commit"):
+                self._connection.commit()
+            logger.debug("Transaction committed")
+        except Exception as e:
+            logger.exception("Failed to commit the transaction: %s", e)
+            raise
+
+    def begin(self) -> None:
+        """Begin a transaction."""
+        self._ensure_connection()
+        try:
+            if not self._connection.in_transaction:
+                self._connection.execute("BEGIN")
+            logger.debug("Transaction started")
+        except Exception as e:
+            logger.exception("Failed to start the transaction: %s", e)
+            raise
+
+    def rollback(self) -> None:
+        """Rollback the transaction."""
+        self._ensure_connection()
+        try:
+            self._connection.rollback()
+            logger.debug("Transaction rolled back")
+        except Exception as e:
+            logger.exception("Failed to roll back the transaction: %s", e)
+            raise
@@ -0,0 +1,137 @@
+"""Bulk synchronization of the local SQLite database with the remote MySQL.
+
+With ``STORAGE_BACKEND=sqlite`` the data hub writes to the local database and
+the new or updated rows are sent upstream in batches, reusing the upserts of
+``writting``. The changes are found with ``timestamp_insert`` /
+``timestamp_update`` and the watermark of every table is kept in the
+``sqlite_sync`` state document, advanced only once the batch is committed
+upstream. Rows changed in the same second as the watermark are sent again,
+which is harmless as every query is an upsert.
+
+With ``SYNC_BULK_LOAD`` (large backfills) the changed rows of a table are
+streamed into a staging table upstream and merged with a single upsert, and
+the watermark advances once the whole table is merged.
+"""
+
+import re
+from typing import Callable, Iterator
+
+from loguru import logger
+
+from solarxdatahub.config import Database, Storage
+from solarxdatahub.database import writting
+from solarxdatahub.database.mysql_database import MySQLDatabase
+from solarxdatahub.database.sqlite_database import SQLiteDatabase
+from solarxdatahub.utils.metrics import DB_ROWS, timed
+from solarxdatahub.utils.state import StateStore
+
+_TABLE = re.compile(r"INSERT INTO (\w+\.\w+)")
+_NAMED_PARAM = re.compile(r"%\((\w+)\)s")
+
+CHANGED = "COALESCE(timestamp_update, timestamp_insert)"
+
+
+def synced_tables() -> dict[str, Callable[[], str]]:
+    """Tables sent upstream, with the upsert that writes them.
+
+    Returns:
+        dict[str, Callable[[], str]]: ``schema.table`` -> ``insert_*`` query.
+    """
+    tables = {}
+    for name in dir(writting):
+        if name.startswith("insert_"):
+            query = getattr(writting, name)
+            tables[_TABLE.search(query()).group(1)] = query
+    return tables
+
+
+def _changed_rows_query(table: str, query: Callable[[], str]) -> str:
+    columns = ", ".join(dict.fromkeys(_NAMED_PARAM.findall(query())))
+    return (
+        f"SELECT {columns}, {CHANGED} AS changed_at FROM {table} "
+        f"WHERE {CHANGED} >= %s ORDER BY changed_at"
+    )
+
+
+def _without_watermark(
+    batches: Iterator[list[dict]], progress: dict
+) -> Iterator[list[dict]]:
+    """Drop ``changed_at`` from the rows, keeping the last one in ``progress``."""
+    for batch in batches:
+        progress["watermark"] = batch[-1].pop("changed_at")
+        for row in batch[:-1]:
+            del row["changed_at"]
+        yield batch
+
+
+def sync_upstream(
+    local: SQLiteDatabase | None = None,
+    upstream: MySQLDatabase | None = None,
+    batch_size: int | None = None,
+    bulk: bool | None = None,
+) -> dict[str, int]:
+    """Send the rows changed since the last sync to the remote MySQL.
+
+    Args:
+        local (SQLiteDatabase | None, optional): The local database. Defaults
+            to the one in SQLITE_DIR.
+        upstream (MySQLDatabase | None, optional): The remote database.
+            Defaults to TARGET_HOST.
+        batch_size (int | None, optional): Rows per upsert (per insert into
+            the staging table with ``bulk``). Defaults to SYNC_BATCH_SIZE.
+        bulk (bool | None, optional): Merge every table with a single upsert
+            through a staging table. Defaults to SYNC_BULK_LOAD.
+
+    Returns:
+        dict[str, int]: Rows sent per table.
+    """
+    local = local or SQLiteDatabase(Storage.SQLITE_DIR)
+    upstream = upstream or MySQLDatabase(**Database.TARGET_HOST.value)
+    batch_size = int(batch_size or Storage.SYNC_BATCH_SIZE)
+    if bulk is None:
+        bulk = Storage.SYNC_BULK_LOAD.lower() == "true"
+    state = StateStore("sqlite_sync")
+    watermarks = state.load()
+    sent: dict[str, int] = {}
+
+    local.connect()
+    upstream.connect()
+    try:
+        for table, query in synced_tables().items():
+            since = watermarks.get(table, "")
+            sent[table] = 0
+            progress: dict = {}
+            batches = _without_watermark(
+                local.read_batches(
+                    _changed_rows_query(table, query), [since], batch_size
+                ),
+                progress,
+            )
+            if bulk:
+                with timed("db_sync", table=table):
+                    stats = upstream.bulk_upsert(query(), batches)
+                DB_ROWS.inc(stats.rows, table=f"sync_{table}")
+                sent[table] = stats.rows
+                if stats.rows:
+                    logger.debug(
+                        "{} merged upstream at {:.0f} rows/s, {:.3f} s of lock",
+                        table,
+                        stats.rows_per_second,
+                        stats.lock_seconds,
+                    )
+                    watermarks[table] = progress["watermark"]
+                    state.save(watermarks)
+            else:
+                for batch in batches:
+                    with timed("db_sync", table=table):
+                        upstream.write(query(), batch)
+                    DB_ROWS.inc(len(batch), table=f"sync_{table}")
+                    sent[table] += len(batch)
+                    watermarks[table] = progress["watermark"]
+                    state.save(watermarks)
+            if sent[table]:
+                logger.info("{} rows of {} synced upstream", sent[table], table)
+    finally:
+        local.disconnect()
+        upstream.disconnect()
+    return sent
@@ -199,6 +199,55 @@ ON DUPLICATE KEY UPDATE
     """
 
 
+def insert_openweather_forecast() -> str:
+    """
+    Devuelve la consulta SQL para insertar los tramos del pronóstico en tb_forecast.
+
+    Una sola llamada a executemany con esta consulta se envía como un único
+    INSERT multi-fila, por lo que todos los tramos de una petición se guardan
+    en un solo viaje a la base de datos.
+    """
+    return """
+        INSERT INTO openweather.tb_forecast (
+            issue_datetime, target_datetime, city_id, lat, lon, dt, temp, feels_like,
+            temp_min, temp_max, pressure, humidity, sea_level, grnd_level, visibility,
+            wind_speed, wind_deg, wind_gust, clouds, pop, rain_3h, pod, weather_main,
+            weather_description, weather_icon
+        )
+        VALUES (
+            %(issue_datetime)s, %(target_datetime)s, %(city_id)s, %(lat)s, %(lon)s, %(dt)s,
+            %(temp)s, %(feels_like)s, %(temp_min)s, %(temp_max)s, %(pressure)s, %(humidity)s,
+            %(sea_level)s, %(grnd_level)s, %(visibility)s, %(wind_speed)s, %(wind_deg)s,
+            %(wind_gust)s, %(clouds)s, %(pop)s, %(rain_3h)s, %(pod)s, %(weather_main)s,
+            %(weather_description)s, %(weather_icon)s
+        )
+        ON DUPLICATE KEY UPDATE
+            city_id = VALUES(city_id),
+            lat = VALUES(lat),
+            lon = VALUES(lon),
+            dt = VALUES(dt),
+            temp = VALUES(temp),
+            feels_like = VALUES(feels_like),
+            temp_min = VALUES(temp_min),
+            temp_max = VALUES(temp_max),
+            pressure = VALUES(pressure),
+            humidity = VALUES(humidity),
+            sea_level = VALUES(sea_level),
+            grnd_level = VALUES(grnd_level),
+            visibility = VALUES(visibility),
+            wind_speed = VALUES(wind_speed),
+            wind_deg = VALUES(wind_deg),
+            wind_gust = VALUES(wind_gust),
+            clouds = VALUES(clouds),
+            pop = VALUES(pop),
+            rain_3h = VALUES(rain_3h),
+            pod = VALUES(pod),
+            weather_main = VALUES(weather_main),
+            weather_description = VALUES(weather_description),
+            weather_icon = VALUES(weather_icon);
+    """
+
+
 def insert_openweather_air_pollution() -> str:
     """_summary_
 
@@ -234,3 +283,152 @@ def insert_tb_notification_log() -> str:
         VALUES (%(inverter_id)s, %(notification_type)s, %(sent_at)s)
         ON DUPLICATE KEY UPDATE sent_at = VALUES(sent_at);
     """
+
+
+def insert_tb_production_forecast() -> str:
+    """Insert the tb_production_forecast table into the database.
+
+    Returns:
+        str: The query to insert the data.
+    """
+    return """INSERT INTO solaxcloud.tb_production_forecast (
+                inverter_id, issue_datetime, target_datetime, clouds, ghi,
+                calibration_factor, expected_power, expected_energy
+            ) VALUES (
+                %(inverter_id)s, %(issue_datetime)s, %(target_datetime)s, %(clouds)s,
+                %(ghi)s, %(calibration_factor)s, %(expected_power)s, %(expected_energy)s
+            ) ON DUPLICATE KEY UPDATE
+                issue_datetime = VALUES(issue_datetime),
+                clouds = VALUES(clouds),
+                ghi = VALUES(ghi),
+                calibration_factor = VALUES(calibration_factor),
+                expected_power = VALUES(expected_power),
+                expected_energy = VALUES(expected_energy);"""
+
+
+def insert_tb_energy_kpi() -> str:
+    """Insert the tb_energy_kpi table into the database.
+
+    Returns:
+        str: The query to insert the data.
+    """
+    return """INSERT INTO solaxcloud.tb_energy_kpi (
+                fecha, periodo, min, inverter_id, uploadTime, interval_seconds,
+                yield_energy, feedin_energy, consume_energy, home_load,
+                self_consumption, battery_charge, battery_discharge, counter_reset, gap
+            ) VALUES (
+                %(fecha)s, %(periodo)s, %(min)s, %(inverter_id)s, %(uploadTime)s,
+                %(interval_seconds)s, %(yield_energy)s, %(feedin_energy)s,
+                %(consume_energy)s, %(home_load)s, %(self_consumption)s,
+                %(battery_charge)s, %(battery_discharge)s, %(counter_reset)s, %(gap)s
+            ) ON DUPLICATE KEY UPDATE
+                uploadTime = VALUES(uploadTime),
+                interval_seconds = VALUES(interval_seconds),
+                yield_energy = VALUES(yield_energy),
+                feedin_energy = VALUES(feedin_energy),
+                consume_energy = VALUES(consume_energy),
+                home_load = VALUES(home_load),
+                self_consumption = VALUES(self_consumption),
+                battery_charge = VALUES(battery_charge),
+                battery_discharge = VALUES(battery_discharge),
+                counter_reset = VALUES(counter_reset),
+                gap = VALUES(gap);"""
+
+
+def insert_tb_inverter_latest_state() -> str:
+    """Upsert the latest state of an inverter into tb_inverter_latest_state.
+
+    A reading older than the stored one (replays, backfills) leaves the row
+    untouched; uploadTime is assigned last because MySQL evaluates the
+    assignments in order.
+
+    Returns:
+        str: The query to insert the data.
+    """
+    return """INSERT INTO solaxcloud.tb_inverter_latest_state (
+                inverter_id, uploadTime, acpower, yieldtoday, yieldtotal, feedinpower,
+                feedinenergy, consumeenergy, peps1, peps2, peps3, powerdc1, powerdc2,
+                powerdc3, powerdc4, batPower, soc, batStatus, inverterStatus
+            ) VALUES (
+                %(inverter_id)s, %(uploadTime)s, %(acpower)s, %(yieldtoday)s,
+                %(yieldtotal)s, %(feedinpower)s, %(feedinenergy)s, %(consumeenergy)s,
+                %(peps1)s, %(peps2)s, %(peps3)s, %(powerdc1)s, %(powerdc2)s,
+                %(powerdc3)s, %(powerdc4)s, %(batPower)s, %(soc)s, %(batStatus)s,
+                %(inverterStatus)s
+            ) ON DUPLICATE KEY UPDATE
+                acpower = CASE WHEN VALUES(uploadTime) >= uploadTime
+                    THEN VALUES(acpower) ELSE acpower END,
+                yieldtoday = CASE WHEN VALUES(uploadTime) >= uploadTime
+                    THEN VALUES(yieldtoday) ELSE yieldtoday END,
+                yieldtotal = CASE WHEN VALUES(uploadTime) >= uploadTime
+                    THEN VALUES(yieldtotal) ELSE yieldtotal END,
+                feedinpower = CASE WHEN VALUES(uploadTime) >= uploadTime
+                    THEN VALUES(feedinpower) ELSE feedinpower END,
+                feedinenergy = CASE WHEN VALUES(uploadTime) >= uploadTime
+                    THEN VALUES(feedinenergy) ELSE feedinenergy END,
+                consumeenergy = CASE WHEN VALUES(uploadTime) >= uploadTime
+                    THEN VALUES(consumeenergy) ELSE consumeenergy END,
+                peps1 = CASE WHEN VALUES(uploadTime) >= uploadTime
+                    THEN VALUES(peps1) ELSE peps1 END,
+                peps2 = CASE WHEN VALUES(uploadTime) >= uploadTime
+                    THEN VALUES(peps2) ELSE peps2 END,
+                peps3 = CASE WHEN VALUES(uploadTime) >= uploadTime
+                    THEN VALUES(peps3) ELSE peps3 END,
+                powerdc1 = CASE WHEN VALUES(uploadTime) >= uploadTime
+                    THEN VALUES(powerdc1) ELSE powerdc1 END,
+                powerdc2 = CASE WHEN VALUES(uploadTime) >= uploadTime
+                    THEN VALUES(powerdc2) ELSE powerdc2 END,
+                powerdc3 = CASE WHEN VALUES(uploadTime) >= uploadTime
+                    THEN VALUES(powerdc3) ELSE powerdc3 END,
+                powerdc4 = CASE WHEN VALUES(uploadTime) >= uploadTime
+                    THEN VALUES(powerdc4) ELSE powerdc4 END,
+                batPower = CASE WHEN VALUES(uploadTime) >= uploadTime
+                    THEN VALUES(batPower) ELSE batPower END,
+                soc = CASE WHEN VALUES(uploadTime) >= uploadTime
+                    THEN VALUES(soc) ELSE soc END,
+                batStatus = CASE WHEN VALUES(uploadTime) >= uploadTime
+                    THEN VALUES(batStatus) ELSE batStatus END,
+                inverterStatus = CASE WHEN VALUES(uploadTime) >= uploadTime
+                    THEN VALUES(inverterStatus) ELSE inverterStatus END,
+                uploadTime = CASE WHEN VALUES(uploadTime) >= uploadTime
+                    THEN VALUES(uploadTime) ELSE uploadTime END;"""
+
+
+def upsert_tb_worker_heartbeat() -> str:
+    """Upsert the heartbeat of a worker into tb_worker_heartbeat.
+
+    The worker tables coordinate the workers sharing a database; their queries
+    are not ``insert_*`` ones, so ``sync`` doesn't send them upstream.
+
+    Returns:
+        str: The query to insert the data.
+    """
+    return """INSERT INTO solaxcloud.tb_worker_heartbeat (
+                worker_id, hostname, started_at, heartbeat_at, status
+            ) VALUES (
+                %(worker_id)s, %(hostname)s, %(started_at)s, %(heartbeat_at)s,
+                %(status)s
+            ) ON DUPLICATE KEY UPDATE
+                hostname = VALUES(hostname),
+                started_at = VALUES(started_at),
+                heartbeat_at = VALUES(heartbeat_at),
+                status = VALUES(status);"""
+
+
+def upsert_tb_worker_lease() -> str:
+    """Claim a lease of tb_worker_lease for a polling slot.
+
+    The first worker that claims a key for a slot keeps it: a claim for a later
+    slot takes the row over, a claim for the same slot leaves it untouched.
+    worker_id is assigned before slot because MySQL evaluates the assignments
+    in order.
+
+    Returns:
+        str: The query to insert the data.
+    """
+    return """INSERT INTO solaxcloud.tb_worker_lease (lease_key, worker_id, slot)
+            VALUES (%(lease_key)s, %(worker_id)s, %(slot)s)
+            ON DUPLICATE KEY UPDATE
+                worker_id = CASE WHEN VALUES(slot) > slot
+                    THEN VALUES(worker_id) ELSE worker_id END,
+                slot = CASE WHEN VALUES(slot) > slot THEN VALUES(slot) ELSE slot END;"""
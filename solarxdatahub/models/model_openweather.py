@@ -1,9 +1,11 @@
 """File containing the OpenWeatherMap API model."""
 
 # models_openweather.py
-from typing import List, Optional
+from typing import List, Literal, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, ValidationError
+
+from solarxdatahub.utils.json_utils import loads
 
 
 # Modelos comunes
@@ -168,6 +170,27 @@ class OpenWeatherCurrentResponse(BaseModel):
                 code=cod,
             )
 
+    @classmethod
+    def from_json(cls, raw: bytes | str) -> "OpenWeatherCurrentResponse":
+        """Crea una instancia validando directamente el cuerpo de la respuesta HTTP.
+
+        El cuerpo se decodifica y valida en una sola pasada, sin dict intermedio.
+        Las respuestas de error se procesan con from_api.
+
+        Args:
+            raw (bytes | str): Cuerpo de la respuesta HTTP.
+
+        Returns:
+            OpenWeatherCurrentResponse: Modelo para la respuesta del clima actual de OpenWeatherMap.
+        """
+        try:
+            result = OpenWeatherCurrentResult.model_validate_json(raw)
+        except ValidationError:
+            result = None
+        if result is None or result.cod != 200:
+            return cls.from_api(loads(raw))
+        return cls(success=True, result=result, code=result.cod)
+
 
 # Modelos para el pronóstico (Forecast 5 Day / 3 Hour)
 class ForecastCity(BaseModel):
@@ -198,6 +221,7 @@ class ForecastItem(BaseModel):
     clouds: Clouds
     wind: Wind
     visibility: Optional[int] = Field(None, description="Visibilidad (m)")
+    rain: Optional[Rain] = None
     pop: float = Field(..., description="Probabilidad de precipitación")
     sys: dict = Field(..., description="Información adicional (por ejemplo, 'pod')")
     dt_txt: str = Field(
@@ -205,6 +229,14 @@ class ForecastItem(BaseModel):
     )
 
 
+class _ForecastPayload(BaseModel):
+    """Cuerpo de una respuesta correcta del pronóstico."""
+
+    cod: Literal["200"]
+    items: List[ForecastItem] = Field(..., alias="list")
+    city: ForecastCity
+
+
 class OpenWeatherForecastResponse(BaseModel):
     """Modelo para la respuesta del pronóstico de OpenWeatherMap.
 
@@ -217,7 +249,7 @@ class OpenWeatherForecastResponse(BaseModel):
 
     success: bool = Field(..., description="True si la respuesta es exitosa")
     result: List[ForecastItem] = Field(..., description="Lista de predicciones")
-    city: ForecastCity = Field(..., description="Información de la ciudad")
+    city: Optional[ForecastCity] = Field(None, description="Información de la ciudad")
     exception: str = Field("", description="Mensaje de error")
     code: int = Field(0, description="Código de respuesta HTTP")
 
@@ -245,6 +277,26 @@ class OpenWeatherForecastResponse(BaseModel):
                 code=int(data.get("cod", 0)),
             )
 
+    @classmethod
+    def from_json(cls, raw: bytes | str) -> "OpenWeatherForecastResponse":
+        """Crea una instancia validando directamente el cuerpo de la respuesta HTTP.
+
+        Es la respuesta más grande (40 predicciones): decodificarla a un dict y
+        volver a recorrerlo para validarlo duplicaba el trabajo. Las respuestas
+        de error se procesan con from_api.
+
+        Args:
+            raw (bytes | str): Cuerpo de la respuesta HTTP.
+
+        Returns:
+            OpenWeatherForecastResponse: Modelo para la respuesta del pronóstico de OpenWeatherMap.
+        """
+        try:
+            payload = _ForecastPayload.model_validate_json(raw)
+        except ValidationError:
+            return cls.from_api(loads(raw))
+        return cls(success=True, result=payload.items, city=payload.city, code=200)
+
 
 # Modelos para la contaminación del aire
 class AirPollutionMain(BaseModel):
@@ -286,6 +338,12 @@ class AirPollutionItem(BaseModel):
     components: AirPollutionComponents
 
 
+class _AirPollutionPayload(BaseModel):
+    """Cuerpo de una respuesta correcta de contaminación del aire."""
+
+    items: List[AirPollutionItem] = Field(..., alias="list", min_length=1)
+
+
 class OpenWeatherAirPollutionResponse(BaseModel):
     """Modelo para la respuesta de contaminación del aire de OpenWeatherMap.
 
@@ -327,3 +385,22 @@ class OpenWeatherAirPollutionResponse(BaseModel):
                 exception="Error en la respuesta",
                 code=data.get("cod", 0),
             )
+
+    @classmethod
+    def from_json(cls, raw: bytes | str) -> "OpenWeatherAirPollutionResponse":
+        """Crea una instancia validando directamente el cuerpo de la respuesta HTTP.
+
+        Las respuestas de error se procesan con from_api.
+
+        Args:
+            raw (bytes | str): Cuerpo de la respuesta HTTP.
+
+        Returns:
+            OpenWeatherAirPollutionResponse: Modelo para la respuesta de contaminación
+            del aire de OpenWeatherMap.
+        """
+        try:
+            payload = _AirPollutionPayload.model_validate_json(raw)
+        except ValidationError:
+            return cls.from_api(loads(raw))
+        return cls(success=True, result=payload.items, code=200)
@@ -2,7 +2,9 @@
 
 from typing import Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ValidationError
+
+from solarxdatahub.utils.json_utils import loads
 
 
 class SolaxCloudResult(BaseModel):
@@ -48,3 +50,22 @@ class SolaxCloudResponse(BaseModel):
     exception: str
     result: Optional[SolaxCloudResult] = None
     code: int
+
+    @classmethod
+    def from_json(cls, raw: bytes | str) -> "SolaxCloudResponse":
+        """Validate the response straight from the body of the HTTP response.
+
+        The body is parsed and validated in a single pass by pydantic, without
+        building an intermediate ``dict``.
+
+        Args:
+            raw (bytes | str): Body of the HTTP response.
+
+        Returns:
+            SolaxCloudResponse: The validated response.
+        """
+        try:
+            return cls.model_validate_json(raw)
+        except ValidationError:
+            # Mismo resultado (y mismos errores) que validar el dict decodificado
+            return cls(**loads(raw))
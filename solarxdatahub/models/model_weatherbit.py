@@ -2,7 +2,9 @@
 
 from typing import Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, ValidationError
+
+from solarxdatahub.utils.json_utils import loads
 
 
 class WeatherDescription(BaseModel):
@@ -70,6 +72,12 @@ class WeatherDataResult(BaseModel):
     snow: float = Field(..., description="Cantidad de nieve")
 
 
+class _WeatherbitPayload(BaseModel):
+    """Cuerpo de una respuesta correcta de Weatherbit (al menos un registro)."""
+
+    data: list[WeatherDataResult] = Field(..., min_length=1)
+
+
 class WeatherbitResponse(BaseModel):
     """
     Modelo adaptado para la respuesta de Weatherbit con una estructura similar a SolaxCloudResponse.
@@ -99,3 +107,22 @@ class WeatherbitResponse(BaseModel):
             return cls(
                 success=False, exception="No se recibieron datos", result=None, code=1
             )
+
+    @classmethod
+    def from_json(cls, raw: bytes | str) -> "WeatherbitResponse":
+        """
+        Crea una instancia de WeatherbitResponse validando directamente el cuerpo
+        de la respuesta HTTP, sin construir un dict intermedio.
+        Las respuestas de error se procesan con from_api.
+
+        Args:
+            raw (bytes | str): Cuerpo de la respuesta HTTP.
+
+        Returns:
+            WeatherbitResponse: Modelo para la respuesta de Weatherbit.
+        """
+        try:
+            payload = _WeatherbitPayload.model_validate_json(raw)
+        except ValidationError:
+            return cls.from_api(loads(raw))
+        return cls(success=True, exception="", result=payload.data[0], code=0)
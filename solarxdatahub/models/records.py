@@ -0,0 +1,138 @@
+"""Compact in-memory representation of the SolaxCloud readings.
+
+A validated ``SolaxCloudResult`` plus the per-table dicts built from it cost a
+few KB per reading. Readings kept in memory use instead ``ReadingRecord``, a
+slotted dataclass with the values of the three tables (tb_energy_data,
+tb_phase_power_data and tb_battery_data), built once per reading, which
+produces the rows of every table.
+"""
+
+from dataclasses import dataclass
+
+from solarxdatahub.models.model_solaxcloud import SolaxCloudResult
+
+ENERGY_FIELDS = (
+    "acpower",
+    "yieldtoday",
+    "yieldtotal",
+    "feedinpower",
+    "feedinenergy",
+    "consumeenergy",
+)
+PHASE_POWER_FIELDS = (
+    "peps1",
+    "peps2",
+    "peps3",
+    "powerdc1",
+    "powerdc2",
+    "powerdc3",
+    "powerdc4",
+)
+BATTERY_FIELDS = ("batPower", "soc")
+FLOAT_FIELDS = ENERGY_FIELDS + PHASE_POWER_FIELDS + BATTERY_FIELDS
+
+UPLOAD_TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+@dataclass(slots=True, frozen=True)
+class ReadingRecord:
+    """One SolaxCloud reading with the columns of the three reading tables.
+
+    Args:
+        inverter_id (int): The inverter ID in master_tb_inverters.
+        fecha (str): Date of the reading (YYYY-MM-DD).
+        periodo (str): Hour of the reading (HH).
+        minute (str): Minute of the reading (MM).
+        uploadTime (str): Upload time reported by the API (YYYY-MM-DD HH:MM:SS).
+    """
+
+    inverter_id: int
+    fecha: str
+    periodo: str
+    minute: str
+    uploadTime: str
+    acpower: float
+    yieldtoday: float
+    yieldtotal: float
+    feedinpower: float
+    feedinenergy: float
+    consumeenergy: float
+    peps1: float | None = None
+    peps2: float | None = None
+    peps3: float | None = None
+    powerdc1: float | None = None
+    powerdc2: float | None = None
+    powerdc3: float | None = None
+    powerdc4: float | None = None
+    batPower: float | None = None
+    soc: float | None = None
+    batStatus: str | None = None
+    inverterStatus: str | None = None
+
+    @classmethod
+    def from_result(
+        cls, result: SolaxCloudResult, inverter_id: int, common_columns: dict
+    ) -> "ReadingRecord":
+        """Build the record of a validated reading.
+
+        Args:
+            result (SolaxCloudResult): The validated reading.
+            inverter_id (int): The inverter ID.
+            common_columns (dict): fecha, periodo and minute of the reading.
+
+        Returns:
+            ReadingRecord: The compact record.
+        """
+        values = {name: getattr(result, name) for name in FLOAT_FIELDS}
+        return cls(
+            inverter_id=inverter_id,
+            fecha=common_columns["fecha"],
+            periodo=common_columns["periodo"],
+            minute=common_columns["minute"],
+            uploadTime=result.uploadTime,
+            batStatus=result.batStatus,
+            inverterStatus=result.inverterStatus,
+            **values,
+        )
+
+    def _key_columns(self) -> dict:
+        return {
+            "fecha": self.fecha,
+            "periodo": self.periodo,
+            "min": self.minute,
+            "inverter_id": self.inverter_id,
+        }
+
+    def energy_row(self) -> dict:
+        """Row of tb_energy_data."""
+        row = self._key_columns()
+        for name in ENERGY_FIELDS:
+            row[name] = getattr(self, name)
+        row["uploadTime"] = self.uploadTime
+        return row
+
+    def phase_power_row(self) -> dict:
+        """Row of tb_phase_power_data."""
+        row = self._key_columns()
+        for name in PHASE_POWER_FIELDS:
+            row[name] = getattr(self, name)
+        row["uploadTime"] = self.uploadTime
+        return row
+
+    def battery_row(self) -> dict:
+        """Row of tb_battery_data."""
+        row = self._key_columns()
+        row["batPower"] = self.batPower
+        row["soc"] = self.soc
+        row["batStatus"] = self.batStatus
+        row["uploadTime"] = self.uploadTime
+        return row
+
+    def latest_state_row(self) -> dict:
+        """Row of tb_inverter_latest_state (every value of the reading)."""
+        row = {"inverter_id": self.inverter_id, "uploadTime": self.uploadTime}
+        for name in FLOAT_FIELDS:
+            row[name] = getattr(self, name)
+        row["batStatus"] = self.batStatus
+        row["inverterStatus"] = self.inverterStatus
+        return row
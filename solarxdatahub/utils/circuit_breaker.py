@@ -0,0 +1,238 @@
+"""Circuit breakers for the calls to the external APIs.
+
+When a provider is down every request waits the whole timeout. A breaker per
+endpoint tracks the outcome of the last calls and, when too many of them
+fail, opens: the following calls are rejected at once with
+``CircuitOpenError`` instead of waiting. After a cool-down one probe call is
+let through (half-open); it closes the circuit if it succeeds and opens it
+again otherwise.
+
+Only the failures that point at the provider count: timeouts, connection
+errors and 5xx / 429 answers. The state is persisted with ``StateStore`` so
+the breakers also work when the data hub runs as a one-shot job.
+"""
+
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+
+import requests
+from loguru import logger
+
+from solarxdatahub.config import CircuitBreakers
+from solarxdatahub.utils.metrics import API_CIRCUIT_REJECTIONS, API_CIRCUIT_STATE
+from solarxdatahub.utils.state import StateStore
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+# Valor exportado en la métrica de estado
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """The call was rejected because the circuit of the endpoint is open."""
+
+
+def is_provider_failure(error: BaseException) -> bool:
+    """Whether an error means the provider is unavailable.
+
+    Args:
+        error (BaseException): The error raised by the call.
+
+    Returns:
+        bool: True for timeouts, connection errors and 5xx / 429 answers.
+    """
+    if isinstance(error, requests.exceptions.HTTPError):
+        status = error.response.status_code if error.response is not None else 0
+        return status >= 500 or status == 429
+    return isinstance(
+        error, (requests.exceptions.Timeout, requests.exceptions.ConnectionError)
+    )
+
+
+class _Guard:
+    """Context manager returned by ``CircuitBreaker.guard``."""
+
+    __slots__ = ("breaker",)
+
+    def __init__(self, breaker: "CircuitBreaker"):
+        self.breaker = breaker
+
+    def __enter__(self):
+        self.breaker.before_call()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc is not None and is_provider_failure(exc):
+            self.breaker.record_failure()
+        else:
+            # Otros errores (4xx, parseo) no indican que el proveedor esté caído
+            self.breaker.record_success()
+        return False
+
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker of an endpoint.
+
+    Args:
+        name (str): The endpoint (``provider.endpoint``).
+        window (int | None, optional): Calls considered. Defaults to
+            CIRCUIT_WINDOW.
+        min_calls (int | None, optional): Calls needed before opening.
+            Defaults to CIRCUIT_MIN_CALLS.
+        failure_rate (float | None, optional): Failed proportion of the
+            window that opens the circuit. Defaults to CIRCUIT_FAILURE_RATE.
+        cooldown (float | None, optional): Seconds open before a probe call.
+            Defaults to CIRCUIT_COOLDOWN_SECONDS.
+        store (StateStore | None, optional): Where the state is persisted.
+            Defaults to None (memory only).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        window: int | None = None,
+        min_calls: int | None = None,
+        failure_rate: float | None = None,
+        cooldown: float | None = None,
+        store: StateStore | None = None,
+    ):
+        self.name = name
+        self.min_calls = int(min_calls or CircuitBreakers.CIRCUIT_MIN_CALLS)
+        self.failure_rate = float(failure_rate or CircuitBreakers.CIRCUIT_FAILURE_RATE)
+        self.cooldown = float(
+            CircuitBreakers.CIRCUIT_COOLDOWN_SECONDS if cooldown is None else cooldown
+        )
+        self.store = store
+        self._lock = threading.Lock()
+        # True = fallo
+        self._outcomes: deque[bool] = deque(
+            maxlen=int(window or CircuitBreakers.CIRCUIT_WINDOW)
+        )
+        self._state = CLOSED
+        self._opened_at = 0.0
+        if store is not None:
+            self._load(store.load().get(name, {}))
+        API_CIRCUIT_STATE.set(STATE_VALUES[self._state], endpoint=name)
+
+    def _load(self, state: dict) -> None:
+        self._outcomes.extend(state.get("outcomes", []))
+        self._state = state.get("state", CLOSED)
+        self._opened_at = state.get("opened_at", 0.0)
+        if self._state == HALF_OPEN:
+            # La llamada de prueba no terminó (el proceso se cerró): se repite
+            self._state = OPEN
+
+    def _save(self) -> None:
+        if self.store is None:
+            return
+        with _STORE_LOCK:
+            document = self.store.load()
+            document[self.name] = {
+                "state": self._state,
+                "opened_at": self._opened_at,
+                "outcomes": list(self._outcomes),
+            }
+            self.store.save(document)
+
+    @property
+    def state(self) -> str:
+        """Current state (``closed``, ``open`` or ``half_open``)."""
+        return self._state
+
+    def _set_state(self, state: str) -> None:
+        if state == self._state:
+            return
+        logger.log(
+            "WARNING" if state == OPEN else "INFO",
+            "Circuit of {} {} (was {})",
+            self.name,
+            state,
+            self._state,
+        )
+        self._state = state
+        API_CIRCUIT_STATE.set(STATE_VALUES[state], endpoint=self.name)
+
+    def before_call(self) -> None:
+        """Let a call through or reject it.
+
+        Raises:
+            CircuitOpenError: The circuit is open (or a probe call is running).
+        """
+        with self._lock:
+            if self._state == CLOSED:
+                return
+            remaining = self._opened_at + self.cooldown - time.time()
+            if self._state == OPEN and remaining <= 0:
+                self._set_state(HALF_OPEN)
+                return
+            API_CIRCUIT_REJECTIONS.inc(endpoint=self.name)
+            raise CircuitOpenError(
+                f"Circuit of {self.name} is open, next attempt in "
+                f"{max(remaining, 0):.0f} s"
+            )
+
+    def record_success(self) -> None:
+        """Record a call answered by the provider."""
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._outcomes.clear()
+                self._set_state(CLOSED)
+            self._outcomes.append(False)
+            self._save()
+
+    def record_failure(self) -> None:
+        """Record a call that failed because of the provider."""
+        with self._lock:
+            self._outcomes.append(True)
+            failures = sum(self._outcomes)
+            if self._state == HALF_OPEN or (
+                len(self._outcomes) >= self.min_calls
+                and failures / len(self._outcomes) >= self.failure_rate
+            ):
+                self._opened_at = time.time()
+                self._set_state(OPEN)
+            self._save()
+
+    def guard(self) -> _Guard:
+        """Context manager wrapping one call to the endpoint.
+
+        Raises ``CircuitOpenError`` on enter when the call is rejected and
+        records the outcome of the block on exit.
+        """
+        return _Guard(self)
+
+
+def guard(breaker: CircuitBreaker | None):
+    """``breaker.guard()``, or a no-op context manager without breaker."""
+    return breaker.guard() if breaker is not None else nullcontext()
+
+
+_STORE_LOCK = threading.Lock()
+_breakers: dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(provider: str, endpoint: str) -> CircuitBreaker | None:
+    """Return the process wide breaker of an endpoint.
+
+    Args:
+        provider (str): The API (solaxcloud, openweather, weatherbit).
+        endpoint (str): The endpoint of the API.
+
+    Returns:
+        CircuitBreaker | None: The breaker, or None when CIRCUIT_BREAKER_ENABLED
+            is not "true".
+    """
+    if CircuitBreakers.CIRCUIT_BREAKER_ENABLED.lower() != "true":
+        return None
+    name = f"{provider}.{endpoint}"
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = _breakers[name] = CircuitBreaker(
+                name, store=StateStore("circuit_breakers")
+            )
+        return breaker
@@ -0,0 +1,250 @@
+"""Disk-backed cache for the HTTP responses of the weather providers."""
+
+import hashlib
+import json
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import requests
+from loguru import logger
+
+from solarxdatahub.config import HttpCache
+from solarxdatahub.utils.circuit_breaker import CircuitBreaker, guard
+from solarxdatahub.utils.json_utils import loads
+
+
+@dataclass
+class CachedResponse:
+    """Minimal response object returned by the cache.
+
+    It exposes the subset of ``requests.Response`` used by the API clients.
+    """
+
+    status_code: int
+    content: bytes
+    headers: dict = field(default_factory=dict)
+    from_cache: bool = False
+
+    def json(self):
+        """Decode the body as JSON, raising like ``requests.Response.json``."""
+        return loads(self.content)
+
+    def raise_for_status(self) -> None:
+        """Only successful responses are returned, nothing to raise."""
+
+
+class ResponseCache:
+    """Cache of GET responses keyed by endpoint and params.
+
+    Each entry is stored as two files (``<key>.body`` and ``<key>.meta``) under
+    the cache directory. An entry is served without network access while it is
+    fresh; once stale it is revalidated with ``If-None-Match`` /
+    ``If-Modified-Since`` when the provider sent an ETag or Last-Modified
+    header. The least recently used entries are evicted when the directory
+    grows beyond ``max_bytes``.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int, enabled: bool = True):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        if self.enabled:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def key(url: str, params: dict | None) -> str:
+        """Build the cache key of a request.
+
+        Args:
+            url (str): The endpoint.
+            params (dict | None): The query parameters.
+
+        Returns:
+            str: A hex digest (the API keys never reach the disk in clear).
+        """
+        canonical = json.dumps(
+            [url, sorted((params or {}).items())], default=str, separators=(",", ":")
+        )
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def get(
+        self,
+        url: str,
+        params: dict | None,
+        ttl: int,
+        timeout: int = 10,
+        breaker: CircuitBreaker | None = None,
+    ) -> CachedResponse:
+        """GET ``url`` through the cache.
+
+        Args:
+            url (str): The endpoint.
+            params (dict | None): The query parameters.
+            ttl (int): Freshness in seconds when the provider does not send
+                a Cache-Control max-age.
+            timeout (int, optional): Request timeout. Defaults to 10.
+            breaker (CircuitBreaker | None, optional): Circuit breaker of the
+                endpoint, checked only when the request has to reach the
+                provider. Defaults to None.
+
+        Raises:
+            requests.exceptions.RequestException: Network or HTTP errors
+                (``CircuitOpenError`` when the breaker rejects the request).
+
+        Returns:
+            CachedResponse: The response, with ``from_cache`` set when no
+            request reached the provider.
+        """
+        if not self.enabled:
+            with guard(breaker):
+                response = requests.get(url, params=params, timeout=timeout)
+                response.raise_for_status()
+            return CachedResponse(
+                response.status_code, response.content, dict(response.headers)
+            )
+
+        key = self.key(url, params)
+        meta = self._load_meta(key)
+        now = time.time()
+        if meta is not None and now < meta["expires_at"]:
+            body = self._load_body(key)
+            if body is not None:
+                self._touch(key)
+                logger.debug("HTTP cache hit for {}", url)
+                return CachedResponse(
+                    meta["status_code"], body, meta["headers"], from_cache=True
+                )
+
+        with guard(breaker):
+            return self._fetch(key, meta, url, params, ttl, timeout, now)
+
+    def _fetch(
+        self,
+        key: str,
+        meta: dict | None,
+        url: str,
+        params: dict | None,
+        ttl: int,
+        timeout: int,
+        now: float,
+    ) -> CachedResponse:
+        """Request ``url`` (revalidating ``meta`` if present) and store it."""
+        headers = {}
+        if meta is not None:
+            if meta["headers"].get("ETag"):
+                headers["If-None-Match"] = meta["headers"]["ETag"]
+            if meta["headers"].get("Last-Modified"):
+                headers["If-Modified-Since"] = meta["headers"]["Last-Modified"]
+
+        response = requests.get(url, params=params, headers=headers, timeout=timeout)
+        if response.status_code == 304 and meta is not None:
+            body = self._load_body(key)
+            if body is not None:
+                meta["expires_at"] = now + self._freshness(response.headers, ttl)
+                try:
+                    self._write(key + ".meta", json.dumps(meta).encode("utf-8"))
+                except OSError as e:
+                    logger.warning(
+                        "Could not refresh the HTTP cache entry of {}: {}", url, e
+                    )
+                logger.debug("HTTP cache revalidated for {}", url)
+                return CachedResponse(meta["status_code"], body, meta["headers"])
+            # El cuerpo desapareció: se repite la petición sin condiciones
+            response = requests.get(url, params=params, timeout=timeout)
+        response.raise_for_status()
+
+        stored_headers = {
+            name: response.headers[name]
+            for name in ("ETag", "Last-Modified", "Cache-Control")
+            if name in response.headers
+        }
+        if "no-store" not in response.headers.get("Cache-Control", ""):
+            self._store(
+                key,
+                response.content,
+                {
+                    "url": url,
+                    "status_code": response.status_code,
+                    "headers": stored_headers,
+                    "expires_at": now + self._freshness(response.headers, ttl),
+                },
+            )
+        return CachedResponse(response.status_code, response.content, stored_headers)
+
+    @staticmethod
+    def _freshness(headers, default_ttl: int) -> int:
+        """Seconds an entry stays fresh, honouring Cache-Control when present."""
+        cache_control = headers.get("Cache-Control", "")
+        if "no-cache" in cache_control:
+            return 0
+        match = re.search(r"max-age=(\d+)", cache_control)
+        return int(match.group(1)) if match else default_ttl
+
+    def _path(self, name: str) -> Path:
+        return self.cache_dir / name
+
+    def _load_meta(self, key: str) -> dict | None:
+        try:
+            return json.loads(self._path(key + ".meta").read_bytes())
+        except (OSError, ValueError):
+            return None
+
+    def _load_body(self, key: str) -> bytes | None:
+        try:
+            return self._path(key + ".body").read_bytes()
+        except OSError:
+            return None
+
+    def _touch(self, key: str) -> None:
+        try:
+            os.utime(self._path(key + ".body"))
+        except OSError:
+            pass
+
+    def _write(self, name: str, data: bytes) -> None:
+        """Write a file atomically so a crash never leaves half an entry."""
+        tmp = self._path(name + ".tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, self._path(name))
+
+    def _store(self, key: str, body: bytes, meta: dict) -> None:
+        try:
+            self._write(key + ".body", body)
+            self._write(key + ".meta", json.dumps(meta).encode("utf-8"))
+            self._evict()
+        except OSError as e:
+            logger.warning("Could not store the HTTP response in the cache: {}", e)
+
+    def _evict(self) -> None:
+        """Remove the least recently used entries beyond ``max_bytes``."""
+        bodies = []
+        total = 0
+        for path in self.cache_dir.glob("*.body"):
+            stat = path.stat()
+            bodies.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+        for _, size, path in sorted(bodies):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            path.with_suffix(".meta").unlink(missing_ok=True)
+            total -= size
+            logger.debug("HTTP cache entry evicted: {}", path.stem)
+
+
+_response_cache: ResponseCache | None = None
+
+
+def get_response_cache() -> ResponseCache:
+    """Return the process wide response cache configured from the environment."""
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = ResponseCache(
+            cache_dir=HttpCache.HTTP_CACHE_DIR,
+            max_bytes=int(HttpCache.HTTP_CACHE_MAX_MB) * 1024 * 1024,
+            enabled=HttpCache.HTTP_CACHE_ENABLED.lower() == "true",
+        )
+    return _response_cache
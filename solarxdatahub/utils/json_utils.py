@@ -0,0 +1,40 @@
+"""JSON decoding helpers.
+
+``orjson`` is used when it is installed (it is an optional dependency), the
+standard library otherwise. The API models validate response bodies straight
+from bytes with pydantic (``model_validate_json``); these helpers cover the
+remaining paths that need a plain ``dict``.
+"""
+
+import json
+
+import requests
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depende del entorno
+    orjson = None
+
+
+def loads(data: bytes | str):
+    """Decode a JSON document.
+
+    Args:
+        data (bytes | str): The JSON document.
+
+    Raises:
+        requests.exceptions.JSONDecodeError: If the document is not valid JSON,
+            like ``requests.Response.json``.
+
+    Returns:
+        The decoded document.
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError as e:
+            raise requests.exceptions.JSONDecodeError(e.msg, e.doc, e.pos) from e
+    try:
+        return json.loads(data)
+    except json.JSONDecodeError as e:
+        raise requests.exceptions.JSONDecodeError(e.msg, e.doc, e.pos) from e
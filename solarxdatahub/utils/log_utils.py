@@ -0,0 +1,183 @@
+"""Helpers to keep logging off the hot path of the pipeline."""
+
+import logging
+import logging.handlers
+import sys
+import threading
+from collections import deque
+from itertools import islice
+
+import pandas as pd
+from loguru import logger
+
+
+class PayloadPreview:
+    """Size-capped, lazily rendered view of a query or data payload.
+
+    Nothing is rendered until the log record is formatted, so passing a
+    preview to a disabled log level costs only the object creation. When the
+    level is enabled, at most ``limit`` characters are rendered (large
+    payloads are summarized instead of being converted to text whole).
+    A ``limit`` of 0 renders the whole payload.
+    """
+
+    __slots__ = ("payload", "limit")
+
+    def __init__(self, payload, limit: int = 500):
+        self.payload = payload
+        self.limit = limit
+
+    def __str__(self) -> str:
+        payload = self.payload
+        if self.limit <= 0:
+            return str(payload)
+        if isinstance(payload, pd.DataFrame):
+            rows = len(payload)
+            sample = payload.head(2).to_dict(orient="records")
+        elif isinstance(payload, (list, tuple)):
+            rows = len(payload)
+            sample = list(islice(payload, 2))
+        else:
+            return self._cap(" ".join(str(payload).split()))
+        if rows <= 2:
+            return self._cap(repr(sample))
+        return self._cap(f"{rows} rows, first: {sample!r}")
+
+    __repr__ = __str__
+
+    def _cap(self, text: str) -> str:
+        if len(text) <= self.limit:
+            return text
+        return f"{text[: self.limit]}... ({len(text) - self.limit} more chars)"
+
+
+class InterceptHandler(logging.Handler):
+    """Forward standard library log records to loguru.
+
+    Modules using ``logging`` (e.g. mysql_database) then share the loguru
+    sinks, including their background queue.
+    """
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            level = logger.level(record.levelname).name
+        except ValueError:
+            level = record.levelno
+
+        # Saltar los frames del módulo logging para apuntar al llamador real
+        frame, depth = logging.currentframe(), 2
+        while frame is not None and frame.f_code.co_filename == logging.__file__:
+            frame = frame.f_back
+            depth += 1
+
+        logger.opt(depth=depth, exception=record.exc_info).log(
+            level, "{}", record.getMessage()
+        )
+
+
+class QueuedSink:
+    """File-like loguru sink whose writes happen in a background thread.
+
+    loguru formats the message in the calling thread and hands it over with a
+    ``deque.append`` (atomic, no lock); the writer thread drains the pending
+    messages in batches and does the write to the terminal or file (and the
+    file rotation). Unlike ``enqueue=True`` the message is not pickled through
+    a multiprocessing queue, which costs more than the write itself. When
+    ``maxsize`` messages are pending new ones are dropped and counted rather
+    than blocking the pipeline.
+    """
+
+    def __init__(self, write, flush=None, close=None, maxsize: int = 10000):
+        self._write = write
+        self._flush = flush
+        self._close = close
+        self._maxsize = maxsize
+        self._pending: deque = deque()
+        self._wakeup = threading.Event()
+        self._idle = threading.Event()
+        self._idle.set()
+        self._stopping = False
+        self.dropped = 0
+        self._thread = threading.Thread(
+            target=self._run, name="log-writer", daemon=True
+        )
+        self._thread.start()
+
+    def write(self, message) -> None:
+        """Queue a formatted message (called by loguru)."""
+        if len(self._pending) >= self._maxsize:
+            self.dropped += 1
+            return
+        self._pending.append(str(message))
+        if not self._wakeup.is_set():
+            self._wakeup.set()
+
+    def wait(self) -> None:
+        """Block until every queued message has been written."""
+        while self._pending or not self._idle.is_set():
+            self._wakeup.set()
+            self._idle.wait(0.05)
+
+    def stop(self) -> None:
+        """Write the pending messages and stop the writer (called by loguru)."""
+        self._stopping = True
+        self._wakeup.set()
+        self._thread.join(timeout=10)
+        if self.dropped:
+            sys.stderr.write(f"{self.dropped} log messages dropped (queue full)\n")
+        if self._close is not None:
+            self._close()
+
+    def _run(self) -> None:
+        pending = self._pending
+        while True:
+            self._wakeup.wait()
+            self._idle.clear()
+            self._wakeup.clear()
+            batch = []
+            while pending:
+                batch.append(pending.popleft())
+            try:
+                if batch:
+                    self._write("".join(batch))
+                    if self._flush is not None:
+                        self._flush()
+            except Exception:  # pylint: disable=broad-except
+                # Un fallo de escritura no debe tumbar el hilo de logs
+                pass
+            finally:
+                self._idle.set()
+            if self._stopping and not pending:
+                return
+
+    @classmethod
+    def stream(cls, stream, maxsize: int = 10000) -> "QueuedSink":
+        """Queued sink writing to a stream such as ``sys.stdout``."""
+        return cls(stream.write, flush=stream.flush, maxsize=maxsize)
+
+    @classmethod
+    def daily_file(
+        cls, path: str, retention_days: int, maxsize: int = 10000
+    ) -> "QueuedSink":
+        """Queued sink writing to a file rotated at midnight.
+
+        Args:
+            path (str): The log file.
+            retention_days (int): Rotated files kept.
+            maxsize (int, optional): Messages queued before dropping.
+        """
+        handler = logging.handlers.TimedRotatingFileHandler(
+            path,
+            when="midnight",
+            backupCount=retention_days,
+            encoding="utf-8",
+            delay=True,
+        )
+        # El mensaje ya viene formateado por loguru (con su salto de línea)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        handler.terminator = ""
+
+        def write(text: str) -> None:
+            handler.emit(logging.makeLogRecord({"msg": text}))
+
+        return cls(write, flush=handler.flush, close=handler.close, maxsize=maxsize)
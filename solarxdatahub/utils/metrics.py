@@ -0,0 +1,433 @@
+"""Pipeline metrics exported in the Prometheus text exposition format.
+
+The metrics live in a process wide registry. They are exported by writing a
+textfile (for the node_exporter textfile collector) at the end of every cycle
+and, in daemon mode, by a local HTTP server answering ``GET /metrics``.
+"""
+
+import bisect
+import os
+import threading
+import time
+from contextlib import nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from loguru import logger
+
+from solarxdatahub.config import Metrics
+
+# Límites de los buckets en segundos (desde llamadas a la BD hasta ciclos enteros)
+DEFAULT_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+
+
+def _label_key(labels: dict) -> tuple:
+    # Los valores se convierten a texto al exportar, no en cada observación
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(key: tuple, extra: tuple = ()) -> str:
+    pairs = key + extra
+    if not pairs:
+        return ""
+    escaped = (
+        (
+            name,
+            str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"),
+        )
+        for name, value in pairs
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+class _Metric:
+    """Common state of every metric type."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str):
+        self.name = name
+        self.documentation = documentation
+        self._lock = threading.Lock()
+        self._values: dict[tuple, object] = {}
+
+    def render(self) -> list[str]:
+        """Lines of the metric in the text exposition format."""
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        with self._lock:
+            items = sorted(self._values.items(), key=lambda item: repr(item[0]))
+        for key, value in items:
+            lines.extend(self._render_series(key, value))
+        return lines
+
+    def _render_series(self, key: tuple, value) -> list[str]:
+        return [f"{self.name}{_format_labels(key)} {value}"]
+
+    def clear(self) -> None:
+        """Forget every series."""
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(_Metric):
+    """Monotonically increasing value."""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        """Increment the series identified by ``labels``."""
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        """Current value of a series."""
+        return self._values.get(_label_key(labels), 0.0)
+
+
+class Gauge(_Metric):
+    """Value that can go up and down."""
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        """Set the series identified by ``labels``."""
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def value(self, **labels) -> float | None:
+        """Current value of a series."""
+        return self._values.get(_label_key(labels))
+
+
+class Histogram(_Metric):
+    """Distribution of observations in cumulative buckets."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, buckets: tuple = DEFAULT_BUCKETS):
+        super().__init__(name, documentation)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        """Add an observation to the series identified by ``labels``."""
+        key = _label_key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                # [contadores por bucket (+Inf al final), suma, total]
+                series = [[0] * (len(self.buckets) + 1), 0.0, 0]
+                self._values[key] = series
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def _render_series(self, key: tuple, value) -> list[str]:
+        counts, total, count = value
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += bucket_count
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            lines.append(
+                f"{self.name}_bucket{_format_labels(key, (('le', le),))} {cumulative}"
+            )
+        lines.append(f"{self.name}_sum{_format_labels(key)} {total}")
+        lines.append(f"{self.name}_count{_format_labels(key)} {count}")
+        return lines
+
+    def count(self, **labels) -> int:
+        """Number of observations of a series."""
+        series = self._values.get(_label_key(labels))
+        return series[2] if series else 0
+
+    def totals(self) -> list[tuple[dict, int, float]]:
+        """Labels, number of observations and sum of every series."""
+        with self._lock:
+            return [
+                (dict(key), series[2], series[1])
+                for key, series in self._values.items()
+            ]
+
+
+class MetricsRegistry:
+    """Collection of the metrics exported by the process."""
+
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str) -> Counter:
+        """Create (or return the existing) counter."""
+        return self._register(Counter(name, documentation))
+
+    def gauge(self, name: str, documentation: str) -> Gauge:
+        """Create (or return the existing) gauge."""
+        return self._register(Gauge(name, documentation))
+
+    def histogram(
+        self, name: str, documentation: str, buckets: tuple = DEFAULT_BUCKETS
+    ) -> Histogram:
+        """Create (or return the existing) histogram."""
+        return self._register(Histogram(name, documentation, buckets))
+
+    def render(self) -> str:
+        """Every metric in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def clear(self) -> None:
+        """Forget the series of every metric (the metrics stay registered)."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            metric.clear()
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_DURATION = REGISTRY.histogram(
+    "solarxdatahub_stage_duration_seconds",
+    "Duration of each stage of the ingestion pipeline.",
+)
+CYCLE_DURATION = REGISTRY.histogram(
+    "solarxdatahub_cycle_duration_seconds", "Duration of a full ingestion cycle."
+)
+CYCLES = REGISTRY.counter("solarxdatahub_cycles_total", "Ingestion cycles by outcome.")
+API_REQUESTS = REGISTRY.counter(
+    "solarxdatahub_api_requests_total",
+    "Requests sent to the external APIs by provider, endpoint and HTTP status.",
+)
+API_CACHE_HITS = REGISTRY.counter(
+    "solarxdatahub_api_cache_hits_total",
+    "API responses served from the HTTP cache without using quota.",
+)
+API_QUOTA_USED = REGISTRY.gauge(
+    "solarxdatahub_api_quota_used", "Requests counted today against the daily quota."
+)
+API_QUOTA_LIMIT = REGISTRY.gauge(
+    "solarxdatahub_api_quota_limit", "Daily request quota of each provider."
+)
+API_CIRCUIT_STATE = REGISTRY.gauge(
+    "solarxdatahub_api_circuit_state",
+    "Circuit breaker of each endpoint (0 closed, 1 half-open, 2 open).",
+)
+API_CIRCUIT_REJECTIONS = REGISTRY.counter(
+    "solarxdatahub_api_circuit_rejections_total",
+    "Calls skipped because the circuit of the endpoint was open.",
+)
+API_LEASE_SKIPPED = REGISTRY.counter(
+    "solarxdatahub_api_lease_skipped_total",
+    "Provider calls skipped because another process leased the interval.",
+)
+READINGS = REGISTRY.counter(
+    "solarxdatahub_readings_total", "SolaxCloud readings by outcome."
+)
+KPI_INTERVALS = REGISTRY.counter(
+    "solarxdatahub_kpi_intervals_total",
+    "Reading intervals with derived KPIs, by kind (normal, counter_reset, gap).",
+)
+POLL_FRESHNESS_LAG = REGISTRY.gauge(
+    "solarxdatahub_poll_freshness_lag_seconds",
+    "Age of the latest SolaxCloud reading of each inverter when it was polled.",
+)
+POLL_UPLOAD_PERIOD = REGISTRY.gauge(
+    "solarxdatahub_poll_upload_period_seconds",
+    "Learned upload period of the dongle of each inverter.",
+)
+POLL_SKIPPED = REGISTRY.counter(
+    "solarxdatahub_poll_skipped_total",
+    "SolaxCloud polls skipped outside the daylight window.",
+)
+WORKER_MEMBERS = REGISTRY.gauge(
+    "solarxdatahub_worker_members", "Live workers in the hash ring of each worker."
+)
+WORKER_SHARD_SIZE = REGISTRY.gauge(
+    "solarxdatahub_worker_shard_size", "Inverters assigned to each worker."
+)
+WORKER_LEASE_CONFLICTS = REGISTRY.counter(
+    "solarxdatahub_worker_lease_conflicts_total",
+    "Assigned inverters skipped because another worker leased them for the slot.",
+)
+DB_ROWS = REGISTRY.counter(
+    "solarxdatahub_db_rows_written_total", "Rows sent to the database by table."
+)
+DB_BULK_ROWS_PER_SECOND = REGISTRY.gauge(
+    "solarxdatahub_db_bulk_rows_per_second",
+    "Throughput of the last bulk upsert of each table.",
+)
+DB_BULK_LOCK = REGISTRY.histogram(
+    "solarxdatahub_db_bulk_lock_seconds",
+    "Time the target table was written by each bulk upsert (merge and commit).",
+)
+DB_READS = REGISTRY.counter(
+    "solarxdatahub_db_reads_total", "Database reads by the host that served them."
+)
+DB_QUERY_CACHE = REGISTRY.counter(
+    "solarxdatahub_db_query_cache_total",
+    "Reads answered by the query result cache (hit) or the database (miss).",
+)
+DB_REPLICA_LAG = REGISTRY.gauge(
+    "solarxdatahub_db_replica_lag_seconds",
+    "Replication lag of the read replica at the last check.",
+)
+NOTIFICATIONS = REGISTRY.counter(
+    "solarxdatahub_notifications_total", "ntfy notifications sent by type."
+)
+
+_ENABLED = Metrics.METRICS_ENABLED.lower() == "true"
+# Callback notificado al entrar y salir de cada etapa (lo usa el profiler)
+_stage_listener = None
+
+
+def set_stage_listener(listener) -> None:
+    """Register a callback notified of every stage boundary.
+
+    Args:
+        listener: ``listener(entering: bool, stage: str, labels: dict)`` called
+            from the thread running the stage, or None to remove it.
+    """
+    global _stage_listener
+    _stage_listener = listener
+
+
+class _StageTimer:
+    """Context manager returned by ``timed`` (cheaper than a generator)."""
+
+    __slots__ = ("stage", "labels", "start", "listener")
+
+    def __init__(self, stage: str, labels: dict):
+        self.stage = stage
+        self.labels = labels
+        self.start = 0.0
+        self.listener = _stage_listener
+
+    def __enter__(self):
+        if self.listener is not None:
+            self.listener(True, self.stage, self.labels)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if _ENABLED:
+            STAGE_DURATION.observe(
+                time.perf_counter() - self.start, stage=self.stage, **self.labels
+            )
+        if self.listener is not None:
+            self.listener(False, self.stage, self.labels)
+        return False
+
+
+def timed(stage: str, **labels):
+    """Time a block of code as a pipeline stage.
+
+    Args:
+        stage (str): Name of the stage (http_fetch, parse, build_rows...).
+        **labels: Extra labels of the series (provider, table...).
+
+    Returns:
+        A context manager recording the duration of the block.
+    """
+    if not _ENABLED and _stage_listener is None:
+        return nullcontext()
+    return _StageTimer(stage, labels)
+
+
+def write_textfile(path: str | None = None) -> None:
+    """Write every metric to a file for the node_exporter textfile collector.
+
+    Args:
+        path (str | None, optional): Destination. Defaults to METRICS_TEXTFILE;
+            nothing is written when neither is set.
+    """
+    path = path or Metrics.METRICS_TEXTFILE
+    if not path or not _ENABLED:
+        return
+    target = Path(path)
+    try:
+        target.parent.mkdir(parents=True, exist_ok=True)
+        # El colector solo lee ficheros *.prom: se escribe a un temporal y se renombra
+        tmp = target.with_name(target.name + ".tmp")
+        tmp.write_text(REGISTRY.render(), encoding="utf-8")
+        os.replace(tmp, target)
+    except OSError as e:
+        logger.warning("Could not write the metrics textfile {}: {}", target, e)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    """Serves ``GET /metrics``."""
+
+    def do_GET(self):  # noqa: N802
+        """Answer with the metrics in the text exposition format."""
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = REGISTRY.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):  # noqa: A002
+        """Keep the scrapes out of the application log."""
+
+
+def start_metrics_server(
+    port: int | None = None, host: str | None = None
+) -> ThreadingHTTPServer | None:
+    """Serve ``/metrics`` from a background thread.
+
+    Args:
+        port (int | None, optional): Port. Defaults to METRICS_PORT; the server
+            is not started when neither is set.
+        host (str | None, optional): Address to bind. Defaults to METRICS_HOST.
+
+    Returns:
+        ThreadingHTTPServer | None: The running server.
+    """
+    port = port if port is not None else Metrics.METRICS_PORT
+    if port in (None, "") or not _ENABLED:
+        return None
+    server = ThreadingHTTPServer(
+        (host or Metrics.METRICS_HOST, int(port)), _MetricsHandler
+    )
+    server.daemon_threads = True
+    threading.Thread(
+        target=server.serve_forever, name="metrics-server", daemon=True
+    ).start()
+    logger.info("Serving metrics on http://{}:{}/metrics", *server.server_address[:2])
+    return server
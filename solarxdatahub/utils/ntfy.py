@@ -1,5 +1,19 @@
-"""Module to send notifications to the user by ntfy."""
+"""Module to send notifications to the user by ntfy.
 
+With NTFY_ASYNC (the default) the notifications are delivered by
+``NotificationDispatcher`` from background threads, so a slow or unreachable
+ntfy server doesn't delay nor abort the ingestion cycle. The decision to
+notify and the notification log stay in the caller's thread (the database
+connections are not shared with the workers): a notification is only
+written to tb_notification_log once delivered, by the caller's thread on its
+next check or at the end of the cycle (``NtfyNotification.flush``), so an
+alert that could not be delivered is sent again.
+"""
+
+import atexit
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 
 import pandas as pd
@@ -7,16 +21,214 @@ import requests
 from loguru import logger
 
 from solarxdatahub.config import Ntfy
+from solarxdatahub.core.rules import RulesEngine
 from solarxdatahub.database.crud import (
     get_last_notification_timestamp,
     insert_notification_log,
 )
+from solarxdatahub.models.records import ReadingRecord
+from solarxdatahub.utils.metrics import NOTIFICATIONS, timed
+
+
+@dataclass
+class PendingNotification:
+    """A notification waiting to be delivered."""
+
+    notification_type: str
+    title: str
+    message: str
+
+
+class NotificationDispatcher:
+    """Bounded queue of notifications delivered by worker threads.
+
+    Notifications are keyed (by inverter and notification type): a
+    notification submitted while another one with the same key is still
+    pending replaces it, so a rule that flips quickly only delivers its latest
+    state, while different rules fired by the same reading are all delivered.
+    Failed deliveries are retried with exponential backoff, abandoned if a
+    newer notification for the same key arrives meanwhile. The delivered
+    notifications are kept until ``take_delivered`` hands them to the caller.
+
+    Args:
+        send: ``send(title, message)``, raising on failure.
+        maxsize (int): Pending notifications kept; new keys beyond it are
+            dropped.
+        workers (int): Worker threads, started on the first submission.
+        max_retries (int): Retries after the first failed attempt.
+        backoff (float): Seconds before the first retry, doubled each time.
+    """
+
+    def __init__(
+        self,
+        send,
+        maxsize: int = 100,
+        workers: int = 1,
+        max_retries: int = 3,
+        backoff: float = 2.0,
+    ):
+        self._send = send
+        self._maxsize = maxsize
+        self._workers = workers
+        self._max_retries = max_retries
+        self._backoff = backoff
+        self._pending: OrderedDict = OrderedDict()
+        self._in_flight = 0
+        self._in_flight_keys: set = set()
+        self._delivered: list[tuple] = []
+        self._closed = False
+        self._threads: list[threading.Thread] = []
+        self._condition = threading.Condition()
+
+    def submit(self, key, notification: PendingNotification) -> bool:
+        """Queue a notification.
+
+        Args:
+            key: The notification key (inverter ID and notification type).
+            notification (PendingNotification): The notification.
+
+        Returns:
+            bool: False if the queue was full and the notification dropped.
+        """
+        with self._condition:
+            if key in self._pending:
+                replaced = self._pending[key]
+                NOTIFICATIONS.inc(type=replaced.notification_type, outcome="coalesced")
+            elif len(self._pending) >= self._maxsize:
+                NOTIFICATIONS.inc(
+                    type=notification.notification_type, outcome="dropped"
+                )
+                logger.warning(
+                    "Notification queue full, dropping {}", notification.title
+                )
+                return False
+            self._pending[key] = notification
+            self._start_workers()
+            self._condition.notify_all()
+        return True
+
+    def _start_workers(self) -> None:
+        while len(self._threads) < self._workers:
+            thread = threading.Thread(
+                target=self._run, name=f"ntfy-{len(self._threads)}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending or self._closed)
+                if not self._pending:
+                    return
+                key, notification = self._pending.popitem(last=False)
+                self._in_flight += 1
+                self._in_flight_keys.add(key)
+            try:
+                self._deliver(key, notification)
+            finally:
+                with self._condition:
+                    self._in_flight -= 1
+                    self._in_flight_keys.discard(key)
+                    self._condition.notify_all()
+
+    def _deliver(self, key, notification: PendingNotification) -> None:
+        for attempt in range(self._max_retries + 1):
+            try:
+                self._send(notification.title, notification.message)
+                NOTIFICATIONS.inc(type=notification.notification_type, outcome="sent")
+                with self._condition:
+                    self._delivered.append((key, notification, datetime.now()))
+                return
+            except Exception as e:  # pylint: disable=broad-except
+                if attempt == self._max_retries:
+                    logger.error(
+                        "Notification {} not delivered after {} attempts: {}",
+                        notification.title,
+                        attempt + 1,
+                        e,
+                    )
+                    NOTIFICATIONS.inc(
+                        type=notification.notification_type, outcome="failed"
+                    )
+                    return
+                delay = self._backoff * 2**attempt
+                logger.warning(
+                    "Notification {} failed ({}), retrying in {} s",
+                    notification.title,
+                    e,
+                    delay,
+                )
+                with self._condition:
+                    # Un estado más reciente de la misma regla sustituye al reintento
+                    if self._condition.wait_for(lambda: key in self._pending, delay):
+                        NOTIFICATIONS.inc(
+                            type=notification.notification_type, outcome="coalesced"
+                        )
+                        return
+
+    def in_progress(self, key) -> bool:
+        """Whether a notification of ``key`` is being sent or awaits logging."""
+        with self._condition:
+            return key in self._in_flight_keys or any(
+                delivered == key for delivered, _, _ in self._delivered
+            )
+
+    def take_delivered(self) -> list[tuple]:
+        """Hand over the notifications delivered since the last call.
+
+        Returns:
+            list[tuple]: ``(key, notification, sent_at)`` of every delivery.
+        """
+        with self._condition:
+            delivered, self._delivered = self._delivered, []
+        return delivered
+
+    def drain(self, timeout: float | None = None) -> bool:
+        """Wait until every queued notification has been handled.
+
+        Returns:
+            bool: False if the timeout expired first.
+        """
+        with self._condition:
+            return self._condition.wait_for(
+                lambda: not self._pending and not self._in_flight, timeout
+            )
+
+    def close(self, timeout: float | None = None) -> None:
+        """Deliver the pending notifications (up to ``timeout``) and stop."""
+        if not self.drain(timeout):
+            logger.warning("{} notifications not delivered on exit", len(self._pending))
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+
+_dispatcher: NotificationDispatcher | None = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_notification_dispatcher() -> NotificationDispatcher:
+    """Get the process wide dispatcher, delivering pending notifications on exit."""
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = NotificationDispatcher(
+                NtfyNotification().send_ntfy_notification,
+                maxsize=int(Ntfy.NTFY_QUEUE_SIZE),
+                workers=int(Ntfy.NTFY_WORKERS),
+                max_retries=int(Ntfy.NTFY_MAX_RETRIES),
+                backoff=float(Ntfy.NTFY_RETRY_BACKOFF_SECONDS),
+            )
+            atexit.register(_dispatcher.close, float(Ntfy.NTFY_DRAIN_SECONDS))
+        return _dispatcher
 
 
 class NtfyNotification:
     """Class to store the ntfy notification configuration."""
 
-    def __init__(self):
+    def __init__(self, rules: RulesEngine | None = None):
+        self.rules = rules
         self.topic = Ntfy.NTFY_TOPIC
         self.server = Ntfy.NTFY_SERVER
         self.user = Ntfy.NTFY_USER
@@ -32,20 +244,21 @@ class NtfyNotification:
         message: Mensaje de la notificación
         """
         try:
-            response = requests.post(
-                f"{self.server}/{self.topic}",
-                data=message.encode("utf-8"),
-                headers={"Title": title, "Priority": "urgent"},
-                auth=(self.user, self.passwd),
-                timeout=10,
-            )
+            with timed("notification", provider="ntfy"):
+                response = requests.post(
+                    f"{self.server}/{self.topic}",
+                    data=message.encode("utf-8"),
+                    headers={"Title": title, "Priority": "urgent"},
+                    auth=(self.user, self.passwd),
+                    timeout=10,
+                )
             response.raise_for_status()
             logger.info("Notificación enviada: {} - {}", title, message)
         except requests.RequestException as e:
-            logger.error("Error al enviar la notificación: %s", e)
+            logger.error("Error al enviar la notificación: {}", e)
             raise
         except Exception as e:
-            logger.error("Error desconocido al enviar la notificación: %s", e)
+            logger.error("Error desconocido al enviar la notificación: {}", e)
             raise
 
     def _should_notify(self, inverter_id: int, notif_type: str) -> bool:
@@ -69,19 +282,35 @@ class NtfyNotification:
         last_time = pd.to_datetime(df_last_same.iloc[0]["sent_at"])
         return datetime.now() - last_time >= timedelta(minutes=self.margin_time)
 
-    def _log_notification(self, inverter_id: int, notif_type: str):
+    def _log_notification(
+        self, inverter_id: int, notif_type: str, sent_at: datetime | None = None
+    ):
         """Insert or update notification log."""
         df = pd.DataFrame(
             [
                 {
                     "inverter_id": inverter_id,
                     "notification_type": notif_type,
-                    "sent_at": datetime.now(),
+                    "sent_at": sent_at or datetime.now(),
                 }
             ]
         )
         insert_notification_log(df)
 
+    def flush(self, timeout: float = 0) -> None:
+        """Log the notifications delivered in the background.
+
+        Args:
+            timeout (float, optional): Seconds to wait for the pending
+                notifications first. Defaults to 0 (don't wait).
+        """
+        if _dispatcher is None:
+            return
+        if timeout:
+            _dispatcher.drain(timeout)
+        for (inverter_id, notif_type), _, sent_at in _dispatcher.take_delivered():
+            self._log_notification(inverter_id, notif_type, sent_at)
+
     def check_energy(self, inverter_id: int, feedinpower: float) -> None:
         """Evaluates energy flow and sends a notification based on thresholds.
 
@@ -112,6 +341,44 @@ class NtfyNotification:
         else:
             return  # Ni excedente ni consumo suficientemente grande
 
-        if self._should_notify(inverter_id, notif_type):
+        self._notify(inverter_id, notif_type, title, message)
+
+    def check_reading(self, record: ReadingRecord) -> None:
+        """Evaluates the windowed rules with a new reading and notifies the
+        rules that became active.
+
+        The rules run in memory; the database is only read when a rule
+        changes state.
+
+        Args:
+            record (ReadingRecord): The reading.
+        """
+        if self.rules is None:
+            self.check_energy(record.inverter_id, record.feedinpower or 0)
+            return
+        with timed("rules", provider="ntfy"):
+            events = self.rules.observe(record)
+        for event in events:
+            logger.info(event.message)
+            self._notify(
+                event.inverter_id, event.notification_type, event.title, event.message
+            )
+
+    def _notify(self, inverter_id: int, notif_type: str, title: str, message: str):
+        """Send (or queue) a notification unless it was already sent."""
+        asynchronous = Ntfy.NTFY_ASYNC.lower() == "true"
+        if asynchronous:
+            self.flush()
+        if not self._should_notify(inverter_id, notif_type):
+            return
+        if not asynchronous:
             self.send_ntfy_notification(title, message)
+            NOTIFICATIONS.inc(type=notif_type, outcome="sent")
             self._log_notification(inverter_id, notif_type)
+            return
+        key = (inverter_id, notif_type)
+        dispatcher = get_notification_dispatcher()
+        # Se registra al entregarse; mientras tanto no se vuelve a enviar
+        if dispatcher.in_progress(key):
+            return
+        dispatcher.submit(key, PendingNotification(notif_type, title, message))
@@ -0,0 +1,247 @@
+"""Profiling of ingestion cycles with cProfile and a sampling profiler.
+
+For every profiled cycle the following files are written under
+``PROFILE_DIR/<session>/``:
+
+- ``cycle-NNNN.pstats``: cProfile statistics (``python -m pstats`` or snakeviz).
+- ``cycle-NNNN.txt``: the 40 most expensive functions by cumulative time.
+- ``cycle-NNNN.collapsed``: sampled stacks in the collapsed format of
+  flamegraph.pl / speedscope / inferno. Each stack starts with the cycle id and
+  the pipeline stages (``timed`` blocks) active when it was sampled.
+- ``cycle-NNNN.stages.json``: start and end offset of every stage.
+
+``profile.collapsed`` accumulates the stacks of every cycle of the session.
+"""
+
+import cProfile
+import io
+import json
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from pathlib import Path
+
+from loguru import logger
+
+from solarxdatahub.config import Profiling
+from solarxdatahub.utils.metrics import set_stage_listener
+
+PROFILE_MODES = ("cprofile", "sampling", "both")
+
+
+def _frame_label(frame) -> str:
+    """Name of a frame as ``module:qualified_name``."""
+    module = frame.f_globals.get("__name__", "?")
+    code = frame.f_code
+    return f"{module}:{getattr(code, 'co_qualname', code.co_name)}"
+
+
+class StackSampler:
+    """Samples the stack of one thread at a fixed interval.
+
+    The samples are prefixed with the stage stack reported through the
+    ``metrics`` stage listener, so the flamegraph is split by stage.
+    """
+
+    def __init__(self, thread_id: int, interval: float, prefix: str):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.prefix = prefix
+        self.samples: Counter = Counter()
+        self.stages: list[str] = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="stack-sampler", daemon=True
+        )
+
+    def start(self) -> None:
+        """Start sampling."""
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop sampling and wait for the sampler thread."""
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)  # noqa: SLF001
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            stack.reverse()
+            tags = [self.prefix] + [f"stage:{stage}" for stage in list(self.stages)]
+            self.samples[";".join(tags + stack)] += 1
+
+
+class CycleProfiler:
+    """Profiles the next N ingestion cycles of the process."""
+
+    def __init__(
+        self,
+        output_dir: str | None = None,
+        mode: str | None = None,
+        sample_interval_ms: float | None = None,
+    ):
+        self.output_dir = Path(output_dir or Profiling.PROFILE_DIR)
+        self.mode = (mode or Profiling.PROFILE_MODE).lower()
+        if self.mode not in PROFILE_MODES:
+            raise ValueError(
+                f"Invalid profile mode {self.mode}, must be one of {PROFILE_MODES}"
+            )
+        self.sample_interval = (
+            float(sample_interval_ms or Profiling.PROFILE_SAMPLE_INTERVAL_MS) / 1000.0
+        )
+        self.remaining = 0
+        self.cycle_id = 0
+        # Ciclos pedidos desde un manejador de señal, aplicados en cycle()
+        self._requested = 0
+        self._session_dir: Path | None = None
+        self._lock = threading.Lock()
+
+    def arm(self, cycles: int) -> None:
+        """Profile the next ``cycles`` cycles.
+
+        Args:
+            cycles (int): Number of cycles to profile.
+        """
+        with self._lock:
+            self.remaining = max(0, int(cycles))
+        if self.remaining:
+            logger.info("Profiling the next {} cycle(s).", self.remaining)
+
+    def request(self, cycles: int) -> None:
+        """Profile the next ``cycles`` cycles, from a signal handler.
+
+        Unlike ``arm`` it takes no lock and doesn't log: the handler runs in
+        the main thread between two bytecodes, possibly while ``cycle`` holds
+        the lock or a log handler is writing. The request is applied by the
+        next ``cycle``.
+
+        Args:
+            cycles (int): Number of cycles to profile.
+        """
+        self._requested = max(0, int(cycles))
+
+    def cycle(self):
+        """Context manager wrapping one ingestion cycle.
+
+        Returns:
+            A context manager that profiles the cycle if the profiler is armed.
+        """
+        requested, self._requested = self._requested, 0
+        if requested:
+            self.arm(requested)
+        with self._lock:
+            self.cycle_id += 1
+            if self.remaining <= 0:
+                return nullcontext()
+            self.remaining -= 1
+        return self._profile(self.cycle_id)
+
+    @property
+    def session_dir(self) -> Path:
+        """Directory of the files written by this process."""
+        if self._session_dir is None:
+            stamp = datetime.now().strftime("%Y%m%dT%H%M%S")
+            self._session_dir = self.output_dir / stamp
+            self._session_dir.mkdir(parents=True, exist_ok=True)
+        return self._session_dir
+
+    @contextmanager
+    def _profile(self, cycle_id: int):
+        name = f"cycle-{cycle_id:04d}"
+        thread_id = threading.get_ident()
+        timeline: list[dict] = []
+        open_stages: list[dict] = []
+        cycle_start = time.perf_counter()
+        sampler = (
+            StackSampler(thread_id, self.sample_interval, name)
+            if self.mode in ("sampling", "both")
+            else None
+        )
+
+        def on_stage(entering: bool, stage: str, labels: dict) -> None:
+            if threading.get_ident() != thread_id:
+                return
+            offset = round((time.perf_counter() - cycle_start) * 1000.0, 3)
+            if entering:
+                label = ",".join(f"{k}={v}" for k, v in sorted(labels.items()))
+                entry = {"stage": stage, "labels": label, "start_ms": offset}
+                open_stages.append(entry)
+                timeline.append(entry)
+                if sampler is not None:
+                    sampler.stages.append(f"{stage}[{label}]" if label else stage)
+            elif open_stages:
+                open_stages.pop()["end_ms"] = offset
+                if sampler is not None and sampler.stages:
+                    sampler.stages.pop()
+
+        profile = cProfile.Profile() if self.mode in ("cprofile", "both") else None
+        set_stage_listener(on_stage)
+        if sampler is not None:
+            sampler.start()
+        if profile is not None:
+            profile.enable()
+        try:
+            yield
+        finally:
+            if profile is not None:
+                profile.disable()
+            if sampler is not None:
+                sampler.stop()
+            set_stage_listener(None)
+            elapsed_ms = round((time.perf_counter() - cycle_start) * 1000.0, 3)
+            self._dump(name, profile, sampler, timeline, elapsed_ms)
+
+    def _dump(self, name, profile, sampler, timeline, elapsed_ms) -> None:
+        """Write the files of a profiled cycle."""
+        try:
+            directory = self.session_dir
+            if profile is not None:
+                profile.dump_stats(directory / f"{name}.pstats")
+                report = io.StringIO()
+                pstats.Stats(profile, stream=report).sort_stats(
+                    pstats.SortKey.CUMULATIVE
+                ).print_stats(40)
+                (directory / f"{name}.txt").write_text(
+                    report.getvalue(), encoding="utf-8"
+                )
+            if sampler is not None:
+                lines = [
+                    f"{stack} {count}\n" for stack, count in sampler.samples.items()
+                ]
+                (directory / f"{name}.collapsed").write_text(
+                    "".join(lines), encoding="utf-8"
+                )
+                with open(directory / "profile.collapsed", "a", encoding="utf-8") as f:
+                    f.writelines(lines)
+            (directory / f"{name}.stages.json").write_text(
+                json.dumps(
+                    {"cycle": name, "elapsed_ms": elapsed_ms, "stages": timeline},
+                    indent=2,
+                ),
+                encoding="utf-8",
+            )
+            logger.info("Profile of {} written to {}", name, directory)
+        except OSError as e:
+            logger.warning("Could not write the profile of {}: {}", name, e)
+
+
+_cycle_profiler: CycleProfiler | None = None
+
+
+def get_cycle_profiler() -> CycleProfiler:
+    """Return the process wide profiler, armed with PROFILE_CYCLES."""
+    global _cycle_profiler
+    if _cycle_profiler is None:
+        _cycle_profiler = CycleProfiler()
+        _cycle_profiler.arm(int(Profiling.PROFILE_CYCLES))
+    return _cycle_profiler
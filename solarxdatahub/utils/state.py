@@ -0,0 +1,48 @@
+"""Small JSON documents persisted between executions of the data hub."""
+
+import json
+import os
+from pathlib import Path
+
+from loguru import logger
+
+from solarxdatahub.config import State
+
+
+class StateStore:
+    """A named JSON document stored under ``State.STATE_DIR``.
+
+    Used for the bits of in-memory state (caches, counters) that must survive
+    between executions when the data hub runs as a one-shot job.
+    """
+
+    def __init__(self, name: str, state_dir: str | None = None):
+        self.path = Path(state_dir or State.STATE_DIR) / f"{name}.json"
+
+    def load(self) -> dict:
+        """Load the document.
+
+        Returns:
+            dict: The stored document, or an empty dict if missing or corrupt.
+        """
+        try:
+            return json.loads(self.path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable state file {}: {}", self.path, e)
+            return {}
+
+    def save(self, data: dict) -> None:
+        """Store the document atomically.
+
+        Args:
+            data (dict): A JSON serializable document.
+        """
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(data, default=str), encoding="utf-8")
+            os.replace(tmp, self.path)
+        except OSError as e:
+            logger.warning("Could not save the state file {}: {}", self.path, e)